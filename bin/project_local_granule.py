@@ -141,5 +141,5 @@ def project_granule(
 
     reprojector = SwathProjectorAdapter(message, config=config(False))
 
-    with patch('swotrepr.shutil.rmtree', side_effect=rmtree_side_effect):
+    with patch('swath_projector.adapter.shutil.rmtree', side_effect=rmtree_side_effect):
         reprojector.invoke()
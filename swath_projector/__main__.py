@@ -1,16 +1,21 @@
 """Run the Harmony Swath Projector adapter via the Harmony CLI."""
 
 from argparse import ArgumentParser
-from sys import argv
+from sys import argv, stdin
 
 from harmony import is_harmony_cli, run_cli, setup_cli
+from harmony.logging import build_logger
+from harmony.util import config
 
 from swath_projector.adapter import SwathProjectorAdapter
+from swath_projector.worker import run_directory_worker, run_stream_worker
 
 
 def main(arguments: list[str]):
     """Parse command line arguments and invoke the appropriate method to
-    respond to them.
+    respond to them. If `--worker` is specified, a long-lived worker
+    processes a stream of Harmony CLI invocations, read from standard input
+    or from the directory specified by `--worker-queue-directory`.
 
     """
     parser = ArgumentParser(
@@ -18,9 +23,27 @@ def main(arguments: list[str]):
         description='Run the Harmony Swath Projector Tool',
     )
     setup_cli(parser)
+    parser.add_argument(
+        '--worker',
+        action='store_true',
+        help='Process a stream of Harmony CLI invocations in a single process.',
+    )
+    parser.add_argument(
+        '--worker-queue-directory',
+        help='Directory of worker messages. If omitted, messages are read from stdin.',
+    )
     harmony_arguments, _ = parser.parse_known_args(arguments[1:])
 
-    if is_harmony_cli(harmony_arguments):
+    if harmony_arguments.worker:
+        logger = build_logger(config())
+
+        if harmony_arguments.worker_queue_directory:
+            run_directory_worker(
+                parser, harmony_arguments.worker_queue_directory, logger
+            )
+        else:
+            run_stream_worker(parser, stdin, logger)
+    elif is_harmony_cli(harmony_arguments):
         run_cli(parser, harmony_arguments, SwathProjectorAdapter)
     else:
         parser.error('Only --harmony CLIs are supported')
@@ -1,16 +1,56 @@
-"""Data Services Swath Projector service for Harmony."""
+"""Data Services Swath Projector service for Harmony.
 
+The `swath_projector.reproject` module, and the scientific packages it uses
+(e.g., `netCDF4`, `pyresample` and `varinfo`), are only imported when a
+granule is reprojected. This keeps the start-up time of the service low.
+
+"""
+
+import errno
+import logging
 import mimetypes
 import os
 import shutil
-from tempfile import mkdtemp
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from multiprocessing import get_context
+from queue import Queue
+from threading import Thread
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
 
 from harmony import BaseHarmonyAdapter
+from harmony.message import Message
 from harmony.message import Source as HarmonySource
 from harmony.util import HarmonyException, download, generate_output_filename, stage
-from pystac import Asset, Item
+from pystac import Asset, Catalog, Item, read_file
 
-from swath_projector.reproject import reproject
+from swath_projector.environment import get_integer_environment_variable
+from swath_projector.workspace import Workspace
+
+# The environment variable specifying the maximum number of STAC items that
+# are processed concurrently, each in a separate worker process.
+ITEM_CONCURRENCY_ENVIRONMENT_VARIABLE = 'SWATH_PROJECTOR_ITEM_CONCURRENCY'
+# The environment variable specifying the maximum number of items waiting
+# between the download, reprojection and staging stages when items are
+# processed serially. If unset, or zero, these stages are not pipelined.
+PIPELINE_DEPTH_ENVIRONMENT_VARIABLE = 'SWATH_PROJECTOR_PIPELINE_DEPTH'
+# The name of the optional `extraArgs` property of the Harmony message that
+# requests a single mosaic of all granules, using the specified compositing
+# rule.
+MOSAIC_EXTRA_ARGUMENT = 'mosaic'
+# The name of the optional `extraArgs` property of the Harmony message that
+# requests a single output stacking all granules along a `time` dimension.
+TIME_STACK_EXTRA_ARGUMENT = 'timeStack'
+# The prefix of URLs for input granules or staging locations that are on the
+# local filesystem.
+LOCAL_URL_PREFIX = 'file://'
+# Zarr directory stores are not recognised by `mimetypes` by default.
+mimetypes.add_type('application/x-zarr', '.zarr')
+# The state shared with worker processes when processing items concurrently.
+# Worker processes are forked, so inherit this state without it being pickled.
+worker_state = {}
 
 
 class SwathProjectorAdapter(BaseHarmonyAdapter):
@@ -32,6 +72,45 @@ class SwathProjectorAdapter(BaseHarmonyAdapter):
         logger.info('Starting Data Services Swath Projector Service')
         os.environ['HDF5_DISABLE_VERSION_CHECK'] = '1'
         self.validate_message()
+
+        compositing_rule = get_mosaic_compositing_rule(self.message)
+        time_stack = get_time_stack_requested(self.message)
+
+        if compositing_rule is not None and time_stack:
+            raise HarmonyException(
+                'A request cannot specify both a mosaic and a time stack'
+            )
+
+        if compositing_rule is not None or time_stack:
+            from swath_projector.reproject import get_output_format, get_tile_scheme
+
+            if get_output_format(self.message) is not None:
+                raise HarmonyException(
+                    'Mosaic and time stack outputs are only available as NetCDF-4'
+                )
+
+            if get_tile_scheme(self.message) is not None:
+                raise HarmonyException(
+                    'Mosaic and time stack outputs cannot use a tiling scheme'
+                )
+
+        if compositing_rule is not None:
+            return (
+                self.message,
+                self.process_aggregation(
+                    'mosaic',
+                    partial(
+                        create_mosaic_aggregator, compositing_rule=compositing_rule
+                    ),
+                ),
+            )
+
+        if time_stack:
+            return (
+                self.message,
+                self.process_aggregation('stacked', create_time_stack_aggregator),
+            )
+
         return super().invoke()
 
     def process_item(self, item: Item, source: HarmonySource):
@@ -54,72 +133,493 @@ class SwathProjectorAdapter(BaseHarmonyAdapter):
         pystac.Item
             a STAC catalog whose metadata and assets describe the service output
         """
-        logger = self.logger
-        result = item.clone()
-        result.assets = {}
+        logger = self.get_item_logger(item)
 
-        # Create a temporary dir for processing we may do
-        workdir = mkdtemp()
-        try:
-            # Get the data file
-            asset = next(v for v in item.assets.values() if 'data' in (v.roles or []))
-            granule_url = asset.href
+        # Create a workspace for processing we may do. All intermediate
+        # resources are cleaned up on exit.
+        with Workspace(logger) as workspace:
+            try:
+                granule_url, input_filename = self.download_granule(
+                    item, workspace, logger
+                )
 
+                working_filename = self.reproject_granule(
+                    source, granule_url, input_filename, workspace, logger
+                )
+
+                return self.stage_output(item, granule_url, working_filename, logger)
+
+            except Exception as err:
+                raise get_item_exception(err, logger) from err
+
+    def download_granule(
+        self, item: Item, workspace: Workspace, logger: logging.LoggerAdapter
+    ) -> Tuple[str]:
+        """Retrieve the data file for the STAC item. Return the URL of the
+        original granule and the path of the local copy of that granule.
+        Downloaded granules count towards the quota of the workspace.
+
+        """
+        # Get the data file
+        asset = next(v for v in item.assets.values() if 'data' in (v.roles or []))
+        granule_url = asset.href
+
+        if is_local_url(granule_url):
+            # Local granules are only read, so are used in place, not copied.
+            input_filename = get_local_path(granule_url)
+            logger.info(f'Using local granule in place: {input_filename}')
+        else:
             input_filename = download(
                 granule_url,
-                workdir,
+                workspace.directory,
                 logger=logger,
                 access_token=self.message.accessToken,
                 cfg=self.config,
             )
 
             logger.info('Granule data copied')
+            workspace.check_quota()
 
-            # Call Reprojection utility
-            working_filename = reproject(
-                self.message,
-                source.shortName,
+        return granule_url, input_filename
+
+    def reproject_granule(
+        self,
+        source: HarmonySource,
+        granule_url: str,
+        input_filename: str,
+        workspace: Workspace,
+        logger: logging.LoggerAdapter,
+        geolocation_cache: Optional[Dict] = None,
+        include_overviews: bool = True,
+        aggregator: Optional[object] = None,
+    ) -> str:
+        """Reproject the local copy of the granule, returning the path of the
+        reprojected output file. Intermediate files are written to the
+        workspace, and count towards its quota. If supplied, the geolocation
+        cache allows reprojection information to be reused from the previous
+        granule, where both share identical coordinates. Any requested
+        overviews are omitted if `include_overviews` is `False`. If an
+        aggregator is supplied, the granule is added to the aggregated
+        output, and the path of that output is returned.
+
+        """
+        from swath_projector.reproject import reproject
+
+        # Call Reprojection utility
+        working_filename = reproject(
+            self.message,
+            source.shortName,
+            granule_url,
+            input_filename,
+            workspace.get_intermediate_directory(input_filename),
+            logger,
+            geolocation_cache,
+            include_overviews,
+            aggregator,
+        )
+
+        workspace.check_quota()
+
+        return working_filename
+
+    def stage_output(
+        self,
+        item: Item,
+        granule_url: str,
+        working_filename: str,
+        logger: logging.LoggerAdapter,
+        output_filename: Optional[str] = None,
+    ) -> Item:
+        """Stage the reprojected output file, and return a STAC item whose
+        metadata and assets describe that output. Unless specified, the
+        output filename is derived from the granule URL. If a tiling scheme
+        was requested, the output is a directory of tile files, each of which
+        is staged as a separate asset.
+
+        """
+        from swath_projector.reproject import get_tile_scheme
+
+        if get_tile_scheme(self.message) is not None:
+            return self.stage_tiles(item, granule_url, working_filename, logger)
+
+        result = item.clone()
+        result.assets = {}
+
+        # Stage the output file with a conventional filename. Directory
+        # outputs, such as Zarr stores, retain their own extension.
+        if output_filename is None:
+            output_filename = generate_output_filename(
                 granule_url,
-                input_filename,
-                workdir,
-                logger,
+                ext=get_directory_extension(working_filename),
+                is_regridded=True,
             )
 
-            # Stage the output file with a conventional filename
-            output_filename = generate_output_filename(asset.href, is_regridded=True)
+        mimetype, _ = mimetypes.guess_type(output_filename, False) or (
+            'application/x-netcdf4',
+            None,
+        )
+
+        url = self.stage_file(working_filename, output_filename, mimetype, logger)
+
+        # Update the STAC record
+        asset = Asset(url, title=output_filename, media_type=mimetype, roles=['data'])
+        result.assets['data'] = asset
+
+        # Return the output file back to Harmony
+        logger.info('Reprojection complete')
+
+        return result
+
+    def stage_tiles(
+        self,
+        item: Item,
+        granule_url: str,
+        working_directory: str,
+        logger: logging.LoggerAdapter,
+    ) -> Item:
+        """Stage the output file of each tile within the working directory,
+        and return a STAC item with a data asset for each tile, keyed by the
+        name of that tile, e.g., "h18v07". The staged filename of each tile
+        is the conventional output filename with the tile name appended.
+
+        """
+        result = item.clone()
+        result.assets = {}
+        output_root, output_extension = os.path.splitext(
+            generate_output_filename(granule_url, is_regridded=True)
+        )
+
+        for tile_filename in sorted(os.listdir(working_directory)):
+            tile_name = os.path.splitext(tile_filename)[0].rsplit('_', 1)[-1]
+            output_filename = f'{output_root}_{tile_name}{output_extension}'
             mimetype, _ = mimetypes.guess_type(output_filename, False) or (
                 'application/x-netcdf4',
                 None,
             )
+            url = self.stage_file(
+                os.path.join(working_directory, tile_filename),
+                output_filename,
+                mimetype,
+                logger,
+            )
+            result.assets[tile_name] = Asset(
+                url, title=output_filename, media_type=mimetype, roles=['data']
+            )
+
+        logger.info(f'Reprojection complete, staged {len(result.assets)} tile(s)')
+
+        return result
+
+    def stage_file(
+        self,
+        working_filename: str,
+        output_filename: str,
+        mimetype: Optional[str],
+        logger: logging.LoggerAdapter,
+    ) -> str:
+        """Stage a single output, which may be a file or a directory, such as
+        a Zarr store, to the staging location of the message, and return the
+        URL of the staged output.
+
+        """
+        if is_local_url(self.message.stagingLocation):
+            return stage_local_file(
+                working_filename, output_filename, self.message.stagingLocation, logger
+            )
 
-            url = stage(
+        if os.path.isdir(working_filename):
+            return stage_directory(
                 working_filename,
                 output_filename,
-                mimetype,
-                location=self.message.stagingLocation,
-                logger=self.logger,
+                self.message.stagingLocation,
+                logger,
             )
 
-            # Update the STAC record
-            asset = Asset(
-                url, title=output_filename, media_type=mimetype, roles=['data']
+        return stage(
+            working_filename,
+            output_filename,
+            mimetype,
+            location=self.message.stagingLocation,
+            logger=logger,
+        )
+
+    def process_aggregation(
+        self,
+        aggregation_name: str,
+        create_aggregator: Callable[[str, List[Item], logging.LoggerAdapter], object],
+    ) -> Catalog:
+        """Reproject all items in the input catalog to the target grid defined
+        in the Harmony message, and combine the results into a single output,
+        e.g., a mosaic or a time stack. Items are ordered by their start
+        time, where available. The reprojected variables of each granule are
+        added to the aggregator as the granule is reprojected, so no output
+        is written for each granule. Each downloaded granule is removed once
+        reprojected.
+
+        Consecutive granules with identical coordinates reuse the
+        reprojection information of the previous granule, as all granules
+        share the same target grid. Any requested overviews are derived from
+        the aggregated output. The returned catalog contains a single item
+        describing the aggregated output.
+
+        """
+        items = sort_items_by_start_time(list(self.get_all_catalog_items(self.catalog)))
+        source = self._get_item_source(items[0])
+        aggregated_item = get_aggregated_item(items)
+        logger = self.get_item_logger(aggregated_item)
+        logger.info(f'Creating {aggregation_name} output of {len(items)} granule(s)')
+        geolocation_cache = {}
+
+        with Workspace(logger) as workspace:
+            try:
+                granule_urls = []
+
+                with create_aggregator(
+                    os.path.join(workspace.directory, aggregation_name), items, logger
+                ) as aggregator:
+                    for item in items:
+                        item_logger = self.get_item_logger(item)
+                        granule_url, input_filename = self.download_granule(
+                            item, workspace, item_logger
+                        )
+                        self.reproject_granule(
+                            source,
+                            granule_url,
+                            input_filename,
+                            workspace,
+                            item_logger,
+                            geolocation_cache,
+                            include_overviews=False,
+                            aggregator=aggregator,
+                        )
+                        granule_urls.append(granule_url)
+
+                        if not is_local_url(granule_url):
+                            os.remove(input_filename)
+
+                add_requested_overviews(self.message, aggregator.output_file, logger)
+                workspace.check_quota()
+
+                output_item = self.stage_output(
+                    aggregated_item,
+                    granule_urls[0],
+                    aggregator.output_file,
+                    logger,
+                    get_aggregated_output_filename(granule_urls[0], aggregation_name),
+                )
+            except Exception as err:
+                raise get_item_exception(err, logger) from err
+
+        result = self.catalog.clone()
+        result.id = str(uuid4())
+        result.clear_children()
+        result.clear_items()
+        result.add_item(output_item)
+
+        return result
+
+    def get_item_logger(self, item: Item) -> logging.LoggerAdapter:
+        """Return a logger for a single STAC item. This extends the context
+        of the adapter logger with the item ID, so that messages from items
+        processed concurrently can be distinguished.
+
+        """
+        return logging.LoggerAdapter(
+            getattr(self.logger, 'logger', self.logger),
+            {**getattr(self.logger, 'extra', {}), 'itemId': item.id},
+        )
+
+    def _process_catalog_recursive(self, catalog: Catalog) -> Catalog:
+        """Process all items in a catalog and its children, producing a new
+        output catalog of the results. This replaces the method of the
+        `BaseHarmonyAdapter` so that the items of each catalog can be
+        processed concurrently. The output items retain the order of the
+        input catalog.
+
+        """
+        result = catalog.clone()
+        result.id = str(uuid4())
+
+        # Recursively process all sub-catalogs
+        children = catalog.get_children()
+        result.clear_children()
+        result.add_children(
+            [self._process_catalog_recursive(child) for child in children]
+        )
+
+        # Process immediate child items
+        items = list(catalog.get_items())
+        result.clear_items()
+
+        if len(items) > 0:
+            output_items = self.process_items(
+                [item.clone() for item in items], self._get_item_source(items[0])
             )
-            result.assets['data'] = asset
 
-            # Return the output file back to Harmony
-            logger.info('Reprojection complete')
+            for item, output_item in zip(items, output_items):
+                if output_item:
+                    # Ensure the item gets a new ID
+                    if output_item.id == item.id:
+                        output_item.id = str(uuid4())
+                    result.add_item(output_item)
 
-            return result
+        self.logger.info(f'Processed {len(items)} granule(s)')
 
-        except Exception as err:
-            logger.error('Reprojection failed: ' + str(err), exc_info=1)
-            raise HarmonyException(
-                'Reprojection failed with error: ' + str(err)
-            ) from err
+        # Process 'next' link if present
+        link = catalog.get_single_link(rel='next')
+        if link:
+            next_catalog = read_file(link.get_href())
+            result.add_child(self._process_catalog_recursive(next_catalog))
+
+        return result
+
+    def process_items(
+        self, items: List[Item], source: HarmonySource
+    ) -> List[Optional[Item]]:
+        """Process a list of STAC items, returning the output items in the
+        same order as the inputs. If the configured item concurrency is
+        greater than one, items are processed in a bounded pool of forked
+        worker processes. Each item already uses its own working directory.
+
+        If any item fails, items that have not yet started are cancelled,
+        and the exception is raised once running items complete.
+
+        """
+        concurrency = min(get_item_concurrency(self.logger), len(items))
+
+        if concurrency <= 1:
+            pipeline_depth = get_pipeline_depth(self.logger)
+
+            if pipeline_depth > 0 and len(items) > 1:
+                return self.process_items_pipelined(items, source, pipeline_depth)
+
+            return [self.process_item(item, source) for item in items]
+
+        # Import the reprojection modules before forking, so that worker
+        # processes inherit them, rather than each importing them separately.
+        from swath_projector.reproject import PROCESSED_FORMAT_PROPERTIES
+
+        self.logger.info(f'Processing {len(items)} items with {concurrency} workers')
+
+        with ProcessPoolExecutor(
+            max_workers=concurrency,
+            mp_context=get_context('fork'),
+            initializer=set_worker_state,
+            initargs=(self, items, source),
+        ) as executor:
+            futures = [
+                executor.submit(process_item_in_worker, item_index)
+                for item_index in range(len(items))
+            ]
+
+            try:
+                output_items = [future.result() for future in futures]
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        # Worker processes mark the message properties they use in their own
+        # copies of the message, so mark them here, too.
+        self.message.format.process(*PROCESSED_FORMAT_PROPERTIES)
+
+        return [
+            Item.from_dict(output_item) if output_item is not None else None
+            for output_item in output_items
+        ]
+
+    def process_items_pipelined(
+        self, items: List[Item], source: HarmonySource, pipeline_depth: int
+    ) -> List[Optional[Item]]:
+        """Process a list of STAC items in three pipelined stages: granules
+        are downloaded in a background thread, reprojected in the current
+        thread and staged in a second background thread. This means the
+        next granule can be downloaded, and the previous output staged,
+        while the current granule is reprojected.
+
+        The stages are connected by queues holding at most `pipeline_depth`
+        items, which limits the number of granules and outputs on disk at
+        the same time. Each item's workspace is removed once its output is
+        staged, or if any stage fails. After a failure, remaining
+        items are skipped and the first exception is raised.
+
+        """
+        downloaded_queue = Queue(maxsize=pipeline_depth)
+        reprojected_queue = Queue(maxsize=pipeline_depth)
+        failures = []
+        output_items = [None] * len(items)
+
+        def record_failure(error: Exception, workspace: Workspace, logger):
+            failures.append(get_item_exception(error, logger))
+            workspace.cleanup()
+
+        def download_items():
+            for item_index, item in enumerate(items):
+                if failures:
+                    break
+
+                logger = self.get_item_logger(item)
+                workspace = Workspace(logger)
+
+                try:
+                    granule_url, input_filename = self.download_granule(
+                        item, workspace, logger
+                    )
+                    downloaded_queue.put(
+                        (item_index, granule_url, input_filename, workspace, logger)
+                    )
+                except Exception as err:
+                    record_failure(err, workspace, logger)
+
+            downloaded_queue.put(None)
 
+        def stage_items():
+            while (task := reprojected_queue.get()) is not None:
+                item_index, granule_url, working_filename, workspace, logger = task
+
+                try:
+                    if not failures:
+                        output_items[item_index] = self.stage_output(
+                            items[item_index], granule_url, working_filename, logger
+                        )
+                except Exception as err:
+                    record_failure(err, workspace, logger)
+                finally:
+                    workspace.cleanup()
+
+        download_thread = Thread(target=download_items, name='download')
+        stage_thread = Thread(target=stage_items, name='stage')
+        download_thread.start()
+        stage_thread.start()
+
+        try:
+            # The queue of downloaded granules is always drained, so that the
+            # download thread cannot be blocked, even after a failure.
+            while (task := downloaded_queue.get()) is not None:
+                item_index, granule_url, input_filename, workspace, logger = task
+
+                if failures:
+                    workspace.cleanup()
+                    continue
+
+                try:
+                    working_filename = self.reproject_granule(
+                        source, granule_url, input_filename, workspace, logger
+                    )
+                    reprojected_queue.put(
+                        (item_index, granule_url, working_filename, workspace, logger)
+                    )
+                except Exception as err:
+                    record_failure(err, workspace, logger)
         finally:
-            # Clean up any intermediate resources
-            shutil.rmtree(workdir, ignore_errors=True)
+            reprojected_queue.put(None)
+            download_thread.join()
+            stage_thread.join()
+
+        if failures:
+            raise failures[0]
+
+        return output_items
 
     def validate_message(self):
         """Check the service was triggered by a valid message containing
@@ -140,3 +640,336 @@ class SwathProjectorAdapter(BaseHarmonyAdapter):
 
         if not isinstance(self.message.granules, list):
             raise Exception('Invalid granule list')
+
+
+def get_item_concurrency(logger: logging.Logger) -> int:
+    """Retrieve the maximum number of items to process concurrently from
+    the environment. If this is not set, or is invalid, items are processed
+    serially.
+
+    """
+    return get_integer_environment_variable(
+        ITEM_CONCURRENCY_ENVIRONMENT_VARIABLE, 1, 1, logger
+    )
+
+
+def get_pipeline_depth(logger: logging.Logger) -> int:
+    """Retrieve the maximum number of items waiting between each stage of
+    pipelined item processing from the environment. If this is not set, or
+    is invalid, items are not pipelined.
+
+    """
+    return get_integer_environment_variable(
+        PIPELINE_DEPTH_ENVIRONMENT_VARIABLE, 0, 0, logger
+    )
+
+
+def get_mosaic_compositing_rule(message: Message) -> Optional[str]:
+    """Retrieve the compositing rule for a mosaic from the `extraArgs` of
+    the Harmony message. If no mosaic is requested, `None` is returned. A
+    mosaic requires a valid compositing rule, and a target grid that is
+    fully defined by the message, so that all granules share that grid.
+
+    """
+    from swath_projector.mosaic import COMPOSITING_RULES
+    from swath_projector.reproject import (
+        get_string_extra_argument,
+        message_defines_target_grid,
+    )
+
+    compositing_rule = get_string_extra_argument(message, MOSAIC_EXTRA_ARGUMENT)
+
+    if compositing_rule is None:
+        return None
+
+    compositing_rule = compositing_rule.lower()
+
+    if compositing_rule not in COMPOSITING_RULES:
+        raise HarmonyException(
+            f'Invalid mosaic compositing rule: "{compositing_rule}", must be '
+            f'one of: {", ".join(COMPOSITING_RULES)}'
+        )
+
+    if not message_defines_target_grid(message):
+        raise HarmonyException(
+            'A mosaic requires the target grid extents, and either dimensions '
+            'or resolutions, to be specified in the request'
+        )
+
+    return compositing_rule
+
+
+def get_time_stack_requested(message: Message) -> bool:
+    """Determine if the `extraArgs` of the Harmony message request a single
+    output stacking all granules along a `time` dimension. This requires a
+    target grid that is fully defined by the message, so that all granules
+    share that grid.
+
+    """
+    from swath_projector.reproject import (
+        get_boolean_extra_argument,
+        message_defines_target_grid,
+    )
+
+    if not get_boolean_extra_argument(message, TIME_STACK_EXTRA_ARGUMENT):
+        return False
+
+    if not message_defines_target_grid(message):
+        raise HarmonyException(
+            'A time stack requires the target grid extents, and either '
+            'dimensions or resolutions, to be specified in the request'
+        )
+
+    return True
+
+
+def create_mosaic_aggregator(
+    output_root: str,
+    items: List[Item],
+    logger: logging.LoggerAdapter,
+    compositing_rule: str,
+):
+    """Return an aggregator that composites the reprojected variables of all
+    items into a mosaic.
+
+    """
+    from swath_projector.mosaic import MosaicAggregator
+
+    return MosaicAggregator(output_root, compositing_rule, logger)
+
+
+def create_time_stack_aggregator(
+    output_root: str, items: List[Item], logger: logging.LoggerAdapter
+):
+    """Return an aggregator that stacks the reprojected variables of all
+    items along a `time` dimension, using the start time of each item where
+    the granules have no `time` variable.
+
+    """
+    from swath_projector.nc_merge import TimeStackAggregator
+
+    return TimeStackAggregator(
+        output_root,
+        [get_item_time(item, 'start_datetime') for item in items],
+        logger,
+    )
+
+
+def add_requested_overviews(
+    message: Message, output_file: str, logger: logging.LoggerAdapter
+) -> None:
+    """Add any overview levels requested in the Harmony message to an
+    aggregated output, e.g., a mosaic or time stack.
+
+    """
+    from swath_projector.overviews import create_overviews
+    from swath_projector.reproject import (
+        get_overview_factors,
+        get_overview_resampling,
+    )
+
+    overview_factors = get_overview_factors(message)
+
+    if overview_factors is not None:
+        create_overviews(
+            output_file, overview_factors, get_overview_resampling(message), logger
+        )
+
+
+def get_item_time(item: Item, property_name: str) -> Optional[datetime]:
+    """Return a time from a STAC item, such as the `start_datetime` or
+    `end_datetime` property. If the property is absent, the `datetime` of
+    the item is used instead, which may be `None`.
+
+    """
+    item_time = item.properties.get(property_name)
+
+    if item_time is not None:
+        return datetime.fromisoformat(item_time)
+
+    return item.datetime
+
+
+def sort_items_by_start_time(items: List[Item]) -> List[Item]:
+    """Return STAC items sorted by their start time. If any item has no
+    start time, the input order is retained.
+
+    """
+    start_times = [get_item_time(item, 'start_datetime') for item in items]
+
+    if any(start_time is None for start_time in start_times):
+        return items
+
+    return [item for _, item in sorted(zip(start_times, items), key=lambda x: x[0])]
+
+
+def get_aggregated_item(items: List[Item]) -> Item:
+    """Return a STAC item describing an aggregation of the input items. This is a
+    copy of the first item, with a new ID. The bounding box, geometry and
+    temporal range of the item are extended to cover all input items.
+
+    """
+    aggregated_item = items[0].clone()
+    aggregated_item.id = str(uuid4())
+
+    bounding_boxes = [item.bbox for item in items if item.bbox is not None]
+
+    if bounding_boxes:
+        west, south = (min(bbox[index] for bbox in bounding_boxes) for index in (0, 1))
+        east, north = (max(bbox[index] for bbox in bounding_boxes) for index in (2, 3))
+        aggregated_item.bbox = [west, south, east, north]
+        aggregated_item.geometry = {
+            'type': 'Polygon',
+            'coordinates': [
+                [
+                    [west, south],
+                    [east, south],
+                    [east, north],
+                    [west, north],
+                    [west, south],
+                ]
+            ],
+        }
+
+    start_times = [get_item_time(item, 'start_datetime') for item in items]
+    end_times = [get_item_time(item, 'end_datetime') for item in items]
+
+    if None not in start_times and None not in end_times:
+        aggregated_item.properties['start_datetime'] = min(start_times).isoformat()
+        aggregated_item.properties['end_datetime'] = max(end_times).isoformat()
+
+    return aggregated_item
+
+
+def get_aggregated_output_filename(granule_url: str, aggregation_name: str) -> str:
+    """Return the filename of an aggregated output, based on the
+    conventional output filename of the first granule in the aggregation.
+
+    """
+    output_root, output_extension = os.path.splitext(
+        generate_output_filename(granule_url, is_regridded=True)
+    )
+    return f'{output_root}_{aggregation_name}{output_extension}'
+
+
+def is_local_url(url: Optional[str]) -> bool:
+    """Determine if a URL refers to a file on the local filesystem."""
+    return url is not None and url.startswith(LOCAL_URL_PREFIX)
+
+
+def get_local_path(url: str) -> str:
+    """Return the local filesystem path from a file:// URL."""
+    return url[len(LOCAL_URL_PREFIX) :]
+
+
+def stage_local_file(
+    working_filename: str,
+    output_filename: str,
+    location: str,
+    logger: logging.LoggerAdapter,
+) -> str:
+    """Stage an output file to a local file:// staging location. The output
+    is renamed into the staging directory, avoiding a copy of the file when
+    the working and staging directories are on the same filesystem. The file
+    is only copied if the directories are on different filesystems. Outputs
+    that are directories, such as Zarr stores, are staged in the same way.
+    The file:// URL of the staged output is returned.
+
+    """
+    staging_directory = get_local_path(location)
+    staged_filename = os.path.join(staging_directory, output_filename)
+    os.makedirs(staging_directory, exist_ok=True)
+
+    try:
+        os.replace(working_filename, staged_filename)
+    except OSError as error:
+        if error.errno != errno.EXDEV:
+            raise
+
+        logger.info('Staging location is on a different filesystem, copying output')
+
+        if os.path.isdir(working_filename):
+            shutil.copytree(working_filename, staged_filename)
+        else:
+            shutil.copyfile(working_filename, staged_filename)
+
+    logger.info(f'Staged output to: {staged_filename}')
+    return f'{LOCAL_URL_PREFIX}{staged_filename}'
+
+
+def stage_directory(
+    working_directory: str,
+    output_name: str,
+    location: str,
+    logger: logging.LoggerAdapter,
+) -> str:
+    """Stage every file within an output directory, such as a Zarr store, to
+    the staging location, retaining the path of each file relative to the
+    output directory. The URL of the staged directory is returned.
+
+    """
+    staged_url = None
+
+    for directory, _, file_names in os.walk(working_directory):
+        for file_name in file_names:
+            file_path = os.path.join(directory, file_name)
+            relative_path = os.path.relpath(file_path, working_directory)
+            relative_url_path = relative_path.replace(os.sep, '/')
+            staged_url = stage(
+                file_path,
+                f'{output_name}/{relative_url_path}',
+                'application/octet-stream',
+                location=location,
+                logger=logger,
+            )
+
+    if staged_url is None:
+        raise HarmonyException(f'Output directory is empty: {working_directory}')
+
+    logger.info(f'Staged output directory: {output_name}')
+    return staged_url[: -len(relative_url_path) - 1]
+
+
+def get_directory_extension(working_filename: str) -> Optional[str]:
+    """Return the extension of an output that is a directory, such as a Zarr
+    store, or `None` for an output file. This allows the staged output
+    filename to retain the extension of the original granule, unless the
+    output is a directory.
+
+    """
+    if os.path.isdir(working_filename):
+        return os.path.splitext(working_filename)[1]
+
+    return None
+
+
+def get_item_exception(error: Exception, logger: logging.LoggerAdapter):
+    """Log a failure to process an item, and return the exception to be
+    raised to Harmony.
+
+    """
+    logger.error('Reprojection failed: ' + str(error), exc_info=error)
+    return HarmonyException('Reprojection failed with error: ' + str(error))
+
+
+def set_worker_state(
+    adapter: SwathProjectorAdapter, items: List[Item], source: HarmonySource
+) -> None:
+    """Initialise a worker process with the adapter and items to process."""
+    worker_state.update({'adapter': adapter, 'items': items, 'source': source})
+
+
+def process_item_in_worker(item_index: int) -> Optional[Dict]:
+    """Process a single item in a worker process. The output item is
+    returned as a dictionary, as it can be pickled independently of the
+    catalog that contains the input item.
+
+    """
+    output_item = worker_state['adapter'].process_item(
+        worker_state['items'][item_index], worker_state['source']
+    )
+
+    if output_item is None:
+        return None
+
+    return output_item.to_dict()
@@ -0,0 +1,140 @@
+"""This module contains functions to write the chunks of a 2-D (or higher
+dimensional) array to an HDF5 dataset, compressing the chunks concurrently.
+
+Writing through `netCDF4` or `h5py` compresses each chunk in the HDF5 filter
+pipeline, on a single thread. Instead, each chunk is filtered and compressed
+in a thread pool, using the same filter pipeline as the dataset (an optional
+byte shuffle followed by deflate). The compressed bytes are then stored
+using HDF5 direct chunk writes, from the calling thread. The output is
+identical to that written by the HDF5 library, so remains readable by all
+standard tools.
+
+Only chunks containing populated pixels are written, so that entirely
+masked chunks remain unallocated, as with `write_populated_chunks`.
+
+"""
+
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import h5py
+import numpy as np
+from h5py import h5z
+
+from swath_projector.utilities import get_populated_chunks
+
+
+def get_deflate_filters(dataset: h5py.Dataset) -> Optional[Tuple[bool, int]]:
+    """Return whether the filter pipeline of a chunked dataset starts with a
+    byte shuffle, and the deflate compression level. If the pipeline
+    contains any other filters, or the dataset is not chunked, `None` is
+    returned, as the chunks cannot be filtered outside the HDF5 library.
+
+    """
+    if dataset.chunks is None:
+        return None
+
+    property_list = dataset.id.get_create_plist()
+    filters = [
+        property_list.get_filter(filter_index)
+        for filter_index in range(property_list.get_nfilters())
+    ]
+    filter_codes = [filter_information[0] for filter_information in filters]
+
+    if filter_codes == [h5z.FILTER_DEFLATE]:
+        return False, filters[0][2][0]
+
+    if filter_codes == [h5z.FILTER_SHUFFLE, h5z.FILTER_DEFLATE]:
+        return True, filters[1][2][0]
+
+    return None
+
+
+def compress_chunk(chunk_values: np.ndarray, shuffle: bool, level: int) -> bytes:
+    """Apply the HDF5 shuffle filter, if required, and deflate compression to
+    the values of a single, complete chunk. The shuffle filter groups the
+    first byte of every element, followed by the second byte, and so on.
+
+    """
+    chunk_values = np.ascontiguousarray(chunk_values)
+
+    if shuffle and chunk_values.itemsize > 1:
+        chunk_bytes = (
+            chunk_values.reshape(-1).view(np.uint8).reshape(-1, chunk_values.itemsize)
+        ).T.tobytes()
+    else:
+        chunk_bytes = chunk_values.tobytes()
+
+    return zlib.compress(chunk_bytes, level)
+
+
+def write_compressed_chunks(
+    dataset: h5py.Dataset,
+    values: np.ndarray,
+    leading_indices: Tuple[int],
+    executor: ThreadPoolExecutor,
+    maximum_pending_chunks: int,
+) -> None:
+    """Write 2-D values to an HDF5 dataset, compressing populated chunks in
+    the thread pool. The `leading_indices` are used for datasets with
+    additional dimensions preceding the two horizontal spatial dimensions,
+    e.g. (time, y, x), which must have a chunk length of one. Masked values
+    are written as the fill value of the dataset, and the values are cast
+    to the data type of the dataset.
+
+    If the dataset has an unsupported filter pipeline, or chunk shape, all
+    values are written via the HDF5 library instead. At most
+    `maximum_pending_chunks` chunks are held in memory awaiting compression.
+
+    """
+    deflate_filters = get_deflate_filters(dataset)
+    filled_values = np.ma.filled(values, dataset.fillvalue).astype(dataset.dtype)
+
+    if deflate_filters is None or any(
+        chunk_size != 1 for chunk_size in dataset.chunks[:-2]
+    ):
+        dataset[leading_indices + (slice(None), slice(None))] = filled_values
+        return
+
+    shuffle, level = deflate_filters
+    chunk_rows, chunk_columns = dataset.chunks[-2:]
+    populated_chunks = get_populated_chunks(
+        np.logical_not(np.ma.getmaskarray(values)), chunk_rows, chunk_columns
+    )
+    pending_chunks = []
+
+    for chunk_row, chunk_column in zip(*np.nonzero(populated_chunks)):
+        chunk_offset = (chunk_row * chunk_rows, chunk_column * chunk_columns)
+        chunk_values = filled_values[
+            chunk_offset[0] : chunk_offset[0] + chunk_rows,
+            chunk_offset[1] : chunk_offset[1] + chunk_columns,
+        ]
+
+        if chunk_values.shape != (chunk_rows, chunk_columns):
+            # Edge chunks are stored at full size, padded with fill values.
+            padded_values = np.full(
+                (chunk_rows, chunk_columns), dataset.fillvalue, dtype=dataset.dtype
+            )
+            padded_values[: chunk_values.shape[0], : chunk_values.shape[1]] = (
+                chunk_values
+            )
+            chunk_values = padded_values
+
+        pending_chunks.append(
+            (
+                leading_indices + tuple(int(offset) for offset in chunk_offset),
+                executor.submit(compress_chunk, chunk_values, shuffle, level),
+            )
+        )
+
+        if len(pending_chunks) > maximum_pending_chunks:
+            write_pending_chunk(dataset, *pending_chunks.pop(0))
+
+    for pending_chunk in pending_chunks:
+        write_pending_chunk(dataset, *pending_chunk)
+
+
+def write_pending_chunk(dataset: h5py.Dataset, chunk_offset: Tuple[int], future):
+    """Wait for a chunk to be compressed, then store it in the dataset."""
+    dataset.id.write_direct_chunk(chunk_offset, future.result())
@@ -0,0 +1,31 @@
+"""This module contains functions to retrieve service configuration from
+environment variables. It has no dependencies beyond the standard library,
+so that it can be imported by the adapter without adding to the start-up
+time of the service.
+
+"""
+
+import os
+from logging import Logger
+
+
+def get_integer_environment_variable(
+    variable_name: str, default_value: int, minimum_value: int, logger: Logger
+) -> int:
+    """Retrieve an integer configuration value from an environment variable.
+    If the variable is not set, or is not an integer, the default value is
+    returned. Values less than the minimum are replaced by that minimum.
+
+    """
+    raw_value = os.environ.get(variable_name)
+
+    if raw_value is None:
+        return default_value
+
+    try:
+        return max(int(raw_value), minimum_value)
+    except ValueError:
+        logger.warning(
+            f'Invalid {variable_name}: "{raw_value}", using default: {default_value}'
+        )
+        return default_value
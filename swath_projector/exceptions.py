@@ -43,3 +43,16 @@ class MissingCoordinatesError(CustomError):
             'MissingCoordinatesError',
             f'Could not find coordinate {missing_coordinate}.',
         )
+
+
+class WorkspaceQuotaExceededError(CustomError):
+    """This exception is raised when the files within a `Workspace` exceed
+    the configured disk quota for processing a single item.
+
+    """
+
+    def __init__(self, workspace_size, quota):
+        super().__init__(
+            'WorkspaceQuotaExceededError',
+            f'Workspace size {workspace_size} bytes exceeds quota of {quota} bytes.',
+        )
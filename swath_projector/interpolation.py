@@ -1,49 +1,140 @@
 """This module contains functions to perform interpolation on the science
 datasets within a file, using the pyresample Python package.
 
+The `pyresample.bilinear` and `pyresample.ewa` modules are only imported by
+the functions for those interpolation methods, so that a request only pays
+the import cost of the method it uses. Notably, `pyresample.bilinear` will
+also import `xarray` and `dask`, where available.
+
 """
 
 import os
-from functools import partial
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache, partial
 from logging import Logger
+from multiprocessing import get_context
 from typing import Dict, List, Optional, Tuple
 
 import numpy as np
-from netCDF4 import Dataset
-from pyresample.bilinear import get_bil_info, get_sample_from_bil_info
-from pyresample.ewa import fornav, ll2cr
+from netCDF4 import Dataset, Variable
+from pykdtree.kdtree import KDTree
+
+# `Cartesian`, `_create_empty_info` and `_query_resample_kdtree` are private
+# to `pyresample`. They are used so that the KD-tree of the swath is built
+# once, by `get_swath_kd_tree`, and queried for every target area, where the
+# public `get_neighbour_info` would rebuild it on each call. For this reason,
+# pip_requirements.txt restricts `pyresample` to a single minor release.
+from pyresample._spatial_mp import Cartesian
 from pyresample.geometry import AreaDefinition, SwathDefinition
-from pyresample.kd_tree import get_neighbour_info, get_sample_from_neighbour_info
+from pyresample.kd_tree import (
+    _create_empty_info,
+    _query_resample_kdtree,
+    get_sample_from_neighbour_info,
+)
 from pyresample.utils import check_and_wrap
 from varinfo import VarInfoFromNetCDF4
 
-from swath_projector.nc_single_band import HARMONY_TARGET, write_single_band_output
+from swath_projector.environment import get_integer_environment_variable
+from swath_projector.memory_map import (
+    get_coordinate_arrays,
+    get_memory_mapped_array,
+    get_memory_maps,
+    should_memory_map,
+)
+from swath_projector.nc_single_band import (
+    DIMENSION_SUFFIX,
+    HARMONY_TARGET,
+    write_single_band_output,
+)
+from swath_projector.shared_arrays import (
+    SharedArrayRegistry,
+    attach_shared_array,
+    attached_information,
+    close_shared_block,
+    release_information,
+    share_information,
+)
+from swath_projector.streamed_ewa import get_streamed_ewa_results
 from swath_projector.swath_geometry import (
-    get_extents_from_perimeter,
-    get_projected_resolution,
+    get_extents_from_projected_perimeter,
+    get_projected_perimeter,
+    get_resolution_from_perimeter,
+)
+from swath_projector.swath_resource_cache import (
+    REPROJECTION_INFORMATION,
+    cache_swath_resources,
+    get_cached_swath_resources,
+    swath_resource_cache_enabled,
 )
 from swath_projector.utilities import (
     create_coordinates_key,
     get_coordinate_variable,
+    get_coordinates_fingerprint,
     get_scale_and_offset,
     get_variable_file_path,
     get_variable_numeric_fill_value,
     get_variable_values,
-    make_array_two_dimensional,
+    values_are_entirely_fill,
 )
 
 # In nearest neighbour interpolation, the distance to a found value is
 # guaranteed to be no further than (1 + EPSILON) times the distance to the
 # correct neighbour.
 EPSILON = 0.5
-# The number of closest locations considered when selecting the four data
-# points around the target location. A smaller number reduces runtime, but this
-# value needs to be large enough to ensure the target is surrounded.
-NEIGHBOURS = 16
+# The numbers of closest locations considered when selecting the four data
+# points around the target location. All target locations are first queried
+# with the smallest number, which is usually enough to surround targets within
+# a regular swath. Only targets without a data point in each quadrant around
+# them are queried again with the next number, which is needed for targets
+# near the sparse edges of a swath. The largest number matches the fixed
+# number of neighbours used previously, so results are unchanged.
+BILINEAR_NEIGHBOURS = (4, 8, 16)
 # The radius, in metres, around each grid pixel to search for swath neighbours.
 # This is used in both the bilinear and nearest-neighbour interpolation
 # methods, and is set to the default value from `pyresample`.
 RADIUS_OF_INFLUENCE = 50000
+# The maximum distance, in grid pixels, over which `fornav` distributes a
+# single swath pixel in each grid dimension. This is the `pyresample` default
+# for `weight_delta_max`, and is used as padding when trimming the margins of
+# a derived target area for EWA interpolation.
+EWA_TRIM_PADDING = 10
+# The stride, in swath rows and columns, of the coordinate subsample used to
+# estimate the extents and resolution of a derived target area, when a fast
+# estimate is requested. Only one in every 100 interior pixels is processed.
+ESTIMATION_STRIDE = 10
+# The key in the swath cache for the mapping between coordinate variable names
+# and the content-based fingerprints of those coordinates. This is not a tuple,
+# so cannot clash with the coordinates keys of other swath cache entries.
+COORDINATE_FINGERPRINTS = 'coordinate_fingerprints'
+# The keys in the geolocation cache for the reprojection information derived
+# for the previous and current granules, each keyed by coordinate fingerprint.
+PREVIOUS_GRANULE = 'previous'
+CURRENT_GRANULE = 'current'
+# The environment variable specifying the number of swath rows in each block
+# when EWA interpolation is performed in blocks of rows, to bound memory usage
+# for very large swaths. If unset, or zero, the full swath is resampled at
+# once.
+EWA_BLOCK_ROWS_ENVIRONMENT_VARIABLE = 'SWATH_PROJECTOR_EWA_BLOCK_ROWS'
+# The environment variable specifying the number of rows in each scan of the
+# instrument, used when EWA interpolation is performed in blocks of rows. If
+# unset, or less than two, each block is resampled as a single scan.
+EWA_ROWS_PER_SCAN_ENVIRONMENT_VARIABLE = 'SWATH_PROJECTOR_EWA_ROWS_PER_SCAN'
+EWA_INTERPOLATIONS = ('ewa', 'ewa-nn')
+# The environment variable specifying the minimum uncompressed size, in bytes,
+# of coordinate and science variables that are copied to memory-mapped arrays
+# in the workspace, rather than read into memory. If unset, or zero, all
+# variables are read into memory.
+MEMORY_MAP_THRESHOLD_ENVIRONMENT_VARIABLE = 'SWATH_PROJECTOR_MEMORY_MAP_THRESHOLD'
+# The key in the swath cache for the configuration of memory-mapped arrays,
+# which also retains memory-mapped coordinates. This is not a tuple, so cannot
+# clash with the coordinates keys of other swath cache entries.
+MEMORY_MAPS = 'memory_maps'
+# The environment variable specifying the number of worker processes used to
+# resample the science variables of a granule in parallel. Reprojection
+# information is derived by the parent process, and handed to the workers in
+# shared memory. If unset, or less than two, variables are resampled by the
+# parent process alone.
+VARIABLE_WORKERS_ENVIRONMENT_VARIABLE = 'SWATH_PROJECTOR_VARIABLE_WORKERS'
 
 
 def resample_all_variables(
@@ -52,20 +143,99 @@ def resample_all_variables(
     temp_directory: str,
     logger: Logger,
     var_info: VarInfoFromNetCDF4,
+    geolocation_cache: Optional[Dict] = None,
+    additional_target_parameters: Optional[List[Dict]] = None,
 ) -> List[str]:
     """Iterate through all science variables and reproject to the target
     coordinate grid.
 
+    The optional geolocation cache is shared between a sequence of granules.
+    When the target area is fully defined by the Harmony message, this
+    allows a granule to reuse the reprojection information of the previous
+    granule for coordinates with identical contents. Only the information
+    from the previous granule is retained, to bound memory usage.
+
+    If parameters for additional target grids are supplied, each variable
+    is also reprojected to those grids. The single band outputs for each
+    additional target are written to a subdirectory named after that
+    target. The swath resources are shared between all targets.
+
+    If configured, EWA interpolation of swaths with more rows than the
+    configured block size is performed in blocks of rows, see
+    `get_streamed_ewa_results` for more information.
+
+    If configured, coordinate and science variables larger than a threshold
+    are copied to memory-mapped arrays in the temporary directory, see the
+    `swath_projector.memory_map` module for more information.
+
+    If configured, variables are resampled by a pool of worker processes,
+    see `resample_variables_in_pool`. This is not used with additional
+    target grids, or when EWA interpolation is performed in blocks of rows.
+
     Returns:
         output_variables: A list of names of successfully reprojected
             variables.
     """
     output_extension = os.path.splitext(message_parameters['input_file'])[-1]
     reprojection_cache = get_reprojection_cache(message_parameters)
+    swath_cache = {
+        MEMORY_MAPS: get_memory_maps(
+            temp_directory,
+            get_integer_environment_variable(
+                MEMORY_MAP_THRESHOLD_ENVIRONMENT_VARIABLE, 0, 0, logger
+            ),
+        )
+    }
     output_variables = []
+    ewa_block_rows = get_integer_environment_variable(
+        EWA_BLOCK_ROWS_ENVIRONMENT_VARIABLE, 0, 0, logger
+    )
+    ewa_rows_per_scan = get_integer_environment_variable(
+        EWA_ROWS_PER_SCAN_ENVIRONMENT_VARIABLE, 0, 0, logger
+    )
+    variable_workers = get_integer_environment_variable(
+        VARIABLE_WORKERS_ENVIRONMENT_VARIABLE, 0, 0, logger
+    )
 
     check_for_valid_interpolation(message_parameters, logger)
 
+    additional_targets = []
+
+    for target_parameters in additional_target_parameters or []:
+        check_for_valid_interpolation(target_parameters, logger)
+        target_directory = os.path.join(
+            temp_directory, target_parameters['target_name']
+        )
+        os.makedirs(target_directory, exist_ok=True)
+        additional_targets.append(
+            {
+                'parameters': target_parameters,
+                'reprojection_cache': get_reprojection_cache(target_parameters),
+                'directory': target_directory,
+            }
+        )
+
+    if geolocation_cache is not None and HARMONY_TARGET in reprojection_cache:
+        geolocation_cache[PREVIOUS_GRANULE] = geolocation_cache.get(CURRENT_GRANULE, {})
+        geolocation_cache[CURRENT_GRANULE] = {}
+    else:
+        # Reprojection information for derived target areas depends on the
+        # extents of each granule, so cannot be shared.
+        geolocation_cache = None
+
+    if variable_workers > 1 and not additional_targets and ewa_block_rows == 0:
+        return resample_variables_in_pool(
+            message_parameters,
+            science_variables,
+            temp_directory,
+            logger,
+            var_info,
+            reprojection_cache,
+            swath_cache,
+            geolocation_cache,
+            variable_workers,
+        )
+
     for variable in science_variables:
         try:
             variable_output_path = get_variable_file_path(
@@ -82,6 +252,20 @@ def resample_all_variables(
                 variable_output_path,
                 logger,
                 var_info,
+                swath_cache,
+                geolocation_cache,
+                [
+                    {
+                        'parameters': target['parameters'],
+                        'reprojection_cache': target['reprojection_cache'],
+                        'output_path': get_variable_file_path(
+                            target['directory'], variable, output_extension
+                        ),
+                    }
+                    for target in additional_targets
+                ],
+                ewa_block_rows,
+                ewa_rows_per_scan,
             )
 
             output_variables.append(variable)
@@ -101,6 +285,11 @@ def resample_variable(
     variable_output_path: str,
     logger: Logger,
     var_info: VarInfoFromNetCDF4,
+    swath_cache: Dict,
+    geolocation_cache: Optional[Dict] = None,
+    additional_targets: Optional[List[Dict]] = None,
+    ewa_block_rows: int = 0,
+    ewa_rows_per_scan: int = 0,
 ) -> None:
     """A function to perform the reprojection of a single variable. The
     reprojection information for each will be derived using interpolation
@@ -111,21 +300,502 @@ def resample_variable(
     recalled, rather than re-derived for subsequent science variables that
     share the same coordinate variables.
 
+    If requested, coordinates with identical contents, but different
+    variable names, will be mapped to the same cache entries, so that the
+    reprojection information is only derived once.
+
+    Resources describing the input swath itself (the swath definition and,
+    if required, a KD-tree of the swath pixels) are stored in a separate
+    cache. These do not depend on the target area, so can be shared
+    between interpolation methods and target grids for the same granule.
+
+    If a geolocation cache is supplied, reprojection information is also
+    retrieved from the previous granule, when that granule had coordinates
+    with identical contents.
+
+    Each additional target contains the message parameters, reprojection
+    cache and single band output path for another target grid. The values
+    of the variable are only read once for all targets.
+
+    If `ewa_block_rows` is greater than zero, all targets use EWA
+    interpolation, and the swath has more rows than a single block, the
+    variable is instead resampled in blocks of rows, without reading the
+    full variable or coordinates. The target area is cached, but the EWA
+    information for each block is not retained. If `ewa_rows_per_scan` is
+    at least two, blocks are aligned to, and resampled in, scans of that
+    many rows.
+
     """
-    interpolation_functions = get_resampling_functions()[
-        message_parameters['interpolation']
-    ]
     dataset = Dataset(message_parameters['input_file'])
     variable = dataset[full_variable]
-    # get variable with CF_Overrides and get real coordinates
-    variable_cf = var_info.get_variable(full_variable)
-    coordinates_key = create_coordinates_key(variable_cf)
+    coordinates_key = get_variable_coordinates_key(
+        message_parameters, full_variable, var_info, swath_cache, dataset, logger
+    )
+
+    targets = [
+        {
+            'parameters': message_parameters,
+            'reprojection_cache': reprojection_cache,
+            'output_path': variable_output_path,
+            'geolocation_cache': geolocation_cache,
+        }
+    ] + (additional_targets or [])
+
+    fill_value = get_variable_numeric_fill_value(variable)
+    stream_values = use_streamed_ewa(targets, dataset, coordinates_key, ewa_block_rows)
+
+    if stream_values:
+        logger.info(f'Resampling {full_variable} in blocks of {ewa_block_rows} rows.')
+        entirely_fill = False
+    else:
+        memory_maps = swath_cache.get(MEMORY_MAPS)
+
+        if should_memory_map(variable, memory_maps):
+            logger.info(f'Memory-mapping {full_variable} in the workspace.')
+
+        variable_information = get_variable_information(dataset, variable, memory_maps)
+        entirely_fill = values_are_entirely_fill(
+            variable_information['values'], fill_value
+        )
+
+    attributes = get_output_attributes(variable)
+
+    for target in targets:
+        interpolation_functions = get_interpolation_functions(
+            target['parameters']['interpolation'], dataset, coordinates_key
+        )
+
+        if stream_values:
+            target_area = get_streamed_target_area(
+                target['parameters'],
+                target['reprojection_cache'],
+                logger,
+                dataset,
+                coordinates_key,
+                swath_cache.get(MEMORY_MAPS),
+            )
+        else:
+            target_area = None
+
+            if entirely_fill:
+                # The output will only contain fill values, so only the target
+                # area is needed, rather than the reprojection information.
+                target_area = get_fill_value_target_area(
+                    target['parameters'],
+                    target['reprojection_cache'],
+                    logger,
+                    dataset,
+                    coordinates_key,
+                    swath_cache.get(MEMORY_MAPS),
+                )
+
+            if target_area is None:
+                reprojection_information = get_reprojection_information(
+                    target['parameters'],
+                    full_variable,
+                    target['reprojection_cache'],
+                    logger,
+                    swath_cache,
+                    target.get('geolocation_cache'),
+                    dataset,
+                    coordinates_key,
+                )
+                target_area = reprojection_information['target_area']
+
+        if entirely_fill:
+            # Skip resampling, as the output will only contain fill values. The
+            # masked output ensures no data chunks are written.
+            logger.info(f'{full_variable} only contains fill values.')
+            results = np.ma.masked_all(target_area.shape, dtype=variable.dtype)
+        else:
+            if stream_values:
+                results = get_streamed_ewa_results(
+                    dataset,
+                    variable,
+                    coordinates_key,
+                    target_area,
+                    fill_value,
+                    ewa_block_rows,
+                    target['parameters']['interpolation'] == 'ewa-nn',
+                    ewa_rows_per_scan,
+                )
+            else:
+                # Interpolation methods may replace the values in the
+                # dictionary, e.g., casting integers to floats, so each target
+                # uses a copy.
+                results = interpolation_functions['get_results'](
+                    dict(variable_information), reprojection_information
+                )
+
+            results = get_masked_results(results, fill_value, variable.dtype)
+
+        write_single_band_output(
+            target_area,
+            results,
+            full_variable,
+            target['output_path'],
+            target['reprojection_cache'],
+            dict(attributes),
+        )
+
+        logger.debug(
+            f'Saved {full_variable} output to temporary file: '
+            f'{target["output_path"]}'
+        )
+
+    dataset.close()
+
+
+def resample_variables_in_pool(
+    message_parameters: Dict,
+    science_variables: List[str],
+    temp_directory: str,
+    logger: Logger,
+    var_info: VarInfoFromNetCDF4,
+    reprojection_cache: Dict,
+    swath_cache: Dict,
+    geolocation_cache: Optional[Dict],
+    variable_workers: int,
+) -> List[str]:
+    """Resample science variables using a pool of forked worker processes.
+
+    The first variable for each set of coordinates is resampled by the
+    parent process, which derives the reprojection information, and stores
+    it in the reprojection cache. Later variables with the same coordinates
+    are resampled by a worker. The arrays of the reprojection information
+    are copied to shared memory once, and only their descriptors are sent
+    to the workers. Each worker writes its results to an output buffer in
+    shared memory, from which the parent process writes the single band
+    output.
+
+    Each variable holds a reference to the shared arrays it uses, so shared
+    memory is unlinked as soon as no pending variable requires it, and all
+    shared memory is unlinked if processing fails. At most one variable per
+    worker is pending at a time, to bound the number of output buffers.
+
+    Returns:
+        output_variables: A list of names of successfully reprojected
+            variables.
+    """
+    output_extension = os.path.splitext(message_parameters['input_file'])[-1]
+    output_variables = []
+    pending_variables = {}
+    worker_memory_maps = swath_cache.get(MEMORY_MAPS)
+
+    if worker_memory_maps is not None:
+        # Memory-mapped coordinates are not needed by workers.
+        worker_memory_maps = {**worker_memory_maps, 'coordinates': {}}
+
+    with SharedArrayRegistry() as registry, ProcessPoolExecutor(
+        variable_workers, mp_context=get_context('fork')
+    ) as executor:
+        for variable in science_variables:
+            variable_output_path = get_variable_file_path(
+                temp_directory, variable, output_extension
+            )
+
+            logger.info(f'Reprojecting variable "{variable}"')
+            logger.info(f'Reprojected output: "{variable_output_path}"')
+
+            try:
+                with Dataset(message_parameters['input_file']) as dataset:
+                    coordinates_key = get_variable_coordinates_key(
+                        message_parameters,
+                        variable,
+                        var_info,
+                        swath_cache,
+                        dataset,
+                        logger,
+                    )
+                    data_type = dataset[variable].dtype
+                    attributes = get_output_attributes(dataset[variable])
+
+                if coordinates_key not in reprojection_cache:
+                    resample_variable(
+                        message_parameters,
+                        variable,
+                        reprojection_cache,
+                        variable_output_path,
+                        logger,
+                        var_info,
+                        swath_cache,
+                        geolocation_cache,
+                    )
+                    output_variables.append(variable)
+                    continue
+
+                reprojection_information = reprojection_cache[coordinates_key]
+                pending_variable = {
+                    'variable': variable,
+                    'output_path': variable_output_path,
+                    'information_prefix': str(coordinates_key),
+                    'output_key': f'output{variable}',
+                    'target_area': reprojection_information['target_area'],
+                    'data_type': data_type,
+                    'attributes': attributes,
+                }
+                pending_variable['shared_information'] = share_information(
+                    registry,
+                    pending_variable['information_prefix'],
+                    reprojection_information,
+                )
+                registry.create(
+                    pending_variable['output_key'],
+                    pending_variable['target_area'].shape,
+                    data_type,
+                    masked=True,
+                )
+                future = executor.submit(
+                    resample_shared_variable,
+                    message_parameters,
+                    variable,
+                    coordinates_key,
+                    pending_variable['shared_information'],
+                    registry.get_descriptor(pending_variable['output_key']),
+                    worker_memory_maps,
+                )
+                pending_variables[future] = pending_variable
+            except Exception as error:
+                logger.error(f'Cannot reproject {variable}')
+                logger.exception(error)
+
+            if len(pending_variables) >= variable_workers:
+                completed, _ = wait(pending_variables, return_when=FIRST_COMPLETED)
+
+                for future in completed:
+                    write_shared_variable(
+                        future,
+                        pending_variables.pop(future),
+                        registry,
+                        reprojection_cache,
+                        output_variables,
+                        logger,
+                    )
+
+        for future in list(pending_variables):
+            write_shared_variable(
+                future,
+                pending_variables.pop(future),
+                registry,
+                reprojection_cache,
+                output_variables,
+                logger,
+            )
+
+    return output_variables
+
+
+def resample_shared_variable(
+    message_parameters: Dict,
+    full_variable: str,
+    coordinates_key: Tuple[str],
+    shared_information: Dict,
+    output_descriptor: Dict,
+    memory_maps: Optional[Dict],
+) -> bool:
+    """Resample a single variable in a worker process, using reprojection
+    information held in shared memory, and write the results to an output
+    buffer in shared memory. The shared memory blocks are closed, but not
+    unlinked, before returning.
+
+    Returns:
+        entirely_fill: Whether the variable only contains fill values, in
+            which case the output buffer is not populated.
+    """
+    with Dataset(message_parameters['input_file']) as dataset:
+        variable = dataset[full_variable]
+        variable_information = get_variable_information(dataset, variable, memory_maps)
+
+        if values_are_entirely_fill(
+            variable_information['values'], variable_information['fill_value']
+        ):
+            return True
+
+        interpolation_functions = get_interpolation_functions(
+            message_parameters['interpolation'], dataset, coordinates_key
+        )
+
+        with attached_information(shared_information) as reprojection_information:
+            results = interpolation_functions['get_results'](
+                variable_information, reprojection_information
+            )
+
+        results = get_masked_results(
+            results, variable_information['fill_value'], variable.dtype
+        )
+
+    shared_block, output_buffer = attach_shared_array(output_descriptor)
+
+    try:
+        np.ma.getdata(output_buffer)[...] = np.ma.getdata(results)
+        np.ma.getmaskarray(output_buffer)[...] = np.ma.getmaskarray(results)
+    finally:
+        del output_buffer
+        close_shared_block(shared_block)
+
+    return False
+
+
+def write_shared_variable(
+    future,
+    pending_variable: Dict,
+    registry: SharedArrayRegistry,
+    reprojection_cache: Dict,
+    output_variables: List[str],
+    logger: Logger,
+) -> None:
+    """Write the single band output for a variable resampled by a worker
+    process, from its output buffer in shared memory. The references to
+    the reprojection information and output buffer held by the variable
+    are released, whether or not the worker succeeded.
+
+    """
+    variable = pending_variable['variable']
+
+    try:
+        if future.result():
+            logger.info(f'{variable} only contains fill values.')
+            results = np.ma.masked_all(
+                pending_variable['target_area'].shape,
+                dtype=pending_variable['data_type'],
+            )
+        else:
+            results = registry.get_array(pending_variable['output_key'])
+
+        write_single_band_output(
+            pending_variable['target_area'],
+            results,
+            variable,
+            pending_variable['output_path'],
+            reprojection_cache,
+            dict(pending_variable['attributes']),
+        )
+        output_variables.append(variable)
+        logger.debug(
+            f'Saved {variable} output to temporary file: '
+            f'{pending_variable["output_path"]}'
+        )
+    except Exception as error:
+        logger.error(f'Cannot reproject {variable}')
+        logger.exception(error)
+    finally:
+        results = None
+        release_information(
+            registry,
+            pending_variable['information_prefix'],
+            pending_variable['shared_information'],
+        )
+        registry.release(pending_variable['output_key'])
+
+
+def get_variable_coordinates_key(
+    message_parameters: Dict,
+    full_variable: str,
+    var_info: VarInfoFromNetCDF4,
+    swath_cache: Dict,
+    dataset: Dataset,
+    logger: Logger,
+) -> Tuple[str]:
+    """Return the key of the reprojection and swath caches for the
+    coordinates of a variable. The coordinates are retrieved from the
+    variable metadata, including any CF overrides. If requested, the key of
+    earlier coordinates with identical contents is used instead.
+
+    """
+    coordinates_key = create_coordinates_key(var_info.get_variable(full_variable))
+
+    if message_parameters.get('deduplicate_coordinates'):
+        coordinates_key = get_deduplicated_coordinates_key(
+            swath_cache, dataset, coordinates_key, logger
+        )
+
+    return coordinates_key
+
+
+def get_variable_information(
+    dataset: Dataset, variable: Variable, memory_maps: Optional[Dict]
+) -> Dict:
+    """Return the values and numeric fill value of a variable in a
+    dictionary. This allows the same function signature to retrieve results
+    from all interpolation methods. If configured, large variables are
+    retrieved as memory-mapped arrays.
+
+    """
+    fill_value = get_variable_numeric_fill_value(variable)
+
+    if should_memory_map(variable, memory_maps):
+        values = get_memory_mapped_array(
+            dataset, variable, memory_maps['directory'], fill_value
+        )
+    else:
+        values = get_variable_values(dataset, variable, fill_value)
+
+    return {'values': values, 'fill_value': fill_value}
+
+
+def get_output_attributes(variable: Variable) -> Dict:
+    """Return the attributes of the input variable that are retained in the
+    single band output: the scale factor, offset and fill value.
+
+    """
+    attributes = get_scale_and_offset(variable)
+
+    if get_variable_numeric_fill_value(variable) is not None:
+        # Defining the fill value in the single band output allows chunks
+        # containing only fill values to remain unwritten.
+        attributes['_FillValue'] = variable.getncattr('_FillValue')
+
+    return attributes
+
+
+def get_masked_results(
+    results: np.ndarray, fill_value, data_type: np.dtype
+) -> np.ndarray:
+    """Mask fill values in the resampled results prior to casting them to the
+    data type of the input variable, so they can be identified regardless
+    of the output data type.
 
+    """
+    if fill_value is not None:
+        results = np.ma.masked_array(results, mask=results == fill_value)
+
+    return results.astype(data_type)
+
+
+def get_reprojection_information(
+    message_parameters: Dict,
+    full_variable: str,
+    reprojection_cache: Dict,
+    logger: Logger,
+    swath_cache: Dict,
+    geolocation_cache: Optional[Dict],
+    dataset: Dataset,
+    coordinates_key: Tuple[str],
+) -> Dict:
+    """Retrieve the reprojection information for the coordinates of a
+    variable from the reprojection cache, or from the previous granule via
+    the geolocation cache. Otherwise, derive the information for the
+    target area, and store it in the cache(s) for later variables.
+
+    """
     if coordinates_key in reprojection_cache:
         logger.debug(
             'Retrieving previous interpolation information for ' f'{full_variable}'
         )
-        reprojection_information = reprojection_cache[coordinates_key]
+        return reprojection_cache[coordinates_key]
+
+    interpolation_functions = get_interpolation_functions(
+        message_parameters['interpolation'], dataset, coordinates_key
+    )
+    reprojection_information = get_previous_granule_information(
+        geolocation_cache, swath_cache, dataset, coordinates_key
+    )
+
+    if reprojection_information is not None:
+        logger.debug(
+            'Retrieving interpolation information from previous granule '
+            f'for {full_variable}'
+        )
     else:
         logger.debug(f'Deriving interpolation information for {full_variable}')
 
@@ -135,55 +805,294 @@ def resample_variable(
         else:
             logger.debug('Deriving target area from associated coordinates.')
             target_area = get_target_area(
-                message_parameters, dataset, coordinates_key, logger
+                message_parameters,
+                dataset,
+                coordinates_key,
+                logger,
+                swath_cache.get(MEMORY_MAPS),
             )
 
-        swath_definition = get_swath_definition(dataset, coordinates_key)
+        swath_resources = get_swath_resources(swath_cache, dataset, coordinates_key)
+        trim_target_area = should_trim_target_area(message_parameters)
+        # Only swath resources in the process-level cache retain the
+        # information derived from them, so it can be reused by later messages.
+        derived_information = swath_resources.get(REPROJECTION_INFORMATION)
+        information_key = (
+            message_parameters['interpolation'],
+            target_area,
+            trim_target_area,
+        )
+
+        if derived_information is not None and information_key in derived_information:
+            logger.debug(f'Retrieving cached swath information for {full_variable}')
+            reprojection_information = derived_information[information_key]
+        else:
+            reprojection_information = interpolation_functions['get_information'](
+                swath_resources, target_area
+            )
 
-        reprojection_information = interpolation_functions['get_information'](
-            swath_definition, target_area
+            if trim_target_area:
+                logger.debug('Trimming empty margins from derived target area.')
+                reprojection_information = interpolation_functions['trim_information'](
+                    reprojection_information
+                )
+                logger.info(
+                    'Trimmed target area shape: '
+                    f'{reprojection_information["target_area"].shape}'
+                )
+
+            if derived_information is not None:
+                derived_information[information_key] = reprojection_information
+
+    # This entry stores target area information, too. If the Harmony
+    # message has a fully defined target area, the target area information
+    # cached within the coordinate key entry will only be a reference to
+    # the Harmony message target area objects, not copies of the objects
+    # themselves.
+    reprojection_cache[coordinates_key] = reprojection_information
+
+    if geolocation_cache is not None:
+        fingerprint = get_cached_coordinates_fingerprint(
+            swath_cache, dataset, coordinates_key
         )
+        geolocation_cache[CURRENT_GRANULE][fingerprint] = reprojection_information
 
-        # This entry stores target area information, too. If the Harmony
-        # message has a fully defined target area, the target area information
-        # cached within the coordinate key entry will only be a reference to
-        # the Harmony message target area objects, not copies of the objects
-        # themselves.
-        reprojection_cache[coordinates_key] = reprojection_information
+    return reprojection_information
 
-    # Use a dictionary to store input variable values and fill value. This
-    # allows the same function signature to retrieve results from all
-    # interpolation methods.
-    fill_value = get_variable_numeric_fill_value(variable)
-    variable_information = {
-        'values': get_variable_values(dataset, variable, fill_value),
-        'fill_value': fill_value,
-    }
 
-    results = interpolation_functions['get_results'](
-        variable_information, reprojection_information
-    )
-    results = results.astype(variable.dtype)
+def use_streamed_ewa(
+    targets: List[Dict],
+    dataset: Dataset,
+    coordinates_key: Tuple[str],
+    ewa_block_rows: int,
+) -> bool:
+    """Determine whether a variable should be resampled in blocks of rows.
+    This requires a positive block size, EWA interpolation for all targets,
+    and 2-D coordinates with more rows than a single block.
 
-    attributes = get_scale_and_offset(variable)
-    write_single_band_output(
-        reprojection_information['target_area'],
-        results,
-        full_variable,
-        variable_output_path,
-        reprojection_cache,
-        attributes,
-    )
+    Each target must also have a target area that can be defined without
+    processing every pixel of the full coordinates: either a grid fully
+    defined by the Harmony message, or a derived grid that is estimated
+    from a subsample of the coordinates (see `get_decimated_coordinates`).
+    Otherwise, the full swath is resampled at once.
 
-    dataset.close()
+    """
+    if ewa_block_rows < 1 or any(
+        target['parameters']['interpolation'] not in EWA_INTERPOLATIONS
+        or not (
+            HARMONY_TARGET in target['reprojection_cache']
+            or target['parameters'].get('estimate_target_area')
+        )
+        for target in targets
+    ):
+        return False
+
+    latitudes = get_coordinate_variable(dataset, coordinates_key, 'lat')
+
+    return latitudes.ndim == 2 and latitudes.shape[0] > ewa_block_rows
+
+
+def get_streamed_target_area(
+    message_parameters: Dict,
+    reprojection_cache: Dict,
+    logger: Logger,
+    dataset: Dataset,
+    coordinates_key: Tuple[str],
+    memory_maps: Optional[Dict] = None,
+) -> AreaDefinition:
+    """Retrieve the target area for variables resampled in blocks of rows
+    from the reprojection cache. Otherwise, use the target area defined in
+    the Harmony message, or estimate one from a subsample of the
+    coordinates, and store it in the cache for later variables. The margins
+    of derived target areas are not trimmed, as that requires the grid
+    locations of the full swath.
+
+    """
+    if coordinates_key not in reprojection_cache:
+        if HARMONY_TARGET in reprojection_cache:
+            target_area = reprojection_cache[HARMONY_TARGET]['target_area']
+        else:
+            # `use_streamed_ewa` requires `estimate_target_area`, so only a
+            # subsample of the coordinates is read.
+            target_area = get_target_area(
+                message_parameters, dataset, coordinates_key, logger, memory_maps
+            )
+
+        reprojection_cache[coordinates_key] = {'target_area': target_area}
 
-    logger.debug(
-        f'Saved {full_variable} output to temporary file: ' f'{variable_output_path}'
+    return reprojection_cache[coordinates_key]['target_area']
+
+
+def get_fill_value_target_area(
+    message_parameters: Dict,
+    reprojection_cache: Dict,
+    logger: Logger,
+    dataset: Dataset,
+    coordinates_key: Tuple[str],
+    memory_maps: Optional[Dict] = None,
+) -> Optional[AreaDefinition]:
+    """Retrieve the target area for a variable that only contains fill
+    values, without deriving reprojection information. The target area of
+    earlier variables with the same coordinates is used, if cached,
+    otherwise the target area defined in the Harmony message. Failing
+    those, the target area is derived from the coordinates, but not cached,
+    as later variables will need the full reprojection information.
+
+    If the margins of a derived target area would be trimmed, `None` is
+    returned, as the trimmed area depends on the reprojection information,
+    and must match that of other variables with the same coordinates.
+
+    """
+    if coordinates_key in reprojection_cache:
+        return reprojection_cache[coordinates_key]['target_area']
+
+    if HARMONY_TARGET in reprojection_cache:
+        return reprojection_cache[HARMONY_TARGET]['target_area']
+
+    if should_trim_target_area(message_parameters):
+        return None
+
+    logger.debug('Deriving target area from associated coordinates.')
+    return get_target_area(
+        message_parameters, dataset, coordinates_key, logger, memory_maps
     )
 
 
+@lru_cache(maxsize=None)
+def get_bilinear_resampler_class() -> type:
+    """Return a `pyresample` bilinear resampler class that uses the KD-tree
+    stored in the swath resources cache, instead of constructing a new
+    KD-tree for each target area. The class is defined on first use, so
+    that `pyresample.bilinear` is only imported for bilinear requests.
+
+    """
+    from pyproj import Proj
+    from pyresample.bilinear import NumpyBilinearResampler
+    from pyresample.bilinear import _base as bilinear_base
+
+    # This class relies on private `pyresample` internals, which is why
+    # pip_requirements.txt restricts `pyresample` to a single minor release.
+    # The overridden methods are `_create_resample_kdtree`, `_reduce_index_array`
+    # and `_get_fractional_distances`. The latter also reads the private
+    # attributes of `NumpyBilinearResampler` (e.g., `_index_array`,
+    # `_valid_input_index`, `_neighbours`) and calls the private functions
+    # `_get_four_closest_corners`, `_query_no_distance`,
+    # `_get_fractional_distances` and `_get_raveled_lonlats` from
+    # `pyresample.bilinear._base`. Check all of these when upgrading.
+    class SwathKDTreeBilinearResampler(NumpyBilinearResampler):
+        """A bilinear resampler using the KD-tree from swath resources, which
+        finds the four data points around each target location using an
+        adaptive number of neighbours.
+
+        """
+
+        def __init__(self, swath_resources: Dict, target_area: AreaDefinition):
+            super().__init__(
+                swath_resources['swath_definition'],
+                target_area,
+                RADIUS_OF_INFLUENCE,
+                neighbours=BILINEAR_NEIGHBOURS[0],
+                reduce_data=False,
+            )
+            self.swath_resources = swath_resources
+            self.has_neighbours = None
+
+        def _create_resample_kdtree(self, kdtree_class=KDTree, nprocs=1):
+            """Override the `pyresample` method to retrieve the cached KD-tree."""
+            return get_swath_kd_tree(self.swath_resources)
+
+        def _reduce_index_array(self, index_array):
+            """Override the `pyresample` method to also record which target
+            locations have any swath neighbours within the radius of
+            influence. Only these can be surrounded by querying more
+            neighbours. Missing neighbours are ordered last by the KD-tree.
+
+            """
+            if self.has_neighbours is None:
+                self.has_neighbours = index_array[:, 0] < np.sum(
+                    self._valid_input_index
+                )
+
+            return super()._reduce_index_array(index_array)
+
+        def _get_fractional_distances(self):
+            """Override the `pyresample` method to find the four corners
+            around each target location adaptively. Target locations without
+            a corner in every quadrant are queried again with the next number
+            of neighbours, until all are surrounded, or the largest number of
+            neighbours has been used. As neighbours are ordered by distance,
+            the corners found for a target location are the same as if the
+            largest number of neighbours had been queried for all targets.
+
+            """
+            # pylint: disable=protected-access
+            out_x, out_y = self._get_output_xy()
+            input_lons, input_lats = bilinear_base.array_slice_for_multiple_arrays(
+                self._valid_input_index,
+                bilinear_base.mask_coordinates(
+                    *bilinear_base._get_raveled_lonlats(self._source_geo_def)
+                ),
+            )
+            projection = Proj(self._target_geo_def.proj_str)
+            target_lons = np.ravel(self._target_lons)[self._valid_output_indices]
+            target_lats = np.ravel(self._target_lats)[self._valid_output_indices]
+
+            corner_points, self._index_array = bilinear_base._get_four_closest_corners(
+                *projection(
+                    input_lons[self._index_array], input_lats[self._index_array]
+                ),
+                out_x,
+                out_y,
+                self._neighbours,
+                self._index_array,
+            )
+
+            for neighbours in BILINEAR_NEIGHBOURS[1:]:
+                unresolved = np.flatnonzero(
+                    self.has_neighbours
+                    & np.any(
+                        [np.isnan(corner[:, 0]) for corner in corner_points], axis=0
+                    )
+                )
+
+                if unresolved.size == 0:
+                    break
+
+                index_array = self._reduce_index_array(
+                    bilinear_base._query_no_distance(
+                        target_lons[unresolved],
+                        target_lats[unresolved],
+                        slice(None),
+                        self._resample_kdtree,
+                        neighbours,
+                        self._epsilon,
+                        self._radius_of_influence,
+                    )
+                )
+                unresolved_corners, unresolved_indices = (
+                    bilinear_base._get_four_closest_corners(
+                        *projection(input_lons[index_array], input_lats[index_array]),
+                        out_x[unresolved],
+                        out_y[unresolved],
+                        neighbours,
+                        index_array,
+                    )
+                )
+
+                for corner, unresolved_corner in zip(corner_points, unresolved_corners):
+                    corner[unresolved] = unresolved_corner
+
+                self._index_array[unresolved] = unresolved_indices
+
+            self.bilinear_t, self.bilinear_s = bilinear_base._get_fractional_distances(
+                corner_points, out_x, out_y
+            )
+
+    return SwathKDTreeBilinearResampler
+
+
 def get_bilinear_information(
-    swath_definition: SwathDefinition, target_area: AreaDefinition
+    swath_resources: Dict, target_area: AreaDefinition
 ) -> Dict:
     """Return the necessary information to reproject a swath using the
     bilinear interpolation method. This information will be stored in the
@@ -191,15 +1100,15 @@ def get_bilinear_information(
     same coordinate variables.
 
     """
-    bilinear_information = get_bil_info(
-        swath_definition, target_area, radius=RADIUS_OF_INFLUENCE, neighbours=NEIGHBOURS
-    )
+    resampler = get_bilinear_resampler_class()(swath_resources, target_area)
+    resampler.get_bil_info()
 
+    # pylint: disable=protected-access
     return {
-        'vertical_distances': bilinear_information[0],
-        'horizontal_distances': bilinear_information[1],
-        'valid_input_indices': bilinear_information[2],
-        'valid_point_mapping': bilinear_information[3],
+        'vertical_distances': resampler.bilinear_t,
+        'horizontal_distances': resampler.bilinear_s,
+        'valid_input_indices': resampler._valid_input_index,
+        'valid_point_mapping': resampler._index_array,
         'target_area': target_area,
     }
 
@@ -211,6 +1120,8 @@ def get_bilinear_results(variable: Dict, bilinear_information: Dict) -> np.ndarr
     set to the fill value for the variable.
 
     """
+    from pyresample.bilinear import get_sample_from_bil_info
+
     results = get_sample_from_bil_info(
         variable['values'].ravel(),
         bilinear_information['vertical_distances'],
@@ -226,20 +1137,90 @@ def get_bilinear_results(variable: Dict, bilinear_information: Dict) -> np.ndarr
     return results
 
 
-def get_ewa_information(
-    swath_definition: SwathDefinition, target_area: AreaDefinition
-) -> Dict:
+def trim_bilinear_information(bilinear_information: Dict) -> Dict:
+    """Shrink the target area of the bilinear information to the smallest
+    window containing all target pixels with interpolation weights. The
+    per-pixel weights and mapping to swath pixels are sliced to match.
+
+    """
+    target_shape = bilinear_information['target_area'].shape
+    vertical_distances = bilinear_information['vertical_distances'].reshape(
+        target_shape
+    )
+    window = get_populated_window(np.isfinite(vertical_distances))
+
+    if window is None:
+        return bilinear_information
+
+    point_mapping = bilinear_information['valid_point_mapping']
+
+    return {
+        'vertical_distances': vertical_distances[window].ravel(),
+        'horizontal_distances': bilinear_information['horizontal_distances']
+        .reshape(target_shape)[window]
+        .ravel(),
+        'valid_input_indices': bilinear_information['valid_input_indices'],
+        'valid_point_mapping': point_mapping.reshape(
+            target_shape + point_mapping.shape[1:]
+        )[window].reshape((-1,) + point_mapping.shape[1:]),
+        'target_area': bilinear_information['target_area'][window],
+    }
+
+
+def get_ewa_information(swath_resources: Dict, target_area: AreaDefinition) -> Dict:
     """Return the necessary information to reproject a swath using the
     Elliptically Weighted Average interpolation method. This information
     will be stored in the reprojection cache, for use with other science
     variables that share the same coordinate variables.
 
     """
-    ewa_info = ll2cr(swath_definition, target_area)
+    from pyresample.ewa import ll2cr
+
+    ewa_info = ll2cr(swath_resources['swath_definition'], target_area)
 
     return {'columns': ewa_info[1], 'rows': ewa_info[2], 'target_area': target_area}
 
 
+def trim_ewa_information(ewa_information: Dict) -> Dict:
+    """Shrink the target area of the EWA information to the smallest window
+    containing the projected swath pixels, as calculated by `ll2cr`. This
+    occurs before `fornav`, so only the trimmed grid is resampled. Padding
+    is retained around the projected swath pixels, as each swath pixel
+    contributes to the grid pixels within its elliptical footprint, not just
+    the pixel containing its centre. The swath column and row indices are
+    offset to be relative to the trimmed target area.
+
+    """
+    target_area = ewa_information['target_area']
+    columns = ewa_information['columns']
+    rows = ewa_information['rows']
+    valid_pixels = np.isfinite(columns) & np.isfinite(rows)
+
+    if not valid_pixels.any():
+        return ewa_information
+
+    window = tuple(
+        slice(
+            max(int(np.floor(indices[valid_pixels].min())) - EWA_TRIM_PADDING, 0),
+            min(
+                int(np.ceil(indices[valid_pixels].max())) + EWA_TRIM_PADDING + 1,
+                dimension_size,
+            ),
+        )
+        for indices, dimension_size in zip((rows, columns), target_area.shape)
+    )
+
+    if window[0].start >= window[0].stop or window[1].start >= window[1].stop:
+        # The swath lies entirely outside the target area.
+        return ewa_information
+
+    return {
+        'columns': columns - window[1].start,
+        'rows': rows - window[0].start,
+        'target_area': target_area[window],
+    }
+
+
 def get_ewa_results(
     variable: Dict, ewa_information: Dict, maximum_weight_mode: bool
 ) -> np.ndarray:
@@ -257,6 +1238,8 @@ def get_ewa_results(
     scans.
 
     """
+    from pyresample.ewa import fornav
+
     if np.issubdtype(variable['values'].dtype, np.integer):
         variable['values'] = variable['values'].astype(float)
 
@@ -276,32 +1259,209 @@ def get_ewa_results(
     return results
 
 
-def get_near_information(
-    swath_definition: SwathDefinition, target_area: AreaDefinition
-) -> Dict:
+def get_binned_information(swath_resources: Dict, target_area: AreaDefinition) -> Dict:
+    """Return the necessary information to reproject a 1-D swath, such as an
+    along-track profile, by binning swath pixels directly into the target
+    grid pixels that contain them. This is used instead of EWA, which
+    requires the scans of a 2-D swath to determine pixel footprints.
+
+    All swath pixels are projected at once, and their fractional grid
+    columns and rows are used to identify the containing grid pixel, and
+    the squared distance to the centre of that grid pixel, in grid pixels.
+
+    """
+    from pyproj import Proj
+
+    longitudes, latitudes = swath_resources['swath_definition'].get_lonlats()
+    # Memory-mapped coordinates are already 64-bit, so are not copied.
+    longitudes = np.ravel(np.ma.asarray(longitudes, dtype=np.float64))
+    latitudes = np.ravel(np.ma.asarray(latitudes, dtype=np.float64))
+
+    valid_input_index = np.flatnonzero(
+        np.ma.filled(
+            (longitudes >= -180)
+            & (longitudes <= 180)
+            & (latitudes >= -90)
+            & (latitudes <= 90),
+            False,
+        )
+    )
+
+    x_values, y_values = Proj(target_area.crs)(
+        np.ma.getdata(longitudes)[valid_input_index],
+        np.ma.getdata(latitudes)[valid_input_index],
+    )
+    columns = (np.asarray(x_values) - target_area.area_extent[0]) / (
+        target_area.pixel_size_x
+    )
+    rows = (target_area.area_extent[3] - np.asarray(y_values)) / (
+        target_area.pixel_size_y
+    )
+
+    in_target = (
+        np.isfinite(columns)
+        & np.isfinite(rows)
+        & (columns >= 0)
+        & (columns < target_area.width)
+        & (rows >= 0)
+        & (rows < target_area.height)
+    )
+    columns = columns[in_target]
+    rows = rows[in_target]
+    column_indices = np.floor(columns).astype(np.int64)
+    row_indices = np.floor(rows).astype(np.int64)
+
+    return {
+        'valid_input_index': valid_input_index[in_target],
+        'target_index': row_indices * target_area.width + column_indices,
+        'centre_distances': (columns - column_indices - 0.5) ** 2
+        + (rows - row_indices - 0.5) ** 2,
+        'target_area': target_area,
+    }
+
+
+def trim_binned_information(binned_information: Dict) -> Dict:
+    """Shrink the target area of the binned information to the smallest
+    window containing all target pixels with a swath pixel. The target
+    indices are converted to indices within that window.
+
+    """
+    target_area = binned_information['target_area']
+    populated_pixels = np.zeros(target_area.size, dtype=bool)
+    populated_pixels[binned_information['target_index']] = True
+    window = get_populated_window(populated_pixels.reshape(target_area.shape))
+
+    if window is None:
+        return binned_information
+
+    trimmed_target_area = target_area[window]
+    row_indices, column_indices = np.divmod(
+        binned_information['target_index'], target_area.width
+    )
+
+    return {
+        'valid_input_index': binned_information['valid_input_index'],
+        'target_index': (row_indices - window[0].start) * trimmed_target_area.width
+        + (column_indices - window[1].start),
+        'centre_distances': binned_information['centre_distances'],
+        'target_area': trimmed_target_area,
+    }
+
+
+def get_binned_results(
+    variable: Dict, binned_information: Dict, maximum_weight_mode: bool
+) -> np.ndarray:
+    """Use the derived information from the input swath and target area to
+    reproject 1-D variable data by binning. Swath pixels that are NaN, or
+    equal to the fill value, are excluded.
+
+    If maximum_weight_mode is False, each grid pixel is the mean of all
+    swath pixels it contains, analogous to the weighted average of EWA. If
+    True, each grid pixel is the value of the swath pixel closest to its
+    centre, analogous to the EWA maximum weight mode. Grid pixels without
+    swath pixels are NaN, unless the variable has a numeric fill value.
+
+    """
+    target_area = binned_information['target_area']
+    values = np.ravel(variable['values'])[binned_information['valid_input_index']]
+    values = values.astype(np.float64, copy=False)
+    valid_values = np.isfinite(values)
+
+    if variable['fill_value'] is not None:
+        valid_values &= values != variable['fill_value']
+
+    values = values[valid_values]
+    target_index = binned_information['target_index'][valid_values]
+    results = np.full(target_area.size, np.nan)
+
+    if maximum_weight_mode:
+        nearest_first = np.lexsort(
+            (binned_information['centre_distances'][valid_values], target_index)
+        )
+        populated_pixels, nearest_indices = np.unique(
+            target_index[nearest_first], return_index=True
+        )
+        results[populated_pixels] = values[nearest_first][nearest_indices]
+    else:
+        counts = np.bincount(target_index, minlength=target_area.size)
+        sums = np.bincount(target_index, weights=values, minlength=target_area.size)
+        populated_pixels = counts > 0
+        results[populated_pixels] = sums[populated_pixels] / counts[populated_pixels]
+
+    results = results.reshape(target_area.shape)
+
+    if variable['fill_value'] is not None:
+        np.nan_to_num(results, nan=variable['fill_value'], copy=False)
+
+    return results
+
+
+def get_near_information(swath_resources: Dict, target_area: AreaDefinition) -> Dict:
     """Return the necessary information to reproject a swath using the
     nearest neighbour interpolation method. This information will be stored
     in the reprojection cache, for use with other science variables that
     share the same coordinate variables.
 
+    The KD-tree of swath pixels is retrieved from the swath resources, so
+    only the query of the target area pixels is performed here.
+
     """
-    near_information = get_neighbour_info(
-        swath_definition,
-        target_area,
-        RADIUS_OF_INFLUENCE,
-        epsilon=EPSILON,
-        neighbours=1,
-    )
+    swath_definition = swath_resources['swath_definition']
+    valid_input_index, kd_tree = get_swath_kd_tree(swath_resources)
+
+    if kd_tree is None:
+        # No valid swath pixels, so no target pixels can be populated.
+        near_information = _create_empty_info(swath_definition, target_area, 1)
+    else:
+        near_information = _query_resample_kdtree(
+            kd_tree,
+            swath_definition,
+            target_area,
+            RADIUS_OF_INFLUENCE,
+            slice(None),
+            neighbours=1,
+            epsilon=EPSILON,
+            reduce_data=False,
+        )
 
     return {
-        'valid_input_index': near_information[0],
-        'valid_output_index': near_information[1],
-        'index_array': near_information[2],
-        'distance_array': near_information[3],
+        'valid_input_index': valid_input_index,
+        'valid_output_index': near_information[0],
+        'index_array': near_information[1],
+        'distance_array': near_information[2],
         'target_area': target_area,
     }
 
 
+def trim_near_information(near_information: Dict) -> Dict:
+    """Shrink the target area of the nearest neighbour information to the
+    smallest window containing all target pixels with a swath neighbour.
+    The neighbour indices and distances are only retained for the target
+    pixels within that window.
+
+    """
+    target_shape = near_information['target_area'].shape
+    valid_output_index = near_information['valid_output_index'].reshape(target_shape)
+    distance_array = np.full(target_shape, np.inf)
+    distance_array[valid_output_index] = near_information['distance_array']
+    window = get_populated_window(np.isfinite(distance_array))
+
+    if window is None:
+        return near_information
+
+    index_array = np.zeros(target_shape, dtype=near_information['index_array'].dtype)
+    index_array[valid_output_index] = near_information['index_array']
+    trimmed_valid_output_index = valid_output_index[window]
+
+    return {
+        'valid_input_index': near_information['valid_input_index'],
+        'valid_output_index': trimmed_valid_output_index.ravel(),
+        'index_array': index_array[window][trimmed_valid_output_index],
+        'distance_array': distance_array[window][trimmed_valid_output_index],
+        'target_area': near_information['target_area'][window],
+    }
+
+
 def get_near_results(variable: Dict, near_information) -> np.ndarray:
     """Use the derived information from the input swath and target area to
     reproject variable data in the target area using the nearest neighbour
@@ -337,22 +1497,51 @@ def get_resampling_functions() -> Dict:
         'bilinear': {
             'get_information': get_bilinear_information,
             'get_results': get_bilinear_results,
+            'trim_information': trim_bilinear_information,
         },
         'ewa': {
             'get_information': get_ewa_information,
             'get_results': partial(get_ewa_results, maximum_weight_mode=False),
+            'trim_information': trim_ewa_information,
         },
         'ewa-nn': {
             'get_information': get_ewa_information,
             'get_results': partial(get_ewa_results, maximum_weight_mode=True),
+            'trim_information': trim_ewa_information,
         },
         'near': {
             'get_information': get_near_information,
             'get_results': get_near_results,
+            'trim_information': trim_near_information,
         },
     }
 
 
+def get_interpolation_functions(
+    interpolation: str, dataset: Dataset, coordinates: Tuple[str]
+) -> Dict:
+    """Return the resampling functions for the interpolation method and the
+    coordinates of a variable. EWA requires the scans of a 2-D swath, so
+    1-D swaths, such as along-track profiles, are binned directly into the
+    target grid instead. Other interpolation methods use the same functions
+    for 1-D and 2-D swaths.
+
+    """
+    if (
+        interpolation in EWA_INTERPOLATIONS
+        and len(get_coordinate_variable(dataset, coordinates, 'lat').shape) == 1
+    ):
+        return {
+            'get_information': get_binned_information,
+            'get_results': partial(
+                get_binned_results, maximum_weight_mode=interpolation == 'ewa-nn'
+            ),
+            'trim_information': trim_binned_information,
+        }
+
+    return get_resampling_functions()[interpolation]
+
+
 def check_for_valid_interpolation(message_parameters: Dict, logger: Logger) -> None:
     """Ensure the interpolation supplied in the message parameters is one of
     the expected options.
@@ -375,31 +1564,206 @@ def check_for_valid_interpolation(message_parameters: Dict, logger: Logger) -> N
         )
 
 
-def get_swath_definition(dataset: Dataset, coordinates: Tuple[str]) -> SwathDefinition:
+def get_swath_definition(
+    dataset: Dataset, coordinates: Tuple[str], memory_maps: Optional[Dict] = None
+) -> SwathDefinition:
     """Define the swath as specified by the associated longitude and latitude
     datasets. Note, the longitudes must be wrapped to the range:
     -180 < longitude < 180.
 
+    If configured, large coordinates are retrieved as memory-mapped arrays,
+    which are only copied if the longitudes need wrapping.
+
+    1-D coordinates, such as along-track profiles, retain their shape. These
+    are not resampled with `ll2cr` and `fornav`, which require 2-D arrays,
+    see `get_interpolation_functions`.
+
     """
-    latitudes = get_coordinate_variable(dataset, coordinates, 'lat')
-    longitudes = get_coordinate_variable(dataset, coordinates, 'lon')
+    longitudes, latitudes = get_coordinate_arrays(dataset, coordinates, memory_maps)
 
     wrapped_lons, wrapped_lats = check_and_wrap(longitudes[:], latitudes[:])
 
-    # EWA ll2cr requires 2-dimensional arrays for the swath coordinates:
-    if len(wrapped_lons.shape) == 1:
-        wrapped_lons = make_array_two_dimensional(wrapped_lons)
-        wrapped_lats = make_array_two_dimensional(wrapped_lats)
-
     return SwathDefinition(lons=wrapped_lons, lats=wrapped_lats)
 
 
+def get_swath_resources(
+    swath_cache: Dict, dataset: Dataset, coordinates: Tuple[str]
+) -> Dict:
+    """Retrieve the resources describing the input swath for the given
+    coordinates from the swath cache. If there is no entry for the
+    coordinates, a new entry is created containing the swath definition.
+    Other resources, such as the KD-tree, are only added when an
+    interpolation method requires them.
+
+    If the process-level cache is enabled, e.g., in a long-lived worker, a
+    new entry is shared with any previous message that used coordinates
+    with identical contents, see `swath_projector.swath_resource_cache`.
+
+    """
+    if coordinates not in swath_cache:
+        fingerprint = get_swath_resource_cache_key(swath_cache, dataset, coordinates)
+        swath_resources = None
+
+        if fingerprint is not None:
+            swath_resources = get_cached_swath_resources(fingerprint)
+
+        if swath_resources is None:
+            swath_resources = {
+                'swath_definition': get_swath_definition(
+                    dataset, coordinates, swath_cache.get(MEMORY_MAPS)
+                )
+            }
+
+            if fingerprint is not None:
+                cache_swath_resources(fingerprint, swath_resources)
+
+        swath_cache[coordinates] = swath_resources
+
+    return swath_cache[coordinates]
+
+
+def get_swath_resource_cache_key(
+    swath_cache: Dict, dataset: Dataset, coordinates: Tuple[str]
+) -> Optional[str]:
+    """Return the fingerprint of the coordinates, under which their swath
+    resources are retained between messages. `None` is returned when the
+    process-level cache is disabled, or the coordinates are memory-mapped,
+    as memory-mapped files are removed with the workspace of each item.
+
+    """
+    if not swath_resource_cache_enabled() or any(
+        should_memory_map(
+            get_coordinate_variable(dataset, coordinates, coordinate_substring),
+            swath_cache.get(MEMORY_MAPS),
+        )
+        for coordinate_substring in ['lat', 'lon']
+    ):
+        return None
+
+    return get_cached_coordinates_fingerprint(swath_cache, dataset, coordinates)
+
+
+def get_deduplicated_coordinates_key(
+    swath_cache: Dict, dataset: Dataset, coordinates: Tuple[str], logger: Logger
+) -> Tuple[str]:
+    """Return the coordinates key of the first coordinates encountered in
+    the granule that have identical contents to the specified coordinates.
+    If no previous coordinates match, the specified coordinates are
+    returned. Content fingerprints are stored in the swath cache, so that the
+    coordinate variables are only hashed once per set of coordinates.
+
+    Using the returned key for both the swath and reprojection caches means
+    variables with duplicated coordinates share reprojection information,
+    and are written to the same output dimensions.
+
+    """
+    fingerprint = get_cached_coordinates_fingerprint(swath_cache, dataset, coordinates)
+    deduplicated_coordinates = swath_cache[COORDINATE_FINGERPRINTS]['by_fingerprint'][
+        fingerprint
+    ]
+
+    if deduplicated_coordinates != coordinates:
+        logger.debug(
+            f'Coordinates {coordinates} are identical to {deduplicated_coordinates}'
+        )
+
+    return deduplicated_coordinates
+
+
+def get_previous_granule_information(
+    geolocation_cache: Optional[Dict],
+    swath_cache: Dict,
+    dataset: Dataset,
+    coordinates: Tuple[str],
+) -> Optional[Dict]:
+    """Return the reprojection information derived for the previous granule
+    for coordinates with identical contents to the specified coordinates.
+    If there is no geolocation cache, or no matching coordinates in the
+    previous granule, `None` is returned.
+
+    """
+    if geolocation_cache is None or not geolocation_cache[PREVIOUS_GRANULE]:
+        return None
+
+    fingerprint = get_cached_coordinates_fingerprint(swath_cache, dataset, coordinates)
+
+    return geolocation_cache[PREVIOUS_GRANULE].get(fingerprint)
+
+
+def get_cached_coordinates_fingerprint(
+    swath_cache: Dict, dataset: Dataset, coordinates: Tuple[str]
+) -> str:
+    """Return the content-based fingerprint of the specified coordinates.
+    Fingerprints are stored in the swath cache, so that the coordinate
+    variables are only hashed once per set of coordinates. The first
+    coordinates encountered with each fingerprint are also recorded.
+
+    """
+    fingerprints = swath_cache.setdefault(
+        COORDINATE_FINGERPRINTS, {'by_coordinates': {}, 'by_fingerprint': {}}
+    )
+
+    if coordinates not in fingerprints['by_coordinates']:
+        fingerprint = get_coordinates_fingerprint(dataset, coordinates)
+        fingerprints['by_coordinates'][coordinates] = fingerprint
+        fingerprints['by_fingerprint'].setdefault(fingerprint, coordinates)
+
+    return fingerprints['by_coordinates'][coordinates]
+
+
+def get_swath_kd_tree(swath_resources: Dict) -> Tuple[np.ndarray, Optional[KDTree]]:
+    """Return a KD-tree of the valid swath pixels, in cartesian coordinates,
+    and the index of those valid pixels within the flattened swath. These
+    are derived on first request, and then stored in the swath resources,
+    so that the KD-tree is only constructed once per swath, regardless of
+    the number of interpolation methods or target areas.
+
+    The KD-tree is built over all valid swath pixels, rather than a subset
+    reduced to the bounds of a specific target area. If there are no valid
+    swath pixels, the returned KD-tree will be `None`.
+
+    """
+    if 'kd_tree' not in swath_resources:
+        longitudes, latitudes = swath_resources['swath_definition'].get_lonlats()
+        # Memory-mapped coordinates are already 64-bit, so are not copied.
+        longitudes = np.ravel(np.ma.asarray(longitudes, dtype=np.float64))
+        latitudes = np.ravel(np.ma.asarray(latitudes, dtype=np.float64))
+
+        valid_input_index = np.ma.filled(
+            (longitudes >= -180)
+            & (longitudes <= 180)
+            & (latitudes >= -90)
+            & (latitudes <= 90),
+            False,
+        )
+
+        cartesian_coordinates = Cartesian().transform_lonlats(
+            longitudes[valid_input_index], latitudes[valid_input_index]
+        )
+
+        if cartesian_coordinates.size > 0:
+            kd_tree = KDTree(cartesian_coordinates)
+        else:
+            kd_tree = None
+
+        swath_resources.update(
+            {
+                'valid_input_index': valid_input_index,
+                'cartesian_coordinates': cartesian_coordinates,
+                'kd_tree': kd_tree,
+            }
+        )
+
+    return swath_resources['valid_input_index'], swath_resources['kd_tree']
+
+
 def get_reprojection_cache(parameters: Dict) -> Dict:
     """Return a cache for information to be shared between all variables with
     common coordinates. Additionally, check the input Harmony message for a
     complete definition of the target area. If that is present, return it
     in the initial cache under a key that should not be match a valid
-    variable name in the input granule.
+    variable name in the input granule. The cache for an additional target
+    grid also records the suffix for the dimensions of that target.
 
     """
     reprojection_cache = {}
@@ -429,15 +1793,29 @@ def get_reprojection_cache(parameters: Dict) -> Dict:
 
         reprojection_cache[HARMONY_TARGET] = {'target_area': target_area}
 
+    if parameters.get('dimension_suffix') is not None:
+        # An additional target grid, so dimension names need a suffix.
+        reprojection_cache[DIMENSION_SUFFIX] = parameters['dimension_suffix']
+
     return reprojection_cache
 
 
 def get_target_area(
-    parameters: Dict, dataset: Dataset, coordinates: Tuple[str], logger: Logger
+    parameters: Dict,
+    dataset: Dataset,
+    coordinates: Tuple[str],
+    logger: Logger,
+    memory_maps: Optional[Dict] = None,
 ) -> AreaDefinition:
     """Define the target area as specified by either a complete set of message
     parameters, or supplemented with coordinate variables as referred to in
-    the science variable metadata.
+    the science variable metadata. If configured, large coordinates are
+    retrieved as memory-mapped arrays.
+
+    If requested, the extents and resolution derived from 2-D coordinates
+    are estimated from a subsample of those coordinates, rather than every
+    pixel, see `get_decimated_coordinates`. Either way, the projected
+    perimeter of the swath is only derived once.
 
     """
     grid_extents = get_parameters_tuple(
@@ -446,8 +1824,14 @@ def get_target_area(
     dimensions = get_parameters_tuple(parameters, ['height', 'width'])
     resolutions = get_parameters_tuple(parameters, ['xres', 'yres'])
     projection_string = parameters['projection'].definition_string()
-    latitudes = get_coordinate_variable(dataset, coordinates, 'lat')
-    longitudes = get_coordinate_variable(dataset, coordinates, 'lon')
+    longitudes, latitudes = get_coordinate_arrays(dataset, coordinates, memory_maps)
+    # The perimeter is derived at most once, for both extents and resolution.
+    projected_perimeter = None
+
+    if parameters.get('estimate_target_area'):
+        stride = ESTIMATION_STRIDE
+    else:
+        stride = 1
 
     if grid_extents is not None:
         logger.info(
@@ -457,8 +1841,11 @@ def get_target_area(
             f'Message y extent: y_min: {grid_extents[1]}, y_max: ' f'{grid_extents[3]}'
         )
     else:
-        x_min, x_max, y_min, y_max = get_extents_from_perimeter(
-            parameters['projection'], longitudes, latitudes
+        projected_perimeter = get_projected_perimeter(
+            parameters['projection'], longitudes, latitudes, stride
+        )
+        x_min, x_max, y_min, y_max = get_extents_from_projected_perimeter(
+            projected_perimeter
         )
 
         grid_extents = (x_min, y_min, x_max, y_max)
@@ -471,8 +1858,13 @@ def get_target_area(
     if resolutions is None and dimensions is not None:
         resolutions = (x_range / dimensions[1], y_range / dimensions[0])
     elif resolutions is None:
-        x_res = get_projected_resolution(
-            parameters['projection'], longitudes, latitudes
+        if projected_perimeter is None:
+            projected_perimeter = get_projected_perimeter(
+                parameters['projection'], longitudes, latitudes, stride
+            )
+
+        x_res = get_resolution_from_perimeter(
+            projected_perimeter, len(longitudes.shape)
         )
         # TODO: Determine sign of y resolution from projected y data.
         y_res = -1.0 * x_res
@@ -495,6 +1887,41 @@ def get_target_area(
     )
 
 
+def should_trim_target_area(parameters: Dict) -> bool:
+    """Determine whether the empty margins of the target area should be
+    trimmed. This is only requested via an optional message parameter, and
+    only applies when the extents and dimensions of the target area are
+    derived from the swath coordinates, rather than specified in the
+    Harmony message.
+
+    """
+    return (
+        bool(parameters.get('trim_margins'))
+        and get_parameters_tuple(parameters, ['x_min', 'y_min', 'x_max', 'y_max'])
+        is None
+        and get_parameters_tuple(parameters, ['height', 'width']) is None
+    )
+
+
+def get_populated_window(populated_pixels: np.ndarray) -> Optional[Tuple[slice]]:
+    """Return the row and column slices of the smallest window containing
+    all populated pixels in a two-dimensional boolean array. If no pixels
+    are populated, `None` is returned.
+
+    """
+    populated_rows = np.flatnonzero(populated_pixels.any(axis=1))
+
+    if populated_rows.size == 0:
+        return None
+
+    populated_columns = np.flatnonzero(populated_pixels.any(axis=0))
+
+    return (
+        slice(int(populated_rows[0]), int(populated_rows[-1]) + 1),
+        slice(int(populated_columns[0]), int(populated_columns[-1]) + 1),
+    )
+
+
 def get_parameters_tuple(
     input_parameters: Dict, output_parameter_keys: List
 ) -> Optional[Tuple]:
@@ -0,0 +1,176 @@
+"""This module contains functions to copy large coordinate and science
+variables into memory-mapped arrays in the workspace, for granules whose
+uncompressed variables would otherwise need to be held in memory.
+
+Each variable is decompressed once, in blocks of rows, into an uncompressed
+`.npy` file with the same data type as the values read from the input
+granule. The file is then opened as a copy-on-write memory map, so that
+the geometry and resampling functions operate on pages loaded on demand
+by the operating system, which can be evicted under memory pressure, and
+shared via the page cache between processes opening the same file.
+
+Coordinates are stored as 64-bit floating point values, as required by
+the swath geometry functions, so that they are never cast, and therefore
+copied, when used. Masked coordinate pixels are stored as NaN, and are
+masked again when the coordinates are retrieved, using a mask that is much
+smaller than the coordinates themselves. Masked science variable pixels are stored as the
+fill value, as with `get_variable_values`.
+
+"""
+
+import os
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+from netCDF4 import Dataset, Variable
+
+from swath_projector.streamed_ewa import get_block_slices
+from swath_projector.utilities import (
+    get_coordinate_variable,
+    get_variable_file_path,
+)
+
+# The name of the subdirectory of the workspace containing memory-mapped
+# arrays.
+MEMORY_MAP_DIRECTORY = 'memory_maps'
+# The approximate number of array elements read from the input granule at a
+# time when copying a variable to a memory-mapped array.
+MEMORY_MAP_BLOCK_SIZE = 2**22
+
+
+def get_memory_maps(temp_directory: str, threshold: int) -> Optional[Dict]:
+    """Return the configuration for memory-mapped arrays, which also holds
+    the memory-mapped coordinates retrieved so far. If the threshold is
+    zero, memory-mapping is disabled, and `None` is returned.
+
+    """
+    if threshold < 1:
+        return None
+
+    return {
+        'directory': os.path.join(temp_directory, MEMORY_MAP_DIRECTORY),
+        'threshold': threshold,
+        'coordinates': {},
+    }
+
+
+def should_memory_map(variable: Variable, memory_maps: Optional[Dict]) -> bool:
+    """Determine whether a variable should be copied to a memory-mapped
+    array. This requires memory-mapping to be enabled, and a variable with
+    at least two dimensions, with an uncompressed size of at least the
+    configured threshold, in bytes.
+
+    """
+    return (
+        memory_maps is not None
+        and len(variable.shape) > 1
+        and variable.size * variable.dtype.itemsize >= memory_maps['threshold']
+    )
+
+
+def get_coordinate_arrays(
+    dataset: Dataset, coordinates: Tuple[str], memory_maps: Optional[Dict]
+) -> Tuple[Union[Variable, np.ma.MaskedArray]]:
+    """Return the longitude and latitude for the specified coordinates. If
+    both should be memory-mapped, masked arrays of the memory-mapped values
+    are returned and retained for later requests. Otherwise the variables
+    from the input granule are returned.
+
+    """
+    latitudes = get_coordinate_variable(dataset, coordinates, 'lat')
+    longitudes = get_coordinate_variable(dataset, coordinates, 'lon')
+
+    if not (
+        should_memory_map(longitudes, memory_maps)
+        and should_memory_map(latitudes, memory_maps)
+    ):
+        return longitudes, latitudes
+
+    if coordinates not in memory_maps['coordinates']:
+        memory_maps['coordinates'][coordinates] = tuple(
+            np.ma.masked_invalid(
+                get_memory_mapped_array(
+                    dataset, variable, memory_maps['directory'], np.nan, np.float64
+                ),
+                copy=False,
+            )
+            for variable in [longitudes, latitudes]
+        )
+
+    return memory_maps['coordinates'][coordinates]
+
+
+def get_memory_mapped_array(
+    dataset: Dataset,
+    variable: Variable,
+    directory: str,
+    fill_value,
+    dtype: Optional[np.dtype] = None,
+) -> np.memmap:
+    """Return a copy-on-write memory map of the values of a 2-D variable,
+    with masked pixels set to the fill value. As with `get_variable_values`,
+    variables with a `time` dimension are assumed to have a shape of
+    (1, y, x). The values are only copied to the `.npy` file in the
+    workspace if that file does not already exist.
+
+    Integer coordinates have no NaN with which to represent masked pixels,
+    so are stored as floating point values. If a data type is specified,
+    the values are stored with that data type instead.
+
+    """
+    file_path = get_variable_file_path(
+        directory, f'{variable.group().path}/{variable.name}', '.npy'
+    )
+
+    if not os.path.exists(file_path):
+        write_memory_mapped_array(dataset, variable, file_path, fill_value, dtype)
+
+    return np.load(file_path, mmap_mode='c')
+
+
+def write_memory_mapped_array(
+    dataset: Dataset,
+    variable: Variable,
+    file_path: str,
+    fill_value,
+    dtype: Optional[np.dtype] = None,
+) -> None:
+    """Copy the values of a variable to an uncompressed `.npy` file, in blocks
+    of rows, so that the full variable is never held in memory. The file is
+    written under a temporary name, and renamed once complete, so that
+    partially written files are never opened.
+
+    """
+    if 'time' in dataset.variables and 'time' in variable.dimensions:
+        index_prefix = (0,)
+    else:
+        index_prefix = ()
+
+    shape = variable.shape[len(index_prefix) :]
+    block_rows = max(MEMORY_MAP_BLOCK_SIZE // int(np.prod(shape[1:])), 1)
+    temporary_path = f'{file_path}.partial'
+    memory_mapped_array = None
+
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    for rows in get_block_slices(shape[0], block_rows):
+        block_values = np.ma.asarray(variable[index_prefix + (rows,)])
+
+        if memory_mapped_array is None:
+            if dtype is None:
+                dtype = block_values.dtype
+
+                if fill_value is not None and np.isnan(fill_value):
+                    dtype = np.result_type(dtype, np.float32)
+
+            memory_mapped_array = np.lib.format.open_memmap(
+                temporary_path, mode='w+', dtype=dtype, shape=shape
+            )
+
+        memory_mapped_array[rows] = block_values.astype(dtype).filled(
+            fill_value=fill_value
+        )
+
+    memory_mapped_array.flush()
+    del memory_mapped_array
+    os.replace(temporary_path, file_path)
@@ -0,0 +1,156 @@
+"""This module contains a class to composite the reprojected variables of
+several granules into a single mosaic NetCDF-4 file. All granules must be
+reprojected to the same target grid, as defined in the Harmony message, so
+that each science variable has the same shape in every granule.
+
+The mosaic has the global attributes and metadata variables of the first
+granule. Each science variable is composited in memory, as each granule
+is reprojected, using one of the following rules:
+
+- latest: The value from the last granule with a valid pixel.
+- first: The value from the first granule with a valid pixel.
+- mean: The mean of all valid pixels.
+- min: The minimum of all valid pixels.
+- max: The maximum of all valid pixels.
+
+The composites are written to the mosaic once, when all granules have been
+added.
+
+"""
+
+import logging
+from typing import List, Optional
+
+import numpy as np
+from netCDF4 import Group, Variable
+
+from swath_projector.nc_merge import GranuleAggregator
+from swath_projector.utilities import write_populated_chunks
+
+COMPOSITING_RULES = ('latest', 'first', 'mean', 'min', 'max')
+
+
+class MosaicAggregator(GranuleAggregator):
+    """Composites the reprojected science variables of several granules
+    into a single output file. Granules should be added in order, such that
+    the "latest" granule is the last added. Only the composite of each
+    variable, and for the mean a count of valid pixels, are retained in
+    memory between granules.
+
+    """
+
+    def __init__(self, output_root: str, compositing_rule: str, logger: logging.Logger):
+        super().__init__(output_root, logger)
+        self.compositing_rule = compositing_rule
+        self.composites = {}
+        self.valid_counts = {}
+
+    def add_values(self, variable: Variable, values: np.ma.MaskedArray) -> None:
+        """Combine the values of a variable from a granule with the composite
+        of that variable from the previous granules.
+
+        """
+        variable_path = get_variable_path(variable)
+        values = np.ma.masked_invalid(values)
+
+        if self.compositing_rule == 'mean':
+            self.valid_counts[variable_path] = self.valid_counts.get(
+                variable_path, 0
+            ) + (~np.ma.getmaskarray(values)).astype(np.int64)
+
+        self.composites[variable_path] = get_composite_values(
+            self.composites.get(variable_path), values, self.compositing_rule
+        )
+
+    def write_output(self) -> None:
+        """Write the composite of each variable to the mosaic. Composites of
+        integer variables without a scale factor are rounded, as the mean
+        may not be a whole number.
+
+        """
+        self.logger.info(
+            f'Writing mosaic of {self.granule_index} granules using '
+            f'"{self.compositing_rule}" compositing.'
+        )
+
+        for variable_path, composite in self.composites.items():
+            variable = self.output_dataset[variable_path]
+
+            if self.compositing_rule == 'mean':
+                composite = composite / np.maximum(self.valid_counts[variable_path], 1)
+
+            if np.issubdtype(variable.dtype, np.integer) and (
+                'scale_factor' not in variable.ncattrs()
+            ):
+                composite = np.ma.round(composite)
+
+            write_populated_chunks(
+                variable, composite, (0,) * (variable.ndim - composite.ndim)
+            )
+
+        self.composites = {}
+        self.valid_counts = {}
+
+
+def get_gridded_variables(group: Group) -> List[str]:
+    """Return the full paths of all reprojected science variables within a
+    group, and all of its child groups. These are identified as the
+    variables with at least two dimensions that refer to a grid mapping.
+
+    """
+    gridded_variables = [
+        f'{group.path.rstrip("/")}/{variable.name}'
+        for variable in group.variables.values()
+        if variable.ndim >= 2 and 'grid_mapping' in variable.ncattrs()
+    ]
+
+    for child_group in group.groups.values():
+        gridded_variables.extend(get_gridded_variables(child_group))
+
+    return gridded_variables
+
+
+def get_variable_path(variable: Variable) -> str:
+    """Return the full path of a variable, including its group."""
+    return f'{variable.group().path.rstrip("/")}/{variable.name}'
+
+
+def get_composite_values(
+    composite: Optional[np.ma.MaskedArray],
+    values: np.ma.MaskedArray,
+    compositing_rule: str,
+) -> np.ma.MaskedArray:
+    """Combine the values of a variable from one granule with the composite
+    of the previous granules, if any, using the specified compositing rule.
+    Pixels without a valid value in any granule are masked. For the mean,
+    the composite is the sum of all valid values, which is divided by the
+    number of valid values once all granules have been added.
+
+    """
+    if composite is None:
+        if compositing_rule == 'mean':
+            return values.astype(np.float64)
+
+        return values.copy()
+
+    new_pixels = ~np.ma.getmaskarray(values)
+    existing_pixels = ~np.ma.getmaskarray(composite)
+
+    if compositing_rule == 'mean':
+        return np.ma.masked_array(
+            np.ma.filled(composite, 0.0) + np.ma.filled(values, 0.0),
+            mask=~(existing_pixels | new_pixels),
+        )
+
+    if compositing_rule == 'latest':
+        replace = new_pixels
+    elif compositing_rule == 'first':
+        replace = new_pixels & ~existing_pixels
+    elif compositing_rule == 'min':
+        replace = new_pixels & (~existing_pixels | (values.data < composite.data))
+    else:
+        replace = new_pixels & (~existing_pixels | (values.data > composite.data))
+
+    composite[replace] = values[replace]
+
+    return composite
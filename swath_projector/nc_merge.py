@@ -6,15 +6,24 @@ attributes.
 import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Dict, Optional, Set, Tuple, Union
+from math import isqrt
+from typing import Dict, List, Optional, Set, Tuple, Union
 
+import h5py
 import numpy as np
-from netCDF4 import Dataset, Variable
+from netCDF4 import Dataset, Variable, date2num, num2date
 from varinfo import VarInfoFromNetCDF4
 
+from swath_projector.chunk_writer import write_compressed_chunks
+from swath_projector.environment import get_integer_environment_variable
 from swath_projector.exceptions import MissingReprojectedDataError
-from swath_projector.utilities import get_variable_file_path, variable_in_dataset
+from swath_projector.utilities import (
+    get_variable_file_path,
+    variable_in_dataset,
+    write_populated_chunks,
+)
 
 # Values needed for history_json attribute
 HISTORY_JSON_SCHEMA = (
@@ -24,6 +33,21 @@ PROGRAM = 'sds/harmony-swath-projector'
 PROGRAM_REF = 'https://cmr.uat.earthdata.nasa.gov/search/concepts/S1237974711-EEDTEST'
 VERSION = '0.9.0'
 
+# The environment variable specifying the number of threads used to compress
+# the chunks of reprojected science variables in the merged output. If unset,
+# or one, chunks are compressed by the HDF5 library as they are written.
+COMPRESSION_THREADS_ENVIRONMENT_VARIABLE = 'SWATH_PROJECTOR_COMPRESSION_THREADS'
+# The target size, in bytes, of each chunk of a time-stacked variable. Chunks
+# span many time slices, but few pixels, so that retrieving the time series
+# of a single pixel reads few chunks.
+TIME_SERIES_CHUNK_BYTES = 2**20
+# The maximum number of time slices in a single chunk of a time-stacked
+# variable.
+MAXIMUM_TIME_CHUNK_SIZE = 512
+# The units of the `time` variable of a time-stacked output, when derived from
+# the start times of the input granules.
+TIME_STACK_UNITS = 'seconds since 1970-01-01T00:00:00Z'
+
 
 def create_output(
     request_parameters: dict,
@@ -33,6 +57,7 @@ def create_output(
     metadata_variables: Set[str],
     logger: logging.Logger,
     var_info: VarInfoFromNetCDF4,
+    additional_targets: Optional[List[str]] = None,
 ) -> None:
     """Merge the reprojected single-dataset NetCDF-4 files from `pyresample`
     into a single file, copying global attributes and metadata
@@ -42,9 +67,25 @@ def create_output(
     variables, and any accompanying CRS and coordinate variables. Note, the
     coordinate datasets will only be copied once.
 
+    For each additional target grid, the science variables are copied from
+    the single-band files in the subdirectory named after that target, to
+    a group of the same name. The dimensions, dimension variables and grid
+    mappings of these targets have distinct names, and are written to the
+    root group, alongside those of the main target grid.
+
     """
     input_file = request_parameters.get('input_file')
     logger.info(f'Creating output file "{output_file}"')
+    compression_threads = get_integer_environment_variable(
+        COMPRESSION_THREADS_ENVIRONMENT_VARIABLE, 1, 1, logger
+    )
+
+    if compression_threads > 1:
+        # Science variable values are written once the output is closed,
+        # compressing chunks in parallel.
+        deferred_writes = []
+    else:
+        deferred_writes = None
 
     with (
         Dataset(input_file) as input_dataset,
@@ -62,46 +103,469 @@ def create_output(
                 input_dataset, output_dataset, metadata_variable, logger
             )
 
-        output_extension = os.path.splitext(input_file)[1]
+        copy_science_variables(
+            input_dataset,
+            output_dataset,
+            temp_dir,
+            science_variables,
+            logger,
+            var_info,
+            deferred_writes,
+        )
 
-        for variable_name in science_variables:
-            dataset_file = get_variable_file_path(
-                temp_dir, variable_name, output_extension
+        for target_name in additional_targets or []:
+            logger.info(f'Adding variables for target grid "{target_name}".')
+            copy_science_variables(
+                input_dataset,
+                output_dataset,
+                os.path.join(temp_dir, target_name),
+                science_variables,
+                logger,
+                var_info,
+                deferred_writes,
+                f'/{target_name}',
             )
 
-            if os.path.isfile(dataset_file):
-                with Dataset(dataset_file) as data:
-                    set_dimensions(data, output_dataset)
-
-                    copy_science_variable(
-                        input_dataset,
-                        output_dataset,
-                        data,
-                        variable_name,
-                        logger,
-                        var_info,
+    if deferred_writes:
+        write_deferred_science_variables(
+            output_file, deferred_writes, compression_threads, logger
+        )
+
+
+class GranuleAggregator:
+    """Combines the reprojected science variables of several granules, all
+    on the same target grid, into a single NetCDF-4 output, e.g., a mosaic.
+    Each granule is added directly from its single band outputs, which are
+    removed once read, so no merged output is written for each granule.
+
+    The output file is created when the first granule is added, using the
+    extension of that granule, and has the global attributes and metadata
+    variables of that granule. Each science variable is created the first
+    time it is found in any granule, so the output contains the union of
+    the variables from all granules. Subclasses define how the values of
+    each granule are combined, via `add_values`, and may write combined
+    values when the aggregator is closed, via `write_output`.
+
+    """
+
+    def __init__(self, output_root: str, logger: logging.Logger):
+        self.output_root = output_root
+        self.logger = logger
+        self.output_file = None
+        self.output_dataset = None
+        self.granule_index = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        if exception_type is None:
+            self.close()
+        elif self.output_dataset is not None:
+            self.output_dataset.close()
+
+    def add_granule(
+        self,
+        request_parameters: Dict,
+        temp_dir: str,
+        science_variables: List[str],
+        metadata_variables: Set[str],
+        var_info: VarInfoFromNetCDF4,
+        additional_targets: Optional[List[str]] = None,
+    ) -> None:
+        """Add the reprojected science variables of a granule from their
+        single band outputs in the temporary directory. The variables for
+        each additional target grid are read from the subdirectory named
+        after that target, and added to a group of the same name.
+
+        """
+        input_file = request_parameters['input_file']
+        output_extension = os.path.splitext(input_file)[1]
+        target_directories = [('', temp_dir)] + [
+            (f'/{target_name}', os.path.join(temp_dir, target_name))
+            for target_name in additional_targets or []
+        ]
+
+        with Dataset(input_file) as input_dataset:
+            if self.output_dataset is None:
+                self.create_output(
+                    input_dataset, request_parameters, metadata_variables
+                )
+
+            self.add_metadata(input_dataset, metadata_variables)
+
+            for output_group, directory in target_directories:
+                for variable_name in science_variables:
+                    single_band_file = get_variable_file_path(
+                        directory, variable_name, output_extension
                     )
 
-                    # Copy supporting variables from the single band output:
-                    # the grid mapping, reprojected x and reprojected y.
-                    for variable_key in data.variables:
-                        if (
-                            variable_key not in output_dataset.variables
-                            and variable_key != variable_name
-                        ):
-                            copy_metadata_variable(
-                                data, output_dataset, variable_key, logger
-                            )
+                    if not os.path.isfile(single_band_file):
+                        self.logger.error(f'Cannot find "{single_band_file}".')
+                        raise MissingReprojectedDataError(variable_name)
+
+                    with Dataset(single_band_file) as single_band_dataset:
+                        variable = self.get_output_variable(
+                            input_dataset,
+                            single_band_dataset,
+                            variable_name,
+                            var_info,
+                            output_group,
+                        )
+                        self.add_values(variable, single_band_dataset[variable_name][:])
+
+                    os.remove(single_band_file)
+
+        self.granule_index += 1
+
+    def create_output(
+        self,
+        input_dataset: Dataset,
+        request_parameters: Dict,
+        metadata_variables: Set[str],
+    ) -> None:
+        """Create the output file, with the global attributes, `time`
+        dimension and metadata variables of the first granule.
+
+        """
+        self.output_file = (
+            self.output_root + os.path.splitext(input_dataset.filepath())[1]
+        )
+        self.logger.info(f'Creating output file "{self.output_file}"')
+        self.output_dataset = Dataset(self.output_file, 'w', format='NETCDF4')
+        set_output_attributes(input_dataset, self.output_dataset, request_parameters)
+        self.create_time_dimension(input_dataset)
+
+        for metadata_variable in metadata_variables:
+            if not variable_in_dataset(metadata_variable, self.output_dataset):
+                self.create_metadata_variable(input_dataset, metadata_variable)
 
-            else:
-                logger.error(f'Cannot find "{dataset_file}".')
-                raise MissingReprojectedDataError(variable_name)
+    def create_time_dimension(self, input_dataset: Dataset) -> None:
+        """Add the `time` dimension of the first granule, if present."""
+        if 'time' in input_dataset.dimensions:
+            copy_time_dimension(input_dataset, self.output_dataset, self.logger)
+
+    def create_metadata_variable(
+        self, input_dataset: Dataset, metadata_variable: str
+    ) -> None:
+        """Copy a metadata variable from the first granule."""
+        copy_metadata_variable(
+            input_dataset, self.output_dataset, metadata_variable, self.logger
+        )
+
+    def add_metadata(
+        self, input_dataset: Dataset, metadata_variables: Set[str]
+    ) -> None:
+        """Add any metadata from each granule, e.g., its time. By default,
+        only the metadata of the first granule is retained.
+
+        """
+
+    def get_output_variable(
+        self,
+        input_dataset: Dataset,
+        single_band_dataset: Dataset,
+        variable_name: str,
+        var_info: VarInfoFromNetCDF4,
+        output_group: str,
+    ) -> Variable:
+        """Return the output variable for a reprojected science variable. If
+        this is the first granule containing the variable, it is created,
+        using the attributes of the granule, and the grid mapping and
+        dimension variables of its single band output are added, if not
+        already present.
+
+        """
+        output_path = f'{output_group}{variable_name}'
+
+        if variable_in_dataset(output_path, self.output_dataset):
+            return self.output_dataset[output_path]
+
+        self.logger.info(f'Adding reprojected "{output_path}" to the output')
+        set_dimensions(single_band_dataset, self.output_dataset)
+        attributes = get_science_variable_attributes(
+            input_dataset, single_band_dataset, variable_name, var_info
+        )
+        dimensions = single_band_dataset[variable_name].dimensions
+
+        if 'time' in self.output_dataset.dimensions:
+            dimensions = ('time',) + dimensions
+
+        data_type = input_dataset[variable_name].datatype
+        variable = self.output_dataset.createVariable(
+            output_path,
+            data_type,
+            dimensions=dimensions,
+            fill_value=get_fill_value_from_attributes(attributes),
+            zlib=True,
+            complevel=6,
+            chunksizes=self.get_chunk_sizes(dimensions, data_type),
+        )
+        variable.setncatts(attributes)
+
+        for variable_key in single_band_dataset.variables:
+            if (
+                variable_key not in self.output_dataset.variables
+                and variable_key != variable_name
+            ):
+                copy_metadata_variable(
+                    single_band_dataset, self.output_dataset, variable_key, self.logger
+                )
+
+        return variable
+
+    def get_chunk_sizes(
+        self, dimensions: Tuple[str], data_type: np.dtype
+    ) -> Optional[Tuple[int]]:
+        """Return the chunk sizes of a science variable, or `None` to use the
+        default chunking of the NetCDF-4 library.
+
+        """
+        return None
+
+    def add_values(self, variable: Variable, values: np.ma.MaskedArray) -> None:
+        """Combine the reprojected values of a science variable from a granule
+        with those already in the output.
+
+        """
+        raise NotImplementedError
+
+    def write_output(self) -> None:
+        """Write any values combined in memory to the output. By default, all
+        values are written as each granule is added.
+
+        """
+
+    def close(self) -> None:
+        """Write any combined values, and close the output file."""
+        self.write_output()
+        self.output_dataset.close()
+
+
+class TimeStackAggregator(GranuleAggregator):
+    """Stacks the reprojected science variables of several granules along a
+    `time` dimension, with one `time` slice per granule. The values of each
+    granule are written directly to their slice of the output variables,
+    which are chunked to favour time-series access, so no more than one
+    granule is held in memory.
+
+    If the first granule has a `time` variable, the `time` of each slice is
+    the first `time` value of its granule, converted to the units of the
+    first granule. Otherwise, the `time` of each slice is derived from the
+    start time of its granule, with missing start times written as fill
+    values. Metadata variables with a leading `time` dimension are also
+    stacked, while all other metadata variables are copied from the first
+    granule.
+
+    """
+
+    def __init__(
+        self,
+        output_root: str,
+        granule_times: List[Optional[datetime]],
+        logger: logging.Logger,
+    ):
+        super().__init__(output_root, logger)
+        self.granule_times = granule_times
+        self.stacked_metadata_variables = []
+
+    def create_time_dimension(self, input_dataset: Dataset) -> None:
+        """Add a `time` dimension with one element per granule, and the
+        corresponding `time` variable.
+
+        """
+        self.logger.info(f'Creating time stack of {len(self.granule_times)} granules.')
+        self.output_dataset.createDimension('time', len(self.granule_times))
+
+        if 'time' in input_dataset.variables:
+            attributes = read_attrs(input_dataset['time'])
+            time_variable = self.output_dataset.createVariable(
+                'time',
+                input_dataset['time'].datatype,
+                dimensions=('time',),
+                fill_value=get_fill_value_from_attributes(attributes),
+            )
+            time_variable.setncatts(attributes)
+        else:
+            time_variable = self.output_dataset.createVariable(
+                'time', np.float64, dimensions=('time',)
+            )
+            time_variable.setncatts(
+                {
+                    'standard_name': 'time',
+                    'units': TIME_STACK_UNITS,
+                    'calendar': 'standard',
+                }
+            )
+
+    def create_metadata_variable(
+        self, input_dataset: Dataset, metadata_variable: str
+    ) -> None:
+        """Create a metadata variable with a leading `time` dimension, to be
+        populated as each granule is added, or copy any other metadata
+        variable from the first granule.
+
+        """
+        input_variable = input_dataset[metadata_variable]
+
+        if input_variable.dimensions[:1] != ('time',):
+            super().create_metadata_variable(input_dataset, metadata_variable)
+            return
+
+        self.logger.info(f'Stacking "{metadata_variable}" along the "time" dimension.')
+        set_metadata_dimensions(metadata_variable, input_dataset, self.output_dataset)
+        attributes = read_attrs(input_variable)
+        self.output_dataset.createVariable(
+            metadata_variable,
+            input_variable.datatype,
+            dimensions=input_variable.dimensions,
+            fill_value=get_fill_value_from_attributes(attributes),
+            zlib=True,
+            complevel=6,
+        ).setncatts(attributes)
+        self.stacked_metadata_variables.append(metadata_variable)
+
+    def add_metadata(
+        self, input_dataset: Dataset, metadata_variables: Set[str]
+    ) -> None:
+        """Write the `time` of the granule, and the first `time` slice of
+        each stacked metadata variable, to the slice of the granule.
+
+        """
+        self.output_dataset['time'][self.granule_index] = get_stacked_time_value(
+            input_dataset,
+            self.output_dataset['time'],
+            self.granule_times[self.granule_index],
+        )
+
+        for metadata_variable in self.stacked_metadata_variables:
+            if variable_in_dataset(metadata_variable, input_dataset):
+                self.output_dataset[metadata_variable][self.granule_index] = (
+                    input_dataset[metadata_variable][0]
+                )
+
+    def get_chunk_sizes(
+        self, dimensions: Tuple[str], data_type: np.dtype
+    ) -> Optional[Tuple[int]]:
+        """Return chunk sizes spanning many time slices, but few pixels."""
+        return get_time_series_chunk_sizes(
+            tuple(
+                self.output_dataset.dimensions[dimension].size
+                for dimension in dimensions
+            ),
+            data_type,
+        )
+
+    def add_values(self, variable: Variable, values: np.ma.MaskedArray) -> None:
+        """Write the values of a granule to its `time` slice. Chunks without
+        valid pixels are not written, and slices for granules without the
+        variable remain filled.
+
+        """
+        leading_indices = (self.granule_index,) + (0,) * (
+            variable.ndim - values.ndim - 1
+        )
+        write_populated_chunks(variable, values, leading_indices)
+
+
+def get_stacked_time_value(
+    input_dataset: Dataset,
+    time_variable: Variable,
+    granule_time: Optional[datetime],
+) -> Union[float, np.ma.core.MaskedConstant]:
+    """Return the `time` of a granule in the units of the time-stacked output.
+    This is the first `time` value of the granule, if present, otherwise
+    the start time of the granule. If neither is available, the value is
+    masked, to be written as a fill value.
+
+    """
+    units = time_variable.units
+    calendar = getattr(time_variable, 'calendar', 'standard')
+
+    if 'time' in input_dataset.variables and input_dataset['time'].size > 0:
+        time_value = input_dataset['time'][0]
+        granule_units = getattr(input_dataset['time'], 'units', units)
+
+        if granule_units != units:
+            time_value = date2num(
+                num2date(time_value, granule_units, calendar), units, calendar
+            )
+    elif granule_time is None:
+        time_value = np.ma.masked
+    elif units == TIME_STACK_UNITS:
+        time_value = granule_time.timestamp()
+    else:
+        time_value = date2num(
+            granule_time.astimezone(timezone.utc).replace(tzinfo=None),
+            units,
+            calendar,
+        )
+
+    return time_value
+
+
+def copy_science_variables(
+    input_dataset: Dataset,
+    output_dataset: Dataset,
+    temp_dir: str,
+    science_variables: Set[str],
+    logger: logging.Logger,
+    var_info: VarInfoFromNetCDF4,
+    deferred_writes: Optional[List[Dict]],
+    output_group: str = '',
+) -> None:
+    """Copy each reprojected science variable from its single-band file in
+    the temporary directory to the merged output, within the specified
+    output group. The supporting variables of each single-band file, the
+    grid mapping and dimension variables, are copied to the root group of
+    the merged output, if not already present.
+
+    """
+    output_extension = os.path.splitext(input_dataset.filepath())[1]
+
+    for variable_name in science_variables:
+        dataset_file = get_variable_file_path(temp_dir, variable_name, output_extension)
+
+        if os.path.isfile(dataset_file):
+            with Dataset(dataset_file) as data:
+                set_dimensions(data, output_dataset)
+
+                copy_science_variable(
+                    input_dataset,
+                    output_dataset,
+                    data,
+                    variable_name,
+                    logger,
+                    var_info,
+                    deferred_writes,
+                    output_group,
+                )
+
+                # Copy supporting variables from the single band output:
+                # the grid mapping, reprojected x and reprojected y.
+                for variable_key in data.variables:
+                    if (
+                        variable_key not in output_dataset.variables
+                        and variable_key != variable_name
+                    ):
+                        copy_metadata_variable(
+                            data, output_dataset, variable_key, logger
+                        )
+
+        else:
+            logger.error(f'Cannot find "{dataset_file}".')
+            raise MissingReprojectedDataError(variable_name)
 
 
 def set_output_attributes(
     input_dataset: Dataset, output_dataset: Dataset, request_parameters: Dict
 ) -> None:
-    """Set the global attributes of the merged output file. These begin as the
+    """Set the global attributes of the merged output file."""
+    output_dataset.setncatts(get_output_attributes(input_dataset, request_parameters))
+
+
+def get_output_attributes(input_dataset: Dataset, request_parameters: Dict) -> Dict:
+    """Return the global attributes of the merged output file. These begin as the
     global attributes of the input granule, but are updated to also include
     the provenance data via an updated `history` CF attribute (or `History`
     if that is already present), and a `history_json` attribute that is
@@ -180,7 +644,7 @@ def set_output_attributes(
     output_history = '\n'.join(filter(None, [input_history, new_history_line]))
     output_attributes[cf_att_name] = output_history
 
-    output_dataset.setncatts(output_attributes)
+    return output_attributes
 
 
 def create_history_record(input_history: str, request_parameters: dict) -> Dict:
@@ -224,6 +688,36 @@ def copy_time_dimension(
     copy_metadata_variable(input_dataset, output_dataset, 'time', logger)
 
 
+def get_time_series_chunk_sizes(shape: Tuple[int], dtype: np.dtype) -> Tuple[int]:
+    """Return the chunk sizes for a time-stacked variable, favouring access
+    to the time series of individual pixels. Chunks span all time slices,
+    up to `MAXIMUM_TIME_CHUNK_SIZE`, with the remaining dimensions reduced
+    so that each chunk is approximately `TIME_SERIES_CHUNK_BYTES`. For
+    variables with more than two non-time dimensions, only the last two are
+    chunked with more than one element.
+
+    """
+    time_chunk_size = max(min(shape[0], MAXIMUM_TIME_CHUNK_SIZE), 1)
+    chunk_pixels = max(
+        TIME_SERIES_CHUNK_BYTES // (time_chunk_size * max(np.dtype(dtype).itemsize, 1)),
+        1,
+    )
+
+    if len(shape) == 1:
+        return (time_chunk_size,)
+
+    if len(shape) == 2:
+        return (time_chunk_size, max(min(shape[1], chunk_pixels), 1))
+
+    chunk_side = max(isqrt(chunk_pixels), 1)
+
+    return (
+        (time_chunk_size,)
+        + (1,) * (len(shape) - 3)
+        + tuple(max(min(size, chunk_side), 1) for size in shape[-2:])
+    )
+
+
 def set_dimensions(input_dataset: Dataset, output_dataset: Dataset) -> None:
     """Read the dimensions in the single band intermediate file. Add each
     dimension to the output dataset that is not already present.
@@ -291,6 +785,8 @@ def copy_science_variable(
     variable_name: str,
     logger: logging.Logger,
     var_info: VarInfoFromNetCDF4,
+    deferred_writes: Optional[List[Dict]] = None,
+    output_group: str = '',
 ) -> None:
     """Write a reprojected variable from a single-band output file to the
     merged output file. This will first obtain metadata (dimensions,
@@ -300,6 +796,13 @@ def copy_science_variable(
     attributes include a scale and offset, the output values are adjusted
     accordingly.
 
+    If a list of deferred writes is supplied, the values are not written.
+    Instead, the information needed to write them later is appended to that
+    list.
+
+    The variable is written to the same path within the output group,
+    which defaults to the root group.
+
     """
     logger.info(f'Adding reprojected "{variable_name}" to the output')
 
@@ -313,7 +816,7 @@ def copy_science_variable(
     fill_value = get_fill_value_from_attributes(attributes)
 
     variable = output_dataset.createVariable(
-        variable_name,
+        f'{output_group}{variable_name}',
         input_dataset[variable_name].datatype,
         dimensions=dimensions,
         fill_value=fill_value,
@@ -321,9 +824,44 @@ def copy_science_variable(
         complevel=6,
     )
 
-    # Extract the data from the single band image, and ensure it is correctly
-    # scaled, so packing occurs correctly on write.
-    raw_data = single_band_dataset[variable_name][:].data
+    single_band_data = single_band_dataset[variable_name][:]
+
+    if np.ma.count(single_band_data) == 0:
+        # The variable only contains fill values, so no values are written.
+        # The output variable will read as the fill value throughout.
+        logger.info(f'"{variable_name}" only contains fill values.')
+    elif deferred_writes is not None:
+        deferred_writes.append(
+            {
+                'variable_name': variable_name,
+                'output_variable_name': f'{output_group}{variable_name}',
+                'single_band_file': single_band_dataset.filepath(),
+                'attributes': attributes,
+                'fill_value': fill_value,
+                'leading_indices': (0,) if 'time' in variable.dimensions else (),
+            }
+        )
+    else:
+        packed_data = get_packed_values(single_band_data, attributes, fill_value)
+
+        if 'time' in variable.dimensions:
+            write_populated_chunks(variable, packed_data, (0,))
+        else:
+            write_populated_chunks(variable, packed_data)
+
+    variable.setncatts(attributes)
+
+
+def get_packed_values(
+    single_band_data: np.ma.MaskedArray, attributes: Dict, fill_value: Optional
+) -> np.ndarray:
+    """Extract the data from the single band image, and ensure it is
+    correctly scaled, so packing occurs correctly on write. If there is a
+    fill value, unpopulated pixels are masked, so that chunks only
+    containing fill values can remain unwritten.
+
+    """
+    raw_data = single_band_data.data
     scale_factor = attributes.get('scale_factor', 1)
     add_offset = attributes.get('add_offset', 0)
 
@@ -333,12 +871,54 @@ def copy_science_variable(
     filled_data = np.where(raw_data == fill_value)
     packed_data[filled_data] = fill_value
 
-    if 'time' in variable.dimensions:
-        variable[0, :] = packed_data
-    else:
-        variable[:] = packed_data
+    if fill_value is not None:
+        # Only write chunks that contain valid pixels, leaving the rest
+        # unallocated to be read as the fill value.
+        packed_data = np.ma.masked_array(
+            packed_data, mask=np.ma.getmaskarray(single_band_data)
+        )
 
-    variable.setncatts(attributes)
+    return packed_data
+
+
+def write_deferred_science_variables(
+    output_file: str,
+    deferred_writes: List[Dict],
+    compression_threads: int,
+    logger: logging.Logger,
+) -> None:
+    """Write the values of science variables that were created in the merged
+    output, but not populated. The single-band output of each variable is
+    read again, and the chunks are compressed in a thread pool, then
+    stored using HDF5 direct chunk writes.
+
+    """
+    logger.info(
+        f'Writing {len(deferred_writes)} science variables using '
+        f'{compression_threads} compression threads.'
+    )
+
+    with (
+        h5py.File(output_file, 'r+') as output_dataset,
+        ThreadPoolExecutor(max_workers=compression_threads) as executor,
+    ):
+        for deferred_write in deferred_writes:
+            variable_name = deferred_write['variable_name']
+
+            with Dataset(deferred_write['single_band_file']) as single_band_dataset:
+                single_band_data = single_band_dataset[variable_name][:]
+
+            write_compressed_chunks(
+                output_dataset[deferred_write['output_variable_name']],
+                get_packed_values(
+                    single_band_data,
+                    deferred_write['attributes'],
+                    deferred_write['fill_value'],
+                ),
+                deferred_write['leading_indices'],
+                executor,
+                compression_threads * 2,
+            )
 
 
 def get_science_variable_attributes(
@@ -29,6 +29,8 @@ import numpy as np
 from netCDF4 import Dataset
 from pyresample.geometry import AreaDefinition
 
+from swath_projector.utilities import write_populated_chunks
+
 DIMENSION_METADATA = {
     'lat': {
         'long_name': 'latitude',
@@ -52,6 +54,14 @@ DIMENSION_METADATA = {
     },
 }
 HARMONY_TARGET = 'harmony_message_target'
+# The key in the reprojection cache of an additional target grid for the
+# suffix appended to the names of all dimensions of that target, so that they
+# are distinct from those of other targets in the merged output.
+DIMENSION_SUFFIX = 'dimension_suffix'
+# The maximum length of each dimension of a chunk in the science variable. The
+# science variable is chunked so that only chunks containing valid pixels
+# are written to the single band output.
+MAXIMUM_CHUNK_SIZE = 1024
 
 
 def write_single_band_output(
@@ -111,17 +121,23 @@ def write_dimensions(
       have a suffix added, so that they can all be included in the merged
       output.
 
+    If the reprojection cache belongs to an additional target grid requested
+    alongside the main target, the suffix of that target is also added to
+    the dimensions, e.g., ('lat_target_1', 'lon_target_1').
+
     """
     coordinates_key = tuple(target_area.area_id.split(', '))
     grid_mapping_name = target_area.crs.to_cf().get('grid_mapping_name')
 
+    target_suffix = cache.get(DIMENSION_SUFFIX, '')
+
     # Identify the base name for the dimensions (geographic or not):
     if grid_mapping_name == 'latitude_longitude':
-        x_dim = 'lon'
-        y_dim = 'lat'
+        x_dim = 'lon' + target_suffix
+        y_dim = 'lat' + target_suffix
     else:
-        x_dim = 'x'
-        y_dim = 'y'
+        x_dim = 'x' + target_suffix
+        y_dim = 'y' + target_suffix
 
     # Determine whether a suffix is required (e.g. multiple target grids).
     if HARMONY_TARGET not in cache:
@@ -132,7 +148,7 @@ def write_dimensions(
             y_dim, x_dim = cached_dimensions
         else:
             # Derive suffix
-            target_grids = len(cache)
+            target_grids = sum(isinstance(key, tuple) for key in cache)
 
             if target_grids == 1:
                 # The first dimensions will be ('y', 'x') or ('lat', 'lon')
@@ -215,14 +231,32 @@ def write_science_variable(
     Note, the `netCDF4` library automatically applied the `add_offset` and
     `scale_factor` keywords on reading and writing of `Variable` objects.
 
+    If the attributes include a `_FillValue`, this is set when creating the
+    variable. The variable is chunked, and only chunks containing unmasked
+    values are written. Chunks that are entirely masked will read as the
+    fill value.
+
     """
+    fill_value = attributes.pop('_FillValue', None)
+    chunk_sizes = tuple(
+        min(dimension_size, MAXIMUM_CHUNK_SIZE) for dimension_size in data_values.shape
+    )
+
     variable = dataset.createVariable(
-        variable_full_name, data_values.dtype, dimensions=dimensions
+        variable_full_name,
+        data_values.dtype,
+        dimensions=dimensions,
+        fill_value=fill_value,
+        chunksizes=chunk_sizes,
     )
 
     attributes['grid_mapping'] = grid_mapping_name
     variable.setncatts(attributes)
-    variable[:] = data_values[:]
+
+    if fill_value is not None:
+        write_populated_chunks(variable, data_values)
+    else:
+        variable[:] = data_values[:]
 
 
 def write_dimension_variables(
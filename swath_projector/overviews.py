@@ -0,0 +1,262 @@
+"""This module contains functions to add decimated overview levels of each
+reprojected science variable to a NetCDF-4 output file. Overviews allow
+visualisation clients to read a coarse version of the output at low zoom
+levels, without downsampling the full-resolution grid themselves, or
+requesting a second reprojection at a coarser resolution.
+
+Each overview level is a group in the root of the output, named after the
+decimation factor, e.g., `/overview_2`, `/overview_4` and `/overview_8`.
+Each group contains a copy of the horizontal spatial dimensions and their
+dimension variables at the coarser resolution, along with a decimated copy
+of every gridded science variable, at the same relative path. The overview
+variables retain the attributes of the full-resolution variables, including
+their `grid_mapping`, which refers to the grid mapping variable in the root
+group, resolved via the CF-Conventions search of ancestor groups. Any other
+dimensions, such as `time`, are shared with the root group.
+
+Overview values are derived from the already reprojected grid, using one of
+the following reduction methods:
+
+- average: The mean of all valid pixels within each block of the full
+  resolution grid. Variables with `flag_values` or `flag_masks` are always
+  reduced using the nearest method, as their values are categorical.
+- nearest: The pixel of the full resolution grid nearest to the centre of
+  each block.
+
+"""
+
+import logging
+from typing import List, Tuple
+
+import numpy as np
+from netCDF4 import Dataset, Group
+
+from swath_projector.mosaic import get_gridded_variables
+from swath_projector.nc_single_band import MAXIMUM_CHUNK_SIZE
+from swath_projector.utilities import write_populated_chunks
+
+OVERVIEW_RESAMPLING_METHODS = ('average', 'nearest')
+# The prefix of each group containing an overview level, which is followed by
+# the decimation factor of that level.
+OVERVIEW_GROUP_PREFIX = 'overview_'
+# Attributes indicating a variable contains categorical values, which cannot
+# be averaged.
+FLAG_ATTRIBUTES = ('flag_values', 'flag_masks')
+
+
+def create_overviews(
+    output_file: str,
+    overview_factors: List[int],
+    resampling: str,
+    logger: logging.Logger,
+) -> None:
+    """Add an overview level to the output file for each decimation factor.
+    Each level is derived from the full-resolution grid, rather than the
+    previous level, so that the averaging of each level is exact.
+
+    """
+    with Dataset(output_file, 'a') as output_dataset:
+        gridded_variables = get_gridded_variables(output_dataset)
+
+        for overview_factor in overview_factors:
+            logger.info(
+                f'Adding {overview_factor}x overview of {len(gridded_variables)} '
+                f'variables using "{resampling}" resampling.'
+            )
+            overview_group = output_dataset.createGroup(
+                f'{OVERVIEW_GROUP_PREFIX}{overview_factor}'
+            )
+
+            for variable_path in gridded_variables:
+                write_overview_variable(
+                    output_dataset,
+                    overview_group,
+                    variable_path,
+                    overview_factor,
+                    resampling,
+                )
+
+
+def write_overview_variable(
+    output_dataset: Dataset,
+    overview_group: Group,
+    variable_path: str,
+    overview_factor: int,
+    resampling: str,
+) -> None:
+    """Write a decimated copy of a full-resolution variable to the overview
+    group, at the same relative path. The horizontal spatial dimensions of
+    the variable are added to the overview group, if not already present.
+    Values are reduced without unpacking, so packed integer variables are
+    rounded to the nearest packed value.
+
+    """
+    source_variable = output_dataset[variable_path]
+    source_variable.set_auto_scale(False)
+    attributes = {
+        attribute_name: source_variable.getncattr(attribute_name)
+        for attribute_name in source_variable.ncattrs()
+    }
+    fill_value = attributes.pop('_FillValue', None)
+
+    if any(flag_attribute in attributes for flag_attribute in FLAG_ATTRIBUTES):
+        resampling = 'nearest'
+
+    write_overview_dimensions(
+        output_dataset, overview_group, source_variable.dimensions[-2:], overview_factor
+    )
+
+    group_path, variable_name = variable_path.rsplit('/', 1)
+    output_group = overview_group
+
+    for group_name in filter(None, group_path.split('/')):
+        if group_name in output_group.groups:
+            output_group = output_group.groups[group_name]
+        else:
+            output_group = output_group.createGroup(group_name)
+
+    overview_shape = source_variable.shape[:-2] + get_overview_shape(
+        source_variable.shape[-2:], overview_factor
+    )
+
+    overview_variable = output_group.createVariable(
+        variable_name,
+        source_variable.datatype,
+        dimensions=source_variable.dimensions,
+        fill_value=fill_value,
+        zlib=True,
+        complevel=6,
+        chunksizes=(1,) * (len(overview_shape) - 2)
+        + tuple(
+            min(dimension_size, MAXIMUM_CHUNK_SIZE)
+            for dimension_size in overview_shape[-2:]
+        ),
+    )
+    overview_variable.setncatts(attributes)
+    overview_variable.set_auto_scale(False)
+
+    for leading_indices in np.ndindex(source_variable.shape[:-2]):
+        overview_values = get_overview_values(
+            source_variable[leading_indices], overview_factor, resampling
+        )
+
+        if fill_value is not None:
+            # Auto-scaling is disabled, so masked pixels are not filled when
+            # written. The mask is retained to identify unpopulated chunks.
+            overview_values = np.ma.masked_array(
+                np.ma.filled(overview_values, fill_value),
+                mask=np.ma.getmaskarray(overview_values),
+            )
+
+        write_populated_chunks(overview_variable, overview_values, leading_indices)
+
+
+def write_overview_dimensions(
+    output_dataset: Dataset,
+    overview_group: Group,
+    dimension_names: Tuple[str],
+    overview_factor: int,
+) -> None:
+    """Add the horizontal spatial dimensions of a variable to the overview
+    group, with their dimension variables at the coarser resolution. Each
+    dimension is only written once per overview group.
+
+    """
+    for dimension_name in dimension_names:
+        if dimension_name in overview_group.dimensions:
+            continue
+
+        dimension_size = output_dataset.dimensions[dimension_name].size
+        overview_size = get_overview_shape((dimension_size,), overview_factor)[0]
+        overview_group.createDimension(dimension_name, overview_size)
+
+        if dimension_name in output_dataset.variables:
+            source_variable = output_dataset[dimension_name]
+            dimension_variable = overview_group.createVariable(
+                dimension_name, source_variable.datatype, (dimension_name,)
+            )
+            dimension_variable.setncatts(
+                {
+                    attribute_name: source_variable.getncattr(attribute_name)
+                    for attribute_name in source_variable.ncattrs()
+                    if attribute_name not in ('_FillValue', 'bounds')
+                }
+            )
+            dimension_variable[:] = get_overview_coordinates(
+                source_variable[:], overview_factor
+            )
+
+
+def get_overview_shape(shape: Tuple[int], overview_factor: int) -> Tuple[int]:
+    """Return the shape of an overview, in which each element covers a block
+    of `overview_factor` elements along each dimension of the full
+    resolution grid. Partial blocks at the edge of the grid are retained.
+
+    """
+    return tuple(-(-dimension_size // overview_factor) for dimension_size in shape)
+
+
+def get_overview_coordinates(
+    coordinates: np.ndarray, overview_factor: int
+) -> np.ndarray:
+    """Return the centres of the overview pixels along a regularly spaced
+    dimension of the full resolution grid. The overview pixels along a
+    dimension share the same pixel size, so a partial block at the edge of
+    the grid extends beyond the full resolution grid.
+
+    """
+    if coordinates.size < 2:
+        return coordinates
+
+    pixel_size = coordinates[1] - coordinates[0]
+    overview_indices = np.arange(
+        get_overview_shape(coordinates.shape, overview_factor)[0]
+    )
+
+    return (
+        coordinates[0]
+        + (overview_indices * overview_factor + (overview_factor - 1) / 2) * pixel_size
+    )
+
+
+def get_overview_values(
+    values: np.ma.MaskedArray, overview_factor: int, resampling: str
+) -> np.ma.MaskedArray:
+    """Reduce a 2-D array by the overview factor along both dimensions. The
+    average method takes the mean of the valid pixels in each block, with
+    blocks without any valid pixels masked. Integer values are rounded to
+    the nearest integer. The nearest method takes the pixel closest to the
+    centre of each block, or the last pixel of a partial block, if that is
+    closer.
+
+    """
+    values = np.ma.masked_invalid(values, copy=False)
+    overview_rows, overview_columns = get_overview_shape(values.shape, overview_factor)
+
+    if resampling == 'nearest':
+        block_centre = overview_factor // 2
+        rows = np.minimum(
+            np.arange(overview_rows) * overview_factor + block_centre,
+            values.shape[0] - 1,
+        )
+        columns = np.minimum(
+            np.arange(overview_columns) * overview_factor + block_centre,
+            values.shape[1] - 1,
+        )
+        return values[np.ix_(rows, columns)]
+
+    # Pad the values to a whole number of blocks, with masked pixels, then
+    # average the valid pixels in each block.
+    padded_values = np.ma.masked_all(
+        (overview_rows * overview_factor, overview_columns * overview_factor),
+        dtype=np.float64,
+    )
+    padded_values[: values.shape[0], : values.shape[1]] = values
+    overview_values = padded_values.reshape(
+        overview_rows, overview_factor, overview_columns, overview_factor
+    ).mean(axis=(1, 3))
+
+    if np.issubdtype(values.dtype, np.integer):
+        overview_values = np.ma.round(overview_values)
+
+    return overview_values.astype(values.dtype)
@@ -3,8 +3,7 @@
 import functools
 import logging
 import os
-from tempfile import mkdtemp
-from typing import Dict
+from typing import Any, Dict, List, Optional, Set
 
 from harmony.message import Message
 from pyproj import Proj
@@ -12,6 +11,14 @@ from varinfo import VarInfoFromNetCDF4
 
 from swath_projector import nc_merge
 from swath_projector.interpolation import resample_all_variables
+from swath_projector.overviews import OVERVIEW_RESAMPLING_METHODS, create_overviews
+from swath_projector.tiling import (
+    TILE_DIRECTORY_SUFFIX,
+    TILE_SCHEMES,
+    get_tile_parameters,
+    tile_is_empty,
+)
+from swath_projector.var_info_cache import get_var_info
 
 RADIUS_EARTH_METRES = (
     6_378_137  # http://nssdc.gsfc.nasa.gov/planetary/factsheet/earthfact.html
@@ -19,6 +26,38 @@ RADIUS_EARTH_METRES = (
 CRS_DEFAULT = '+proj=longlat +ellps=WGS84'
 INTERPOLATION_DEFAULT = 'ewa-nn'
 CF_CONFIG_FILE = 'swath_projector/cf_config.json'
+# Properties of the Harmony message `format` that are used by this service.
+PROCESSED_FORMAT_PROPERTIES = (
+    'crs',
+    'interpolation',
+    'scaleExtent',
+    'scaleSize',
+    'height',
+    'width',
+)
+# The output format that writes a Zarr directory store, instead of a merged
+# NetCDF-4 file, and the extension of that store.
+ZARR_MIME_TYPE = 'application/x-zarr'
+ZARR_EXTENSION = '.zarr'
+# The names of the optional `extraArgs` properties of the Harmony message that
+# request overview levels in the output, and the reduction method used to
+# derive them.
+OVERVIEWS_EXTRA_ARGUMENT = 'overviews'
+OVERVIEW_RESAMPLING_EXTRA_ARGUMENT = 'overviewResampling'
+OVERVIEW_RESAMPLING_DEFAULT = 'average'
+# The name of the optional `extraArgs` property of the Harmony message that
+# lists additional target grids, and the prefix of the output group for each
+# of those targets, which is followed by the index of the target, e.g.,
+# "target_1".
+TARGETS_EXTRA_ARGUMENT = 'targets'
+TARGET_GROUP_PREFIX = 'target_'
+# The name of the optional `extraArgs` property of the Harmony message that
+# requests an output file for each intersected tile of a standard tiling
+# scheme, instead of a single output.
+TILE_SCHEME_EXTRA_ARGUMENT = 'tileScheme'
+# The maximum number of `Proj` objects retained between requests by a
+# long-lived worker process.
+PROJECTION_CACHE_SIZE = 16
 
 
 def reproject(
@@ -28,19 +67,50 @@ def reproject(
     local_filename: str,
     temp_dir: str,
     logger: logging.Logger,
+    geolocation_cache: Optional[Dict] = None,
+    include_overviews: bool = True,
+    aggregator: Optional[nc_merge.GranuleAggregator] = None,
 ) -> str:
     """Derive reprojection parameters from the input Harmony message. Then
     extract listing of science variables and coordinate variables from the
     source granule. Then reproject all science variables. Finally merge all
     individual output bands back into a single NetCDF-4 file.
 
+    The optional geolocation cache is shared between consecutive granules
+    that are reprojected to the same target grid, see
+    `resample_all_variables` for more information.
+
+    Any additional target grids listed in the message are reprojected from
+    the same read of each variable, and written to their own groups in the
+    output file.
+
+    If requested, overview levels are added to the output, unless
+    `include_overviews` is `False`. This allows the overviews of outputs
+    that combine several granules to be derived from the combined output.
+
+    If a tiling scheme is requested, the returned path is a directory
+    containing an output file for each tile intersected by the swath.
+
+    If an aggregator is supplied, e.g., for a mosaic, the reprojected
+    variables are added to the aggregated output, instead of being merged
+    into an output for this granule, and the path of the aggregated output
+    is returned. Overviews are not added to the aggregated output.
+
     """
     parameters = get_parameters_from_message(message, granule_url, local_filename)
+    additional_target_parameters = get_additional_target_parameters(
+        message, granule_url, local_filename
+    )
 
-    # Set up source and destination files
-    temp_dir = mkdtemp()
+    # Set up destination file in the supplied temporary directory
     root_ext = os.path.splitext(os.path.basename(parameters.get('input_file')))
-    output_file = temp_dir + os.sep + root_ext[0] + '_repr' + root_ext[1]
+
+    if parameters['output_format'] == ZARR_MIME_TYPE:
+        output_file = temp_dir + os.sep + root_ext[0] + '_repr' + ZARR_EXTENSION
+    elif parameters['tile_scheme'] is not None:
+        output_file = temp_dir + os.sep + root_ext[0] + '_repr' + TILE_DIRECTORY_SUFFIX
+    else:
+        output_file = temp_dir + os.sep + root_ext[0] + '_repr' + root_ext[1]
 
     logger.info(f'Reprojecting file {parameters.get("input_file")} as {output_file}')
     logger.info(
@@ -49,10 +119,8 @@ def reproject(
     )
 
     try:
-        var_info = VarInfoFromNetCDF4(
-            parameters['input_file'],
-            short_name=collection_short_name,
-            config_file=CF_CONFIG_FILE,
+        var_info = get_var_info(
+            parameters['input_file'], collection_short_name, CF_CONFIG_FILE, logger
         )
     except Exception as err:
         logger.error(f'Unable to parse input file variables: {str(err)}')
@@ -65,10 +133,21 @@ def reproject(
 
     logger.info(f'Input file has {len(science_variables)} science variables')
 
+    if parameters['tile_scheme'] is not None:
+        return reproject_tiles(
+            parameters, output_file, temp_dir, science_variables, var_info, logger
+        )
+
     # Loop through each dataset and reproject
     logger.debug('Using pyresample for reprojection.')
     outputs = resample_all_variables(
-        parameters, science_variables, temp_dir, logger, var_info
+        parameters,
+        science_variables,
+        temp_dir,
+        logger,
+        var_info,
+        geolocation_cache,
+        additional_target_parameters,
     )
 
     if not outputs:
@@ -76,22 +155,144 @@ def reproject(
 
     # Now merge outputs (unless we only have one)
     metadata_variables = var_info.get_metadata_variables()
-    nc_merge.create_output(
-        parameters,
-        output_file,
-        temp_dir,
+    additional_targets = [
+        target_parameters['target_name']
+        for target_parameters in additional_target_parameters
+    ]
+
+    if aggregator is not None:
+        aggregator.add_granule(
+            parameters,
+            temp_dir,
+            outputs,
+            metadata_variables,
+            var_info,
+            additional_targets,
+        )
+        return aggregator.output_file
+
+    if parameters['output_format'] == ZARR_MIME_TYPE:
+        from swath_projector.zarr_output import create_zarr_output
+
+        create_zarr_output(
+            parameters,
+            output_file,
+            temp_dir,
+            science_variables,
+            metadata_variables,
+            logger,
+            var_info,
+        )
+    else:
+        nc_merge.create_output(
+            parameters,
+            output_file,
+            temp_dir,
+            science_variables,
+            metadata_variables,
+            logger,
+            var_info,
+            additional_targets,
+        )
+
+    if include_overviews and parameters['overview_factors'] is not None:
+        create_overviews(
+            output_file,
+            parameters['overview_factors'],
+            parameters['overview_resampling'],
+            logger,
+        )
+
+    # Return the output file back to Harmony
+    return output_file
+
+
+def reproject_tiles(
+    parameters: Dict,
+    output_directory: str,
+    temp_dir: str,
+    science_variables: Set[str],
+    var_info: VarInfoFromNetCDF4,
+    logger: logging.Logger,
+) -> str:
+    """Reproject all science variables to every tile of the requested tiling
+    scheme that is intersected by the swath, then write an output file for
+    each tile containing valid pixels to the output directory. Each tile is
+    a target grid, so the values of each variable are read once, and the
+    swath resources, such as the KD-tree, are shared by all tiles.
+
+    """
+    tile_parameters = get_tile_parameters(
+        parameters, var_info, science_variables, logger
+    )
+
+    if not tile_parameters:
+        raise Exception('Swath does not intersect any tiles')
+
+    # The first tile is the main target grid, so its single band outputs are
+    # written to the root of the temporary directory.
+    outputs = resample_all_variables(
+        tile_parameters[0],
         science_variables,
-        metadata_variables,
+        temp_dir,
         logger,
         var_info,
+        None,
+        tile_parameters[1:],
     )
 
-    # Return the output file back to Harmony
-    return output_file
+    if not outputs:
+        raise Exception('No variables could be reprojected')
+
+    metadata_variables = var_info.get_metadata_variables()
+    output_root, output_extension = os.path.splitext(
+        os.path.basename(parameters['input_file'])
+    )
+    os.makedirs(output_directory)
+
+    for tile_index, tile in enumerate(tile_parameters):
+        if tile_index == 0:
+            tile_directory = temp_dir
+        else:
+            tile_directory = os.path.join(temp_dir, tile['target_name'])
+
+        if tile_is_empty(tile_directory, outputs, output_extension):
+            logger.info(f'Omitting tile without valid pixels: {tile["target_name"]}')
+            continue
+
+        tile_file = os.path.join(
+            output_directory,
+            f'{output_root}_repr_{tile["target_name"]}{output_extension}',
+        )
+        nc_merge.create_output(
+            tile,
+            tile_file,
+            tile_directory,
+            science_variables,
+            metadata_variables,
+            logger,
+            var_info,
+        )
+
+        if parameters['overview_factors'] is not None:
+            create_overviews(
+                tile_file,
+                parameters['overview_factors'],
+                parameters['overview_resampling'],
+                logger,
+            )
+
+    if not os.listdir(output_directory):
+        raise Exception('No tiles contain valid reprojected pixels')
+
+    return output_directory
 
 
 def get_parameters_from_message(
-    message: Message, granule_url: str, input_file: str
+    message: Message,
+    granule_url: str,
+    input_file: str,
+    target_format: Optional[Dict] = None,
 ) -> Dict:
     """A helper function to parse the input Harmony message and extract
     required information. If the message is missing parameters, then
@@ -101,23 +302,64 @@ def get_parameters_from_message(
     granule, as downloaded by `harmony-service-lib-py` utility functions
     for transformation by this service.
 
+    If a target format is supplied, the target grid and interpolation are
+    taken from that, instead of the `format` of the message. The target
+    format has the same schema as the `format` of the message.
+
+    If a tiling scheme is requested, the CRS is that of the tiling scheme,
+    and the extents of each target grid are those of the tiles.
+
     """
+    if target_format is None:
+        grid_message = message
+        tile_scheme = get_tile_scheme(message)
+    else:
+        grid_message = Message({'format': target_format})
+        tile_scheme = None
+
     parameters = {
-        'crs': rgetattr(message, 'format.crs', CRS_DEFAULT),
+        'crs': rgetattr(grid_message, 'format.crs', CRS_DEFAULT),
         'granule_url': granule_url,
         'input_file': input_file,
         'interpolation': rgetattr(
-            message, 'format.interpolation', INTERPOLATION_DEFAULT
+            grid_message, 'format.interpolation', INTERPOLATION_DEFAULT
+        ),
+        'x_extent': rgetattr(grid_message, 'format.scaleExtent.x', None),
+        'y_extent': rgetattr(grid_message, 'format.scaleExtent.y', None),
+        'width': rgetattr(grid_message, 'format.width', None),
+        'height': rgetattr(grid_message, 'format.height', None),
+        'xres': rgetattr(grid_message, 'format.scaleSize.x', None),
+        'yres': rgetattr(grid_message, 'format.scaleSize.y', None),
+        'trim_margins': get_boolean_extra_argument(message, 'trimMargins'),
+        'estimate_target_area': get_boolean_extra_argument(
+            message, 'estimateTargetArea'
         ),
-        'x_extent': rgetattr(message, 'format.scaleExtent.x', None),
-        'y_extent': rgetattr(message, 'format.scaleExtent.y', None),
-        'width': rgetattr(message, 'format.width', None),
-        'height': rgetattr(message, 'format.height', None),
-        'xres': rgetattr(message, 'format.scaleSize.x', None),
-        'yres': rgetattr(message, 'format.scaleSize.y', None),
+        'deduplicate_coordinates': get_boolean_extra_argument(
+            message, 'deduplicateCoordinates'
+        ),
+        'output_format': get_output_format(message),
+        'overview_factors': get_overview_factors(message),
+        'tile_scheme': tile_scheme,
     }
 
-    parameters['projection'] = Proj(parameters['crs'])
+    if parameters['overview_factors'] is not None:
+        parameters['overview_resampling'] = get_overview_resampling(message)
+
+        if parameters['output_format'] == ZARR_MIME_TYPE:
+            raise Exception('Overviews are only available for NetCDF-4 output')
+    else:
+        parameters['overview_resampling'] = None
+
+    if tile_scheme is not None:
+        if parameters['output_format'] == ZARR_MIME_TYPE:
+            raise Exception('Tiling schemes are only available for NetCDF-4 output')
+
+        if parameters['x_extent'] is not None or parameters['y_extent'] is not None:
+            raise Exception('"scaleExtent" cannot be used with a tiling scheme')
+
+        parameters['crs'] = TILE_SCHEMES[tile_scheme]['crs']
+
+    parameters['projection'] = get_projection(parameters['crs'])
 
     if parameters['interpolation'] in [None, '', 'None']:
         parameters['interpolation'] = INTERPOLATION_DEFAULT
@@ -145,20 +387,159 @@ def get_parameters_from_message(
     if parameters['height'] and not parameters['width']:
         raise Exception('Missing cell width')
 
-    parameters['x_min'] = rgetattr(message, 'format.scaleExtent.x.min', None)
-    parameters['x_max'] = rgetattr(message, 'format.scaleExtent.x.max', None)
-    parameters['y_min'] = rgetattr(message, 'format.scaleExtent.y.min', None)
-    parameters['y_max'] = rgetattr(message, 'format.scaleExtent.y.max', None)
+    parameters['x_min'] = rgetattr(grid_message, 'format.scaleExtent.x.min', None)
+    parameters['x_max'] = rgetattr(grid_message, 'format.scaleExtent.x.max', None)
+    parameters['y_min'] = rgetattr(grid_message, 'format.scaleExtent.y.min', None)
+    parameters['y_max'] = rgetattr(grid_message, 'format.scaleExtent.y.max', None)
 
     # Mark the properties that this service will use, so that downstream
     # services will not re-use them.
-    message.format.process(
-        'crs', 'interpolation', 'scaleExtent', 'scaleSize', 'height', 'width'
-    )
+    message.format.process(*PROCESSED_FORMAT_PROPERTIES)
+
+    if parameters['output_format'] is not None:
+        message.format.process('mime')
 
     return parameters
 
 
+def get_additional_target_parameters(
+    message: Message, granule_url: str, input_file: str
+) -> List[Dict]:
+    """Parse any additional target grids listed in the `extraArgs` of the
+    Harmony message. Each target grid is an object with the same schema as
+    the `format` of the message, e.g., `crs`, `scaleExtent`, `scaleSize`,
+    `height`, `width` and `interpolation`. Properties that are not specified
+    use their defaults, rather than those in the `format` of the message.
+
+    The parameters of each target include its name, which is used for the
+    group containing the variables reprojected to that target, and as the
+    suffix of its dimensions.
+
+    """
+    targets = get_extra_argument(message, TARGETS_EXTRA_ARGUMENT)
+
+    if targets is None:
+        return []
+
+    if not isinstance(targets, list) or not all(
+        isinstance(target, dict) for target in targets
+    ):
+        raise Exception('"targets" must be a list of target grid objects')
+
+    if len(targets) > 0 and get_output_format(message) == ZARR_MIME_TYPE:
+        raise Exception('Multiple target grids are only available for NetCDF-4 output')
+
+    if len(targets) > 0 and get_tile_scheme(message) is not None:
+        raise Exception('Multiple target grids cannot be used with a tiling scheme')
+
+    return [
+        {
+            **get_parameters_from_message(message, granule_url, input_file, target),
+            'target_name': f'{TARGET_GROUP_PREFIX}{target_index}',
+            'dimension_suffix': f'_{TARGET_GROUP_PREFIX}{target_index}',
+        }
+        for target_index, target in enumerate(targets, start=1)
+    ]
+
+
+def get_output_format(message: Message) -> Optional[str]:
+    """Return the requested output format, if it is an alternative to the
+    default merged NetCDF-4 file that is supported by this service.
+    Otherwise, `None` is returned.
+
+    """
+    mime_type = rgetattr(message, 'format.mime', None)
+
+    if mime_type is not None and mime_type.lower() == ZARR_MIME_TYPE:
+        return ZARR_MIME_TYPE
+
+    return None
+
+
+def get_overview_factors(message: Message) -> Optional[List[int]]:
+    """Retrieve the decimation factors of any overview levels requested in
+    the `extraArgs` of the Harmony message. These can be a list of integers,
+    or a comma-separated string, e.g., "2,4,8". Each factor must be an
+    integer greater than one. The factors are returned in ascending order,
+    without duplicates. If no overviews are requested, `None` is returned.
+
+    """
+    requested_factors = get_extra_argument(message, OVERVIEWS_EXTRA_ARGUMENT)
+
+    if requested_factors is None:
+        return None
+
+    if not isinstance(requested_factors, list):
+        requested_factors = str(requested_factors).split(',')
+
+    try:
+        overview_factors = sorted(
+            {int(str(factor).strip()) for factor in requested_factors}
+        )
+    except ValueError as error:
+        raise Exception(
+            f'Invalid overview factors: "{requested_factors}", must be integers'
+        ) from error
+
+    if len(overview_factors) == 0 or overview_factors[0] < 2:
+        raise Exception('Overview factors must be integers greater than one')
+
+    return overview_factors
+
+
+def get_overview_resampling(message: Message) -> str:
+    """Retrieve the reduction method used to derive overview levels from the
+    `extraArgs` of the Harmony message, defaulting to averaging.
+
+    """
+    resampling = get_string_extra_argument(message, OVERVIEW_RESAMPLING_EXTRA_ARGUMENT)
+
+    if resampling is None:
+        return OVERVIEW_RESAMPLING_DEFAULT
+
+    resampling = resampling.lower()
+
+    if resampling not in OVERVIEW_RESAMPLING_METHODS:
+        raise Exception(
+            f'Invalid overview resampling: "{resampling}", must be one of: '
+            f'{", ".join(OVERVIEW_RESAMPLING_METHODS)}'
+        )
+
+    return resampling
+
+
+def get_tile_scheme(message: Message) -> Optional[str]:
+    """Retrieve the name of the tiling scheme requested in the `extraArgs` of
+    the Harmony message, e.g., "modis" or "geographic". If no tiling scheme
+    is requested, `None` is returned.
+
+    """
+    tile_scheme = get_string_extra_argument(message, TILE_SCHEME_EXTRA_ARGUMENT)
+
+    if tile_scheme is None:
+        return None
+
+    tile_scheme = tile_scheme.lower()
+
+    if tile_scheme not in TILE_SCHEMES:
+        raise Exception(
+            f'Invalid tiling scheme: "{tile_scheme}", must be one of: '
+            f'{", ".join(TILE_SCHEMES)}'
+        )
+
+    return tile_scheme
+
+
+@functools.lru_cache(maxsize=PROJECTION_CACHE_SIZE)
+def get_projection(crs: str) -> Proj:
+    """Return a `Proj` object for the requested CRS. These objects are cached,
+    so that a long-lived worker process does not need to reconstruct them
+    for every request using the same CRS.
+
+    """
+    return Proj(crs)
+
+
 def rgetattr(obj, attr: str, *args):
     """Recursive get attribute. Returns attribute from an attribute hierarchy,
     e.g. a.b.c, if it exists. If it doesn't exist, the default value will
@@ -180,3 +561,74 @@ def rgetattr(obj, attr: str, *args):
         attribute_value = args[0]
 
     return attribute_value
+
+
+def get_extra_argument(message: Message, argument_name: str) -> Any:
+    """Retrieve the raw value of an optional property from the `extraArgs` of
+    the Harmony message. If the message has no `extraArgs`, or the argument
+    is absent, `None` is returned.
+
+    The `Message` class of the pinned `harmony-service-lib` does not parse
+    `extraArgs` into an attribute, so the property is then retrieved from
+    the JSON content of the message.
+
+    """
+    extra_arguments = getattr(message, 'extraArgs', None)
+
+    if extra_arguments is None:
+        extra_arguments = (getattr(message, 'data', None) or {}).get('extraArgs')
+
+    return (extra_arguments or {}).get(argument_name)
+
+
+def get_boolean_extra_argument(message: Message, argument_name: str) -> Optional[bool]:
+    """Retrieve an optional flag from the `extraArgs` of the Harmony message.
+    Flags may be specified as either booleans or strings, e.g. "true". If
+    the flag is absent, `None` is returned, so that it is not included in
+    the history metadata of the output.
+
+    """
+    argument_value = get_extra_argument(message, argument_name)
+
+    if argument_value is None:
+        return None
+
+    return str(argument_value).lower() == 'true'
+
+
+def get_string_extra_argument(message: Message, argument_name: str) -> Optional[str]:
+    """Retrieve an optional string value from the `extraArgs` of the Harmony
+    message. If the argument is absent, `None` is returned.
+
+    """
+    argument_value = get_extra_argument(message, argument_name)
+
+    if argument_value is None:
+        return None
+
+    return str(argument_value)
+
+
+def message_defines_target_grid(message: Message) -> bool:
+    """Determine whether the Harmony message fully defines the target grid,
+    with all extents and either dimensions or resolutions. Only then will
+    all granules in a request be reprojected to the same grid. If no CRS is
+    specified, the default is used for all granules.
+
+    """
+    grid_properties = [
+        'format.scaleExtent.x.min',
+        'format.scaleExtent.x.max',
+        'format.scaleExtent.y.min',
+        'format.scaleExtent.y.max',
+    ]
+
+    if rgetattr(message, 'format.height', None) is not None:
+        grid_properties.extend(['format.height', 'format.width'])
+    else:
+        grid_properties.extend(['format.scaleSize.x', 'format.scaleSize.y'])
+
+    return all(
+        rgetattr(message, grid_property, None) is not None
+        for grid_property in grid_properties
+    )
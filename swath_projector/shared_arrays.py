@@ -0,0 +1,310 @@
+"""This module contains a registry of NumPy arrays held in shared memory, so
+that large arrays can be handed to worker processes without pickling.
+
+Arrays such as swath coordinates, the `ll2cr` columns and rows used by EWA
+interpolation, the neighbour indices used by bilinear and nearest neighbour
+interpolation, and output buffers are copied into a shared memory block
+once, by the parent process. Only a small, picklable descriptor of each
+block is sent to workers, which attach to the block and view its contents
+as a NumPy array, without copying.
+
+The parent process owns every block. Each block is reference counted, so
+that a block shared by several consumers, e.g., the swath coordinates used
+by all variables, is unlinked when the last reference is released. All
+remaining blocks are unlinked when the registry is closed, when it is used
+as a context manager and the block exits, including due to an exception,
+or when the registry is garbage collected, so that shared memory is not
+leaked if processing fails.
+
+Worker processes must only close, never unlink, the blocks they attach to.
+
+"""
+
+import os
+from contextlib import contextmanager
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Iterator, List, Tuple
+from weakref import finalize
+
+import numpy as np
+
+
+class SharedArrayRegistry:
+    """A registry of reference counted NumPy arrays in shared memory, keyed
+    by a name chosen by the parent process, e.g., the coordinates key and
+    name of an array within the reprojection information. The descriptor
+    returned for each array can be sent to worker processes and passed to
+    `attach_shared_array`.
+
+    """
+
+    def __init__(self):
+        self.blocks = {}
+        self.finaliser = finalize(self, unlink_shared_blocks, self.blocks, os.getpid())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.blocks
+
+    def share(self, key: str, array: np.ndarray) -> Dict:
+        """Copy an array into a new shared memory block, and return the
+        descriptor of that block. If the key is already registered, the
+        array is not copied again. Instead, the reference count of the
+        existing block is incremented, and its descriptor returned.
+
+        The mask of a masked array is stored in the same block, after the
+        array values.
+
+        """
+        if key in self.blocks:
+            return self.acquire(key)
+
+        masked = np.ma.isMaskedArray(array)
+        shared_array = self.create(
+            key, np.shape(array), np.ma.getdata(array).dtype, masked
+        )
+        np.ma.getdata(shared_array)[...] = np.ma.getdata(array)
+
+        if masked:
+            np.ma.getmaskarray(shared_array)[...] = np.ma.getmaskarray(array)
+
+        return self.blocks[key]['descriptor']
+
+    def create(
+        self, key: str, shape: Tuple[int], dtype: np.dtype, masked: bool = False
+    ) -> np.ndarray:
+        """Allocate a new, zero-filled shared memory block for an array with
+        the specified shape and data type, such as an output buffer to be
+        populated by worker processes. The array is returned as a view of
+        the shared memory block, and has an initial reference count of one.
+
+        """
+        if not self.finaliser.alive:
+            raise ValueError('Shared array registry is closed.')
+
+        if key in self.blocks:
+            raise ValueError(f'Shared array already registered: "{key}"')
+
+        descriptor = {
+            'name': None,
+            'shape': tuple(shape),
+            'dtype': np.dtype(dtype).str,
+            'masked': masked,
+        }
+        shared_block = SharedMemory(
+            create=True, size=max(get_shared_array_size(descriptor), 1)
+        )
+        descriptor['name'] = shared_block.name
+        self.blocks[key] = {
+            'shared_block': shared_block,
+            'descriptor': descriptor,
+            'references': 1,
+        }
+
+        try:
+            shared_array = get_shared_array_view(shared_block, descriptor)
+            np.ma.getdata(shared_array)[...] = 0
+
+            if masked:
+                np.ma.getmaskarray(shared_array)[...] = False
+        except Exception:
+            self.release(key)
+            raise
+
+        return shared_array
+
+    def acquire(self, key: str) -> Dict:
+        """Increment the reference count of a registered array, and return its
+        descriptor.
+
+        """
+        self.blocks[key]['references'] += 1
+        return self.blocks[key]['descriptor']
+
+    def release(self, key: str) -> None:
+        """Decrement the reference count of a registered array. When no
+        references remain, the shared memory block is unlinked, and the key
+        removed from the registry.
+
+        """
+        self.blocks[key]['references'] -= 1
+
+        if self.blocks[key]['references'] < 1:
+            unlink_shared_block(self.blocks.pop(key)['shared_block'])
+
+    def get_descriptor(self, key: str) -> Dict:
+        """Return the descriptor of a registered array, without changing its
+        reference count, e.g., to send an output buffer to a worker process.
+
+        """
+        return self.blocks[key]['descriptor']
+
+    def get_array(self, key: str) -> np.ndarray:
+        """Return a view of a registered array in the parent process, e.g.,
+        to read an output buffer populated by worker processes.
+
+        """
+        return get_shared_array_view(
+            self.blocks[key]['shared_block'], self.blocks[key]['descriptor']
+        )
+
+    def close(self) -> None:
+        """Unlink all registered shared memory blocks, regardless of their
+        reference counts. No further arrays can be registered once the
+        registry is closed.
+
+        """
+        self.finaliser()
+
+
+def attach_shared_array(descriptor: Dict) -> Tuple[SharedMemory, np.ndarray]:
+    """Attach to the shared memory block of a registered array, and return
+    both the block and a view of its contents. The block must remain open
+    while the array is in use, and should then be closed, but not unlinked.
+
+    """
+    shared_block = SharedMemory(name=descriptor['name'])
+    return shared_block, get_shared_array_view(shared_block, descriptor)
+
+
+def share_information(
+    registry: SharedArrayRegistry, prefix: str, information: Dict
+) -> Dict:
+    """Return a copy of a dictionary, such as the reprojection information
+    for a set of coordinates, in which each NumPy array is replaced with
+    the descriptor of that array in shared memory. Arrays are registered
+    under keys combining the prefix and their name within the dictionary,
+    so information that is already shared is not copied again. Other
+    values, e.g., the target area, are retained, and must be picklable.
+
+    """
+    return {
+        name: (
+            {'shared_array': registry.share(f'{prefix}/{name}', value)}
+            if isinstance(value, np.ndarray)
+            else value
+        )
+        for name, value in information.items()
+    }
+
+
+def release_information(
+    registry: SharedArrayRegistry, prefix: str, shared_information: Dict
+) -> None:
+    """Release the references to each array in shared information returned
+    by `share_information` for the same prefix.
+
+    """
+    for name, value in shared_information.items():
+        if isinstance(value, dict) and 'shared_array' in value:
+            registry.release(f'{prefix}/{name}')
+
+
+@contextmanager
+def attached_information(shared_information: Dict) -> Iterator[Dict]:
+    """A context manager for use in worker processes, which attaches to all
+    shared arrays in information returned by `share_information`, and
+    yields a dictionary with views of those arrays in place of their
+    descriptors. The shared memory blocks are closed on exit, so the
+    arrays must not be used after that.
+
+    """
+    shared_blocks: List[SharedMemory] = []
+    information = {}
+
+    try:
+        for name, value in shared_information.items():
+            if isinstance(value, dict) and 'shared_array' in value:
+                shared_block, information[name] = attach_shared_array(
+                    value['shared_array']
+                )
+                shared_blocks.append(shared_block)
+            else:
+                information[name] = value
+
+        yield information
+    finally:
+        information.clear()
+
+        for shared_block in shared_blocks:
+            close_shared_block(shared_block)
+
+
+def get_shared_array_size(descriptor: Dict) -> int:
+    """Return the number of bytes required for an array, and its mask, if
+    the array is masked.
+
+    """
+    elements = int(np.prod(descriptor['shape']))
+    size = elements * np.dtype(descriptor['dtype']).itemsize
+
+    if descriptor['masked']:
+        size += elements * np.dtype(bool).itemsize
+
+    return size
+
+
+def get_shared_array_view(shared_block: SharedMemory, descriptor: Dict) -> np.ndarray:
+    """Return a view of the contents of a shared memory block as an array
+    with the shape and data type given in the descriptor. For masked
+    arrays, the mask is a view of the bytes after the array values.
+
+    """
+    dtype = np.dtype(descriptor['dtype'])
+    values = np.ndarray(descriptor['shape'], dtype=dtype, buffer=shared_block.buf)
+
+    if not descriptor['masked']:
+        return values
+
+    mask = np.ndarray(
+        descriptor['shape'], dtype=bool, buffer=shared_block.buf, offset=values.nbytes
+    )
+
+    return np.ma.masked_array(values, mask=mask, copy=False)
+
+
+def close_shared_block(shared_block: SharedMemory) -> None:
+    """Close a shared memory block. If arrays viewing the block are still
+    referenced, the block cannot be closed yet, and its memory is instead
+    released once those arrays are garbage collected.
+
+    """
+    try:
+        shared_block.close()
+    except BufferError:
+        pass
+
+
+def unlink_shared_block(shared_block: SharedMemory) -> None:
+    """Unlink and close a shared memory block. A block that has already
+    been unlinked, e.g., by another process, is ignored. Unlinking first
+    ensures the block is removed, even if it cannot yet be closed.
+
+    """
+    try:
+        shared_block.unlink()
+    except FileNotFoundError:
+        pass
+
+    close_shared_block(shared_block)
+
+
+def unlink_shared_blocks(blocks: Dict, owner_pid: int) -> None:
+    """Unlink all shared memory blocks in the registry. This is called when
+    the registry is closed or garbage collected, or at interpreter exit.
+    Forked worker processes inherit a copy of the registry, but must not
+    unlink blocks owned by the parent process, so only close them.
+
+    """
+    while blocks:
+        _, block = blocks.popitem()
+
+        if os.getpid() == owner_pid:
+            unlink_shared_block(block['shared_block'])
+        else:
+            close_shared_block(block['shared_block'])
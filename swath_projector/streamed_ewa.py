@@ -0,0 +1,199 @@
+"""This module contains functions to perform Elliptically Weighted Average
+(EWA) interpolation of a swath in blocks of scan rows, for swaths too large
+to hold in memory at once, such as full-orbit granules.
+
+The standard EWA implementation reads the full longitude, latitude and
+science variable arrays, calculates the target grid column and row of every
+swath pixel with `ll2cr`, and then resamples all swath pixels with `fornav`.
+Instead, each block of swath rows is read in turn, projected with `ll2cr`,
+and its contribution is added to accumulators for the weights and weighted
+sums of every target grid pixel. Once all blocks have been processed, the
+accumulators are normalised to give the output grid. Peak memory usage is
+therefore bounded by the size of a block and the size of the target grid,
+rather than the size of the swath.
+
+`fornav` requires at least two rows in each scan. Blocks therefore contain
+at least two rows, and a shorter final block is merged into the preceding
+block. If the number of rows in each scan of the instrument is known, blocks
+are aligned to whole scans, and each scan is resampled separately, as by the
+instrument-aware EWA implementation. Otherwise, each block is treated as a
+single scan by `fornav`.
+
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+from netCDF4 import Dataset, Variable
+from pyresample.geometry import AreaDefinition, SwathDefinition
+from pyresample.utils import check_and_wrap
+
+from swath_projector.utilities import get_coordinate_variable
+
+# `fornav` rejects scans with fewer rows than this.
+MINIMUM_ROWS_PER_SCAN = 2
+
+
+def get_streamed_ewa_results(
+    dataset: Dataset,
+    variable: Variable,
+    coordinates: Tuple[str],
+    target_area: AreaDefinition,
+    fill_value,
+    block_rows: int,
+    maximum_weight_mode: bool,
+    rows_per_scan: int = 0,
+) -> np.ndarray:
+    """Reproject a 2-D swath variable to the target area using EWA, reading
+    the variable and its coordinates in blocks of rows. The weights and
+    weighted sums of each block are accumulated in arrays the size of the
+    target grid. Pixels without sufficient weight are NaN, unless the
+    variable has a numeric fill value, in which case that is used instead,
+    as with the standard EWA implementation.
+
+    In maximum weight mode, the accumulators retain the value of the swath
+    pixel with the largest weight for each grid pixel, across all blocks.
+
+    If `rows_per_scan` is at least two, the number of rows in each block is
+    rounded up to a whole number of scans, and that scan height is passed to
+    `fornav`. Otherwise, each block is resampled as a single scan.
+
+    """
+    from pyresample.ewa import ll2cr
+    from pyresample.ewa._fornav import (
+        fornav_weights_and_sums_wrapper,
+        write_grid_image_single,
+    )
+
+    grid_weights = np.zeros(target_area.shape, dtype=np.float32)
+    grid_accumulators = np.zeros(target_area.shape, dtype=np.float32)
+    latitudes = get_coordinate_variable(dataset, coordinates, 'lat')
+    block_rows = get_aligned_block_rows(block_rows, rows_per_scan)
+
+    for rows in get_block_slices(latitudes.shape[0], block_rows):
+        swath_definition = get_block_swath_definition(dataset, coordinates, rows)
+        swath_points_in_grid, columns, grid_rows = ll2cr(swath_definition, target_area)
+
+        if swath_points_in_grid == 0:
+            continue
+
+        try:
+            fornav_weights_and_sums_wrapper(
+                np.ascontiguousarray(columns),
+                np.ascontiguousarray(grid_rows),
+                get_block_values(dataset, variable, rows, fill_value),
+                grid_weights,
+                grid_accumulators,
+                np.nan,
+                np.nan,
+                get_block_rows_per_scan(rows, rows_per_scan),
+                maximum_weight_mode=maximum_weight_mode,
+            )
+        except RuntimeError:
+            # Raised by `fornav` when no pixels in the block contribute to
+            # the grid, as can happen at the grid edges for short blocks.
+            # The chunked EWA implementation of pyresample does the same.
+            continue
+
+    results = np.full(target_area.shape, np.nan, dtype=np.float64)
+    write_grid_image_single(
+        results,
+        grid_weights,
+        grid_accumulators,
+        np.nan,
+        maximum_weight_mode=maximum_weight_mode,
+    )
+
+    if fill_value is not None:
+        np.nan_to_num(results, nan=fill_value, copy=False)
+
+    return results
+
+
+def get_aligned_block_rows(block_rows: int, rows_per_scan: int) -> int:
+    """Return the number of rows in each block, rounded up to a whole number
+    of scans if the number of rows per scan is known, and never fewer than
+    the minimum number of rows `fornav` accepts in a scan.
+
+    """
+    if rows_per_scan >= MINIMUM_ROWS_PER_SCAN:
+        block_rows = -(-block_rows // rows_per_scan) * rows_per_scan
+
+    return max(block_rows, MINIMUM_ROWS_PER_SCAN)
+
+
+def get_block_rows_per_scan(rows: slice, rows_per_scan: int) -> int:
+    """Return the number of rows per scan to pass to `fornav` for a block.
+    This is the scan height of the instrument if the block contains a whole
+    number of such scans, otherwise the block is treated as a single scan.
+
+    """
+    total_block_rows = rows.stop - rows.start
+
+    if rows_per_scan >= MINIMUM_ROWS_PER_SCAN and total_block_rows % rows_per_scan == 0:
+        block_rows_per_scan = rows_per_scan
+    else:
+        block_rows_per_scan = total_block_rows
+
+    return block_rows_per_scan
+
+
+def get_block_slices(
+    total_rows: int, block_rows: int, minimum_rows: int = MINIMUM_ROWS_PER_SCAN
+) -> List[slice]:
+    """Return the slices of consecutive blocks of rows, each with the
+    specified number of rows, except for the final block, which contains
+    any remaining rows. If the final block would contain fewer than
+    `minimum_rows`, those rows are appended to the preceding block instead.
+
+    """
+    block_slices = [
+        slice(start_row, min(start_row + block_rows, total_rows))
+        for start_row in range(0, total_rows, block_rows)
+    ]
+
+    if (
+        len(block_slices) > 1
+        and block_slices[-1].stop - block_slices[-1].start < minimum_rows
+    ):
+        final_rows = block_slices.pop()
+        block_slices[-1] = slice(block_slices[-1].start, final_rows.stop)
+
+    return block_slices
+
+
+def get_block_swath_definition(
+    dataset: Dataset, coordinates: Tuple[str], rows: slice
+) -> SwathDefinition:
+    """Define the swath for a block of rows of the longitude and latitude
+    variables. As with the full swath, longitudes are wrapped to the range:
+    -180 < longitude < 180.
+
+    """
+    latitudes = get_coordinate_variable(dataset, coordinates, 'lat')[rows]
+    longitudes = get_coordinate_variable(dataset, coordinates, 'lon')[rows]
+    wrapped_lons, wrapped_lats = check_and_wrap(longitudes, latitudes)
+
+    return SwathDefinition(lons=wrapped_lons, lats=wrapped_lats)
+
+
+def get_block_values(
+    dataset: Dataset, variable: Variable, rows: slice, fill_value
+) -> np.ndarray:
+    """Retrieve a block of rows of the science variable as a C-contiguous
+    floating point array, with masked pixels set to the fill value. As with
+    `get_variable_values`, variables with a `time` dimension are assumed to
+    have a shape of (1, y, x).
+
+    """
+    if 'time' in dataset.variables and 'time' in variable.dimensions:
+        block_values = variable[0, rows, :]
+    else:
+        block_values = variable[rows, :]
+
+    block_values = np.ma.asarray(block_values).filled(fill_value=fill_value)
+
+    if np.issubdtype(block_values.dtype, np.integer):
+        block_values = block_values.astype(float)
+
+    return np.ascontiguousarray(block_values)
@@ -13,7 +13,7 @@ from pyproj import Proj
 
 
 def get_projected_resolution(
-    projection: Proj, longitudes: Variable, latitudes: Variable
+    projection: Proj, longitudes: Variable, latitudes: Variable, stride: int = 1
 ) -> Tuple[float]:
     """Find the resolution of the target grid in the projected coordinates, x
     and y. First the perimeter points are found. These are then projected
@@ -21,41 +21,168 @@ def get_projected_resolution(
     of the swath in the target CRS. This is assumed to be equally shared
     between input pixels. The pixels are also assumed to be square.
 
+    If a stride greater than one is specified, the perimeter and number of
+    valid pixels of a 2-D swath are estimated from a subsample of the
+    coordinates, see `get_decimated_coordinates`.
+
+    """
+    return get_resolution_from_perimeter(
+        get_projected_perimeter(projection, longitudes, latitudes, stride),
+        len(longitudes.shape),
+    )
+
+
+def get_extents_from_perimeter(
+    projection: Proj, longitudes: Variable, latitudes: Variable, stride: int = 1
+) -> Tuple[float]:
+    """Find the swath extents in the target CRS. First the perimeter points of
+    unfilled valid pixels are found. These are then projected to the target
+    CRS. Finally the minimum and maximum values in the projected x and y
+    coordinates are returned.
+
+    If a stride greater than one is specified, the perimeter of a 2-D swath
+    is estimated from a subsample of the coordinates, see
+    `get_decimated_coordinates`.
+
     """
+    return get_extents_from_projected_perimeter(
+        get_projected_perimeter(projection, longitudes, latitudes, stride)
+    )
+
+
+def get_projected_perimeter(
+    projection: Proj, longitudes: Variable, latitudes: Variable, stride: int = 1
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Return the projected perimeter points of the swath, and the number of
+    valid swath pixels. For 1-D coordinates, all valid pixels are returned.
+    The result can be used to derive both the extents and resolution of
+    the swath, without reading or projecting the coordinates twice.
+
+    If a stride greater than one is specified, the perimeter and number of
+    valid pixels of a 2-D swath are estimated from a subsample of the
+    coordinates, see `get_decimated_coordinates`.
+
+    """
+    if should_decimate_coordinates(longitudes, stride):
+        return get_decimated_coordinates(projection, longitudes, latitudes, stride)
+
     coordinates_mask = get_valid_coordinates_mask(longitudes, latitudes)
     x_values, y_values = get_projected_coordinates(
         coordinates_mask, projection, longitudes, latitudes
     )
 
-    if len(longitudes.shape) == 1:
+    return x_values, y_values, coordinates_mask.count()  # pylint: disable=E1101
+
+
+def get_resolution_from_perimeter(
+    projected_perimeter: Tuple[np.ndarray, np.ndarray, int], n_dimensions: int
+) -> float:
+    """Find the resolution of the target grid from the output of
+    `get_projected_perimeter`, for coordinates with the specified number
+    of dimensions.
+
+    """
+    x_values, y_values, n_pixels = projected_perimeter
+
+    if n_dimensions == 1:
         absolute_resolution = get_one_dimensional_resolution(x_values, y_values)
     else:
         ordered_x, ordered_y = sort_perimeter_points(x_values, y_values)
         projected_area = get_polygon_area(ordered_x, ordered_y)
-        absolute_resolution = get_absolute_resolution(
-            projected_area, coordinates_mask.count()  # pylint: disable=E1101
-        )
+        absolute_resolution = get_absolute_resolution(projected_area, n_pixels)
 
     return absolute_resolution
 
 
-def get_extents_from_perimeter(
-    projection: Proj, longitudes: Variable, latitudes: Variable
+def get_extents_from_projected_perimeter(
+    projected_perimeter: Tuple[np.ndarray, np.ndarray, int],
 ) -> Tuple[float]:
-    """Find the swath extents in the target CRS. First the perimeter points of
-    unfilled valid pixels are found. These are then projected to the target
-    CRS. Finally the minimum and maximum values in the projected x and y
-    coordinates are returned.
+    """Return the minimum and maximum projected x and y values from the
+    output of `get_projected_perimeter`.
 
     """
-    coordinates_mask = get_valid_coordinates_mask(longitudes, latitudes)
-    x_values, y_values = get_projected_coordinates(
-        coordinates_mask, projection, longitudes, latitudes
-    )
+    x_values, y_values, _ = projected_perimeter
 
     return (np.min(x_values), np.max(x_values), np.min(y_values), np.max(y_values))
 
 
+def should_decimate_coordinates(longitudes: Variable, stride: int) -> bool:
+    """Determine whether the perimeter of a swath should be estimated from a
+    subsample of its coordinates. This requires a stride greater than one,
+    and 2-D coordinates with more rows and columns than the stride, so that
+    the subsample contains at least two rows and columns.
+
+    """
+    return (
+        stride > 1
+        and len(longitudes.shape) == 2
+        and all(size > stride for size in longitudes.shape)
+    )
+
+
+def get_decimated_coordinates(
+    projection: Proj, longitudes: Variable, latitudes: Variable, stride: int
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Estimate the projected perimeter of a 2-D swath, without processing
+    every pixel. Only every `stride`-th row and column of the coordinates
+    are read, along with the full first and last rows and columns. The
+    perimeter points of the subsample, and all valid pixels in the full
+    edges of the swath, are then projected to the target CRS.
+
+    Extrema along the edges of the swath are therefore exact. Extrema of the
+    interior, e.g., adjacent to fill values, are found to within `stride`
+    pixels. The number of valid pixels in the swath is estimated from the
+    fraction of valid pixels in the subsample.
+
+    Returns:
+        x: numpy.ndarray of projected x coordinates.
+        y: numpy.ndarray of projected y coordinates.
+        n_pixels: The estimated number of valid pixels in the swath.
+
+    """
+    sample_longitudes = np.ma.asarray(longitudes[::stride, ::stride])
+    sample_latitudes = np.ma.asarray(latitudes[::stride, ::stride])
+    sample_mask = get_valid_coordinates_mask(sample_longitudes, sample_latitudes)
+    valid_fraction = sample_mask.count() / sample_mask.size  # pylint: disable=E1101
+    n_pixels = round(valid_fraction * longitudes.size)
+
+    edge_longitudes, edge_latitudes = get_edge_coordinates(longitudes, latitudes)
+    edge_points = zip(
+        shift_perimeter_longitudes(edge_longitudes, sample_longitudes),
+        edge_latitudes,
+    )
+    perimeter_points = set(
+        get_perimeter_coordinates(sample_longitudes, sample_latitudes, sample_mask)
+    ).union(edge_points)
+
+    x_values, y_values = reproject_coordinates(list(perimeter_points), projection)
+
+    return x_values, y_values, n_pixels
+
+
+def get_edge_coordinates(
+    longitudes: Variable, latitudes: Variable
+) -> Tuple[np.ndarray]:
+    """Return arrays of the longitudes and latitudes of all valid pixels in
+    the first and last rows and columns of a 2-D swath. Only these edges are
+    read from the coordinate variables.
+
+    """
+    edges = [np.s_[0, :], np.s_[-1, :], np.s_[:, 0], np.s_[:, -1]]
+    edge_longitudes = np.ma.concatenate(
+        [np.ma.asarray(longitudes[edge]) for edge in edges]
+    )
+    edge_latitudes = np.ma.concatenate(
+        [np.ma.asarray(latitudes[edge]) for edge in edges]
+    )
+
+    return get_all_coordinates(
+        edge_longitudes,
+        edge_latitudes,
+        get_valid_coordinates_mask(edge_longitudes, edge_latitudes),
+    )
+
+
 def get_projected_coordinates(
     coordinates_mask: np.ma.core.MaskedArray,
     projection: Proj,
@@ -65,14 +192,19 @@ def get_projected_coordinates(
     """Get the required coordinate points projected in the target Coordinate
     Reference System (CRS).
 
+    For 1-D coordinates, all valid pixels are projected at once, rather than
+    only the perimeter points.
+
     """
     if len(longitudes.shape) == 1:
-        coordinates = get_all_coordinates(longitudes[:], latitudes[:], coordinates_mask)
-    else:
-        coordinates = get_perimeter_coordinates(
-            longitudes[:], latitudes[:], coordinates_mask
+        return projection(
+            *get_all_coordinates(longitudes[:], latitudes[:], coordinates_mask)
         )
 
+    coordinates = get_perimeter_coordinates(
+        longitudes[:], latitudes[:], coordinates_mask
+    )
+
     return reproject_coordinates(coordinates, projection)
 
 
@@ -89,20 +221,17 @@ def reproject_coordinates(points: List[Tuple], projection: Proj) -> Tuple[np.nda
     return projection(perimeter_longitudes, perimeter_latitudes)
 
 
-def get_one_dimensional_resolution(
-    x_values: List[float], y_values: List[float]
-) -> float:
+def get_one_dimensional_resolution(x_values: np.ndarray, y_values: np.ndarray) -> float:
     """Find the projected distance between each pair of consecutive points
-    and return the median average as the resolution.
+    and return the median average as the resolution. The distances are
+    calculated for all pairs at once.
 
     """
+    x_values = np.asarray(x_values, dtype=np.float64)
+    y_values = np.asarray(y_values, dtype=np.float64)
+
     return np.median(
-        [
-            euclidean_distance(
-                x_values[ind + 1], x_values[ind], y_values[ind + 1], y_values[ind]
-            )
-            for ind in range(len(x_values) - 2)
-        ]
+        euclidean_distance(x_values[1:], x_values[:-1], y_values[1:], y_values[:-1])
     )
 
 
@@ -183,35 +312,58 @@ def get_perimeter_coordinates(
     }
 
     unordered_points = row_points.union(column_points)
+    perimeter_longitudes = shift_perimeter_longitudes(
+        [longitudes[point[0], point[1]] for point in unordered_points], longitudes
+    )
+
+    return [
+        (longitude, latitudes[point[0], point[1]])
+        for longitude, point in zip(perimeter_longitudes, unordered_points)
+    ]
+
 
+def shift_perimeter_longitudes(
+    perimeter_longitudes: List[float], longitudes: np.ndarray
+) -> List[float]:
+    """If the swath crosses the International Date Line, shift the perimeter
+    longitudes to be continuous, in the hemisphere containing most pixels
+    of the swath. Otherwise, the perimeter longitudes are returned unchanged.
+
+    """
     if swath_crosses_international_date_line(longitudes):
-        # The International Date Line is between two pixel columns.
+        # The International Date Line is between two pixel columns. Only the
+        # perimeter longitudes are shifted, as the input longitudes may be
+        # retained for other functions, e.g., memory-mapped coordinates.
         if np.median(longitudes) < 0:
             # Most pixels are in the Western Hemisphere.
-            longitudes[longitudes > 0] -= 360.0
+            perimeter_longitudes = [
+                longitude - 360.0 if longitude > 0 else longitude
+                for longitude in perimeter_longitudes
+            ]
         else:
             # Most pixels are in the Eastern Hemisphere.
-            longitudes[longitudes < 0] += 360.0
+            perimeter_longitudes = [
+                longitude + 360.0 if longitude < 0 else longitude
+                for longitude in perimeter_longitudes
+            ]
 
-    return [
-        (longitudes[point[0], point[1]], latitudes[point[0], point[1]])
-        for point in unordered_points
-    ]
+    return perimeter_longitudes
 
 
 def get_all_coordinates(
     longitudes: np.ndarray, latitudes: np.ndarray, mask: np.ma.core.MaskedArray
-) -> List[Tuple[float]]:
-    """Return coordinates of all valid pixels in (longitude, latitude) tuples.
-    These points will have non-fill values for both the longitude and
-    latitude, and are expected to be from a 1-D variable.
+) -> Tuple[np.ndarray]:
+    """Return arrays of the longitudes and latitudes of all valid pixels, in
+    their original order. These points will have non-fill values for both
+    the longitude and latitude, and are expected to be from a 1-D variable.
 
     """
-    return [
-        (longitude, latitudes[array_index])
-        for array_index, longitude in enumerate(longitudes)
-        if mask[array_index]
-    ]
+    valid_pixels = np.logical_not(np.ma.getmaskarray(mask))
+
+    return (
+        np.ma.getdata(longitudes)[valid_pixels],
+        np.ma.getdata(latitudes)[valid_pixels],
+    )
 
 
 def get_slice_edges(
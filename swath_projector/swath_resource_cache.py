@@ -0,0 +1,101 @@
+"""This module contains a process-level cache of the resources describing
+input swaths, so that a long-lived worker can reuse them for later messages
+that reproject the same geolocation, e.g., requests for other variables or
+output formats of a granule that was already processed.
+
+Each entry contains the swath definition for a set of coordinates, along
+with any KD-tree derived from it, and the reprojection information derived
+for each interpolation method and target area. Entries are keyed by the
+content-based fingerprint of the coordinates, so a granule is recognised
+even when each message downloads it to a different path.
+
+The cache is disabled by default, as a process handling a single
+invocation gains nothing from it, and is enabled by the long-lived worker.
+Each entry can retain arrays the size of the swath, so the number of
+entries is bounded, with the least recently used entry evicted first.
+
+"""
+
+from collections import OrderedDict
+from logging import Logger
+from typing import Dict, Optional
+
+from swath_projector.environment import get_integer_environment_variable
+
+# The environment variable specifying the maximum number of swaths whose
+# resources are retained by a long-lived worker between messages. Zero
+# disables the cache.
+SWATH_RESOURCE_CACHE_SIZE_ENVIRONMENT_VARIABLE = (
+    'SWATH_PROJECTOR_SWATH_RESOURCE_CACHE_SIZE'
+)
+# The number of swaths retained by a long-lived worker, unless configured via
+# the environment variable above.
+DEFAULT_WORKER_CACHE_SIZE = 4
+# The key in each entry for the reprojection information derived from the
+# swath, keyed by interpolation method, target area and whether the target
+# area was trimmed.
+REPROJECTION_INFORMATION = 'reprojection_information'
+
+swath_resource_cache: OrderedDict = OrderedDict()
+cache_settings = {'maximum_size': 0}
+
+
+def configure_swath_resource_cache(logger: Logger) -> None:
+    """Enable the cache for a long-lived worker, with the number of entries
+    specified by the environment, or the default for workers.
+
+    """
+    set_swath_resource_cache_size(
+        get_integer_environment_variable(
+            SWATH_RESOURCE_CACHE_SIZE_ENVIRONMENT_VARIABLE,
+            DEFAULT_WORKER_CACHE_SIZE,
+            0,
+            logger,
+        )
+    )
+
+
+def set_swath_resource_cache_size(maximum_size: int) -> None:
+    """Set the maximum number of cached swaths, evicting the least recently
+    used entries beyond that number. A size of zero disables the cache.
+
+    """
+    cache_settings['maximum_size'] = max(maximum_size, 0)
+    evict_swath_resources()
+
+
+def swath_resource_cache_enabled() -> bool:
+    """Return whether swath resources should be retained between messages."""
+    return cache_settings['maximum_size'] > 0
+
+
+def get_cached_swath_resources(fingerprint: str) -> Optional[Dict]:
+    """Return the cached resources for coordinates with the specified
+    fingerprint, marking them as the most recently used, or `None` if the
+    coordinates have not been cached.
+
+    """
+    if fingerprint not in swath_resource_cache:
+        return None
+
+    swath_resource_cache.move_to_end(fingerprint)
+    return swath_resource_cache[fingerprint]
+
+
+def cache_swath_resources(fingerprint: str, swath_resources: Dict) -> None:
+    """Add the resources for coordinates with the specified fingerprint to
+    the cache, if enabled. Resources added to the dictionary later, e.g., a
+    KD-tree, are therefore also retained, as is any reprojection information
+    stored under `REPROJECTION_INFORMATION`.
+
+    """
+    if swath_resource_cache_enabled():
+        swath_resources.setdefault(REPROJECTION_INFORMATION, {})
+        swath_resource_cache[fingerprint] = swath_resources
+        evict_swath_resources()
+
+
+def evict_swath_resources() -> None:
+    """Remove the least recently used entries beyond the maximum size."""
+    while len(swath_resource_cache) > cache_settings['maximum_size']:
+        swath_resource_cache.popitem(last=False)
@@ -0,0 +1,490 @@
+"""This module contains functions to reproject a swath to the tiles of a
+standard tiling scheme, such as the MODIS sinusoidal grid, in a single pass
+over the input granule. Each tiling scheme divides the world into a fixed
+grid of equally sized tiles in its own CRS, identified by their horizontal
+(h) and vertical (v) indices, e.g., "h18v07". Indices count from the tile at
+the minimum x and maximum y of the scheme.
+
+Only the tiles intersected by the swath are reprojected. These are found by
+projecting the perimeter of the swath to the CRS of the tiling scheme, and
+testing each tile within the bounding box of that perimeter for intersection
+with the polygon the perimeter describes. The perimeter of a swath crossing
+the antimeridian is first split into the parts either side of it. Each intersected tile is then a
+target grid, fully defined by the extents of the tile and the tile
+dimensions, to which all science variables are reprojected. Tiles without
+any valid reprojected pixels, e.g., those only covering a corner of the
+swath bounding box, are omitted from the output.
+
+"""
+
+import os
+from logging import Logger
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from netCDF4 import Dataset, Variable
+from pyproj import Proj
+from varinfo import VarInfoFromNetCDF4
+
+from swath_projector.swath_geometry import (
+    get_perimeter_coordinates,
+    get_projected_coordinates,
+    get_projected_resolution,
+    get_valid_coordinates_mask,
+    sort_perimeter_points,
+)
+from swath_projector.utilities import (
+    create_coordinates_key,
+    get_coordinate_variable,
+    get_variable_file_path,
+)
+
+# The size, in metres, of each MODIS sinusoidal tile, which is 1/36 of the
+# circumference of the sphere used by that projection.
+MODIS_TILE_SIZE = 1111950.5197665233
+TILE_SCHEMES = {
+    'modis': {
+        'crs': '+proj=sinu +R=6371007.181 +nadgrids=@null +wktext +units=m',
+        'x_min': -18 * MODIS_TILE_SIZE,
+        'y_max': 9 * MODIS_TILE_SIZE,
+        'tile_width': MODIS_TILE_SIZE,
+        'tile_height': MODIS_TILE_SIZE,
+        'columns': 36,
+        'rows': 18,
+    },
+    'geographic': {
+        'crs': 'EPSG:4326',
+        'x_min': -180.0,
+        'y_max': 90.0,
+        'tile_width': 10.0,
+        'tile_height': 10.0,
+        'columns': 36,
+        'rows': 18,
+    },
+}
+# The suffix of the directory containing the output file for each tile.
+TILE_DIRECTORY_SUFFIX = '_tiles'
+
+
+def get_tile_parameters(
+    parameters: Dict,
+    var_info: VarInfoFromNetCDF4,
+    science_variables: Set[str],
+    logger: Logger,
+) -> List[Dict]:
+    """Return the parameters of a target grid for each tile intersected by
+    the swath coordinates of any science variable. Each set of parameters
+    is a copy of the message parameters, with the extents and dimensions of
+    the tile, and the tile name as the target name. The dimensions of each
+    tile are either taken from the message, or derived from the finest
+    resolution of the swath coordinates, so all tiles share a pixel size.
+
+    """
+    tile_scheme = TILE_SCHEMES[parameters['tile_scheme']]
+    coordinates_keys = {
+        create_coordinates_key(var_info.get_variable(science_variable))
+        for science_variable in science_variables
+    }
+    tiles = set()
+    resolutions = []
+
+    with Dataset(parameters['input_file']) as dataset:
+        for coordinates_key in coordinates_keys:
+            longitudes = get_coordinate_variable(dataset, coordinates_key, 'lon')
+            latitudes = get_coordinate_variable(dataset, coordinates_key, 'lat')
+            tiles.update(
+                get_swath_tiles(
+                    tile_scheme, parameters['projection'], longitudes, latitudes
+                )
+            )
+
+            if parameters['height'] is None and parameters['xres'] is None:
+                resolutions.append(
+                    get_projected_resolution(
+                        parameters['projection'], longitudes, latitudes
+                    )
+                )
+
+    tile_dimensions = get_tile_dimensions(
+        parameters, tile_scheme, min(resolutions, default=None)
+    )
+    logger.info(
+        f'Swath intersects {len(tiles)} "{parameters["tile_scheme"]}" tile(s), '
+        f'each with dimensions: {tile_dimensions}'
+    )
+
+    return [
+        {
+            **parameters,
+            **get_tile_extents(tile_scheme, *tile),
+            'height': tile_dimensions[0],
+            'width': tile_dimensions[1],
+            'xres': None,
+            'yres': None,
+            'target_name': get_tile_name(*tile),
+        }
+        for tile in sorted(tiles)
+    ]
+
+
+def get_swath_tiles(
+    tile_scheme: Dict, projection: Proj, longitudes: Variable, latitudes: Variable
+) -> Set[Tuple[int]]:
+    """Return the (h, v) indices of all tiles intersected by the swath. For
+    2-D coordinates, this includes tiles containing a perimeter point of the
+    swath, and tiles that otherwise intersect the polygon described by that
+    perimeter. For 1-D coordinates, only tiles containing a swath pixel are
+    returned.
+
+    The perimeter longitudes of a swath crossing the antimeridian are
+    continuous, so may extend beyond 180 degrees east or west. As the
+    projection wraps these longitudes, the perimeter polygon is split at
+    the antimeridian, and the tiles of each part are found separately.
+
+    """
+    coordinates_mask = get_valid_coordinates_mask(longitudes, latitudes)
+
+    if coordinates_mask.count() == 0:  # pylint: disable=E1101
+        return set()
+
+    if len(longitudes.shape) == 1:
+        x_values, y_values = get_finite_points(
+            *get_projected_coordinates(
+                coordinates_mask, projection, longitudes, latitudes
+            )
+        )
+        columns, rows = get_tile_indices(tile_scheme, x_values, y_values)
+        tiles = set(zip(columns.tolist(), rows.tolist()))
+    else:
+        perimeter_longitudes, perimeter_latitudes = zip(
+            *get_perimeter_coordinates(longitudes[:], latitudes[:], coordinates_mask)
+        )
+        polygon_longitudes, polygon_latitudes = (
+            np.array(ordered_values, dtype=np.float64)
+            for ordered_values in sort_perimeter_points(
+                perimeter_longitudes, perimeter_latitudes
+            )
+        )
+        tiles = set()
+
+        for part_longitudes, part_latitudes in split_polygon_at_antimeridian(
+            polygon_longitudes, polygon_latitudes
+        ):
+            tiles.update(
+                get_polygon_tiles(
+                    tile_scheme,
+                    *get_finite_points(*projection(part_longitudes, part_latitudes)),
+                )
+            )
+
+    return {
+        (column % tile_scheme['columns'], row)
+        for column, row in tiles
+        if 0 <= row < tile_scheme['rows']
+    }
+
+
+def get_finite_points(x_values, y_values) -> Tuple[np.ndarray]:
+    """Return only the projected points with finite x and y coordinates, as
+    floating point arrays. Points outside the domain of a projection may be
+    returned as infinite values.
+
+    """
+    x_values = np.asarray(x_values, dtype=np.float64)
+    y_values = np.asarray(y_values, dtype=np.float64)
+    finite_points = np.isfinite(x_values) & np.isfinite(y_values)
+
+    return x_values[finite_points], y_values[finite_points]
+
+
+def get_polygon_tiles(
+    tile_scheme: Dict, polygon_x: np.ndarray, polygon_y: np.ndarray
+) -> Set[Tuple[int]]:
+    """Return the (h, v) indices of all tiles containing a vertex of the
+    polygon, or otherwise intersected by it. Polygons with fewer than three
+    vertices only return the tiles containing those vertices. Horizontal
+    indices are not wrapped, so may lie outside the range of the tiling
+    scheme.
+
+    """
+    if polygon_x.size == 0:
+        return set()
+
+    columns, rows = get_tile_indices(tile_scheme, polygon_x, polygon_y)
+    tiles = set(zip(columns.tolist(), rows.tolist()))
+
+    if polygon_x.size > 2:
+        for column in range(columns.min(), columns.max() + 1):
+            for row in range(rows.min(), rows.max() + 1):
+                if (column, row) not in tiles and polygon_intersects_rectangle(
+                    polygon_x,
+                    polygon_y,
+                    get_tile_extents(tile_scheme, column, row),
+                ):
+                    tiles.add((column, row))
+
+    return tiles
+
+
+def split_polygon_at_antimeridian(
+    longitudes: np.ndarray, latitudes: np.ndarray
+) -> List[Tuple[np.ndarray]]:
+    """Split a polygon, described by ordered vertices with continuous
+    longitudes, into the parts either side of the antimeridian. The part
+    beyond 180 degrees east or west is shifted by 360 degrees, so that all
+    longitudes of both parts are in the range: -180 <= longitude <= 180. A
+    polygon that does not cross the antimeridian is returned unchanged.
+
+    """
+    if np.all(np.abs(longitudes) <= 180.0):
+        return [(longitudes, latitudes)]
+
+    antimeridian = 180.0 if np.max(longitudes) > 180.0 else -180.0
+    inner_part = clip_polygon_at_meridian(
+        longitudes, latitudes, antimeridian, antimeridian > 0
+    )
+    outer_longitudes, outer_latitudes = clip_polygon_at_meridian(
+        longitudes, latitudes, antimeridian, antimeridian < 0
+    )
+
+    return [inner_part, (outer_longitudes - 2.0 * antimeridian, outer_latitudes)]
+
+
+def clip_polygon_at_meridian(
+    longitudes: np.ndarray,
+    latitudes: np.ndarray,
+    meridian: float,
+    keep_west: bool,
+    latitude_spacing: float = 1.0,
+) -> Tuple[np.ndarray]:
+    """Clip a polygon, described by ordered vertices, to the part either
+    west or east of a meridian, using the Sutherland-Hodgman algorithm.
+    Edges of the clipped polygon along the meridian are given additional
+    vertices, spaced by no more than `latitude_spacing` degrees, as a
+    meridian may be curved in the projected CRS, e.g., sinusoidal.
+
+    """
+    if keep_west:
+        retained_vertices = longitudes <= meridian
+    else:
+        retained_vertices = longitudes >= meridian
+
+    clipped_longitudes = []
+    clipped_latitudes = []
+
+    def add_meridian_vertex(latitude: float):
+        """Add a vertex on the meridian, preceded by intermediate vertices
+        if the previous vertex was also on the meridian.
+
+        """
+        if len(clipped_longitudes) > 0 and clipped_longitudes[-1] == meridian:
+            previous_latitude = clipped_latitudes[-1]
+            n_vertices = int(
+                np.ceil(abs(latitude - previous_latitude) / latitude_spacing)
+            )
+            intermediate_latitudes = np.linspace(
+                previous_latitude, latitude, n_vertices + 1
+            )[1:-1]
+            clipped_longitudes.extend([meridian] * intermediate_latitudes.size)
+            clipped_latitudes.extend(intermediate_latitudes.tolist())
+
+        clipped_longitudes.append(meridian)
+        clipped_latitudes.append(latitude)
+
+    for index, longitude in enumerate(longitudes):
+        next_index = (index + 1) % longitudes.size
+
+        if retained_vertices[index]:
+            clipped_longitudes.append(longitude)
+            clipped_latitudes.append(latitudes[index])
+
+        if retained_vertices[index] != retained_vertices[next_index]:
+            fraction = (meridian - longitude) / (longitudes[next_index] - longitude)
+            add_meridian_vertex(
+                latitudes[index] + fraction * (latitudes[next_index] - latitudes[index])
+            )
+
+    return np.array(clipped_longitudes), np.array(clipped_latitudes)
+
+
+def get_tile_indices(
+    tile_scheme: Dict, x_values: np.ndarray, y_values: np.ndarray
+) -> Tuple[np.ndarray]:
+    """Return the horizontal and vertical indices of the tiles containing
+    each projected point. Horizontal indices are not wrapped, so may lie
+    outside the range of the tiling scheme.
+
+    """
+    columns = np.floor((x_values - tile_scheme['x_min']) / tile_scheme['tile_width'])
+    rows = np.floor((tile_scheme['y_max'] - y_values) / tile_scheme['tile_height'])
+
+    return columns.astype(int), rows.astype(int)
+
+
+def get_tile_extents(tile_scheme: Dict, column: int, row: int) -> Dict:
+    """Return the projected extents of the tile with the given horizontal and
+    vertical indices.
+
+    """
+    x_min = tile_scheme['x_min'] + column * tile_scheme['tile_width']
+    y_max = tile_scheme['y_max'] - row * tile_scheme['tile_height']
+
+    return {
+        'x_min': float(x_min),
+        'x_max': float(x_min + tile_scheme['tile_width']),
+        'y_min': float(y_max - tile_scheme['tile_height']),
+        'y_max': float(y_max),
+    }
+
+
+def get_tile_dimensions(
+    parameters: Dict, tile_scheme: Dict, resolution: Optional[float]
+) -> Tuple[int]:
+    """Return the height and width of every tile, in pixels. These are taken
+    from the `height` and `width` of the message, if specified. Otherwise,
+    the tile dimensions are the number of pixels of the requested, or
+    derived, resolution that most closely fit within each tile.
+
+    """
+    if parameters['height'] is not None:
+        return int(parameters['height']), int(parameters['width'])
+
+    if parameters['xres'] is not None:
+        x_resolution = abs(parameters['xres'])
+        y_resolution = abs(parameters['yres'])
+    else:
+        x_resolution = y_resolution = resolution
+
+    return (
+        max(int(round(tile_scheme['tile_height'] / y_resolution)), 1),
+        max(int(round(tile_scheme['tile_width'] / x_resolution)), 1),
+    )
+
+
+def get_tile_name(column: int, row: int) -> str:
+    """Return the conventional name of a tile, e.g., "h08v05"."""
+    return f'h{column:02d}v{row:02d}'
+
+
+def polygon_intersects_rectangle(
+    polygon_x: np.ndarray, polygon_y: np.ndarray, extents: Dict
+) -> bool:
+    """Determine whether a polygon, described by ordered vertices, intersects
+    a rectangle with the given extents. This is the case if either shape has
+    a vertex within the other, or an edge of the polygon crosses an edge of
+    the rectangle.
+
+    """
+    if np.any(
+        (polygon_x >= extents['x_min'])
+        & (polygon_x <= extents['x_max'])
+        & (polygon_y >= extents['y_min'])
+        & (polygon_y <= extents['y_max'])
+    ):
+        return True
+
+    rectangle_corners = [
+        (extents['x_min'], extents['y_min']),
+        (extents['x_max'], extents['y_min']),
+        (extents['x_max'], extents['y_max']),
+        (extents['x_min'], extents['y_max']),
+    ]
+
+    if any(
+        point_in_polygon(corner_x, corner_y, polygon_x, polygon_y)
+        for corner_x, corner_y in rectangle_corners
+    ):
+        return True
+
+    return any(
+        np.any(
+            segments_intersect(
+                polygon_x,
+                polygon_y,
+                np.roll(polygon_x, -1),
+                np.roll(polygon_y, -1),
+                rectangle_corners[corner_index],
+                rectangle_corners[(corner_index + 1) % 4],
+            )
+        )
+        for corner_index in range(4)
+    )
+
+
+def point_in_polygon(
+    x_value: float, y_value: float, polygon_x: np.ndarray, polygon_y: np.ndarray
+) -> bool:
+    """Determine whether a point is within a polygon, described by ordered
+    vertices, by counting the polygon edges crossed by a ray extending from
+    the point in the positive x direction. An odd number of crossings means
+    the point is within the polygon.
+
+    """
+    next_x = np.roll(polygon_x, -1)
+    next_y = np.roll(polygon_y, -1)
+    spans_point = (polygon_y > y_value) != (next_y > y_value)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossing_x = polygon_x + (y_value - polygon_y) * (next_x - polygon_x) / (
+            next_y - polygon_y
+        )
+
+    return bool(np.count_nonzero(spans_point & (x_value < crossing_x)) % 2)
+
+
+def segments_intersect(
+    start_x: np.ndarray,
+    start_y: np.ndarray,
+    end_x: np.ndarray,
+    end_y: np.ndarray,
+    segment_start: Tuple[float],
+    segment_end: Tuple[float],
+) -> np.ndarray:
+    """Determine whether each of an array of line segments intersects a
+    single other line segment. Two segments intersect if the end points of
+    each segment lie on opposite sides of the other segment, or on it.
+
+    """
+
+    def get_orientation(first_x, first_y, second_x, second_y, point_x, point_y):
+        """Return the sign of the cross product of the vector from the first
+        to the second point, and the vector from the first point to the
+        third point.
+
+        """
+        return np.sign(
+            (second_x - first_x) * (point_y - first_y)
+            - (second_y - first_y) * (point_x - first_x)
+        )
+
+    return (
+        get_orientation(start_x, start_y, end_x, end_y, *segment_start)
+        * get_orientation(start_x, start_y, end_x, end_y, *segment_end)
+        <= 0
+    ) & (
+        get_orientation(*segment_start, *segment_end, start_x, start_y)
+        * get_orientation(*segment_start, *segment_end, end_x, end_y)
+        <= 0
+    )
+
+
+def tile_is_empty(
+    tile_directory: str, variables: List[str], output_extension: str
+) -> bool:
+    """Determine whether none of the single band outputs for a tile contain
+    any valid pixels, in which case the tile does not intersect the swath.
+
+    """
+    for variable in variables:
+        single_band_file = get_variable_file_path(
+            tile_directory, variable, output_extension
+        )
+
+        if not os.path.isfile(single_band_file):
+            continue
+
+        with Dataset(single_band_file) as single_band_dataset:
+            if np.ma.count(single_band_dataset[variable][:]) > 0:
+                return False
+
+    return True
@@ -1,4 +1,5 @@
 import os
+from hashlib import blake2b
 from typing import Dict, Optional, Tuple, Union
 
 import numpy as np
@@ -8,6 +9,9 @@ from varinfo import VariableFromNetCDF4
 from swath_projector.exceptions import MissingCoordinatesError
 
 FillValueType = Optional[Union[float, int]]
+# The approximate number of array elements read at a time when calculating a
+# fingerprint of the contents of coordinate variables.
+FINGERPRINT_BLOCK_SIZE = 2**20
 
 
 def create_coordinates_key(variable: VariableFromNetCDF4) -> Tuple[str]:
@@ -25,8 +29,9 @@ def get_variable_values(
     input_file: Dataset, variable: Variable, fill_value: Optional
 ) -> np.ndarray:
     """A helper function to retrieve the values of a specified dataset. This
-    function accounts for 2-D and 3-D datasets based on whether the time
-    variable is present in the dataset.
+    function accounts for 1-D, 2-D and 3-D datasets based on whether the
+    time variable is present in the dataset. 1-D datasets, such as
+    along-track profiles, retain their shape.
 
     As the variable data are returned as a `numpy.ma.MaskedArray`, the will
     return no data in the filled pixels. To ensure that the data are
@@ -39,8 +44,9 @@ def get_variable_values(
     #       in the longitude-latitude plane should be used to determine 2-D
     #       reprojection information. This information should then also be
     #       applied across the other preceding or following dimensions.
-    if len(variable[:].shape) == 1:
-        return make_array_two_dimensional(variable[:])
+    if len(variable.shape) == 1:
+        # Assumption: Array = (n, )
+        return np.ma.asarray(variable[:]).filled(fill_value=fill_value)
     elif 'time' in input_file.variables and 'time' in variable.dimensions:
         # Assumption: Array = (1, y, x)
         return variable[0][:].filled(fill_value=fill_value)
@@ -49,6 +55,86 @@ def get_variable_values(
         return variable[:].filled(fill_value=fill_value)
 
 
+def values_are_entirely_fill(values: np.ndarray, fill_value: FillValueType) -> bool:
+    """Check whether all elements of the input array are either masked, equal
+    to the fill value or NaN, using a single vectorised scan of the array.
+    If the variable has no numeric fill value, this will return `False`,
+    as there is no fill value with which to populate the output.
+
+    """
+    if fill_value is None:
+        return False
+
+    fill_pixels = np.logical_or(
+        np.ma.getmaskarray(values), np.ma.getdata(values) == fill_value
+    )
+
+    if np.issubdtype(values.dtype, np.floating):
+        fill_pixels = np.logical_or(fill_pixels, np.isnan(np.ma.getdata(values)))
+
+    return bool(np.all(fill_pixels))
+
+
+def write_populated_chunks(
+    variable: Variable, values: np.ndarray, leading_indices: Tuple[int] = ()
+) -> None:
+    """Assign 2-D values to a `netCDF4.Variable`, only writing the chunks of
+    the variable that contain at least one unmasked pixel. Chunks that are
+    entirely masked remain unallocated in the HDF5 file, and will read as
+    the `_FillValue` of the variable. This means that the size of the output
+    scales with the area covered by the data, rather than the full grid.
+
+    The `leading_indices` are used for variables with additional dimensions
+    preceding the two horizontal spatial dimensions, e.g. (time, y, x).
+
+    If the variable is stored contiguously, all values are written.
+
+    """
+    chunking = variable.chunking()
+    populated_pixels = np.logical_not(np.ma.getmaskarray(values))
+    full_window = (slice(None), slice(None))
+
+    if chunking == 'contiguous' or populated_pixels.all():
+        variable[leading_indices + full_window] = values
+    else:
+        chunk_rows, chunk_columns = chunking[-2:]
+        populated_chunks = get_populated_chunks(
+            populated_pixels, chunk_rows, chunk_columns
+        )
+
+        for chunk_row, chunk_column in zip(*np.nonzero(populated_chunks)):
+            chunk_window = (
+                slice(chunk_row * chunk_rows, (chunk_row + 1) * chunk_rows),
+                slice(chunk_column * chunk_columns, (chunk_column + 1) * chunk_columns),
+            )
+            variable[leading_indices + chunk_window] = values[chunk_window]
+
+
+def get_populated_chunks(
+    populated_pixels: np.ndarray, chunk_rows: int, chunk_columns: int
+) -> np.ndarray:
+    """Return a 2-D boolean array with one element per chunk of the supplied
+    2-D mask of populated pixels, indicating whether that chunk contains
+    any populated pixels.
+
+    """
+    n_chunk_rows = -(-populated_pixels.shape[0] // chunk_rows)
+    n_chunk_columns = -(-populated_pixels.shape[1] // chunk_columns)
+
+    # Pad the mask to a whole number of chunks, then reduce each chunk to
+    # a single value indicating whether it contains any valid pixels.
+    padded_pixels = np.zeros(
+        (n_chunk_rows * chunk_rows, n_chunk_columns * chunk_columns), dtype=bool
+    )
+    padded_pixels[: populated_pixels.shape[0], : populated_pixels.shape[1]] = (
+        populated_pixels
+    )
+
+    return padded_pixels.reshape(
+        n_chunk_rows, chunk_rows, n_chunk_columns, chunk_columns
+    ).any(axis=(1, 3))
+
+
 def get_coordinate_variable(
     dataset: Dataset, coordinates_tuple: Tuple[str], coordinate_substring
 ) -> Optional[Variable]:
@@ -66,6 +152,34 @@ def get_coordinate_variable(
     raise MissingCoordinatesError(coordinates_tuple)
 
 
+def get_coordinates_fingerprint(dataset: Dataset, coordinates: Tuple[str]) -> str:
+    """Calculate a hash of the contents of the latitude and longitude
+    variables referred to by the coordinates tuple. Coordinate variables
+    with identical shapes and values, such as copies stored under different
+    group paths, will have the same fingerprint. The variables are read in
+    blocks of rows, so that the full arrays are not held in memory at the
+    same time.
+
+    """
+    fingerprint = blake2b(digest_size=16)
+
+    for coordinate_substring in ['lat', 'lon']:
+        variable = get_coordinate_variable(dataset, coordinates, coordinate_substring)
+        fingerprint.update(f'{coordinate_substring}{variable.shape}'.encode())
+
+        mask_fingerprint = blake2b(digest_size=16)
+        block_rows = max(FINGERPRINT_BLOCK_SIZE // int(np.prod(variable.shape[1:])), 1)
+
+        for start_row in range(0, variable.shape[0], block_rows):
+            values = variable[start_row : start_row + block_rows]
+            fingerprint.update(np.ma.getdata(values).tobytes())
+            mask_fingerprint.update(np.ma.getmaskarray(values).tobytes())
+
+        fingerprint.update(mask_fingerprint.digest())
+
+    return fingerprint.hexdigest()
+
+
 def get_variable_numeric_fill_value(variable: Variable) -> FillValueType:
     """Retrieve the _FillValue attribute for a given variable. If there is no
     _FillValue attribute, return None. The `pyresample`
@@ -205,14 +319,3 @@ def variable_in_dataset(variable_name: str, dataset: Dataset) -> bool:
             group_valid = False
 
     return group_valid and variable_pieces[-1] in group.variables
-
-
-def make_array_two_dimensional(one_dimensional_array: np.ndarray) -> np.ndarray:
-    """Take a one dimensional array and make it a two-dimensional array, with
-    all values in the same column.
-
-    This is primarily required to allow processing of data with the EWA
-    interpolations method.
-
-    """
-    return np.expand_dims(one_dimensional_array, 1)
@@ -0,0 +1,145 @@
+"""This module contains functions to cache the parsed `earthdata-varinfo`
+representation of input granules within a single process.
+
+The VarInfo configuration file, and the `CFConfig` derived from it for each
+collection, are only parsed once per process. Additionally, the variable,
+dimension and reference graph of a granule is cached, keyed by the
+collection short name and a structural fingerprint of the file. Subsequent
+granules from the same collection, with the same structure, reuse that graph
+instead of constructing it again. The number of cached graphs is bounded.
+
+"""
+
+from collections import OrderedDict
+from copy import copy
+from hashlib import blake2b
+from logging import Logger
+from typing import Dict, Optional, Tuple, Union
+
+from netCDF4 import Dataset, Group
+from varinfo import CFConfig, VarInfoFromNetCDF4
+
+# The maximum number of granule representations retained in the cache.
+VAR_INFO_CACHE_SIZE = 32
+
+var_info_configurations: Dict[Optional[str], Dict] = {}
+cf_configurations: Dict[Tuple[Optional[str]], CFConfig] = {}
+var_info_cache: OrderedDict = OrderedDict()
+
+
+class CachedConfigVarInfoFromNetCDF4(VarInfoFromNetCDF4):
+    """A `VarInfoFromNetCDF4` that retrieves the parsed VarInfo configuration
+    and `CFConfig` from process-level caches, rather than parsing the
+    configuration file for every granule.
+
+    """
+
+    def _set_var_info_config(self):
+        """Parse the configuration file on first use, and otherwise retrieve
+        the previously parsed configuration.
+
+        """
+        if self.config_file not in var_info_configurations:
+            super()._set_var_info_config()
+            var_info_configurations[self.config_file] = self.var_info_config
+
+        self.var_info_config = var_info_configurations[self.config_file]
+
+    def _set_cf_config(self):
+        """Create the `CFConfig` for the mission and collection on first use,
+        and otherwise retrieve the previously created instance.
+
+        """
+        cf_config_key = (self.mission, self.short_name, self.config_file)
+
+        if cf_config_key not in cf_configurations:
+            super()._set_cf_config()
+            cf_configurations[cf_config_key] = self.cf_config
+
+        self.cf_config = cf_configurations[cf_config_key]
+
+
+def get_var_info(
+    file_path: str,
+    short_name: Optional[str],
+    config_file: str,
+    logger: Logger,
+) -> VarInfoFromNetCDF4:
+    """Return the VarInfo representation of a NetCDF-4 granule. If a granule
+    from the same collection, with an identical structure, has already been
+    parsed, the cached variable graph is reused. Global attributes are not
+    part of the structural fingerprint, as they often vary between granules,
+    so these are always read from the current granule.
+
+    Granules are only cached when the collection short name is known, as it
+    would otherwise be derived from the global attributes.
+
+    """
+    if short_name is None:
+        return CachedConfigVarInfoFromNetCDF4(
+            file_path, short_name=short_name, config_file=config_file
+        )
+
+    cache_key = (short_name, config_file, get_structure_fingerprint(file_path))
+
+    if cache_key in var_info_cache:
+        logger.debug(f'Using cached variable information for {short_name}')
+        var_info_cache.move_to_end(cache_key)
+        var_info = copy(var_info_cache[cache_key])
+        var_info.dataset = file_path
+        # pylint: disable=protected-access
+        var_info._set_global_attributes()
+        var_info._update_global_attributes()
+    else:
+        var_info = CachedConfigVarInfoFromNetCDF4(
+            file_path, short_name=short_name, config_file=config_file
+        )
+        var_info_cache[cache_key] = var_info
+
+        if len(var_info_cache) > VAR_INFO_CACHE_SIZE:
+            var_info_cache.popitem(last=False)
+
+    return var_info
+
+
+def get_structure_fingerprint(file_path: str) -> str:
+    """Return a hash of the structure of a NetCDF-4 file: the paths of all
+    groups, and the name, dimensions, shape, data type and attributes of
+    every variable. No variable data are read, so this is much cheaper than
+    constructing the VarInfo representation of the file.
+
+    """
+    file_hash = blake2b(digest_size=16)
+
+    with Dataset(file_path, 'r') as dataset:
+        update_structure_hash(file_hash, dataset)
+
+    return file_hash.hexdigest()
+
+
+def update_structure_hash(file_hash, group: Union[Dataset, Group]) -> None:
+    """Add the structure of a group, and all of its child groups, to the
+    supplied hash.
+
+    """
+    file_hash.update(f'group:{group.path}'.encode('utf-8'))
+
+    for variable in group.variables.values():
+        attributes = [
+            (attribute_name, variable.getncattr(attribute_name))
+            for attribute_name in variable.ncattrs()
+        ]
+        file_hash.update(
+            repr(
+                (
+                    variable.name,
+                    variable.dimensions,
+                    variable.shape,
+                    str(variable.dtype),
+                    attributes,
+                )
+            ).encode('utf-8')
+        )
+
+    for child_group in group.groups.values():
+        update_structure_hash(file_hash, child_group)
@@ -0,0 +1,142 @@
+"""This module contains functions to run the Swath Projector as a long-lived
+worker, processing a stream of Harmony CLI invocations within a single
+Python process. This avoids paying the start-up cost of importing
+`pyresample`, `pyproj`, `netCDF4` and `varinfo` for every request, and
+retains bounded, process-level caches (e.g., `Proj` objects) between
+requests. The worker also enables the cache of swath resources, such as
+KD-trees and reprojection information, so that later messages with the
+same geolocation reuse them, see `swath_projector.swath_resource_cache`.
+
+Each message is a JSON array of the Harmony CLI arguments that would
+otherwise be supplied to a single invocation of the service, for example:
+
+    ["--harmony-action", "invoke", "--harmony-input", "{...}",
+     "--harmony-sources", "catalog.json", "--harmony-metadata-dir", "out"]
+
+Messages are read either from standard input, one per line, or from a queue
+directory. Within a queue directory, each message is a file with a `.json`
+extension, and messages are processed in name order. Once processed, a
+message file is renamed with a `.done` or `.failed` extension. The worker
+exits when the queue directory contains no pending messages and a file
+named `shutdown`.
+
+"""
+
+import json
+import logging
+import os
+import time
+from argparse import ArgumentParser
+from typing import List, TextIO
+
+from harmony import is_harmony_cli, run_cli
+
+from swath_projector.adapter import SwathProjectorAdapter
+from swath_projector.swath_resource_cache import configure_swath_resource_cache
+
+# The extension of pending message files within a queue directory.
+MESSAGE_EXTENSION = '.json'
+# The name of the file that requests a worker stops, once the queue directory
+# has no pending messages.
+SHUTDOWN_FILE_NAME = 'shutdown'
+# The number of seconds to wait before checking an empty queue directory for
+# new messages.
+POLL_INTERVAL_SECONDS = 1
+
+
+def run_stream_worker(
+    parser: ArgumentParser, stream: TextIO, logger: logging.Logger
+) -> int:
+    """Process messages from a text stream, such as standard input, with one
+    JSON array of arguments per line, until the stream is closed. Blank lines
+    are ignored. A failed message is logged, and does not stop the worker.
+    The number of messages that failed is returned.
+
+    """
+    failures = 0
+    configure_swath_resource_cache(logger)
+
+    for line in stream:
+        if line.strip() and not process_message(parser, line, logger):
+            failures += 1
+
+    logger.info(f'Worker stopping, {failures} message(s) failed')
+    return failures
+
+
+def run_directory_worker(
+    parser: ArgumentParser,
+    queue_directory: str,
+    logger: logging.Logger,
+    poll_interval: float = POLL_INTERVAL_SECONDS,
+) -> int:
+    """Process message files from a queue directory, in name order. Each
+    message file is renamed once processed, with a `.done` extension if it
+    succeeded, or `.failed` otherwise. The worker stops when there are no
+    pending messages and the queue directory contains a shutdown file. The
+    number of messages that failed is returned.
+
+    """
+    failures = 0
+    configure_swath_resource_cache(logger)
+
+    while True:
+        message_files = get_pending_message_files(queue_directory)
+
+        if not message_files:
+            if os.path.exists(os.path.join(queue_directory, SHUTDOWN_FILE_NAME)):
+                break
+
+            time.sleep(poll_interval)
+            continue
+
+        for message_file in message_files:
+            with open(message_file, encoding='utf-8') as file_handler:
+                message = file_handler.read()
+
+            if process_message(parser, message, logger):
+                completed_extension = '.done'
+            else:
+                completed_extension = '.failed'
+                failures += 1
+
+            os.replace(
+                message_file, os.path.splitext(message_file)[0] + completed_extension
+            )
+
+    logger.info(f'Worker stopping, {failures} message(s) failed')
+    return failures
+
+
+def get_pending_message_files(queue_directory: str) -> List[str]:
+    """Return the paths of all pending message files in a queue directory,
+    sorted by name.
+
+    """
+    return [
+        os.path.join(queue_directory, file_name)
+        for file_name in sorted(os.listdir(queue_directory))
+        if file_name.endswith(MESSAGE_EXTENSION)
+    ]
+
+
+def process_message(
+    parser: ArgumentParser, message: str, logger: logging.Logger
+) -> bool:
+    """Run a single Harmony CLI invocation, described by a JSON array of
+    arguments. Return whether the invocation succeeded. Argument errors
+    raise a `SystemExit` from the parser, which must not stop the worker.
+
+    """
+    try:
+        harmony_arguments, _ = parser.parse_known_args(json.loads(message))
+
+        if not is_harmony_cli(harmony_arguments):
+            raise ValueError('Only --harmony CLIs are supported')
+
+        run_cli(parser, harmony_arguments, SwathProjectorAdapter)
+    except (Exception, SystemExit) as error:
+        logger.error(f'Worker message failed: {str(error)}', exc_info=error)
+        return False
+
+    return True
@@ -0,0 +1,119 @@
+"""This module contains a class to manage the scratch directories used when
+processing a single item. A `Workspace` owns all of the directories it
+creates, and removes them when the item has been processed, regardless of
+whether processing succeeded.
+
+Two optional environment variables configure a `Workspace`:
+
+- SWATH_PROJECTOR_WORKSPACE_QUOTA: The maximum size, in bytes, of all files
+  in the workspace. This is checked after each stage of processing.
+- SWATH_PROJECTOR_SCRATCH_DIRECTORY: A preferred location for intermediate
+  files, such as a RAM-backed filesystem (e.g., /dev/shm). This is only used
+  if the intermediate files are expected to fit in the space available.
+
+"""
+
+import os
+import shutil
+from logging import Logger
+from tempfile import mkdtemp
+from typing import List, Optional
+
+from swath_projector.environment import get_integer_environment_variable
+from swath_projector.exceptions import WorkspaceQuotaExceededError
+
+QUOTA_ENVIRONMENT_VARIABLE = 'SWATH_PROJECTOR_WORKSPACE_QUOTA'
+SCRATCH_DIRECTORY_ENVIRONMENT_VARIABLE = 'SWATH_PROJECTOR_SCRATCH_DIRECTORY'
+# The expected size of the single band and merged output files, relative to
+# the size of the input granule. This is used to determine whether the
+# intermediate files will fit in the scratch directory.
+INTERMEDIATE_SIZE_FACTOR = 3
+
+
+class Workspace:
+    """Owns the directories used to process a single item. The main
+    directory is created on instantiation, and is where input granules are
+    downloaded. Intermediate files may be written to a separate directory in
+    the configured scratch location. All directories are removed by
+    `cleanup`, which is called on exit when used as a context manager.
+
+    """
+
+    def __init__(self, logger: Logger):
+        self.logger = logger
+        self.quota = get_integer_environment_variable(
+            QUOTA_ENVIRONMENT_VARIABLE, 0, 0, logger
+        )
+        self.scratch_directory = os.environ.get(SCRATCH_DIRECTORY_ENVIRONMENT_VARIABLE)
+        self.directories: List[str] = []
+        self.directory = self.create_directory()
+
+    def __enter__(self) -> 'Workspace':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.cleanup()
+
+    def create_directory(self, parent_directory: Optional[str] = None) -> str:
+        """Create a new directory owned by the workspace."""
+        directory = mkdtemp(dir=parent_directory)
+        self.directories.append(directory)
+        return directory
+
+    def get_intermediate_directory(self, input_filename: str) -> str:
+        """Return the directory in which to write intermediate files, such as
+        single band outputs and the merged output file. If a scratch
+        directory is configured, and has enough free space for the expected
+        intermediate files, a new directory is created there. Otherwise, the
+        main workspace directory is used.
+
+        """
+        if self.scratch_directory is None:
+            return self.directory
+
+        expected_size = os.path.getsize(input_filename) * INTERMEDIATE_SIZE_FACTOR
+
+        try:
+            available_space = shutil.disk_usage(self.scratch_directory).free
+        except OSError:
+            self.logger.warning(
+                f'Scratch directory unavailable: {self.scratch_directory}'
+            )
+            return self.directory
+
+        if expected_size > available_space:
+            self.logger.info(
+                f'Intermediate files ({expected_size} bytes) will not fit in '
+                f'{self.scratch_directory} ({available_space} bytes free).'
+            )
+            return self.directory
+
+        self.logger.info(f'Writing intermediate files to {self.scratch_directory}')
+        return self.create_directory(self.scratch_directory)
+
+    def get_size(self) -> int:
+        """Return the total size, in bytes, of all files in the workspace."""
+        return sum(
+            os.path.getsize(os.path.join(root, file_name))
+            for directory in self.directories
+            for root, _, file_names in os.walk(directory)
+            for file_name in file_names
+        )
+
+    def check_quota(self) -> None:
+        """Raise an exception if the total size of all files in the workspace
+        exceeds the configured quota. A quota of zero is not enforced.
+
+        """
+        if self.quota > 0:
+            workspace_size = self.get_size()
+
+            if workspace_size > self.quota:
+                raise WorkspaceQuotaExceededError(workspace_size, self.quota)
+
+    def cleanup(self) -> None:
+        """Remove all directories owned by the workspace."""
+        for directory in self.directories:
+            shutil.rmtree(directory, ignore_errors=True)
+
+        self.directories = []
@@ -0,0 +1,287 @@
+"""This module contains functions to write the reprojected single-band
+NetCDF-4 files, produced by `pyresample`, to a single Zarr directory store.
+This is an alternative to merging them into a NetCDF-4 file, and is selected
+by requesting the `application/x-zarr` output format.
+
+The store follows the same layout as the merged NetCDF-4 output: global
+attributes and metadata variables are copied from the input granule, and
+each science variable is accompanied by its grid mapping and projected
+dimension variables. Dimension names are recorded in the `_ARRAY_DIMENSIONS`
+attribute of each array, and all other attributes retain their CF names, so
+that the store can be opened by tools such as `xarray`.
+
+Values are copied without unpacking, and each variable is written in blocks
+of whole chunks, which are compressed concurrently in a thread pool. Chunks
+only containing fill values are not stored.
+
+"""
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import zarr
+from netCDF4 import Dataset, Variable
+from numcodecs import VLenUTF8, Zlib
+from varinfo import VarInfoFromNetCDF4
+
+from swath_projector.environment import get_integer_environment_variable
+from swath_projector.exceptions import MissingReprojectedDataError
+from swath_projector.nc_merge import (
+    get_fill_value_from_attributes,
+    get_output_attributes,
+    get_science_variable_attributes,
+    get_science_variable_dimensions,
+    read_attrs,
+)
+from swath_projector.utilities import get_variable_file_path
+
+# The environment variable specifying the number of threads used to compress
+# the chunks of each variable written to a Zarr store. Defaults to the number
+# of CPUs available.
+ZARR_THREADS_ENVIRONMENT_VARIABLE = 'SWATH_PROJECTOR_ZARR_THREADS'
+# The maximum length of the last two dimensions of each Zarr chunk. All other
+# dimensions have a chunk length of one.
+ZARR_CHUNK_SIZE = 1024
+# The compression applied to every chunk, matching the `zlib` compression
+# level used in the merged NetCDF-4 output.
+ZARR_COMPRESSOR = Zlib(level=6)
+# The attribute recording the dimension names of each array, as used by
+# `xarray`.
+DIMENSIONS_ATTRIBUTE = '_ARRAY_DIMENSIONS'
+
+
+def create_zarr_output(
+    request_parameters: Dict,
+    output_store: str,
+    temp_dir: str,
+    science_variables: Set[str],
+    metadata_variables: Set[str],
+    logger: logging.Logger,
+    var_info: VarInfoFromNetCDF4,
+) -> None:
+    """Write the reprojected single-band NetCDF-4 files to a Zarr directory
+    store, along with the global attributes and metadata variables of the
+    input granule. Each grid mapping and projected dimension variable is
+    only written once. The metadata of the store are consolidated, so that
+    consumers can open the store with a single read.
+
+    """
+    input_file = request_parameters.get('input_file')
+    logger.info(f'Creating Zarr output store "{output_store}"')
+    thread_count = get_integer_environment_variable(
+        ZARR_THREADS_ENVIRONMENT_VARIABLE, os.cpu_count() or 1, 1, logger
+    )
+    # Bound the number of blocks read ahead of compression.
+    maximum_pending_blocks = thread_count * 2
+
+    with (
+        Dataset(input_file) as input_dataset,
+        ThreadPoolExecutor(max_workers=thread_count) as executor,
+    ):
+        output_group = zarr.open_group(output_store, mode='w')
+        output_group.attrs.update(
+            get_json_attributes(
+                get_output_attributes(input_dataset, request_parameters)
+            )
+        )
+
+        if 'time' in input_dataset.dimensions:
+            logger.info('Adding "time" dimension.')
+            write_zarr_variable(
+                input_dataset['time'],
+                output_group,
+                'time',
+                executor,
+                maximum_pending_blocks,
+            )
+
+        for metadata_variable in metadata_variables:
+            logger.info(
+                f'Adding metadata variable "{metadata_variable}" to the output.'
+            )
+            write_zarr_variable(
+                input_dataset[metadata_variable],
+                output_group,
+                metadata_variable,
+                executor,
+                maximum_pending_blocks,
+            )
+
+        output_extension = os.path.splitext(input_file)[1]
+
+        for variable_name in science_variables:
+            dataset_file = get_variable_file_path(
+                temp_dir, variable_name, output_extension
+            )
+
+            if not os.path.isfile(dataset_file):
+                logger.error(f'Cannot find "{dataset_file}".')
+                raise MissingReprojectedDataError(variable_name)
+
+            with Dataset(dataset_file) as single_band_dataset:
+                logger.info(f'Adding reprojected "{variable_name}" to the output')
+                write_zarr_variable(
+                    single_band_dataset[variable_name],
+                    output_group,
+                    variable_name,
+                    executor,
+                    maximum_pending_blocks,
+                    dimensions=get_science_variable_dimensions(
+                        input_dataset, single_band_dataset, variable_name
+                    ),
+                    attributes=get_science_variable_attributes(
+                        input_dataset, single_band_dataset, variable_name, var_info
+                    ),
+                    data_type=input_dataset[variable_name].datatype,
+                )
+
+                # Copy supporting variables from the single band output: the
+                # grid mapping, reprojected x and reprojected y.
+                for variable_key in single_band_dataset.variables:
+                    if (
+                        variable_key not in output_group
+                        and variable_key != variable_name
+                    ):
+                        logger.info(
+                            f'Adding metadata variable "{variable_key}" to the output.'
+                        )
+                        write_zarr_variable(
+                            single_band_dataset[variable_key],
+                            output_group,
+                            variable_key,
+                            executor,
+                            maximum_pending_blocks,
+                        )
+
+    zarr.consolidate_metadata(output_store)
+
+
+def write_zarr_variable(
+    source_variable: Variable,
+    output_group: zarr.Group,
+    variable_path: str,
+    executor: ThreadPoolExecutor,
+    maximum_pending_blocks: int,
+    dimensions: Optional[Tuple[str]] = None,
+    attributes: Optional[Dict] = None,
+    data_type=None,
+) -> None:
+    """Write a NetCDF-4 variable to a Zarr array at the same path. The
+    dimensions, attributes and data type default to those of the source
+    variable. If additional leading dimensions are specified, such as a
+    `time` dimension, these have a length of one. The raw values of the
+    source variable are written, retaining any packing. At most
+    `maximum_pending_blocks` blocks are held in memory awaiting compression.
+
+    """
+    if dimensions is None:
+        dimensions = source_variable.dimensions
+
+    if attributes is None:
+        attributes = read_attrs(source_variable)
+
+    if data_type is None:
+        data_type = source_variable.datatype
+
+    attributes = dict(attributes)
+    fill_value = get_fill_value_from_attributes(attributes)
+    shape = (1,) * (len(dimensions) - source_variable.ndim) + source_variable.shape
+
+    if data_type is str:
+        array_options = {'dtype': object, 'object_codec': VLenUTF8()}
+    else:
+        array_options = {'dtype': np.dtype(data_type), 'fill_value': fill_value}
+
+    output_array = output_group.create_dataset(
+        variable_path.lstrip('/'),
+        shape=shape,
+        chunks=get_zarr_chunk_sizes(shape),
+        compressor=ZARR_COMPRESSOR,
+        write_empty_chunks=False,
+        **array_options,
+    )
+    output_array.attrs.update(get_json_attributes(attributes))
+    output_array.attrs[DIMENSIONS_ATTRIBUTE] = list(dimensions)
+
+    source_variable.set_auto_maskandscale(False)
+    leading_dimensions = len(shape) - source_variable.ndim
+    pending_writes = []
+
+    # NetCDF-4 variables cannot be read concurrently, so blocks are read in
+    # this thread, and then compressed and stored in the thread pool.
+    for block in get_zarr_blocks(shape, output_array.chunks):
+        values = source_variable[block[leading_dimensions:]]
+        pending_writes.append(
+            executor.submit(
+                output_array.__setitem__,
+                block,
+                np.reshape(values, (1,) * leading_dimensions + np.shape(values)),
+            )
+        )
+
+        if len(pending_writes) > maximum_pending_blocks:
+            pending_writes.pop(0).result()
+
+    for pending_write in pending_writes:
+        pending_write.result()
+
+
+def get_zarr_chunk_sizes(shape: Tuple[int]) -> Tuple[int]:
+    """Return the chunk sizes of a Zarr array. The last two dimensions are
+    limited to `ZARR_CHUNK_SIZE`, and all other dimensions have a chunk
+    length of one. One-dimensional arrays are a single chunk.
+
+    """
+    if len(shape) < 2:
+        return tuple(max(size, 1) for size in shape)
+
+    return (1,) * (len(shape) - 2) + tuple(
+        max(min(size, ZARR_CHUNK_SIZE), 1) for size in shape[-2:]
+    )
+
+
+def get_zarr_blocks(shape: Tuple[int], chunk_sizes: Tuple[int]) -> List[Tuple[slice]]:
+    """Return the indices of the blocks in which a Zarr array is written.
+    Each block is a single row of chunks in the last two dimensions, so
+    that blocks can be compressed and stored concurrently without sharing
+    any chunks.
+
+    """
+    if len(shape) < 2:
+        return [tuple(slice(None) for _ in shape)]
+
+    return [
+        tuple(slice(index, index + 1) for index in leading_indices)
+        + (slice(start_row, start_row + chunk_sizes[-2]), slice(None))
+        for leading_indices in np.ndindex(shape[:-2])
+        for start_row in range(0, shape[-2], chunk_sizes[-2])
+    ]
+
+
+def get_json_attributes(attributes: Dict) -> Dict:
+    """Convert NetCDF-4 attribute values to types that can be serialised to
+    the JSON metadata of a Zarr store: `numpy` arrays and scalars become
+    lists and Python scalars, and bytes are decoded.
+
+    """
+    return {
+        attribute_name: get_json_attribute_value(attribute_value)
+        for attribute_name, attribute_value in attributes.items()
+    }
+
+
+def get_json_attribute_value(attribute_value):
+    """Convert a single NetCDF-4 attribute value to a JSON-serialisable type."""
+    if isinstance(attribute_value, np.ndarray):
+        return attribute_value.tolist()
+
+    if isinstance(attribute_value, np.generic):
+        return attribute_value.item()
+
+    if isinstance(attribute_value, bytes):
+        return attribute_value.decode('utf-8')
+
+    return attribute_value
@@ -0,0 +1,95 @@
+"""Tests for the start-up cost of the Swath Projector CLI entry point. Each
+check runs in a fresh Python interpreter, as the modules already imported by
+the test runner would otherwise hide the cost of a cold start.
+
+"""
+
+import json
+import subprocess
+import sys
+from time import perf_counter
+from unittest import TestCase
+
+# The recorded budget, in seconds, for a cold import of the CLI entry point.
+# The majority of this time is spent importing `harmony-service-lib`, and its
+# dependencies, which are required to parse the Harmony CLI arguments. This
+# should only be increased deliberately, alongside a justification.
+COLD_START_BUDGET_SECONDS = 2.0
+# The number of cold starts that are timed. The fastest is compared to the
+# budget, to reduce sensitivity to other activity on the machine.
+COLD_START_REPEATS = 3
+# Modules that are only required to reproject a granule, so should not be
+# imported when the entry point is loaded.
+DEFERRED_MODULES = [
+    'h5py',
+    'netCDF4',
+    'pyproj',
+    'pyresample',
+    'varinfo',
+    'zarr',
+    'swath_projector.interpolation',
+    'swath_projector.reproject',
+]
+
+
+def get_imported_modules(statement: str) -> set[str]:
+    """Return the names of all modules imported by a fresh interpreter after
+    executing the supplied statement.
+
+    """
+    output = subprocess.run(
+        [
+            sys.executable,
+            '-c',
+            f'import json, sys; {statement}; print(json.dumps(list(sys.modules)))',
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return set(json.loads(output.stdout.splitlines()[-1]))
+
+
+class TestColdStart(TestCase):
+    """A test class to ensure the CLI entry point defers heavy imports until
+    they are needed, and that a cold start remains within budget.
+
+    """
+
+    def test_entry_point_defers_heavy_imports(self):
+        """Ensure loading the CLI entry point does not import the modules
+        that are only needed to reproject a granule.
+
+        """
+        imported_modules = get_imported_modules('import swath_projector.__main__')
+
+        for module_name in DEFERRED_MODULES:
+            with self.subTest(module_name):
+                self.assertNotIn(module_name, imported_modules)
+
+    def test_interpolation_backends_imported_on_demand(self):
+        """Ensure the `pyresample` modules for the bilinear and EWA methods are
+        only imported when a request uses those methods.
+
+        """
+        imported_modules = get_imported_modules('import swath_projector.interpolation')
+
+        self.assertNotIn('pyresample.bilinear', imported_modules)
+        self.assertNotIn('pyresample.ewa', imported_modules)
+
+    def test_cold_start_budget(self):
+        """Ensure a fresh interpreter can load the CLI entry point within the
+        recorded cold-start budget.
+
+        """
+        durations = []
+
+        for _ in range(COLD_START_REPEATS):
+            start_time = perf_counter()
+            subprocess.run(
+                [sys.executable, '-c', 'import swath_projector.__main__'],
+                check=True,
+            )
+            durations.append(perf_counter() - start_time)
+
+        self.assertLessEqual(min(durations), COLD_START_BUDGET_SECONDS)
@@ -1,15 +1,32 @@
+import errno
 import json
-from datetime import datetime
-from os import makedirs
+from datetime import datetime, timezone
+from os import environ, listdir, makedirs
+from os.path import abspath, isfile, join
 from shutil import copy, rmtree
+from tempfile import mkdtemp
 from unittest import TestCase
 from unittest.mock import ANY, Mock, patch
 
+import numpy as np
+from harmony.exceptions import HarmonyException
 from harmony.message import Message
 from harmony.util import config
 from netCDF4 import Dataset
-
-from swath_projector.adapter import SwathProjectorAdapter
+from pystac import Asset, Catalog, Item
+
+from swath_projector.adapter import (
+    ITEM_CONCURRENCY_ENVIRONMENT_VARIABLE,
+    LOCAL_URL_PREFIX,
+    PIPELINE_DEPTH_ENVIRONMENT_VARIABLE,
+    SwathProjectorAdapter,
+    get_aggregated_item,
+    get_item_concurrency,
+    get_pipeline_depth,
+    sort_items_by_start_time,
+    stage_directory,
+    stage_local_file,
+)
 from tests.test_utils import StringContains, download_side_effect
 
 
@@ -60,6 +77,41 @@ class TestSwathProjector(TestCase):
 
         return history, history_uppercase, history_json
 
+    def retain_staged_outputs(self, mock_stage):
+        """Set a side effect on the mocked `stage` function that copies each
+        staged file to the test directory, as the workspace containing that
+        file is removed when the request completes. The paths of the copies
+        are appended to the returned list, in the order they are staged.
+
+        """
+        staged_outputs = []
+
+        def stage_side_effect(local_file, remote_filename, *args, **kwargs):
+            staged_output = join(self.tmp_dir, f'staged_{remote_filename}')
+            copy(local_file, staged_output)
+            staged_outputs.append(staged_output)
+            return 'https://example.com/data'
+
+        mock_stage.side_effect = stage_side_effect
+        return staged_outputs
+
+    def get_local_catalog(self, granule_urls):
+        """Create an input STAC catalog with an item for each granule URL."""
+        catalog = Catalog('input catalog', 'test catalog')
+
+        for granule_index, granule_url in enumerate(granule_urls):
+            item = Item(
+                f'item_{granule_index}',
+                None,
+                self.bounding_box,
+                datetime(2020, 1, 1),
+                {},
+            )
+            item.add_asset('data', Asset(granule_url, roles=['data']))
+            catalog.add_item(item)
+
+        return catalog
+
     def test_single_band_input(self, mock_download, mock_stage, mock_datetime):
         """Nominal (successful) reprojection of a single band input file."""
         input_file_path = 'tests/data/VNL2_oneBand.nc'
@@ -139,6 +191,7 @@ class TestSwathProjector(TestCase):
         )
 
         reprojector = SwathProjectorAdapter(test_data, config=config(False))
+        staged_outputs = self.retain_staged_outputs(mock_stage)
         reprojector.invoke()
 
         mock_download.assert_called_once_with(
@@ -152,7 +205,7 @@ class TestSwathProjector(TestCase):
             logger=ANY,
         )
 
-        output_path = mock_stage.call_args[0][0]
+        output_path = staged_outputs[0]
         history, history_uppercase, history_json = self.get_provenance(output_path)
 
         expected_history = (
@@ -248,6 +301,7 @@ class TestSwathProjector(TestCase):
         )
 
         reprojector = SwathProjectorAdapter(test_data, config=config(False))
+        staged_outputs = self.retain_staged_outputs(mock_stage)
         reprojector.invoke()
 
         mock_download.assert_called_once_with(
@@ -261,7 +315,7 @@ class TestSwathProjector(TestCase):
             logger=ANY,
         )
 
-        output_path = mock_stage.call_args[0][0]
+        output_path = staged_outputs[0]
         history, history_uppercase, history_json = self.get_provenance(output_path)
 
         expected_history = (
@@ -354,6 +408,7 @@ class TestSwathProjector(TestCase):
         )
 
         reprojector = SwathProjectorAdapter(test_data, config=config(False))
+        staged_outputs = self.retain_staged_outputs(mock_stage)
         reprojector.invoke()
 
         mock_download.assert_called_once_with(
@@ -367,7 +422,7 @@ class TestSwathProjector(TestCase):
             logger=ANY,
         )
 
-        output_path = mock_stage.call_args[0][0]
+        output_path = staged_outputs[0]
         history, history_uppercase, history_json = self.get_provenance(output_path)
 
         expected_history_uppercase = (
@@ -441,6 +496,7 @@ class TestSwathProjector(TestCase):
         )
 
         reprojector = SwathProjectorAdapter(test_data, config=config(False))
+        staged_outputs = self.retain_staged_outputs(mock_stage)
         reprojector.invoke()
 
         mock_download.assert_called_once_with(
@@ -454,7 +510,7 @@ class TestSwathProjector(TestCase):
             logger=ANY,
         )
 
-        output_path = mock_stage.call_args[0][0]
+        output_path = staged_outputs[0]
         history, history_uppercase, history_json = self.get_provenance(output_path)
 
         expected_history = (
@@ -541,6 +597,7 @@ class TestSwathProjector(TestCase):
             }
         )
         reprojector = SwathProjectorAdapter(test_data, config=config(False))
+        staged_outputs = self.retain_staged_outputs(mock_stage)
         reprojector.invoke()
 
         mock_download.assert_called_once_with(
@@ -554,7 +611,7 @@ class TestSwathProjector(TestCase):
             logger=ANY,
         )
 
-        output_path = mock_stage.call_args[0][0]
+        output_path = staged_outputs[0]
         history, history_uppercase, history_json = self.get_provenance(output_path)
 
         expected_history = (
@@ -598,3 +655,614 @@ class TestSwathProjector(TestCase):
         self.assertEqual(history, expected_history)
         self.assertIsNone(history_uppercase)
         self.assertListEqual(json.loads(history_json), expected_history_json)
+
+    def test_catalog_items_processed_concurrently(
+        self, mock_download, mock_stage, mock_datetime
+    ):
+        """Ensure that all items in an input STAC catalog are reprojected,
+        both serially and when processed concurrently in worker processes,
+        and that the output catalog retains the order of the input items.
+        The message properties used by the service should be marked as
+        processed in both cases.
+
+        """
+        mock_datetime.utcnow = Mock(return_value=datetime(2021, 5, 12, 19, 3, 4))
+        input_paths = []
+
+        for granule_index in range(3):
+            input_paths.append(f'{self.tmp_dir}/africa_{granule_index}.nc')
+            copy('tests/data/africa.nc', input_paths[-1])
+
+        for concurrency in ['1', '2']:
+            with self.subTest(f'Concurrency: {concurrency}'):
+                catalog = self.get_local_catalog(input_paths)
+
+                message = Message(
+                    {
+                        'accessToken': self.access_token,
+                        'callback': self.callback,
+                        'stagingLocation': self.staging_location,
+                        'sources': [{'collection': 'C1234-EEDTEST'}],
+                        'format': {'crs': 'EPSG:4326', 'interpolation': 'near'},
+                    }
+                )
+
+                with patch.dict(
+                    environ, {ITEM_CONCURRENCY_ENVIRONMENT_VARIABLE: concurrency}
+                ):
+                    reprojector = SwathProjectorAdapter(
+                        message, catalog=catalog, config=config(False)
+                    )
+                    output_message, output_catalog = reprojector.invoke()
+
+                self.assertListEqual(
+                    [
+                        output_item.assets['data'].title
+                        for output_item in output_catalog.get_all_items()
+                    ],
+                    [
+                        'africa_0_regridded.nc',
+                        'africa_1_regridded.nc',
+                        'africa_2_regridded.nc',
+                    ],
+                )
+                self.assertDictEqual(json.loads(output_message.json)['format'], {})
+
+    def test_get_item_concurrency(self, mock_download, mock_stage, mock_datetime):
+        """Ensure the item concurrency is retrieved from the environment,
+        defaulting to serial processing if unset or invalid.
+
+        """
+        test_args = [
+            ['Unset', {}, 1],
+            ['Valid', {ITEM_CONCURRENCY_ENVIRONMENT_VARIABLE: '4'}, 4],
+            ['Zero', {ITEM_CONCURRENCY_ENVIRONMENT_VARIABLE: '0'}, 1],
+            ['Invalid', {ITEM_CONCURRENCY_ENVIRONMENT_VARIABLE: 'many'}, 1],
+        ]
+
+        for description, environment, expected_concurrency in test_args:
+            with self.subTest(description):
+                with patch.dict(environ, environment, clear=True):
+                    self.assertEqual(get_item_concurrency(Mock()), expected_concurrency)
+
+    def test_catalog_items_pipelined(self, mock_download, mock_stage, mock_datetime):
+        """Ensure that when the download, reprojection and staging of items
+        is pipelined, all items are processed, using local file:// URLs for
+        the input granules, which are used in place. The output catalog
+        should retain the order of the input items, and all workspaces should
+        be removed.
+
+        If an item fails, the exception should be raised, and workspaces
+        should still be removed.
+
+        """
+        mock_datetime.utcnow = Mock(return_value=datetime(2021, 5, 12, 19, 3, 4))
+        mock_stage.side_effect = lambda local_file, *args, **kwargs: (
+            f'https://example.com/{args[0]}' if isfile(local_file) else None
+        )
+        workdir_parent = f'{self.tmp_dir}/workdirs'
+        makedirs(workdir_parent)
+        granule_urls = []
+
+        for granule_index in range(4):
+            input_path = f'{self.tmp_dir}/africa_{granule_index}.nc'
+            copy('tests/data/africa.nc', input_path)
+            granule_urls.append(f'file://{abspath(input_path)}')
+
+        message_content = {
+            'accessToken': self.access_token,
+            'callback': self.callback,
+            'stagingLocation': self.staging_location,
+            'sources': [{'collection': 'C1234-EEDTEST'}],
+            'format': {'crs': 'EPSG:4326', 'interpolation': 'near'},
+        }
+
+        with (
+            patch.dict(environ, {PIPELINE_DEPTH_ENVIRONMENT_VARIABLE: '1'}),
+            patch(
+                'swath_projector.workspace.mkdtemp',
+                side_effect=lambda dir: mkdtemp(dir=dir or workdir_parent),
+            ),
+        ):
+            with self.subTest('All items succeed'):
+                reprojector = SwathProjectorAdapter(
+                    Message(message_content),
+                    catalog=self.get_local_catalog(granule_urls),
+                    config=config(False),
+                )
+                _, output_catalog = reprojector.invoke()
+
+                self.assertListEqual(
+                    [
+                        output_item.assets['data'].href
+                        for output_item in output_catalog.get_all_items()
+                    ],
+                    [
+                        f'https://example.com/africa_{granule_index}_regridded.nc'
+                        for granule_index in range(4)
+                    ],
+                )
+                self.assertListEqual(listdir(workdir_parent), [])
+
+            with self.subTest('Failed item'):
+                reprojector = SwathProjectorAdapter(
+                    Message(message_content),
+                    catalog=self.get_local_catalog(
+                        granule_urls[:1] + ['file:///missing.nc'] + granule_urls[2:]
+                    ),
+                    config=config(False),
+                )
+
+                with self.assertRaises(HarmonyException):
+                    reprojector.invoke()
+
+                self.assertListEqual(listdir(workdir_parent), [])
+
+    def test_get_pipeline_depth(self, mock_download, mock_stage, mock_datetime):
+        """Ensure the pipeline depth is retrieved from the environment,
+        defaulting to no pipelining if unset or invalid.
+
+        """
+        test_args = [
+            ['Unset', {}, 0],
+            ['Valid', {PIPELINE_DEPTH_ENVIRONMENT_VARIABLE: '2'}, 2],
+            ['Negative', {PIPELINE_DEPTH_ENVIRONMENT_VARIABLE: '-1'}, 0],
+            ['Invalid', {PIPELINE_DEPTH_ENVIRONMENT_VARIABLE: 'deep'}, 0],
+        ]
+
+        for description, environment, expected_depth in test_args:
+            with self.subTest(description):
+                with patch.dict(environ, environment, clear=True):
+                    self.assertEqual(get_pipeline_depth(Mock()), expected_depth)
+
+    def test_local_file_urls(self, mock_download, mock_stage, mock_datetime):
+        """Ensure that a granule with a file:// URL is read in place, rather
+        than downloaded, and that the output is moved to a file:// staging
+        location, rather than staged to S3. The input granule should be
+        unchanged.
+
+        """
+        mock_datetime.utcnow = Mock(return_value=datetime(2021, 5, 12, 19, 3, 4))
+        input_path = abspath(f'{self.tmp_dir}/africa.nc')
+        staging_directory = abspath(f'{self.tmp_dir}/staged')
+
+        with open(input_path, 'rb') as input_file:
+            input_bytes = input_file.read()
+
+        message = Message(
+            {
+                'accessToken': self.access_token,
+                'callback': self.callback,
+                'stagingLocation': f'{LOCAL_URL_PREFIX}{staging_directory}/',
+                'sources': [{'collection': 'C1234-EEDTEST'}],
+                'format': {'crs': 'EPSG:4326', 'interpolation': 'near'},
+            }
+        )
+
+        reprojector = SwathProjectorAdapter(
+            message,
+            catalog=self.get_local_catalog([f'{LOCAL_URL_PREFIX}{input_path}']),
+            config=config(False),
+        )
+        _, output_catalog = reprojector.invoke()
+
+        mock_download.assert_not_called()
+        mock_stage.assert_not_called()
+
+        staged_path = f'{staging_directory}/africa_regridded.nc'
+        self.assertListEqual(
+            [
+                output_item.assets['data'].href
+                for output_item in output_catalog.get_all_items()
+            ],
+            [f'{LOCAL_URL_PREFIX}{staged_path}'],
+        )
+
+        with Dataset(staged_path) as staged_dataset:
+            self.assertIn('red_var', staged_dataset.variables)
+
+        with open(input_path, 'rb') as input_file:
+            self.assertEqual(input_file.read(), input_bytes)
+
+    def test_zarr_output(self, mock_download, mock_stage, mock_datetime):
+        """Ensure that a request for the Zarr output format stages a Zarr
+        directory store, retaining the `.zarr` extension, and that mosaic
+        requests are rejected for this format.
+
+        """
+        mock_datetime.utcnow = Mock(return_value=datetime(2021, 5, 12, 19, 3, 4))
+        input_path = abspath(f'{self.tmp_dir}/africa.nc')
+        staging_directory = abspath(f'{self.tmp_dir}/staged')
+
+        def get_message(extra_args):
+            return Message(
+                {
+                    'accessToken': self.access_token,
+                    'callback': self.callback,
+                    'stagingLocation': f'{LOCAL_URL_PREFIX}{staging_directory}/',
+                    'sources': [{'collection': 'C1234-EEDTEST'}],
+                    'format': {
+                        'crs': 'EPSG:4326',
+                        'interpolation': 'near',
+                        'mime': 'application/x-zarr',
+                        'scaleExtent': {
+                            'x': {'min': -20, 'max': 60},
+                            'y': {'min': 10, 'max': 35},
+                        },
+                        'height': 25,
+                        'width': 80,
+                    },
+                    'extraArgs': extra_args,
+                }
+            )
+
+        with self.subTest('Zarr store staged'):
+            reprojector = SwathProjectorAdapter(
+                get_message({}),
+                catalog=self.get_local_catalog([f'{LOCAL_URL_PREFIX}{input_path}']),
+                config=config(False),
+            )
+            _, output_catalog = reprojector.invoke()
+
+            staged_path = f'{staging_directory}/africa_regridded.zarr'
+            output_assets = [
+                output_item.assets['data']
+                for output_item in output_catalog.get_all_items()
+            ]
+            self.assertListEqual(
+                [asset.href for asset in output_assets],
+                [f'{LOCAL_URL_PREFIX}{staged_path}'],
+            )
+            self.assertEqual(output_assets[0].media_type, 'application/x-zarr')
+            self.assertTrue(isfile(f'{staged_path}/.zmetadata'))
+            self.assertIn('red_var', listdir(staged_path))
+
+        with self.subTest('Mosaic requires NetCDF-4'):
+            reprojector = SwathProjectorAdapter(
+                get_message({'mosaic': 'latest'}),
+                catalog=self.get_local_catalog([f'{LOCAL_URL_PREFIX}{input_path}']),
+                config=config(False),
+            )
+
+            with self.assertRaises(HarmonyException):
+                reprojector.invoke()
+
+    def test_tile_scheme(self, mock_download, mock_stage, mock_datetime):
+        """Ensure that a tiling scheme request stages a file for each tile
+        intersected by the swath, as separate data assets of the output item,
+        keyed by tile name. Mosaic requests are rejected for tiling schemes.
+
+        """
+        mock_datetime.utcnow = Mock(return_value=datetime(2021, 5, 12, 19, 3, 4))
+        input_path = abspath(f'{self.tmp_dir}/africa.nc')
+        staging_directory = abspath(f'{self.tmp_dir}/staged')
+
+        def get_message(extra_args):
+            return Message(
+                {
+                    'accessToken': self.access_token,
+                    'callback': self.callback,
+                    'stagingLocation': f'{LOCAL_URL_PREFIX}{staging_directory}/',
+                    'sources': [{'collection': 'C1234-EEDTEST'}],
+                    'format': {'interpolation': 'near', 'height': 10, 'width': 10},
+                    'extraArgs': {'tileScheme': 'geographic', **extra_args},
+                }
+            )
+
+        with self.subTest('Tiles staged'):
+            reprojector = SwathProjectorAdapter(
+                get_message({}),
+                catalog=self.get_local_catalog([f'{LOCAL_URL_PREFIX}{input_path}']),
+                config=config(False),
+            )
+            _, output_catalog = reprojector.invoke()
+
+            output_items = list(output_catalog.get_all_items())
+            self.assertEqual(len(output_items), 1)
+            self.assertGreater(len(output_items[0].assets), 0)
+
+            for tile_name, asset in output_items[0].assets.items():
+                staged_path = f'{staging_directory}/africa_regridded_{tile_name}.nc'
+                self.assertRegex(tile_name, r'^h\d{2}v\d{2}$')
+                self.assertEqual(asset.href, f'{LOCAL_URL_PREFIX}{staged_path}')
+                self.assertListEqual(asset.roles, ['data'])
+
+                with Dataset(staged_path) as staged_dataset:
+                    self.assertIn('red_var', staged_dataset.variables)
+
+        with self.subTest('Mosaic cannot use a tiling scheme'):
+            reprojector = SwathProjectorAdapter(
+                get_message({'mosaic': 'latest'}),
+                catalog=self.get_local_catalog([f'{LOCAL_URL_PREFIX}{input_path}']),
+                config=config(False),
+            )
+
+            with self.assertRaises(HarmonyException):
+                reprojector.invoke()
+
+    def test_stage_directory(self, mock_download, mock_stage, mock_datetime):
+        """Ensure every file in an output directory is staged beneath the
+        output name, and the URL of the staged directory is returned.
+
+        """
+        mock_stage.side_effect = (
+            lambda _, remote_filename, *args, location, **kwargs: f'{location}'
+            f'{remote_filename}'
+        )
+        working_directory = f'{self.tmp_dir}/output.zarr'
+        makedirs(f'{working_directory}/red_var')
+
+        for file_path in ['.zgroup', 'red_var/.zarray', 'red_var/0.0']:
+            with open(f'{working_directory}/{file_path}', 'w', encoding='utf-8'):
+                pass
+
+        self.assertEqual(
+            stage_directory(
+                working_directory, 'africa.zarr', self.staging_location, Mock()
+            ),
+            f'{self.staging_location}africa.zarr',
+        )
+        self.assertSetEqual(
+            {call.args[1] for call in mock_stage.call_args_list},
+            {
+                'africa.zarr/.zgroup',
+                'africa.zarr/red_var/.zarray',
+                'africa.zarr/red_var/0.0',
+            },
+        )
+
+    def test_mosaic(self, mock_download, mock_stage, mock_datetime):
+        """Ensure that a mosaic request reprojects all granules to the target
+        grid defined in the message, and stages a single composite output.
+        Requests with an invalid compositing rule, or without a fully
+        defined target grid, should raise an exception.
+
+        """
+        mock_datetime.utcnow = Mock(return_value=datetime(2021, 5, 12, 19, 3, 4))
+        staging_directory = abspath(f'{self.tmp_dir}/staged')
+        granule_urls = []
+
+        for granule_name in ['africa_one.nc', 'africa_two.nc']:
+            copy('tests/data/africa.nc', f'{self.tmp_dir}/{granule_name}')
+            granule_urls.append(
+                f'{LOCAL_URL_PREFIX}{abspath(f"{self.tmp_dir}/{granule_name}")}'
+            )
+
+        grid_format = {
+            'crs': 'EPSG:4326',
+            'interpolation': 'near',
+            'scaleExtent': {
+                'x': {'min': -20, 'max': 60},
+                'y': {'min': 10, 'max': 35},
+            },
+            'height': 25,
+            'width': 80,
+        }
+
+        def get_message(message_format, compositing_rule):
+            return Message(
+                {
+                    'accessToken': self.access_token,
+                    'callback': self.callback,
+                    'stagingLocation': f'{LOCAL_URL_PREFIX}{staging_directory}/',
+                    'sources': [{'collection': 'C1234-EEDTEST'}],
+                    'format': message_format,
+                    'extraArgs': {'mosaic': compositing_rule},
+                }
+            )
+
+        with self.subTest('Single composite output'):
+            reprojector = SwathProjectorAdapter(
+                get_message(grid_format, 'latest'),
+                catalog=self.get_local_catalog(granule_urls),
+                config=config(False),
+            )
+            _, output_catalog = reprojector.invoke()
+
+            mock_download.assert_not_called()
+            staged_path = f'{staging_directory}/africa_one_regridded_mosaic.nc'
+            self.assertListEqual(
+                [
+                    output_item.assets['data'].href
+                    for output_item in output_catalog.get_all_items()
+                ],
+                [f'{LOCAL_URL_PREFIX}{staged_path}'],
+            )
+
+            with Dataset(staged_path) as staged_dataset:
+                self.assertTupleEqual(staged_dataset['red_var'].shape[-2:], (25, 80))
+
+        with self.subTest('Invalid compositing rule'):
+            reprojector = SwathProjectorAdapter(
+                get_message(grid_format, 'median'),
+                catalog=self.get_local_catalog(granule_urls),
+                config=config(False),
+            )
+
+            with self.assertRaises(HarmonyException):
+                reprojector.invoke()
+
+        with self.subTest('Target grid not fully defined'):
+            reprojector = SwathProjectorAdapter(
+                get_message({'crs': 'EPSG:4326'}, 'latest'),
+                catalog=self.get_local_catalog(granule_urls),
+                config=config(False),
+            )
+
+            with self.assertRaises(HarmonyException):
+                reprojector.invoke()
+
+    def test_time_stack(self, mock_download, mock_stage, mock_datetime):
+        """Ensure that a time stack request reprojects all granules to the
+        target grid defined in the message, and stages a single output with
+        one `time` slice per granule. Requests without a fully defined
+        target grid, or that also request a mosaic, should raise an
+        exception.
+
+        """
+        mock_datetime.utcnow = Mock(return_value=datetime(2021, 5, 12, 19, 3, 4))
+        staging_directory = abspath(f'{self.tmp_dir}/staged')
+        granule_urls = []
+
+        for granule_name in ['africa_one.nc', 'africa_two.nc']:
+            copy('tests/data/africa.nc', f'{self.tmp_dir}/{granule_name}')
+            granule_urls.append(
+                f'{LOCAL_URL_PREFIX}{abspath(f"{self.tmp_dir}/{granule_name}")}'
+            )
+
+        grid_format = {
+            'crs': 'EPSG:4326',
+            'interpolation': 'near',
+            'scaleExtent': {
+                'x': {'min': -20, 'max': 60},
+                'y': {'min': 10, 'max': 35},
+            },
+            'height': 25,
+            'width': 80,
+        }
+
+        def get_message(message_format, extra_args):
+            return Message(
+                {
+                    'accessToken': self.access_token,
+                    'callback': self.callback,
+                    'stagingLocation': f'{LOCAL_URL_PREFIX}{staging_directory}/',
+                    'sources': [{'collection': 'C1234-EEDTEST'}],
+                    'format': message_format,
+                    'extraArgs': extra_args,
+                }
+            )
+
+        with self.subTest('Single time-stacked output'):
+            reprojector = SwathProjectorAdapter(
+                get_message(grid_format, {'timeStack': True}),
+                catalog=self.get_local_catalog(granule_urls),
+                config=config(False),
+            )
+            _, output_catalog = reprojector.invoke()
+
+            mock_download.assert_not_called()
+            staged_path = f'{staging_directory}/africa_one_regridded_stacked.nc'
+            self.assertListEqual(
+                [
+                    output_item.assets['data'].href
+                    for output_item in output_catalog.get_all_items()
+                ],
+                [f'{LOCAL_URL_PREFIX}{staged_path}'],
+            )
+
+            with Dataset(staged_path) as staged_dataset:
+                self.assertEqual(staged_dataset.dimensions['time'].size, 2)
+                self.assertTupleEqual(staged_dataset['red_var'].shape, (2, 25, 80))
+                np.testing.assert_array_equal(
+                    staged_dataset['red_var'][0], staged_dataset['red_var'][1]
+                )
+
+        with self.subTest('Target grid not fully defined'):
+            reprojector = SwathProjectorAdapter(
+                get_message({'crs': 'EPSG:4326'}, {'timeStack': True}),
+                catalog=self.get_local_catalog(granule_urls),
+                config=config(False),
+            )
+
+            with self.assertRaises(HarmonyException):
+                reprojector.invoke()
+
+        with self.subTest('Mosaic and time stack'):
+            reprojector = SwathProjectorAdapter(
+                get_message(grid_format, {'timeStack': True, 'mosaic': 'latest'}),
+                catalog=self.get_local_catalog(granule_urls),
+                config=config(False),
+            )
+
+            with self.assertRaises(HarmonyException):
+                reprojector.invoke()
+
+    def test_mosaic_items(self, mock_download, mock_stage, mock_datetime):
+        """Ensure mosaic input items are sorted by start time, where all items
+        have one, and that the mosaic output item covers the spatial and
+        temporal extents of all input items.
+
+        """
+        early_item = Item(
+            'early',
+            None,
+            [0, 0, 10, 10],
+            None,
+            {
+                'start_datetime': '2020-01-01T00:00:00+00:00',
+                'end_datetime': '2020-01-01T01:00:00+00:00',
+            },
+        )
+        late_item = Item(
+            'late', None, [5, -5, 20, 5], datetime(2020, 1, 2, tzinfo=timezone.utc), {}
+        )
+
+        with self.subTest('Items sorted by start time'):
+            self.assertListEqual(
+                sort_items_by_start_time([late_item, early_item]),
+                [early_item, late_item],
+            )
+
+        with self.subTest('Input order retained without start times'):
+            undated_item = Item('undated', None, None, datetime(2020, 1, 3), {})
+            undated_item.datetime = None
+            self.assertListEqual(
+                sort_items_by_start_time([late_item, undated_item, early_item]),
+                [late_item, undated_item, early_item],
+            )
+
+        with self.subTest('Mosaic item covers all items'):
+            mosaic_item = get_aggregated_item([early_item, late_item])
+            self.assertNotIn(mosaic_item.id, ['early', 'late'])
+            self.assertListEqual(mosaic_item.bbox, [0, -5, 20, 10])
+            self.assertEqual(
+                mosaic_item.properties['start_datetime'], '2020-01-01T00:00:00+00:00'
+            )
+            self.assertEqual(
+                mosaic_item.properties['end_datetime'], '2020-01-02T00:00:00+00:00'
+            )
+
+    def test_stage_local_file(self, mock_download, mock_stage, mock_datetime):
+        """Ensure an output file is moved to a local staging directory, and
+        is copied if the staging directory is on a different filesystem.
+
+        """
+        staging_directory = abspath(f'{self.tmp_dir}/staged')
+        logger = Mock()
+
+        with self.subTest('Same filesystem'):
+            working_path = f'{self.tmp_dir}/output.nc'
+            copy('tests/data/africa.nc', working_path)
+
+            self.assertEqual(
+                stage_local_file(
+                    working_path,
+                    'same.nc',
+                    f'{LOCAL_URL_PREFIX}{staging_directory}',
+                    logger,
+                ),
+                f'{LOCAL_URL_PREFIX}{staging_directory}/same.nc',
+            )
+            self.assertFalse(isfile(working_path))
+            self.assertTrue(isfile(f'{staging_directory}/same.nc'))
+
+        with self.subTest('Different filesystem'):
+            working_path = f'{self.tmp_dir}/output.nc'
+            copy('tests/data/africa.nc', working_path)
+
+            with patch(
+                'swath_projector.adapter.os.replace',
+                side_effect=OSError(errno.EXDEV, 'Invalid cross-device link'),
+            ):
+                self.assertEqual(
+                    stage_local_file(
+                        working_path,
+                        'different.nc',
+                        f'{LOCAL_URL_PREFIX}{staging_directory}',
+                        logger,
+                    ),
+                    f'{LOCAL_URL_PREFIX}{staging_directory}/different.nc',
+                )
+
+            self.assertTrue(isfile(f'{staging_directory}/different.nc'))
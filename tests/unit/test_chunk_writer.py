@@ -0,0 +1,159 @@
+from concurrent.futures import ThreadPoolExecutor
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+import h5py
+import numpy as np
+
+from swath_projector.chunk_writer import (
+    compress_chunk,
+    get_deflate_filters,
+    write_compressed_chunks,
+)
+
+
+class TestChunkWriter(TestCase):
+    """A test class for the functions that compress chunks in a thread pool
+    and write them to an HDF5 dataset.
+
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.fill_value = -9999
+        cls.values = np.ma.masked_all((250, 300), dtype=np.int32)
+        cls.values[10:20, 150:160] = np.arange(100).reshape(10, 10)
+        # A populated pixel in the partial chunk in the corner of the array.
+        cls.values[249, 299] = 5
+
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.temp_dir)
+
+    def create_dataset(self, h5_file, name, shape, **kwargs):
+        """Create an integer dataset with a fill value and 100x100 chunks."""
+        return h5_file.create_dataset(
+            name,
+            shape=shape,
+            dtype=np.int32,
+            fillvalue=self.fill_value,
+            chunks=(1,) * (len(shape) - 2) + (100, 100),
+            **kwargs,
+        )
+
+    def test_write_compressed_chunks(self):
+        """Ensure chunks written directly contain the same bytes as those
+        written by the HDF5 library, and chunks without populated pixels
+        are not allocated.
+
+        """
+        with (
+            h5py.File(join(self.temp_dir, 'output.h5'), 'w') as h5_file,
+            ThreadPoolExecutor(max_workers=2) as executor,
+        ):
+            library_dataset = self.create_dataset(
+                h5_file, 'library', (250, 300), compression='gzip', shuffle=True
+            )
+            library_dataset[:] = self.values.filled(self.fill_value)
+
+            direct_dataset = self.create_dataset(
+                h5_file, 'direct', (250, 300), compression='gzip', shuffle=True
+            )
+            write_compressed_chunks(direct_dataset, self.values, (), executor, 1)
+
+            np.testing.assert_array_equal(
+                direct_dataset[:], self.values.filled(self.fill_value)
+            )
+            self.assertEqual(direct_dataset.id.get_num_chunks(), 2)
+
+            for chunk_offset in [(0, 100), (200, 200)]:
+                with self.subTest(f'Chunk at {chunk_offset}'):
+                    self.assertEqual(
+                        direct_dataset.id.read_direct_chunk(chunk_offset),
+                        library_dataset.id.read_direct_chunk(chunk_offset),
+                    )
+
+        with self.subTest('Leading indices are used for extra dimensions'):
+            with (
+                h5py.File(join(self.temp_dir, 'time.h5'), 'w') as h5_file,
+                ThreadPoolExecutor(max_workers=2) as executor,
+            ):
+                dataset = self.create_dataset(
+                    h5_file, 'data', (2, 250, 300), compression='gzip'
+                )
+                write_compressed_chunks(dataset, self.values, (1,), executor, 4)
+
+                self.assertTrue(np.all(dataset[0] == self.fill_value))
+                np.testing.assert_array_equal(
+                    dataset[1], self.values.filled(self.fill_value)
+                )
+
+        with self.subTest('Unsupported filters are written by the HDF5 library'):
+            with (
+                h5py.File(join(self.temp_dir, 'lzf.h5'), 'w') as h5_file,
+                ThreadPoolExecutor(max_workers=2) as executor,
+            ):
+                dataset = self.create_dataset(
+                    h5_file, 'data', (250, 300), compression='lzf'
+                )
+                write_compressed_chunks(dataset, self.values, (), executor, 4)
+
+                np.testing.assert_array_equal(
+                    dataset[:], self.values.filled(self.fill_value)
+                )
+
+    def test_get_deflate_filters(self):
+        """Ensure the shuffle and deflate level are retrieved for supported
+        filter pipelines, and `None` is returned otherwise.
+
+        """
+        with h5py.File(join(self.temp_dir, 'filters.h5'), 'w') as h5_file:
+            test_args = [
+                ['Deflate', {'compression': 'gzip'}, (False, 4)],
+                [
+                    'Shuffle and deflate',
+                    {'compression': 'gzip', 'compression_opts': 6, 'shuffle': True},
+                    (True, 6),
+                ],
+                ['Other compression', {'compression': 'lzf'}, None],
+                ['No compression', {}, None],
+            ]
+
+            for description, dataset_options, expected_filters in test_args:
+                with self.subTest(description):
+                    dataset = self.create_dataset(
+                        h5_file, description, (250, 300), **dataset_options
+                    )
+                    self.assertEqual(get_deflate_filters(dataset), expected_filters)
+
+            with self.subTest('Contiguous dataset'):
+                dataset = h5_file.create_dataset('contiguous', data=[1, 2, 3])
+                self.assertIsNone(get_deflate_filters(dataset))
+
+    def test_compress_chunk(self):
+        """Ensure compressed chunks can be decompressed by the HDF5 library,
+        with and without the shuffle filter.
+
+        """
+        chunk_values = np.arange(10000, dtype=np.int32).reshape(100, 100)
+
+        for shuffle in [True, False]:
+            with self.subTest(f'Shuffle: {shuffle}'):
+                with h5py.File(join(self.temp_dir, f'{shuffle}.h5'), 'w') as h5_file:
+                    dataset = self.create_dataset(
+                        h5_file,
+                        'data',
+                        (100, 100),
+                        compression='gzip',
+                        compression_opts=6,
+                        shuffle=shuffle,
+                    )
+                    dataset.id.write_direct_chunk(
+                        (0, 0), compress_chunk(chunk_values, shuffle, 6)
+                    )
+
+                    np.testing.assert_array_equal(dataset[:], chunk_values)
@@ -0,0 +1,34 @@
+import os
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from swath_projector.environment import get_integer_environment_variable
+
+
+class TestEnvironment(TestCase):
+    """A test class for functions retrieving service configuration from
+    environment variables.
+
+    """
+
+    def test_get_integer_environment_variable(self):
+        """Ensure an integer is retrieved from an environment variable, with
+        the default used for unset or invalid values, and values below the
+        minimum replaced by that minimum.
+
+        """
+        logger = Mock()
+        test_args = [
+            ['Unset variable', {}, 3],
+            ['Valid value', {'TEST_INTEGER': '5'}, 5],
+            ['Value below minimum', {'TEST_INTEGER': '-2'}, 1],
+            ['Invalid value', {'TEST_INTEGER': 'many'}, 3],
+        ]
+
+        for description, environment, expected_value in test_args:
+            with self.subTest(description):
+                with patch.dict(os.environ, environment, clear=True):
+                    self.assertEqual(
+                        get_integer_environment_variable('TEST_INTEGER', 3, 1, logger),
+                        expected_value,
+                    )
@@ -1,26 +1,65 @@
+from functools import partial
 from logging import Logger
+from os.path import exists, join
+from shutil import rmtree
+from tempfile import mkdtemp
 from unittest import TestCase
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, Mock, patch
 
 import numpy as np
 from netCDF4 import Dataset
+from pykdtree.kdtree import KDTree
 from pyproj import Proj
-from pyresample.geometry import AreaDefinition
+from pyresample.geometry import AreaDefinition, SwathDefinition
 from varinfo import VarInfoFromNetCDF4
 
+from swath_projector import swath_resource_cache
 from swath_projector.interpolation import (
+    BILINEAR_NEIGHBOURS,
+    COORDINATE_FINGERPRINTS,
+    CURRENT_GRANULE,
     EPSILON,
+    ESTIMATION_STRIDE,
+    MEMORY_MAP_THRESHOLD_ENVIRONMENT_VARIABLE,
+    MEMORY_MAPS,
+    PREVIOUS_GRANULE,
     RADIUS_OF_INFLUENCE,
+    VARIABLE_WORKERS_ENVIRONMENT_VARIABLE,
     check_for_valid_interpolation,
+    get_bilinear_information,
+    get_bilinear_results,
+    get_binned_information,
+    get_binned_results,
+    get_deduplicated_coordinates_key,
+    get_ewa_information,
+    get_ewa_results,
+    get_fill_value_target_area,
+    get_interpolation_functions,
+    get_near_information,
+    get_near_results,
     get_parameters_tuple,
+    get_populated_window,
     get_reprojection_cache,
+    get_reprojection_information,
     get_swath_definition,
+    get_swath_kd_tree,
+    get_swath_resources,
     get_target_area,
     resample_all_variables,
     resample_variable,
+    should_trim_target_area,
+    trim_bilinear_information,
+    trim_binned_information,
+    trim_ewa_information,
+    trim_near_information,
+    use_streamed_ewa,
 )
+from swath_projector.memory_map import MEMORY_MAP_DIRECTORY, get_memory_maps
 from swath_projector.nc_single_band import HARMONY_TARGET
 from swath_projector.reproject import CF_CONFIG_FILE
+from swath_projector.shared_arrays import SharedArrayRegistry
+from swath_projector.streamed_ewa import get_streamed_ewa_results
+from swath_projector.swath_resource_cache import set_swath_resource_cache_size
 
 
 class TestInterpolation(TestCase):
@@ -77,7 +116,8 @@ class TestInterpolation(TestCase):
 
         The default message being supplied does not have sufficient
         information to construct a target area for all variables, so the
-        cache being sent to all variables should be empty.
+        cache being sent to all variables should be empty. Memory-mapping
+        is not configured, so the swath cache only records that.
 
         """
         parameters = {'interpolation': 'ewa-nn'}
@@ -104,8 +144,73 @@ class TestInterpolation(TestCase):
                 variable_output_path,
                 self.logger,
                 self.var_info,
+                {MEMORY_MAPS: None},
+                None,
+                [],
+                0,
+                0,
             )
 
+    def test_resample_all_variables_in_pool(self):
+        """Ensure that, when worker processes are configured, variables
+        resampled by the workers are identical to those resampled by the
+        parent process alone, and that no shared memory remains afterwards.
+
+        """
+        registries = []
+
+        def get_registry():
+            registries.append(SharedArrayRegistry())
+            return registries[-1]
+
+        for interpolation in ['bilinear', 'ewa', 'near']:
+            with self.subTest(interpolation):
+                parameters = {
+                    **self.message_parameters,
+                    'interpolation': interpolation,
+                }
+                serial_directory = mkdtemp()
+                pooled_directory = mkdtemp()
+                self.addCleanup(rmtree, serial_directory)
+                self.addCleanup(rmtree, pooled_directory)
+
+                serial_variables = resample_all_variables(
+                    parameters,
+                    self.science_variables,
+                    serial_directory,
+                    self.logger,
+                    self.var_info,
+                )
+
+                with (
+                    patch.dict(
+                        'os.environ', {VARIABLE_WORKERS_ENVIRONMENT_VARIABLE: '2'}
+                    ),
+                    patch(
+                        'swath_projector.interpolation.SharedArrayRegistry',
+                        side_effect=get_registry,
+                    ),
+                ):
+                    pooled_variables = resample_all_variables(
+                        parameters,
+                        self.science_variables,
+                        pooled_directory,
+                        self.logger,
+                        self.var_info,
+                    )
+
+                self.assertListEqual(sorted(pooled_variables), sorted(serial_variables))
+                self.assertDictEqual(registries[-1].blocks, {})
+
+                for variable in serial_variables:
+                    with (
+                        Dataset(f'{serial_directory}{variable}.nc') as serial_output,
+                        Dataset(f'{pooled_directory}{variable}.nc') as pooled_output,
+                    ):
+                        np.testing.assert_array_equal(
+                            pooled_output[variable][:], serial_output[variable][:]
+                        )
+
     @patch('swath_projector.interpolation.resample_variable')
     def test_resample_single_exception(self, mock_resample_variable):
         """Ensure that if a single variable fails reprojection, the remaining
@@ -140,35 +245,44 @@ class TestInterpolation(TestCase):
                 variable_output_path,
                 self.logger,
                 self.var_info,
+                {MEMORY_MAPS: None},
+                None,
+                [],
+                0,
+                0,
             )
 
+    @patch('swath_projector.interpolation.values_are_entirely_fill', return_value=False)
     @patch('swath_projector.interpolation.write_single_band_output')
     @patch('swath_projector.interpolation.get_swath_definition')
     @patch('swath_projector.interpolation.get_target_area')
     @patch('swath_projector.interpolation.get_variable_values')
-    @patch('swath_projector.interpolation.get_sample_from_bil_info')
-    @patch('swath_projector.interpolation.get_bil_info')
+    @patch('pyresample.bilinear.get_sample_from_bil_info')
+    @patch('swath_projector.interpolation.get_bilinear_resampler_class')
     def test_resample_bilinear(
         self,
-        mock_get_bil_info,
+        mock_get_resampler_class,
         mock_get_sample,
         mock_get_values,
         mock_get_target_area,
         mock_get_swath,
         mock_write_output,
+        mock_values_are_entirely_fill,
     ):
-        """The bilinear interpolation should call both get_bil_info and
-        get_sample_from_bil_info if there are no matching entries for the
-        coordinates in the reprojection information. If there is an entry,
-        then only get_sample_from_bil_info should be called.
+        """The bilinear interpolation should derive bilinear information via
+        the resampler and call get_sample_from_bil_info if there are no
+        matching entries for the coordinates in the reprojection
+        information. If there is an entry, then only
+        get_sample_from_bil_info should be called.
 
         """
-        mock_get_bil_info.return_value = [
-            'vertical',
-            'horizontal',
-            'input_indices',
-            'point_mapping',
-        ]
+        mock_resampler = mock_get_resampler_class.return_value
+        mock_resampler.return_value = MagicMock(
+            bilinear_t='vertical',
+            bilinear_s='horizontal',
+            _valid_input_index='input_indices',
+            _index_array='point_mapping',
+        )
         results = np.array([4.0])
         mock_get_sample.return_value = results
         mock_get_swath.return_value = 'swath'
@@ -190,6 +304,7 @@ class TestInterpolation(TestCase):
                 output_path,
                 self.logger,
                 self.var_info,
+                {},
             )
 
             expected_cache = {
@@ -202,9 +317,10 @@ class TestInterpolation(TestCase):
                 },
             }
 
-            mock_get_bil_info.assert_called_once_with(
-                'swath', self.mock_target_area, radius=50000, neighbours=16
+            mock_resampler.assert_called_once_with(
+                {'swath_definition': 'swath'}, self.mock_target_area
             )
+            mock_resampler.return_value.get_bil_info.assert_called_once_with()
             mock_get_sample.assert_called_once_with(
                 ravel_data,
                 'vertical',
@@ -219,11 +335,11 @@ class TestInterpolation(TestCase):
                 variable_name,
                 output_path,
                 expected_cache,
-                {},
+                {'_FillValue': 0},
             )
 
         with self.subTest('Pre-existing bilinear information'):
-            mock_get_bil_info.reset_mock()
+            mock_resampler.reset_mock()
             mock_get_sample.reset_mock()
             mock_write_output.reset_mock()
 
@@ -244,9 +360,10 @@ class TestInterpolation(TestCase):
                 output_path,
                 self.logger,
                 self.var_info,
+                {},
             )
 
-            mock_get_bil_info.assert_not_called()
+            mock_resampler.assert_not_called()
             mock_get_sample.assert_called_once_with(
                 ravel_data,
                 'vertical_old',
@@ -261,12 +378,12 @@ class TestInterpolation(TestCase):
                 variable_name,
                 output_path,
                 bilinear_information,
-                {},
+                {'_FillValue': 0},
             )
 
         with self.subTest('Harmony message defines target area'):
             mock_get_target_area.reset_mock()
-            mock_get_bil_info.reset_mock()
+            mock_resampler.reset_mock()
             mock_get_sample.reset_mock()
             mock_write_output.reset_mock()
 
@@ -285,6 +402,7 @@ class TestInterpolation(TestCase):
                 output_path,
                 self.logger,
                 self.var_info,
+                {},
             )
 
             # Check that there is a new entry in the cache, and that it only
@@ -302,8 +420,8 @@ class TestInterpolation(TestCase):
             }
             self.assertDictEqual(input_cache, expected_cache)
 
-            mock_get_bil_info.assert_called_once_with(
-                'swath', harmony_target_area, radius=50000, neighbours=16
+            mock_resampler.assert_called_once_with(
+                {'swath_definition': 'swath'}, harmony_target_area
             )
             mock_get_sample.assert_called_once_with(
                 ravel_data,
@@ -321,7 +439,7 @@ class TestInterpolation(TestCase):
                 variable_name,
                 output_path,
                 expected_cache,
-                {},
+                {'_FillValue': 0},
             )
             mock_get_target_area.assert_not_called()
 
@@ -329,8 +447,8 @@ class TestInterpolation(TestCase):
     @patch('swath_projector.interpolation.get_swath_definition')
     @patch('swath_projector.interpolation.get_target_area')
     @patch('swath_projector.interpolation.get_variable_values')
-    @patch('swath_projector.interpolation.fornav')
-    @patch('swath_projector.interpolation.ll2cr')
+    @patch('pyresample.ewa.fornav')
+    @patch('pyresample.ewa.ll2cr')
     def test_resample_ewa(
         self,
         mock_ll2cr,
@@ -367,6 +485,7 @@ class TestInterpolation(TestCase):
                 output_path,
                 self.logger,
                 self.var_info,
+                {},
             )
 
             expected_cache = {
@@ -391,7 +510,7 @@ class TestInterpolation(TestCase):
                 variable_name,
                 output_path,
                 expected_cache,
-                {},
+                {'_FillValue': 0},
             )
 
         with self.subTest('Pre-existing EWA information'):
@@ -414,6 +533,7 @@ class TestInterpolation(TestCase):
                 output_path,
                 self.logger,
                 self.var_info,
+                {},
             )
 
             mock_ll2cr.assert_not_called()
@@ -430,15 +550,15 @@ class TestInterpolation(TestCase):
                 variable_name,
                 output_path,
                 ewa_information,
-                {},
+                {'_FillValue': 0},
             )
 
     @patch('swath_projector.interpolation.write_single_band_output')
     @patch('swath_projector.interpolation.get_swath_definition')
     @patch('swath_projector.interpolation.get_target_area')
     @patch('swath_projector.interpolation.get_variable_values')
-    @patch('swath_projector.interpolation.fornav')
-    @patch('swath_projector.interpolation.ll2cr')
+    @patch('pyresample.ewa.fornav')
+    @patch('pyresample.ewa.ll2cr')
     def test_resample_ewa_nn(
         self,
         mock_ll2cr,
@@ -474,6 +594,7 @@ class TestInterpolation(TestCase):
                 output_path,
                 self.logger,
                 self.var_info,
+                {},
             )
 
             expected_cache = {
@@ -498,7 +619,7 @@ class TestInterpolation(TestCase):
                 variable_name,
                 output_path,
                 expected_cache,
-                {},
+                {'_FillValue': 0},
             )
 
         with self.subTest('Pre-existing EWA-NN information'):
@@ -521,6 +642,7 @@ class TestInterpolation(TestCase):
                 output_path,
                 self.logger,
                 self.var_info,
+                {},
             )
 
             mock_ll2cr.assert_not_called()
@@ -537,7 +659,7 @@ class TestInterpolation(TestCase):
                 variable_name,
                 output_path,
                 ewa_nn_information,
-                {},
+                {'_FillValue': 0},
             )
 
         with self.subTest('Harmony message defines target area'):
@@ -559,6 +681,7 @@ class TestInterpolation(TestCase):
                 output_path,
                 self.logger,
                 self.var_info,
+                {},
             )
 
             # Check that there is a new entry in the cache, and that it only
@@ -590,7 +713,7 @@ class TestInterpolation(TestCase):
                 variable_name,
                 output_path,
                 expected_cache,
-                {},
+                {'_FillValue': 0},
             )
             mock_get_target_area.assert_not_called()
 
@@ -599,9 +722,11 @@ class TestInterpolation(TestCase):
     @patch('swath_projector.interpolation.get_target_area')
     @patch('swath_projector.interpolation.get_variable_values')
     @patch('swath_projector.interpolation.get_sample_from_neighbour_info')
-    @patch('swath_projector.interpolation.get_neighbour_info')
+    @patch('swath_projector.interpolation._query_resample_kdtree')
+    @patch('swath_projector.interpolation.get_swath_kd_tree')
     def test_resample_nearest(
         self,
+        mock_get_kd_tree,
         mock_get_info,
         mock_get_sample,
         mock_get_values,
@@ -609,14 +734,15 @@ class TestInterpolation(TestCase):
         mock_get_swath,
         mock_write_output,
     ):
-        """Nearest neighbour interpolation should call both get_neighbour_info
-        and get_sample_from_neighbour_info if there are no matching entries
-        for the coordinates in the reprojection information. If there is an
-        entry, then only get_sample_from_neighbour_info should be called.
+        """Nearest neighbour interpolation should query the swath KD-tree
+        and call get_sample_from_neighbour_info if there are no matching
+        entries for the coordinates in the reprojection information. If
+        there is an entry, then only get_sample_from_neighbour_info should
+        be called.
 
         """
+        mock_get_kd_tree.return_value = ('valid_input_index', 'kd_tree')
         mock_get_info.return_value = [
-            'valid_input_index',
             'valid_output_index',
             'index_array',
             'distance_array',
@@ -642,6 +768,7 @@ class TestInterpolation(TestCase):
                 output_path,
                 self.logger,
                 self.var_info,
+                {},
             )
 
             expected_cache = {
@@ -655,11 +782,14 @@ class TestInterpolation(TestCase):
             }
 
             mock_get_info.assert_called_once_with(
+                'kd_tree',
                 'swath',
                 self.mock_target_area,
                 RADIUS_OF_INFLUENCE,
-                epsilon=EPSILON,
+                slice(None),
                 neighbours=1,
+                epsilon=EPSILON,
+                reduce_data=False,
             )
             mock_get_sample.assert_called_once_with(
                 'nn',
@@ -677,7 +807,7 @@ class TestInterpolation(TestCase):
                 variable_name,
                 output_path,
                 expected_cache,
-                {},
+                {'_FillValue': 0},
             )
 
         with self.subTest('Pre-existing nearest neighbour information'):
@@ -702,6 +832,7 @@ class TestInterpolation(TestCase):
                 output_path,
                 self.logger,
                 self.var_info,
+                {},
             )
 
             mock_get_info.assert_not_called()
@@ -721,7 +852,7 @@ class TestInterpolation(TestCase):
                 variable_name,
                 output_path,
                 nearest_information,
-                {},
+                {'_FillValue': 0},
             )
 
         with self.subTest('Harmony message defines target area'):
@@ -743,6 +874,7 @@ class TestInterpolation(TestCase):
                 output_path,
                 self.logger,
                 self.var_info,
+                {},
             )
 
             # Check that there is a new entry in the cache, and that it only
@@ -762,11 +894,14 @@ class TestInterpolation(TestCase):
             self.assertDictEqual(cache, expected_cache)
             mock_get_target_area.assert_not_called()
             mock_get_info.assert_called_once_with(
+                'kd_tree',
                 'swath',
                 harmony_target_area,
                 RADIUS_OF_INFLUENCE,
-                epsilon=EPSILON,
+                slice(None),
                 neighbours=1,
+                epsilon=EPSILON,
+                reduce_data=False,
             )
             mock_get_sample.assert_called_once_with(
                 'nn',
@@ -786,7 +921,7 @@ class TestInterpolation(TestCase):
                 variable_name,
                 output_path,
                 expected_cache,
-                {},
+                {'_FillValue': 0},
             )
 
     @patch('swath_projector.interpolation.write_single_band_output')
@@ -794,9 +929,11 @@ class TestInterpolation(TestCase):
     @patch('swath_projector.interpolation.get_target_area')
     @patch('swath_projector.interpolation.get_variable_values')
     @patch('swath_projector.interpolation.get_sample_from_neighbour_info')
-    @patch('swath_projector.interpolation.get_neighbour_info')
+    @patch('swath_projector.interpolation._query_resample_kdtree')
+    @patch('swath_projector.interpolation.get_swath_kd_tree')
     def test_resample_scaled_variable(
         self,
+        mock_get_kd_tree,
         mock_get_info,
         mock_get_sample,
         mock_get_values,
@@ -810,8 +947,8 @@ class TestInterpolation(TestCase):
         in that dataset is also correctly scaled.
 
         """
+        mock_get_kd_tree.return_value = ('valid_input_index', 'kd_tree')
         mock_get_info.return_value = [
-            'valid_input_index',
             'valid_output_index',
             'index_array',
             'distance_array',
@@ -836,6 +973,7 @@ class TestInterpolation(TestCase):
             output_path,
             self.logger,
             self.var_info,
+            {},
         )
 
         expected_cache = {
@@ -847,14 +985,17 @@ class TestInterpolation(TestCase):
                 'target_area': self.mock_target_area,
             }
         }
-        expected_scaling = {'add_offset': 0, 'scale_factor': 2}
+        expected_scaling = {'_FillValue': 0, 'add_offset': 0, 'scale_factor': 2}
 
         mock_get_info.assert_called_once_with(
+            'kd_tree',
             'swath',
             self.mock_target_area,
             RADIUS_OF_INFLUENCE,
-            epsilon=EPSILON,
+            slice(None),
             neighbours=1,
+            epsilon=EPSILON,
+            reduce_data=False,
         )
         mock_get_sample.assert_called_once_with(
             'nn',
@@ -875,6 +1016,121 @@ class TestInterpolation(TestCase):
             expected_scaling,
         )
 
+    @patch('swath_projector.interpolation.write_single_band_output')
+    @patch('swath_projector.interpolation.get_swath_definition')
+    @patch('swath_projector.interpolation.get_target_area')
+    @patch('swath_projector.interpolation.get_variable_values')
+    @patch('pyresample.ewa.fornav')
+    @patch('pyresample.ewa.ll2cr')
+    def test_resample_entirely_fill_variable(
+        self,
+        mock_ll2cr,
+        mock_fornav,
+        mock_get_values,
+        mock_get_target_area,
+        mock_get_swath,
+        mock_write_output,
+    ):
+        """Ensure that a variable containing only fill values does not call
+        the interpolation method to derive reprojection information or to
+        retrieve results, and instead writes a masked array, with the shape
+        of the target area and the `_FillValue` of the input variable. The
+        derived target area is not cached, as later variables need the full
+        reprojection information.
+
+        """
+        mock_ll2cr.return_value = ['swath_points_in_grid', 'columns', 'rows']
+        mock_get_swath.return_value = 'swath'
+        mock_get_values.return_value = np.zeros((2, 3))
+        self.mock_target_area.shape = (2, 4)
+        mock_get_target_area.return_value = self.mock_target_area
+
+        message_parameters = self.message_parameters
+        message_parameters['interpolation'] = 'ewa'
+        variable_name = '/alpha_var'
+        output_path = 'path/to/output'
+
+        reprojection_cache = {}
+
+        resample_variable(
+            message_parameters,
+            variable_name,
+            reprojection_cache,
+            output_path,
+            self.logger,
+            self.var_info,
+            {},
+        )
+
+        mock_get_target_area.assert_called_once()
+        mock_get_swath.assert_not_called()
+        mock_ll2cr.assert_not_called()
+        mock_fornav.assert_not_called()
+        self.assertDictEqual(reprojection_cache, {})
+        mock_write_output.assert_called_once()
+
+        written_results = mock_write_output.call_args[0][1]
+        self.assertIsInstance(written_results, np.ma.MaskedArray)
+        self.assertTupleEqual(written_results.shape, (2, 4))
+        self.assertEqual(written_results.dtype, np.uint8)
+        self.assertEqual(np.ma.count(written_results), 0)
+        self.assertDictEqual(mock_write_output.call_args[0][5], {'_FillValue': 0})
+
+    @patch('swath_projector.interpolation.get_target_area')
+    def test_get_fill_value_target_area(self, mock_get_target_area):
+        """Ensure the target area for a variable only containing fill values
+        is retrieved from the cache, or the Harmony message, before deriving
+        it from the coordinates. If the derived target area would be
+        trimmed, no target area is returned.
+
+        """
+        coordinates_key = ('/lat', '/lon')
+        cached_area = Mock(spec=AreaDefinition)
+        harmony_area = Mock(spec=AreaDefinition)
+        derived_area = Mock(spec=AreaDefinition)
+        mock_get_target_area.return_value = derived_area
+        dataset = Mock(spec=Dataset)
+        trimmed_parameters = {**self.message_parameters, 'trim_margins': True}
+
+        test_args = [
+            [
+                'Cached coordinates',
+                {coordinates_key: {'target_area': cached_area}},
+                {},
+                cached_area,
+            ],
+            [
+                'Harmony message target',
+                {HARMONY_TARGET: {'target_area': harmony_area}},
+                self.message_parameters,
+                harmony_area,
+            ],
+            ['Trimmed target area', {}, trimmed_parameters, None],
+            ['Derived target area', {}, self.message_parameters, derived_area],
+        ]
+
+        for description, reprojection_cache, parameters, expected_area in test_args:
+            with self.subTest(description):
+                mock_get_target_area.reset_mock()
+
+                self.assertIs(
+                    get_fill_value_target_area(
+                        parameters,
+                        reprojection_cache,
+                        self.logger,
+                        dataset,
+                        coordinates_key,
+                    ),
+                    expected_area,
+                )
+
+                if expected_area is derived_area:
+                    mock_get_target_area.assert_called_once_with(
+                        parameters, dataset, coordinates_key, self.logger, None
+                    )
+                else:
+                    mock_get_target_area.assert_not_called()
+
     def test_check_for_valid_interpolation(self):
         """Ensure all valid interpolations don't raise an exception."""
         interpolations = ['bilinear', 'ewa', 'ewa-nn', 'near']
@@ -937,16 +1193,14 @@ class TestInterpolation(TestCase):
 
     def test_get_swath_definition_one_dimensional_coordinates(self):
         """Ensure that if 1-D coordinate arrays are used to produce a swath,
-        they are converted to 2-D before being used to construct the
-        object.
+        they retain their 1-D shape, rather than being padded to N x 1
+        arrays.
 
         """
         dataset = Dataset('test_1d.nc', 'w', diskless=True)
 
         lat_values = np.array([20, 15, 10])
         lon_values = np.array([150, 160, 170])
-        lat_values_2d = np.array([[20], [15], [10]])
-        lon_values_2d = np.array([[150], [160], [170]])
 
         dataset.createDimension('lat', size=3)
         dataset.createDimension('lon', size=3)
@@ -958,11 +1212,865 @@ class TestInterpolation(TestCase):
         coordinates = ('/latitude', '/longitude')
         swath_definition = get_swath_definition(dataset, coordinates)
 
-        self.assertEqual(swath_definition.shape, (lat_values.size, 1))
-        np.testing.assert_array_equal(lat_values_2d, swath_definition.lats)
-        np.testing.assert_array_equal(lon_values_2d, swath_definition.lons)
+        self.assertEqual(swath_definition.shape, (lat_values.size,))
+        np.testing.assert_array_equal(lat_values, swath_definition.lats)
+        np.testing.assert_array_equal(lon_values, swath_definition.lons)
+        dataset.close()
+
+    @patch('swath_projector.interpolation.get_swath_definition')
+    def test_get_swath_resources(self, mock_get_swath_definition):
+        """Ensure a new swath cache entry is created containing the swath
+        definition if the coordinates are not already present. If there is
+        already an entry, it should be returned without re-reading the
+        coordinates.
+
+        """
+        mock_get_swath_definition.return_value = 'swath'
+        dataset = MagicMock(spec=Dataset)
+        coordinates = ('/lat', '/lon')
+        swath_cache = {}
+
+        with self.subTest('No pre-existing swath resources'):
+            swath_resources = get_swath_resources(swath_cache, dataset, coordinates)
+
+            self.assertDictEqual(swath_resources, {'swath_definition': 'swath'})
+            self.assertIs(swath_cache[coordinates], swath_resources)
+            mock_get_swath_definition.assert_called_once_with(
+                dataset, coordinates, None
+            )
+
+        with self.subTest('Pre-existing swath resources'):
+            mock_get_swath_definition.reset_mock()
+            swath_cache[coordinates]['kd_tree'] = 'cached_tree'
+
+            swath_resources = get_swath_resources(swath_cache, dataset, coordinates)
+
+            self.assertEqual(swath_resources['kd_tree'], 'cached_tree')
+            mock_get_swath_definition.assert_not_called()
+
+    @patch('swath_projector.interpolation.get_coordinates_fingerprint')
+    def test_get_deduplicated_coordinates_key(self, mock_get_fingerprint):
+        """Ensure that coordinates with the same content fingerprint are
+        mapped to the first coordinates key encountered with that
+        fingerprint, and that each set of coordinates is only fingerprinted
+        once.
+
+        """
+        fingerprints = {
+            ('/beam_one/lat', '/beam_one/lon'): 'abc',
+            ('/beam_two/lat', '/beam_two/lon'): 'abc',
+            ('/other/lat', '/other/lon'): 'def',
+        }
+        mock_get_fingerprint.side_effect = lambda _, coordinates: fingerprints[
+            coordinates
+        ]
+        dataset = Mock(spec=Dataset)
+        swath_cache = {}
+
+        test_args = [
+            [
+                'First coordinates',
+                ('/beam_one/lat', '/beam_one/lon'),
+                ('/beam_one/lat', '/beam_one/lon'),
+            ],
+            [
+                'Duplicated coordinates',
+                ('/beam_two/lat', '/beam_two/lon'),
+                ('/beam_one/lat', '/beam_one/lon'),
+            ],
+            [
+                'Unique coordinates',
+                ('/other/lat', '/other/lon'),
+                ('/other/lat', '/other/lon'),
+            ],
+            [
+                'Repeated duplicate',
+                ('/beam_two/lat', '/beam_two/lon'),
+                ('/beam_one/lat', '/beam_one/lon'),
+            ],
+        ]
+
+        for description, coordinates, expected_coordinates in test_args:
+            with self.subTest(description):
+                self.assertTupleEqual(
+                    get_deduplicated_coordinates_key(
+                        swath_cache, dataset, coordinates, self.logger
+                    ),
+                    expected_coordinates,
+                )
+
+        self.assertEqual(mock_get_fingerprint.call_count, 3)
+        self.assertDictEqual(
+            swath_cache[COORDINATE_FINGERPRINTS]['by_fingerprint'],
+            {
+                'abc': ('/beam_one/lat', '/beam_one/lon'),
+                'def': ('/other/lat', '/other/lon'),
+            },
+        )
+
+    def test_get_swath_kd_tree(self):
+        """Ensure a KD-tree is constructed from only the valid swath pixels,
+        and that it is stored in the swath resources so that subsequent
+        requests do not construct a new KD-tree.
+
+        """
+        with Dataset('tests/data/africa.nc') as dataset:
+            swath_definition = get_swath_definition(dataset, ('/lat', '/lon'))
+
+        with self.subTest('KD-tree is only constructed once'):
+            swath_resources = {'swath_definition': swath_definition}
+
+            with patch(
+                'swath_projector.interpolation.KDTree', wraps=KDTree
+            ) as mock_kd_tree:
+                valid_index, kd_tree = get_swath_kd_tree(swath_resources)
+                self.assertTupleEqual(
+                    get_swath_kd_tree(swath_resources), (valid_index, kd_tree)
+                )
+                mock_kd_tree.assert_called_once()
+
+            self.assertEqual(valid_index.size, swath_definition.size)
+            self.assertEqual(kd_tree.n, np.count_nonzero(valid_index))
+            self.assertIs(swath_resources['kd_tree'], kd_tree)
+            self.assertTupleEqual(
+                swath_resources['cartesian_coordinates'].shape, (kd_tree.n, 3)
+            )
+
+        with self.subTest('Invalid pixels are excluded'):
+            swath_resources = {
+                'swath_definition': SwathDefinition(
+                    lons=np.array([[10.0, np.nan], [10.0, 200.0]]),
+                    lats=np.array([[5.0, 5.0], [4.0, 4.0]]),
+                )
+            }
+            valid_index, kd_tree = get_swath_kd_tree(swath_resources)
+            np.testing.assert_array_equal(
+                valid_index, np.array([True, False, True, False])
+            )
+            self.assertEqual(kd_tree.n, 2)
+
+        with self.subTest('No valid pixels returns no KD-tree'):
+            swath_resources = {
+                'swath_definition': SwathDefinition(
+                    lons=np.array([[np.nan, np.nan]]), lats=np.array([[5.0, 5.0]])
+                )
+            }
+            valid_index, kd_tree = get_swath_kd_tree(swath_resources)
+            self.assertFalse(valid_index.any())
+            self.assertIsNone(kd_tree)
+
+    def test_swath_kd_tree_shared_between_methods_and_targets(self):
+        """Ensure that the nearest neighbour and bilinear interpolation
+        methods share a single KD-tree for the same swath, even when
+        the target areas differ.
+
+        """
+        with Dataset('tests/data/africa.nc') as dataset:
+            swath_definition = get_swath_definition(dataset, ('/lat', '/lon'))
+
+        swath_resources = {'swath_definition': swath_definition}
+        target_one = AreaDefinition.from_extent(
+            'one', '+proj=longlat', (20, 20), (10, -10, 30, 10)
+        )
+        target_two = AreaDefinition.from_extent(
+            'two', '+proj=longlat', (10, 10), (15, -5, 25, 5)
+        )
+
+        with patch(
+            'swath_projector.interpolation.KDTree', wraps=KDTree
+        ) as mock_kd_tree:
+            near_one = get_near_information(swath_resources, target_one)
+            near_two = get_near_information(swath_resources, target_two)
+            bilinear = get_bilinear_information(swath_resources, target_one)
+
+        mock_kd_tree.assert_called_once()
+        self.assertIs(near_one['target_area'], target_one)
+        self.assertIs(near_two['target_area'], target_two)
+        self.assertEqual(near_one['index_array'].size, target_one.size)
+        self.assertEqual(near_two['index_array'].size, target_two.size)
+        np.testing.assert_array_equal(
+            bilinear['valid_input_indices'], swath_resources['valid_input_index']
+        )
+        self.assertEqual(bilinear['vertical_distances'].size, target_one.size)
+
+    def test_get_bilinear_information_adaptive_neighbours(self):
+        """Ensure that all target locations are first queried with the
+        smallest number of neighbours, and only those not surrounded by
+        swath pixels are queried again. The results should be the same as
+        querying 16 neighbours for all target locations, which was the fixed
+        number of neighbours prior to adaptive queries.
+
+        """
+        from pyresample.bilinear import NumpyBilinearResampler
+        from pyresample.bilinear import _base as bilinear_base
+
+        with Dataset('tests/data/africa.nc') as dataset:
+            swath_definition = get_swath_definition(dataset, ('/lat', '/lon'))
+
+        target_area = AreaDefinition.from_extent(
+            'target', '+proj=longlat', (25, 80), (-20, 10, 60, 35)
+        )
+
+        with patch.object(
+            bilinear_base,
+            '_query_no_distance',
+            wraps=bilinear_base._query_no_distance,
+        ) as mock_query:
+            bilinear_information = get_bilinear_information(
+                {'swath_definition': swath_definition}, target_area
+            )
+
+        query_sizes = [call.args[0].size for call in mock_query.call_args_list]
+        query_neighbours = [call.args[4] for call in mock_query.call_args_list]
+
+        self.assertEqual(query_sizes[0], target_area.size)
+        self.assertListEqual(
+            query_neighbours, list(BILINEAR_NEIGHBOURS[: len(query_sizes)])
+        )
+        self.assertTrue(
+            all(
+                later_size <= earlier_size
+                for earlier_size, later_size in zip(query_sizes, query_sizes[1:])
+            )
+        )
+
+        resampler = NumpyBilinearResampler(
+            swath_definition,
+            target_area,
+            RADIUS_OF_INFLUENCE,
+            neighbours=16,
+            reduce_data=False,
+        )
+        resampler.get_bil_info()
+
+        np.testing.assert_array_equal(
+            bilinear_information['vertical_distances'], resampler.bilinear_t
+        )
+        np.testing.assert_array_equal(
+            bilinear_information['horizontal_distances'], resampler.bilinear_s
+        )
+        np.testing.assert_array_equal(
+            bilinear_information['valid_point_mapping'], resampler._index_array
+        )
+
+    @patch('swath_projector.interpolation.write_single_band_output')
+    def test_geolocation_cache_shared_between_granules(self, mock_write_output):
+        """Ensure that, when the target area is defined in the message,
+        consecutive granules with identical coordinates reuse the
+        reprojection information of the previous granule. Derived target
+        areas depend on each granule, so information is not shared.
+
+        """
+        parameters = {
+            **self.message_parameters,
+            'interpolation': 'near',
+            'x_min': -20,
+            'x_max': 60,
+            'y_min': 10,
+            'y_max': 35,
+            'height': 25,
+            'width': 80,
+        }
+
+        with self.subTest('Target area defined in message'):
+            geolocation_cache = {}
+
+            with patch(
+                'swath_projector.interpolation.get_near_information',
+                wraps=get_near_information,
+            ) as mock_get_near_information:
+                for _ in range(2):
+                    resample_all_variables(
+                        parameters,
+                        self.science_variables,
+                        self.temp_directory,
+                        self.logger,
+                        self.var_info,
+                        geolocation_cache,
+                    )
+
+            mock_get_near_information.assert_called_once()
+            self.assertEqual(len(geolocation_cache[PREVIOUS_GRANULE]), 1)
+            self.assertDictEqual(
+                geolocation_cache[CURRENT_GRANULE], geolocation_cache[PREVIOUS_GRANULE]
+            )
+
+        with self.subTest('Derived target area'):
+            geolocation_cache = {}
+
+            with patch(
+                'swath_projector.interpolation.get_near_information',
+                wraps=get_near_information,
+            ) as mock_get_near_information:
+                for _ in range(2):
+                    resample_all_variables(
+                        {**self.message_parameters, 'interpolation': 'near'},
+                        self.science_variables,
+                        self.temp_directory,
+                        self.logger,
+                        self.var_info,
+                        geolocation_cache,
+                    )
+
+            self.assertEqual(mock_get_near_information.call_count, 2)
+            self.assertDictEqual(geolocation_cache, {})
+
+    @patch('swath_projector.interpolation.write_single_band_output')
+    def test_swath_resource_cache_shared_between_messages(self, mock_write_output):
+        """Ensure that, when the process-level swath resource cache is
+        enabled, a later message for a granule with identical coordinates
+        reuses the swath definition and reprojection information of the
+        earlier message. Memory-mapped coordinates are not cached, as their
+        files are removed with the workspace.
+
+        """
+        swath_resource_cache.swath_resource_cache.clear()
+        set_swath_resource_cache_size(2)
+        self.addCleanup(set_swath_resource_cache_size, 0)
+        parameters = {**self.message_parameters, 'interpolation': 'near'}
+
+        for description, memory_map_threshold, expected_calls in [
+            ('Coordinates in memory', '0', 1),
+            ('Memory-mapped coordinates', '1', 2),
+        ]:
+            with self.subTest(description):
+                with (
+                    patch.dict(
+                        'os.environ',
+                        {
+                            MEMORY_MAP_THRESHOLD_ENVIRONMENT_VARIABLE: memory_map_threshold
+                        },
+                    ),
+                    patch(
+                        'swath_projector.interpolation.get_swath_definition',
+                        wraps=get_swath_definition,
+                    ) as mock_get_swath_definition,
+                    patch(
+                        'swath_projector.interpolation.get_near_information',
+                        wraps=get_near_information,
+                    ) as mock_get_near_information,
+                ):
+                    for _ in range(2):
+                        temp_directory = mkdtemp()
+                        self.addCleanup(rmtree, temp_directory)
+                        resample_all_variables(
+                            parameters,
+                            self.science_variables,
+                            temp_directory,
+                            self.logger,
+                            self.var_info,
+                        )
+
+                self.assertEqual(mock_get_swath_definition.call_count, expected_calls)
+                self.assertEqual(mock_get_near_information.call_count, expected_calls)
+
+        self.assertEqual(len(swath_resource_cache.swath_resource_cache), 1)
+
+    @patch('swath_projector.interpolation.get_variable_values')
+    @patch('swath_projector.interpolation.write_single_band_output')
+    def test_resample_variable_streamed_ewa(
+        self, mock_write_output, mock_get_variable_values
+    ):
+        """Ensure that, when a block size is specified, EWA interpolation is
+        performed in blocks of rows without reading the full variable, and
+        only the target area is stored in the reprojection cache. A block
+        size of a single row is accepted, with the instrument scan height
+        passed through to the streamed EWA function.
+
+        """
+        parameters = {
+            **self.message_parameters,
+            'interpolation': 'ewa',
+            'x_min': -20,
+            'x_max': 60,
+            'y_min': 10,
+            'y_max': 35,
+            'height': 25,
+            'width': 80,
+        }
+        reprojection_cache = get_reprojection_cache(parameters)
+        target_area = reprojection_cache[HARMONY_TARGET]['target_area']
+
+        with patch(
+            'swath_projector.interpolation.get_streamed_ewa_results',
+            wraps=get_streamed_ewa_results,
+        ) as mock_get_streamed_results:
+            resample_variable(
+                parameters,
+                '/red_var',
+                reprojection_cache,
+                'path/to/output',
+                self.logger,
+                self.var_info,
+                {},
+                None,
+                [],
+                1,
+                2,
+            )
+
+        mock_get_variable_values.assert_not_called()
+        mock_get_streamed_results.assert_called_once()
+        self.assertEqual(mock_get_streamed_results.call_args.args[5], 1)
+        self.assertEqual(mock_get_streamed_results.call_args.args[7], 2)
+        self.assertDictEqual(
+            reprojection_cache[('/lat', '/lon')], {'target_area': target_area}
+        )
+        mock_write_output.assert_called_once()
+        self.assertIs(mock_write_output.call_args.args[0], target_area)
+
+    @patch('swath_projector.interpolation.get_target_area')
+    @patch('swath_projector.interpolation.get_streamed_ewa_results')
+    @patch('swath_projector.interpolation.write_single_band_output')
+    def test_resample_variable_streamed_ewa_estimated_area(
+        self, mock_write_output, mock_get_streamed_results, mock_get_target_area
+    ):
+        """Ensure that, when the target grid is not fully defined, a variable
+        is only resampled in blocks of rows if an estimated target area is
+        requested. The target area is derived with the memory maps of the
+        swath cache, and stored for later variables.
+
+        """
+        target_area = AreaDefinition.from_extent(
+            'estimated', '+proj=longlat', (25, 80), (-20, 10, 60, 35)
+        )
+        mock_get_target_area.return_value = target_area
+        mock_get_streamed_results.return_value = np.zeros((25, 80))
+        memory_maps = Mock()
+
+        with self.subTest('Estimated target area is streamed'):
+            parameters = {
+                **self.message_parameters,
+                'interpolation': 'ewa',
+                'estimate_target_area': True,
+            }
+            reprojection_cache = {}
+
+            resample_variable(
+                parameters,
+                '/red_var',
+                reprojection_cache,
+                'path/to/output',
+                self.logger,
+                self.var_info,
+                {MEMORY_MAPS: memory_maps},
+                None,
+                [],
+                1,
+            )
+
+            mock_get_streamed_results.assert_called_once()
+            mock_get_target_area.assert_called_once_with(
+                parameters, ANY, ('/lat', '/lon'), self.logger, memory_maps
+            )
+            self.assertDictEqual(
+                reprojection_cache[('/lat', '/lon')], {'target_area': target_area}
+            )
+
+        mock_get_streamed_results.reset_mock()
+
+        with self.subTest('Derived target area is not streamed'):
+            with patch(
+                'swath_projector.interpolation.get_reprojection_information',
+                wraps=get_reprojection_information,
+            ) as mock_get_information:
+                resample_variable(
+                    {**self.message_parameters, 'interpolation': 'ewa'},
+                    '/red_var',
+                    {},
+                    'path/to/output',
+                    self.logger,
+                    self.var_info,
+                    {MEMORY_MAPS: None},
+                    None,
+                    [],
+                    1,
+                )
+
+            mock_get_streamed_results.assert_not_called()
+            mock_get_information.assert_called_once()
+
+    def test_use_streamed_ewa(self):
+        """Ensure variables are only resampled in blocks of rows when a block
+        size is set, all targets use EWA, and the 2-D coordinates have more
+        rows than a single block. Each target must have a grid fully defined
+        in the message, or request an estimated target area, so that the
+        full coordinates are never processed at once.
+
+        """
+        defined_grid = {HARMONY_TARGET: {'target_area': Mock()}}
+        ewa_target = {
+            'parameters': {'interpolation': 'ewa'},
+            'reprojection_cache': defined_grid,
+        }
+        ewa_nn_target = {
+            'parameters': {'interpolation': 'ewa-nn'},
+            'reprojection_cache': defined_grid,
+        }
+        near_target = {
+            'parameters': {'interpolation': 'near'},
+            'reprojection_cache': defined_grid,
+        }
+        estimated_target = {
+            'parameters': {'interpolation': 'ewa', 'estimate_target_area': True},
+            'reprojection_cache': {},
+        }
+        derived_target = {
+            'parameters': {'interpolation': 'ewa', 'estimate_target_area': False},
+            'reprojection_cache': {},
+        }
+
+        with Dataset('tests/data/africa.nc') as dataset:
+            total_rows = dataset['/lat'].shape[0]
+            test_args = [
+                ['EWA, small blocks', [ewa_target, ewa_nn_target], 1, True],
+                ['No block size', [ewa_target], 0, False],
+                ['Non-EWA target', [ewa_target, near_target], 1, False],
+                ['Block exceeds swath', [ewa_target], total_rows, False],
+                ['Estimated target area', [ewa_target, estimated_target], 1, True],
+                ['Derived target area', [ewa_target, derived_target], 1, False],
+            ]
+
+            for description, targets, block_rows, expected_result in test_args:
+                with self.subTest(description):
+                    self.assertEqual(
+                        use_streamed_ewa(
+                            targets, dataset, ('/lat', '/lon'), block_rows
+                        ),
+                        expected_result,
+                    )
+
+    @patch('swath_projector.interpolation.write_single_band_output')
+    def test_resample_variable_memory_mapped(self, mock_write_output):
+        """Ensure that, when memory-mapping is configured, the coordinates and
+        science variable are copied to memory-mapped arrays in the workspace,
+        and that the results are identical to those from reading the
+        variables into memory.
+
+        """
+        temp_directory = mkdtemp()
+        self.addCleanup(rmtree, temp_directory)
+        parameters = {**self.message_parameters, 'interpolation': 'near'}
+
+        for description, swath_cache in [
+            ('In memory', {}),
+            ('Memory-mapped', {MEMORY_MAPS: get_memory_maps(temp_directory, 1)}),
+        ]:
+            with self.subTest(description):
+                resample_variable(
+                    parameters,
+                    '/red_var',
+                    {},
+                    'path/to/output',
+                    self.logger,
+                    self.var_info,
+                    swath_cache,
+                )
+
+        for file_name in ['lat.npy', 'lon.npy', 'red_var.npy']:
+            self.assertTrue(
+                exists(join(temp_directory, MEMORY_MAP_DIRECTORY, file_name))
+            )
+
+        in_memory_call, memory_mapped_call = mock_write_output.call_args_list
+        self.assert_areadefinitions_equal(
+            in_memory_call.args[0], memory_mapped_call.args[0]
+        )
+        np.testing.assert_array_equal(
+            in_memory_call.args[1], memory_mapped_call.args[1]
+        )
+
+    def test_get_binned_information(self):
+        """Ensure each valid 1-D swath pixel within the target area is
+        assigned to the grid pixel containing it, along with its squared
+        distance from the centre of that grid pixel. Swath pixels outside the
+        target area, or with invalid coordinates, are excluded.
+
+        """
+        swath_definition = SwathDefinition(
+            lons=np.array([0.5, 1.25, 1.75, 2.5, 10.0, np.nan]),
+            lats=np.array([2.5, 1.25, 1.25, 0.5, 0.5, 0.5]),
+        )
+        target_area = AreaDefinition.from_extent(
+            'profile', '+proj=longlat', (3, 3), (0, 0, 3, 3)
+        )
+
+        binned_information = get_binned_information(
+            {'swath_definition': swath_definition}, target_area
+        )
+
+        self.assertIs(binned_information['target_area'], target_area)
+        np.testing.assert_array_equal(
+            binned_information['valid_input_index'], [0, 1, 2, 3]
+        )
+        np.testing.assert_array_equal(binned_information['target_index'], [0, 4, 4, 8])
+        np.testing.assert_allclose(
+            binned_information['centre_distances'], [0.0, 0.125, 0.125, 0.0]
+        )
+
+    def test_get_binned_results(self):
+        """Ensure 1-D swath values are binned into the target grid, using the
+        mean of all swath pixels in each grid pixel, or the swath pixel
+        closest to the centre of each grid pixel in maximum weight mode.
+        Swath pixels with a fill value or NaN are excluded, and grid pixels
+        without swath pixels are set to the fill value, or NaN.
+
+        """
+        target_area = AreaDefinition.from_extent(
+            'profile', '+proj=longlat', (2, 2), (0, 0, 2, 2)
+        )
+        binned_information = {
+            'valid_input_index': np.array([0, 1, 2, 3, 4]),
+            'target_index': np.array([0, 0, 0, 3, 3]),
+            'centre_distances': np.array([0.2, 0.1, 0.3, 0.4, 0.0]),
+            'target_area': target_area,
+        }
+        values = np.array([1.0, 3.0, 8.0, -1.0, np.nan])
+
+        test_args = [
+            ['Mean, fill value', False, -1.0, [[4.0, -1.0], [-1.0, -1.0]]],
+            ['Mean, no fill value', False, None, [[4.0, np.nan], [np.nan, -1.0]]],
+            ['Nearest, fill value', True, -1.0, [[3.0, -1.0], [-1.0, -1.0]]],
+            ['Nearest, no fill value', True, None, [[3.0, np.nan], [np.nan, -1.0]]],
+        ]
+
+        for description, maximum_weight_mode, fill_value, expected_results in test_args:
+            with self.subTest(description):
+                results = get_binned_results(
+                    {'values': values, 'fill_value': fill_value},
+                    binned_information,
+                    maximum_weight_mode,
+                )
+                np.testing.assert_array_equal(results, expected_results)
+
+    def test_trim_binned_information(self):
+        """Ensure the target area of binned information is shrunk to the
+        populated grid pixels, and the target indices refer to the trimmed
+        target area. If no grid pixels are populated, the information should
+        be returned unchanged.
+
+        """
+        target_area = AreaDefinition.from_extent(
+            'profile', '+proj=longlat', (4, 5), (0, 0, 5, 4)
+        )
+        binned_information = {
+            'valid_input_index': np.array([0, 1]),
+            'target_index': np.array([6, 13]),
+            'centre_distances': np.array([0.0, 0.5]),
+            'target_area': target_area,
+        }
+
+        with self.subTest('Populated grid pixels'):
+            trimmed_information = trim_binned_information(binned_information)
+            trimmed_area = trimmed_information['target_area']
+
+            self.assertTupleEqual(trimmed_area.shape, (2, 3))
+            self.assertTupleEqual(trimmed_area.area_extent, (1.0, 1.0, 4.0, 3.0))
+            np.testing.assert_array_equal(trimmed_information['target_index'], [0, 5])
+            np.testing.assert_array_equal(
+                trimmed_information['valid_input_index'], [0, 1]
+            )
+
+        with self.subTest('No populated grid pixels'):
+            empty_information = {
+                'valid_input_index': np.array([], dtype=int),
+                'target_index': np.array([], dtype=int),
+                'centre_distances': np.array([]),
+                'target_area': target_area,
+            }
+            self.assertIs(trim_binned_information(empty_information), empty_information)
+
+    def test_get_interpolation_functions(self):
+        """Ensure EWA interpolation of a 1-D swath uses the binned functions,
+        while other interpolation methods, and EWA interpolation of a 2-D
+        swath, use the standard functions for that method.
+
+        """
+        dataset = Dataset('test_1d.nc', 'w', diskless=True)
+        dataset.createDimension('along_track', size=3)
+        dataset.createDimension('y', size=2)
+        dataset.createDimension('x', size=2)
+
+        for variable_name, dimensions in [
+            ('lat_1d', ('along_track',)),
+            ('lon_1d', ('along_track',)),
+            ('lat_2d', ('y', 'x')),
+            ('lon_2d', ('y', 'x')),
+        ]:
+            dataset.createVariable(variable_name, float, dimensions=dimensions)
+
+        coordinates_1d = ('/lat_1d', '/lon_1d')
+        coordinates_2d = ('/lat_2d', '/lon_2d')
+
+        with self.subTest('EWA with 1-D coordinates'):
+            functions = get_interpolation_functions('ewa', dataset, coordinates_1d)
+            self.assertIs(functions['get_information'], get_binned_information)
+            self.assertIs(functions['trim_information'], trim_binned_information)
+            self.assertIs(functions['get_results'].func, get_binned_results)
+            self.assertDictEqual(
+                functions['get_results'].keywords, {'maximum_weight_mode': False}
+            )
+
+        with self.subTest('EWA-NN with 1-D coordinates'):
+            functions = get_interpolation_functions('ewa-nn', dataset, coordinates_1d)
+            self.assertIs(functions['get_information'], get_binned_information)
+            self.assertDictEqual(
+                functions['get_results'].keywords, {'maximum_weight_mode': True}
+            )
+
+        with self.subTest('EWA with 2-D coordinates'):
+            functions = get_interpolation_functions('ewa', dataset, coordinates_2d)
+            self.assertIs(functions['get_information'], get_ewa_information)
+
+        with self.subTest('Nearest neighbour with 1-D coordinates'):
+            functions = get_interpolation_functions('near', dataset, coordinates_1d)
+            self.assertIs(functions['get_information'], get_near_information)
+            self.assertIs(functions['get_results'], get_near_results)
+
         dataset.close()
 
+    def test_trim_information(self):
+        """Ensure that trimming the reprojection information for each
+        interpolation method shrinks the target area to a window that
+        contains all populated pixels, and that the resampled results in that
+        window are identical to those from the untrimmed target area.
+
+        """
+        with Dataset('tests/data/africa.nc') as dataset:
+            swath_definition = get_swath_definition(dataset, ('/lat', '/lon'))
+            values = dataset['red_var'][0].astype(float).filled(0)
+
+        # Target area extends well beyond the swath, which lies in the
+        # region: -30.4 < lon < 67.1, -41.7 < lat < 47.4.
+        target_area = AreaDefinition.from_extent(
+            '/lat, /lon', '+proj=longlat', (120, 200), (-70, -60, 130, 60)
+        )
+        variable = {'values': values, 'fill_value': 0}
+
+        test_args = [
+            [
+                'bilinear',
+                get_bilinear_information,
+                trim_bilinear_information,
+                get_bilinear_results,
+            ],
+            [
+                'ewa',
+                get_ewa_information,
+                trim_ewa_information,
+                partial(get_ewa_results, maximum_weight_mode=False),
+            ],
+            ['near', get_near_information, trim_near_information, get_near_results],
+        ]
+
+        for description, get_information, trim_information, get_results in test_args:
+            with self.subTest(description):
+                information = get_information(
+                    {'swath_definition': swath_definition}, target_area
+                )
+                full_results = get_results(dict(variable), information)
+                trimmed_information = trim_information(information)
+                trimmed_area = trimmed_information['target_area']
+                trimmed_results = get_results(dict(variable), trimmed_information)
+
+                self.assertEqual(trimmed_area.area_id, target_area.area_id)
+                self.assertLess(trimmed_area.size, target_area.size)
+                self.assertTupleEqual(trimmed_results.shape, trimmed_area.shape)
+
+                row_offset = round(
+                    (target_area.area_extent[3] - trimmed_area.area_extent[3])
+                    / target_area.pixel_size_y
+                )
+                column_offset = round(
+                    (trimmed_area.area_extent[0] - target_area.area_extent[0])
+                    / target_area.pixel_size_x
+                )
+                window = (
+                    slice(row_offset, row_offset + trimmed_area.height),
+                    slice(column_offset, column_offset + trimmed_area.width),
+                )
+                np.testing.assert_array_equal(full_results[window], trimmed_results)
+
+                # All populated pixels are retained in the trimmed output:
+                self.assertEqual(
+                    np.count_nonzero(full_results), np.count_nonzero(trimmed_results)
+                )
+
+    def test_trim_information_no_populated_pixels(self):
+        """Ensure that if no target pixels can be populated, the reprojection
+        information is returned unchanged.
+
+        """
+        with Dataset('tests/data/africa.nc') as dataset:
+            swath_definition = get_swath_definition(dataset, ('/lat', '/lon'))
+
+        target_area = AreaDefinition.from_extent(
+            'distant', '+proj=longlat', (10, 10), (100, 40, 110, 50)
+        )
+        swath_resources = {'swath_definition': swath_definition}
+
+        near_information = get_near_information(swath_resources, target_area)
+        self.assertIs(trim_near_information(near_information), near_information)
+
+        bilinear_information = get_bilinear_information(swath_resources, target_area)
+        self.assertIs(
+            trim_bilinear_information(bilinear_information), bilinear_information
+        )
+
+    def test_should_trim_target_area(self):
+        """Ensure the target area is only trimmed when requested, and when
+        neither the extents nor the dimensions of the target area are
+        specified in the Harmony message.
+
+        """
+        test_args = [
+            ['Not requested', {}, False],
+            ['Requested', {'trim_margins': True}, True],
+            ['Explicitly disabled', {'trim_margins': False}, False],
+            [
+                'Extents in message',
+                {
+                    'trim_margins': True,
+                    'x_min': -10,
+                    'x_max': 10,
+                    'y_min': -5,
+                    'y_max': 5,
+                },
+                False,
+            ],
+            [
+                'Dimensions in message',
+                {'trim_margins': True, 'height': 10, 'width': 20},
+                False,
+            ],
+            [
+                'Resolutions in message',
+                {'trim_margins': True, 'xres': 1, 'yres': -1},
+                True,
+            ],
+        ]
+
+        for description, parameters, expected_result in test_args:
+            with self.subTest(description):
+                message_parameters = {**self.message_parameters, **parameters}
+                self.assertEqual(
+                    should_trim_target_area(message_parameters), expected_result
+                )
+
+    def test_get_populated_window(self):
+        """Ensure the smallest window containing all populated pixels is
+        returned, or `None` if there are no populated pixels.
+
+        """
+        populated_pixels = np.zeros((5, 6), dtype=bool)
+        self.assertIsNone(get_populated_window(populated_pixels))
+
+        populated_pixels[1, 4] = True
+        populated_pixels[3, 2] = True
+        self.assertTupleEqual(
+            get_populated_window(populated_pixels), (slice(1, 4), slice(2, 5))
+        )
+
     def test_get_reprojection_cache_minimal(self):
         """If a Harmony message does not contain any target area information,
         then an empty cache should be retrieved.
@@ -1066,11 +2174,16 @@ class TestInterpolation(TestCase):
 
         self.assertDictEqual(get_reprojection_cache(message_parameters), {})
 
-    @patch('swath_projector.interpolation.get_projected_resolution')
-    @patch('swath_projector.interpolation.get_extents_from_perimeter')
-    @patch('swath_projector.interpolation.get_coordinate_variable')
+    @patch('swath_projector.interpolation.get_resolution_from_perimeter')
+    @patch('swath_projector.interpolation.get_extents_from_projected_perimeter')
+    @patch('swath_projector.interpolation.get_projected_perimeter')
+    @patch('swath_projector.memory_map.get_coordinate_variable')
     def test_get_target_area_minimal(
-        self, mock_get_coordinates, mock_get_extents, mock_get_resolution
+        self,
+        mock_get_coordinates,
+        mock_get_perimeter,
+        mock_get_extents,
+        mock_get_resolution,
     ):
         """If the Harmony message does not define a target area, then that
         information should be derived from the coordinate variables
@@ -1082,9 +2195,10 @@ class TestInterpolation(TestCase):
         directory.
 
         """
-        latitudes = 'lats'
-        longitudes = 'lons'
+        latitudes = Mock(shape=(3, 4))
+        longitudes = Mock(shape=(3, 4))
         mock_get_coordinates.side_effect = [latitudes, longitudes]
+        mock_get_perimeter.return_value = 'perimeter'
         mock_get_extents.return_value = (-20, 20, 0, 40)
         mock_get_resolution.return_value = 2.0
 
@@ -1107,29 +2221,71 @@ class TestInterpolation(TestCase):
         mock_get_coordinates.assert_any_call(
             'coordinate_group', ('/lat', '/lon'), 'lon'
         )
-        mock_get_extents.assert_called_once_with(
-            self.message_parameters['projection'], longitudes, latitudes
-        )
-        mock_get_resolution.assert_called_once_with(
-            self.message_parameters['projection'], longitudes, latitudes
+        mock_get_perimeter.assert_called_once_with(
+            self.message_parameters['projection'], longitudes, latitudes, 1
         )
+        mock_get_extents.assert_called_once_with('perimeter')
+        mock_get_resolution.assert_called_once_with('perimeter', 2)
 
         self.assert_areadefinitions_equal(target_area, expected_target_area)
 
-    @patch('swath_projector.interpolation.get_projected_resolution')
-    @patch('swath_projector.interpolation.get_extents_from_perimeter')
-    @patch('swath_projector.interpolation.get_coordinate_variable')
+    @patch('swath_projector.interpolation.get_resolution_from_perimeter')
+    @patch('swath_projector.interpolation.get_extents_from_projected_perimeter')
+    @patch('swath_projector.interpolation.get_projected_perimeter')
+    @patch('swath_projector.memory_map.get_coordinate_variable')
+    def test_get_target_area_estimated(
+        self,
+        mock_get_coordinates,
+        mock_get_perimeter,
+        mock_get_extents,
+        mock_get_resolution,
+    ):
+        """If a fast estimate of the target area is requested, the extents and
+        resolution should be derived from a subsample of the coordinates.
+
+        """
+        latitudes = Mock(shape=(3, 4))
+        longitudes = Mock(shape=(3, 4))
+        mock_get_coordinates.side_effect = [latitudes, longitudes]
+        mock_get_perimeter.return_value = 'perimeter'
+        mock_get_extents.return_value = (-20, 20, 0, 40)
+        mock_get_resolution.return_value = 2.0
+        message_parameters = {**self.message_parameters, 'estimate_target_area': True}
+
+        target_area = get_target_area(
+            message_parameters, 'coordinate_group', ('/lat', '/lon'), self.logger
+        )
+
+        mock_get_perimeter.assert_called_once_with(
+            message_parameters['projection'],
+            longitudes,
+            latitudes,
+            ESTIMATION_STRIDE,
+        )
+        mock_get_extents.assert_called_once_with('perimeter')
+        mock_get_resolution.assert_called_once_with('perimeter', 2)
+        self.assertTupleEqual(target_area.shape, (20, 20))
+
+    @patch('swath_projector.interpolation.get_resolution_from_perimeter')
+    @patch('swath_projector.interpolation.get_extents_from_projected_perimeter')
+    @patch('swath_projector.interpolation.get_projected_perimeter')
+    @patch('swath_projector.memory_map.get_coordinate_variable')
     def test_get_target_area_extents(
-        self, mock_get_coordinates, mock_get_extents, mock_get_resolution
+        self,
+        mock_get_coordinates,
+        mock_get_perimeter,
+        mock_get_extents,
+        mock_get_resolution,
     ):
         """If the Harmony message defines the target area extents, these
         should be used, with the dimensions and resolution of the output
         being defined by the coordinate data from the variable.
 
         """
-        latitudes = 'lats'
-        longitudes = 'lons'
+        latitudes = Mock(shape=(3, 4))
+        longitudes = Mock(shape=(3, 4))
         mock_get_coordinates.side_effect = [latitudes, longitudes]
+        mock_get_perimeter.return_value = 'perimeter'
         mock_get_extents.return_value = (-20, 20, 0, 40)
         mock_get_resolution.return_value = 2.0
 
@@ -1158,18 +2314,24 @@ class TestInterpolation(TestCase):
         mock_get_coordinates.assert_any_call(
             'coordinate_group', ('/lat', '/lon'), 'lon'
         )
-        mock_get_extents.assert_not_called()
-        mock_get_resolution.assert_called_once_with(
-            self.message_parameters['projection'], longitudes, latitudes
+        mock_get_perimeter.assert_called_once_with(
+            self.message_parameters['projection'], longitudes, latitudes, 1
         )
+        mock_get_extents.assert_not_called()
+        mock_get_resolution.assert_called_once_with('perimeter', 2)
 
         self.assert_areadefinitions_equal(target_area, expected_target_area)
 
-    @patch('swath_projector.interpolation.get_projected_resolution')
-    @patch('swath_projector.interpolation.get_extents_from_perimeter')
-    @patch('swath_projector.interpolation.get_coordinate_variable')
+    @patch('swath_projector.interpolation.get_resolution_from_perimeter')
+    @patch('swath_projector.interpolation.get_extents_from_projected_perimeter')
+    @patch('swath_projector.interpolation.get_projected_perimeter')
+    @patch('swath_projector.memory_map.get_coordinate_variable')
     def test_get_target_area_extents_resolutions(
-        self, mock_get_coordinates, mock_get_extents, mock_get_resolution
+        self,
+        mock_get_coordinates,
+        mock_get_perimeter,
+        mock_get_extents,
+        mock_get_resolution,
     ):
         """If the Harmony message defines the target area extents and
         resolutions, these should be used for the target area definition.
@@ -1178,9 +2340,10 @@ class TestInterpolation(TestCase):
         instantiated.
 
         """
-        latitudes = 'lats'
-        longitudes = 'lons'
+        latitudes = Mock(shape=(3, 4))
+        longitudes = Mock(shape=(3, 4))
         mock_get_coordinates.side_effect = [latitudes, longitudes]
+        mock_get_perimeter.return_value = 'perimeter'
         mock_get_extents.return_value = (-20, 20, 0, 40)
         mock_get_resolution.return_value = 2.0
 
@@ -1211,16 +2374,22 @@ class TestInterpolation(TestCase):
         mock_get_coordinates.assert_any_call(
             'coordinate_group', ('/lat', '/lon'), 'lon'
         )
+        mock_get_perimeter.assert_not_called()
         mock_get_extents.assert_not_called()
         mock_get_resolution.assert_not_called()
 
         self.assert_areadefinitions_equal(target_area, expected_target_area)
 
-    @patch('swath_projector.interpolation.get_projected_resolution')
-    @patch('swath_projector.interpolation.get_extents_from_perimeter')
-    @patch('swath_projector.interpolation.get_coordinate_variable')
+    @patch('swath_projector.interpolation.get_resolution_from_perimeter')
+    @patch('swath_projector.interpolation.get_extents_from_projected_perimeter')
+    @patch('swath_projector.interpolation.get_projected_perimeter')
+    @patch('swath_projector.memory_map.get_coordinate_variable')
     def test_get_target_area_extents_dimensions(
-        self, mock_get_coordinates, mock_get_extents, mock_get_resolution
+        self,
+        mock_get_coordinates,
+        mock_get_perimeter,
+        mock_get_extents,
+        mock_get_resolution,
     ):
         """If the Harmony message defines the target area extents and
         dimensions, these should be used for the target area definition.
@@ -1229,9 +2398,10 @@ class TestInterpolation(TestCase):
         instantiated.
 
         """
-        latitudes = 'lats'
-        longitudes = 'lons'
+        latitudes = Mock(shape=(3, 4))
+        longitudes = Mock(shape=(3, 4))
         mock_get_coordinates.side_effect = [latitudes, longitudes]
+        mock_get_perimeter.return_value = 'perimeter'
         mock_get_extents.return_value = (-20, 20, 0, 40)
         mock_get_resolution.return_value = 2.0
 
@@ -1261,25 +2431,32 @@ class TestInterpolation(TestCase):
         mock_get_coordinates.assert_any_call(
             'coordinate_group', ('/lat', '/lon'), 'lon'
         )
+        mock_get_perimeter.assert_not_called()
         mock_get_extents.assert_not_called()
         mock_get_resolution.assert_not_called()
 
         self.assert_areadefinitions_equal(target_area, expected_target_area)
 
-    @patch('swath_projector.interpolation.get_projected_resolution')
-    @patch('swath_projector.interpolation.get_extents_from_perimeter')
-    @patch('swath_projector.interpolation.get_coordinate_variable')
+    @patch('swath_projector.interpolation.get_resolution_from_perimeter')
+    @patch('swath_projector.interpolation.get_extents_from_projected_perimeter')
+    @patch('swath_projector.interpolation.get_projected_perimeter')
+    @patch('swath_projector.memory_map.get_coordinate_variable')
     def test_get_target_area_dimensions(
-        self, mock_get_coordinates, mock_get_extents, mock_get_resolution
+        self,
+        mock_get_coordinates,
+        mock_get_perimeter,
+        mock_get_extents,
+        mock_get_resolution,
     ):
         """If the Harmony message defines the target area dimensions, then
         that information should be used, along with the extents as
         defined by the variables associated coordinates.
 
         """
-        latitudes = 'lats'
-        longitudes = 'lons'
+        latitudes = Mock(shape=(3, 4))
+        longitudes = Mock(shape=(3, 4))
         mock_get_coordinates.side_effect = [latitudes, longitudes]
+        mock_get_perimeter.return_value = 'perimeter'
         mock_get_extents.return_value = (-20, 20, 0, 40)
         mock_get_resolution.return_value = 4.0
 
@@ -1305,27 +2482,34 @@ class TestInterpolation(TestCase):
         mock_get_coordinates.assert_any_call(
             'coordinate_group', ('/lat', '/lon'), 'lon'
         )
-        mock_get_extents.assert_called_once_with(
-            message_parameters['projection'], longitudes, latitudes
+        mock_get_perimeter.assert_called_once_with(
+            message_parameters['projection'], longitudes, latitudes, 1
         )
+        mock_get_extents.assert_called_once_with('perimeter')
         mock_get_resolution.assert_not_called()
 
         self.assert_areadefinitions_equal(target_area, expected_target_area)
 
-    @patch('swath_projector.interpolation.get_projected_resolution')
-    @patch('swath_projector.interpolation.get_extents_from_perimeter')
-    @patch('swath_projector.interpolation.get_coordinate_variable')
+    @patch('swath_projector.interpolation.get_resolution_from_perimeter')
+    @patch('swath_projector.interpolation.get_extents_from_projected_perimeter')
+    @patch('swath_projector.interpolation.get_projected_perimeter')
+    @patch('swath_projector.memory_map.get_coordinate_variable')
     def test_get_target_area_resolutions(
-        self, mock_get_coordinates, mock_get_extents, mock_get_resolution
+        self,
+        mock_get_coordinates,
+        mock_get_perimeter,
+        mock_get_extents,
+        mock_get_resolution,
     ):
         """If the Harmony message defines the target area resolutions, then
         that information should be used, along with the extents as
         defined by the variables associated coordinates.
 
         """
-        latitudes = 'lats'
-        longitudes = 'lons'
+        latitudes = Mock(shape=(3, 4))
+        longitudes = Mock(shape=(3, 4))
         mock_get_coordinates.side_effect = [latitudes, longitudes]
+        mock_get_perimeter.return_value = 'perimeter'
         mock_get_extents.return_value = (-20, 20, 0, 40)
         mock_get_resolution.return_value = 2.0
 
@@ -1352,9 +2536,10 @@ class TestInterpolation(TestCase):
         mock_get_coordinates.assert_any_call(
             'coordinate_group', ('/lat', '/lon'), 'lon'
         )
-        mock_get_extents.assert_called_once_with(
-            message_parameters['projection'], longitudes, latitudes
+        mock_get_perimeter.assert_called_once_with(
+            message_parameters['projection'], longitudes, latitudes, 1
         )
+        mock_get_extents.assert_called_once_with('perimeter')
         mock_get_resolution.assert_not_called()
 
         self.assert_areadefinitions_equal(target_area, expected_target_area)
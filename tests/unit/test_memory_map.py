@@ -0,0 +1,190 @@
+from os.path import exists, join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+from netCDF4 import Dataset
+
+from swath_projector.memory_map import (
+    MEMORY_MAP_DIRECTORY,
+    get_coordinate_arrays,
+    get_memory_mapped_array,
+    get_memory_maps,
+    should_memory_map,
+    write_memory_mapped_array,
+)
+from swath_projector.utilities import get_variable_values
+
+
+class TestMemoryMap(TestCase):
+    """A test class for the functions that copy coordinate and science
+    variables to memory-mapped arrays in the workspace.
+
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.coordinates = ('/lat', '/lon')
+
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+        self.memory_map_directory = join(self.temp_dir, MEMORY_MAP_DIRECTORY)
+        self.dataset = Dataset('tests/data/africa.nc')
+
+    def tearDown(self):
+        self.dataset.close()
+        rmtree(self.temp_dir)
+
+    def test_get_memory_maps(self):
+        """Ensure memory-mapping is disabled by a zero threshold, and that
+        otherwise the configuration refers to a subdirectory of the
+        workspace.
+
+        """
+        self.assertIsNone(get_memory_maps(self.temp_dir, 0))
+        self.assertDictEqual(
+            get_memory_maps(self.temp_dir, 1024),
+            {
+                'directory': self.memory_map_directory,
+                'threshold': 1024,
+                'coordinates': {},
+            },
+        )
+
+    def test_should_memory_map(self):
+        """Ensure only multi-dimensional variables with an uncompressed size
+        of at least the threshold are memory-mapped, and only when
+        memory-mapping is enabled.
+
+        """
+        latitudes = self.dataset['/lat']
+        size = latitudes.size * latitudes.dtype.itemsize
+
+        test_args = [
+            ['Disabled', latitudes, None, False],
+            ['Equal to threshold', latitudes, size, True],
+            ['Smaller than threshold', latitudes, size + 1, False],
+            ['One-dimensional', self.dataset['/time'], 1, False],
+        ]
+
+        for description, variable, threshold, expected_result in test_args:
+            with self.subTest(description):
+                memory_maps = (
+                    None
+                    if threshold is None
+                    else get_memory_maps(self.temp_dir, threshold)
+                )
+                self.assertEqual(
+                    should_memory_map(variable, memory_maps), expected_result
+                )
+
+    def test_get_coordinate_arrays(self):
+        """Ensure coordinates below the threshold are returned as variables
+        from the input granule, and otherwise as masked, memory-mapped arrays
+        of 64-bit values that are retained for subsequent requests.
+
+        """
+        with self.subTest('Memory-mapping disabled'):
+            longitudes, latitudes = get_coordinate_arrays(
+                self.dataset, self.coordinates, None
+            )
+            self.assertIs(longitudes, self.dataset['/lon'])
+            self.assertIs(latitudes, self.dataset['/lat'])
+
+        with self.subTest('Memory-mapped coordinates'):
+            memory_maps = get_memory_maps(self.temp_dir, 1)
+            longitudes, latitudes = get_coordinate_arrays(
+                self.dataset, self.coordinates, memory_maps
+            )
+
+            self.assertIsInstance(longitudes, np.ma.MaskedArray)
+            self.assertIsInstance(np.ma.getdata(longitudes), np.memmap)
+            self.assertEqual(longitudes.dtype, np.float64)
+            self.assertEqual(latitudes.dtype, np.float64)
+            np.testing.assert_array_equal(longitudes, self.dataset['/lon'][:])
+            np.testing.assert_array_equal(latitudes, self.dataset['/lat'][:])
+            self.assertTrue(exists(join(self.memory_map_directory, 'lon.npy')))
+            self.assertTrue(exists(join(self.memory_map_directory, 'lat.npy')))
+
+        with self.subTest('Retained coordinates are not copied again'):
+            with patch(
+                'swath_projector.memory_map.get_memory_mapped_array'
+            ) as mock_get_memory_mapped_array:
+                retained_longitudes, retained_latitudes = get_coordinate_arrays(
+                    self.dataset, self.coordinates, memory_maps
+                )
+
+            mock_get_memory_mapped_array.assert_not_called()
+            self.assertIs(retained_longitudes, longitudes)
+            self.assertIs(retained_latitudes, latitudes)
+
+    def test_get_memory_mapped_array(self):
+        """Ensure the memory-mapped values match those read into memory, and
+        that an existing file in the workspace is not written again.
+
+        """
+        variable = self.dataset['/red_var']
+
+        with self.subTest('Variable with a time dimension'):
+            memory_mapped_values = get_memory_mapped_array(
+                self.dataset, variable, self.memory_map_directory, 0
+            )
+
+            self.assertIsInstance(memory_mapped_values, np.memmap)
+            np.testing.assert_array_equal(
+                memory_mapped_values,
+                get_variable_values(self.dataset, variable, 0),
+            )
+
+        with self.subTest('Existing file is reused'):
+            with patch(
+                'swath_projector.memory_map.write_memory_mapped_array'
+            ) as mock_write_memory_mapped_array:
+                reused_values = get_memory_mapped_array(
+                    self.dataset, variable, self.memory_map_directory, 0
+                )
+
+            mock_write_memory_mapped_array.assert_not_called()
+            np.testing.assert_array_equal(reused_values, memory_mapped_values)
+
+    @patch('swath_projector.memory_map.MEMORY_MAP_BLOCK_SIZE', 3)
+    def test_write_memory_mapped_array(self):
+        """Ensure variables are copied in blocks of rows, with masked pixels
+        set to the fill value. Integer variables filled with NaN should be
+        stored as floating point values, unless a data type is specified. No
+        partially written file should remain.
+
+        """
+        input_path = join(self.temp_dir, 'input.nc')
+        values = np.ma.masked_array(
+            np.arange(12).reshape(4, 3), mask=np.arange(12).reshape(4, 3) == 4
+        )
+
+        with Dataset(input_path, 'w') as dataset:
+            dataset.createDimension('y', size=4)
+            dataset.createDimension('x', size=3)
+            variable = dataset.createVariable(
+                'integers', np.int16, ('y', 'x'), fill_value=-1
+            )
+            variable[:] = values
+
+        with Dataset(input_path) as dataset:
+            for description, fill_value, dtype, expected_dtype in [
+                ('Integer fill value', -1, None, np.int16),
+                ('NaN fill value', np.nan, None, np.float32),
+                ('Specified data type', np.nan, np.float64, np.float64),
+            ]:
+                with self.subTest(description):
+                    file_path = join(self.temp_dir, f'{description}.npy')
+                    write_memory_mapped_array(
+                        dataset, dataset['integers'], file_path, fill_value, dtype
+                    )
+
+                    written_values = np.load(file_path)
+                    self.assertEqual(written_values.dtype, expected_dtype)
+                    np.testing.assert_array_equal(
+                        written_values, values.astype(expected_dtype).filled(fill_value)
+                    )
+                    self.assertFalse(exists(f'{file_path}.partial'))
@@ -0,0 +1,208 @@
+from logging import getLogger
+from os import listdir, makedirs
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+from unittest.mock import Mock
+
+import numpy as np
+from netCDF4 import Dataset
+from pyresample.geometry import AreaDefinition
+
+from swath_projector.mosaic import (
+    MosaicAggregator,
+    get_composite_values,
+    get_gridded_variables,
+)
+from swath_projector.nc_single_band import HARMONY_TARGET, write_single_band_output
+from swath_projector.utilities import get_variable_file_path
+
+
+class TestMosaic(TestCase):
+    """A test class for the aggregator that composites the reprojected
+    variables of several granules into a single mosaic.
+
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = getLogger('test')
+        cls.fill_value = -9999.0
+        # Each granule has one valid pixel that is unique to that granule, and
+        # both granules have a valid pixel at (0, 0).
+        cls.granule_values = [
+            np.array([[1.0, 5.0], [-9999.0, -9999.0]]),
+            np.array([[3.0, -9999.0], [2.0, -9999.0]]),
+        ]
+        cls.target_area = AreaDefinition.from_extent(
+            'lat, lon', '+proj=longlat', (2, 2), (0, 0, 2, 2)
+        )
+
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.temp_dir)
+
+    def create_granules(self, directory_name):
+        """Create an input file and single band outputs for each granule. The
+        `/nested/data` variable is only in the second granule.
+
+        """
+        granules = []
+
+        for granule_index, values in enumerate(self.granule_values):
+            input_file = join(self.temp_dir, f'granule_{granule_index}.nc')
+            single_band_directory = join(
+                self.temp_dir, directory_name, f'granule_{granule_index}'
+            )
+            makedirs(single_band_directory)
+            science_variables = ['/data', '/nested/data'][: granule_index + 1]
+
+            with Dataset(input_file, 'w') as dataset:
+                dataset.setncattr('granule_index', granule_index)
+                dataset.createDimension('along_track', size=2)
+                dataset.createDimension('across_track', size=2)
+                scalar = dataset.createVariable('scalar', np.int32)
+                scalar.assignValue(granule_index)
+
+                for variable_path in science_variables:
+                    variable = dataset.createVariable(
+                        variable_path,
+                        np.float64,
+                        ('along_track', 'across_track'),
+                        fill_value=self.fill_value,
+                    )
+                    variable.setncattr('units', 'K')
+
+            for variable_path in science_variables:
+                write_single_band_output(
+                    self.target_area,
+                    np.ma.masked_equal(values, self.fill_value),
+                    variable_path,
+                    get_variable_file_path(single_band_directory, variable_path, '.nc'),
+                    {HARMONY_TARGET: {'target_area': self.target_area}},
+                    {'_FillValue': self.fill_value},
+                )
+
+            granules.append((input_file, single_band_directory, science_variables))
+
+        return granules
+
+    def create_mosaic(self, compositing_rule):
+        """Add all granules to a mosaic aggregator, and return the path of the
+        mosaic output.
+
+        """
+        granules = self.create_granules(compositing_rule)
+
+        with MosaicAggregator(
+            join(self.temp_dir, f'mosaic_{compositing_rule}'),
+            compositing_rule,
+            self.logger,
+        ) as aggregator:
+            for input_file, single_band_directory, science_variables in granules:
+                aggregator.add_granule(
+                    {'input_file': input_file, 'granule_url': input_file},
+                    single_band_directory,
+                    science_variables,
+                    {'/scalar'},
+                    Mock(),
+                )
+
+                # Single band outputs are removed once added to the mosaic.
+                self.assertListEqual(listdir(single_band_directory), [])
+
+        return aggregator.output_file
+
+    def test_mosaic_aggregator(self):
+        """Ensure the mosaic retains the global attributes and metadata
+        variables of the first granule, while each science variable is
+        composited from all granules containing it. Variables that are not
+        in the first granule are still included.
+
+        """
+        output_file = self.create_mosaic('latest')
+        self.assertEqual(output_file, join(self.temp_dir, 'mosaic_latest.nc'))
+
+        with Dataset(output_file) as mosaic:
+            self.assertEqual(mosaic.granule_index, 0)
+            self.assertEqual(mosaic['scalar'][:], 0)
+            np.testing.assert_array_equal(mosaic['lon'][:], [0.5, 1.5])
+            self.assertEqual(mosaic['/data'].units, 'K')
+            self.assertEqual(mosaic['/data'].grid_mapping, 'latitude_longitude')
+
+            np.testing.assert_array_equal(
+                mosaic['/data'][:].filled(), [[3.0, 5.0], [2.0, -9999.0]]
+            )
+            np.testing.assert_array_equal(
+                mosaic['/nested/data'][:].filled(), self.granule_values[1]
+            )
+
+    def test_compositing_rules(self):
+        """Ensure each compositing rule combines the valid pixels of all
+        granules as expected, and pixels without valid data in any granule
+        remain masked.
+
+        """
+        test_args = [
+            ['latest', [[3.0, 5.0], [2.0, -9999.0]]],
+            ['first', [[1.0, 5.0], [2.0, -9999.0]]],
+            ['mean', [[2.0, 5.0], [2.0, -9999.0]]],
+            ['min', [[1.0, 5.0], [2.0, -9999.0]]],
+            ['max', [[3.0, 5.0], [2.0, -9999.0]]],
+        ]
+
+        for compositing_rule, expected_values in test_args:
+            with self.subTest(compositing_rule):
+                with Dataset(self.create_mosaic(compositing_rule)) as mosaic:
+                    np.testing.assert_array_equal(
+                        mosaic['/data'][:].filled(), expected_values
+                    )
+
+    def test_get_composite_values(self):
+        """Ensure the values of a granule are combined with the composite of
+        the previous granules, or copied if there is no composite yet. For
+        the mean, the composite is the sum of the valid values.
+
+        """
+        first_values, second_values = (
+            np.ma.masked_equal(values, self.fill_value)
+            for values in self.granule_values
+        )
+
+        with self.subTest('No previous composite'):
+            composite = get_composite_values(None, first_values, 'latest')
+            np.testing.assert_array_equal(composite, first_values)
+            self.assertIsNot(composite, first_values)
+
+        test_args = [
+            ['latest', [[3.0, 5.0], [2.0, 0.0]]],
+            ['first', [[1.0, 5.0], [2.0, 0.0]]],
+            ['mean', [[4.0, 5.0], [2.0, 0.0]]],
+            ['min', [[1.0, 5.0], [2.0, 0.0]]],
+            ['max', [[3.0, 5.0], [2.0, 0.0]]],
+        ]
+
+        for compositing_rule, expected_values in test_args:
+            with self.subTest(compositing_rule):
+                composite = get_composite_values(
+                    get_composite_values(None, first_values, compositing_rule),
+                    second_values,
+                    compositing_rule,
+                )
+                np.testing.assert_array_equal(
+                    np.ma.getmaskarray(composite), [[False, False], [False, True]]
+                )
+                np.testing.assert_array_equal(composite.filled(0.0), expected_values)
+
+    def test_get_gridded_variables(self):
+        """Ensure only variables with a grid mapping and at least two
+        dimensions are identified, including those in nested groups.
+
+        """
+        with Dataset(self.create_mosaic('latest')) as dataset:
+            self.assertListEqual(
+                get_gridded_variables(dataset), ['/data', '/nested/data']
+            )
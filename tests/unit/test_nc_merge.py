@@ -1,24 +1,33 @@
 import json
 import logging
 import os
-from datetime import datetime
+from datetime import datetime, timezone
+from shutil import rmtree
+from tempfile import mkdtemp
 from unittest import TestCase
 from unittest.mock import Mock, patch
 
+import numpy as np
 from netCDF4 import Dataset
+from pyresample.geometry import AreaDefinition
 from varinfo import VarInfoFromNetCDF4
 
 from swath_projector.exceptions import MissingReprojectedDataError
 from swath_projector.nc_merge import (
+    TIME_STACK_UNITS,
+    TimeStackAggregator,
     check_coor_valid,
     create_history_record,
     create_output,
     get_fill_value_from_attributes,
     get_science_variable_attributes,
     get_science_variable_dimensions,
+    get_time_series_chunk_sizes,
     read_attrs,
 )
+from swath_projector.nc_single_band import HARMONY_TARGET, write_single_band_output
 from swath_projector.reproject import CF_CONFIG_FILE
+from swath_projector.utilities import get_variable_file_path
 
 
 class TestNCMerge(TestCase):
@@ -186,6 +195,49 @@ class TestNCMerge(TestCase):
         output_data_type = out_dataset[test_variable].datatype
         self.assertEqual(input_data_type, output_data_type, 'Should be equal')
 
+    @patch.dict(os.environ, {'SWATH_PROJECTOR_COMPRESSION_THREADS': '3'})
+    def test_compression_threads(self):
+        """When chunks are compressed in a thread pool, the output science
+        variables should contain the same values and attributes as when the
+        chunks are compressed by the HDF5 library.
+
+        """
+        temp_dir = mkdtemp()
+        threaded_output_file = os.path.join(temp_dir, 'threaded.nc')
+
+        create_output(
+            self.properties,
+            threaded_output_file,
+            self.tmp_dir,
+            self.science_variables,
+            self.metadata_variables,
+            self.logger,
+            self.var_info,
+        )
+
+        with (
+            Dataset(self.output_file) as serial_dataset,
+            Dataset(threaded_output_file) as threaded_dataset,
+        ):
+            for variable_name in self.science_variables:
+                with self.subTest(variable_name):
+                    serial_variable = serial_dataset[variable_name]
+                    threaded_variable = threaded_dataset[variable_name]
+                    serial_variable.set_auto_maskandscale(False)
+                    threaded_variable.set_auto_maskandscale(False)
+
+                    np.testing.assert_array_equal(
+                        threaded_variable[:], serial_variable[:]
+                    )
+                    self.assertDictEqual(
+                        threaded_variable.__dict__, serial_variable.__dict__
+                    )
+                    self.assertDictEqual(
+                        threaded_variable.filters(), serial_variable.filters()
+                    )
+
+        rmtree(temp_dir)
+
     def test_missing_file_raises_error(self):
         """If a science variable should be included in the output, but there
         is no associated output file, an exception should be raised.
@@ -393,3 +445,209 @@ class TestNCMerge(TestCase):
                 create_history_record(list_history, request_parameters),
                 expected_output_with_history,
             )
+
+
+class TestTimeStackAggregator(TestCase):
+    """A test class for the aggregator that stacks the reprojected variables
+    of several granules along a `time` dimension.
+
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = logging.getLogger('nc_merge test')
+        cls.fill_value = -9999.0
+        cls.granule_values = [
+            np.array([[1.0, 2.0], [-9999.0, -9999.0]]),
+            np.array([[3.0, -9999.0], [4.0, -9999.0]]),
+        ]
+        cls.granule_times = [
+            datetime(2020, 1, 1, tzinfo=timezone.utc),
+            datetime(2020, 1, 2, tzinfo=timezone.utc),
+        ]
+        cls.target_area = AreaDefinition.from_extent(
+            'lat, lon', '+proj=longlat', (2, 2), (0, 0, 2, 2)
+        )
+
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.temp_dir)
+
+    def create_granules(self, directory_name, time_units=None):
+        """Create an input file and single band outputs for each granule. If
+        time units are specified, each input has a single `time` value, in
+        those units, and a `time`-dependent metadata variable. The
+        `/nested/data` variable is only in the second granule.
+
+        """
+        granules = []
+
+        for granule_index, values in enumerate(self.granule_values):
+            input_file = os.path.join(self.temp_dir, f'granule_{granule_index}.nc')
+            single_band_directory = os.path.join(
+                self.temp_dir, directory_name, f'granule_{granule_index}'
+            )
+            os.makedirs(single_band_directory)
+            science_variables = ['/data', '/nested/data'][: granule_index + 1]
+            metadata_variables = {'/scalar'}
+
+            with Dataset(input_file, 'w') as dataset:
+                dataset.setncattr('granule_index', granule_index)
+                dataset.createDimension('along_track', size=2)
+                dataset.createDimension('across_track', size=2)
+                dimensions = ('along_track', 'across_track')
+                scalar = dataset.createVariable('scalar', np.int32)
+                scalar.assignValue(granule_index)
+
+                if time_units is not None:
+                    dataset.createDimension('time', size=1)
+                    time_variable = dataset.createVariable(
+                        'time', np.float64, ('time',)
+                    )
+                    time_variable.setncattr('units', time_units[granule_index])
+                    time_variable[:] = [0.0]
+                    orbit = dataset.createVariable('orbit', np.int32, ('time',))
+                    orbit[:] = [granule_index + 10]
+                    dimensions = ('time',) + dimensions
+                    metadata_variables.update({'/time', '/orbit'})
+
+                for variable_path in science_variables:
+                    dataset.createVariable(
+                        variable_path,
+                        np.float64,
+                        dimensions,
+                        fill_value=self.fill_value,
+                    )
+
+            for variable_path in science_variables:
+                write_single_band_output(
+                    self.target_area,
+                    np.ma.masked_equal(values, self.fill_value),
+                    variable_path,
+                    get_variable_file_path(single_band_directory, variable_path, '.nc'),
+                    {HARMONY_TARGET: {'target_area': self.target_area}},
+                    {'_FillValue': self.fill_value},
+                )
+
+            granules.append(
+                (
+                    input_file,
+                    single_band_directory,
+                    science_variables,
+                    metadata_variables,
+                )
+            )
+
+        return granules
+
+    def create_time_stack(self, directory_name, granule_times, time_units=None):
+        """Add all granules to a time stack aggregator, and return the path of
+        the time-stacked output.
+
+        """
+        with TimeStackAggregator(
+            os.path.join(self.temp_dir, f'stacked_{directory_name}'),
+            granule_times,
+            self.logger,
+        ) as aggregator:
+            for (
+                input_file,
+                single_band_directory,
+                science_variables,
+                metadata_variables,
+            ) in self.create_granules(directory_name, time_units):
+                aggregator.add_granule(
+                    {'input_file': input_file, 'granule_url': input_file},
+                    single_band_directory,
+                    science_variables,
+                    metadata_variables,
+                    Mock(),
+                )
+
+                # Single band outputs are removed once added to the stack.
+                self.assertListEqual(os.listdir(single_band_directory), [])
+
+        return aggregator.output_file
+
+    def test_time_stack_aggregator(self):
+        """Ensure each granule is written to its own `time` slice of every
+        science variable, while global attributes and metadata variables
+        are copied from the first granule. Time values should be derived
+        from the granule start times, unless the granules have a `time`
+        variable. Slices of granules without a variable should be filled.
+
+        """
+        expected_values = np.ma.masked_equal(
+            np.stack(self.granule_values), self.fill_value
+        )
+
+        with self.subTest('Time derived from granule start times'):
+            output_file = self.create_time_stack('start', self.granule_times)
+
+            with Dataset(output_file) as stacked:
+                self.assertEqual(stacked.granule_index, 0)
+                self.assertEqual(stacked['scalar'][:], 0)
+                np.testing.assert_array_equal(stacked['lon'][:], [0.5, 1.5])
+                self.assertEqual(stacked['time'].units, TIME_STACK_UNITS)
+                np.testing.assert_array_equal(
+                    stacked['time'][:], [1577836800.0, 1577923200.0]
+                )
+                self.assertTupleEqual(
+                    stacked['/data'].dimensions, ('time', 'lat', 'lon')
+                )
+                self.assertListEqual(stacked['/data'].chunking(), [2, 2, 2])
+                np.testing.assert_array_equal(
+                    stacked['/data'][:].filled(), expected_values.filled()
+                )
+                np.testing.assert_array_equal(
+                    stacked['/nested/data'][:].filled(),
+                    [np.full((2, 2), self.fill_value), self.granule_values[1]],
+                )
+
+        with self.subTest('Missing start time is filled'):
+            output_file = self.create_time_stack(
+                'missing', [None, self.granule_times[1]]
+            )
+
+            with Dataset(output_file) as stacked:
+                np.testing.assert_array_equal(
+                    np.ma.getmaskarray(stacked['time'][:]), [True, False]
+                )
+
+        with self.subTest('Time from granules, in first units'):
+            output_file = self.create_time_stack(
+                'units',
+                [None, None],
+                ['days since 2020-01-01', 'days since 2020-01-03'],
+            )
+
+            with Dataset(output_file) as stacked:
+                self.assertEqual(stacked['time'].units, 'days since 2020-01-01')
+                np.testing.assert_array_equal(stacked['time'][:], [0.0, 2.0])
+                np.testing.assert_array_equal(stacked['orbit'][:], [10, 11])
+                self.assertTupleEqual(stacked['data'].shape, (2, 2, 2))
+                np.testing.assert_array_equal(
+                    stacked['data'][:].filled(), expected_values.filled()
+                )
+
+    def test_get_time_series_chunk_sizes(self):
+        """Ensure chunks span all time slices, up to the maximum, and the
+        remaining dimensions are limited to the target chunk size.
+
+        """
+        test_args = [
+            ['Time only', (10,), np.float32, (10,)],
+            ['Time and one dimension', (10, 100), np.float32, (10, 100)],
+            ['Small grid', (10, 20, 30), np.float32, (10, 20, 30)],
+            ['Large grid', (10, 2000, 3000), np.float32, (10, 161, 161)],
+            ['Many time slices', (1000, 2000, 3000), np.float64, (512, 16, 16)],
+            ['Extra dimension', (10, 3, 2000, 3000), np.float32, (10, 1, 161, 161)],
+        ]
+
+        for description, shape, dtype, expected_chunk_sizes in test_args:
+            with self.subTest(description):
+                self.assertTupleEqual(
+                    get_time_series_chunk_sizes(shape, dtype), expected_chunk_sizes
+                )
@@ -9,6 +9,7 @@ from pyproj.crs import CRS
 from pyresample.geometry import AreaDefinition
 
 from swath_projector.nc_single_band import (
+    DIMENSION_SUFFIX,
     HARMONY_TARGET,
     write_dimension_variables,
     write_dimensions,
@@ -168,6 +169,31 @@ class TestNCSingleBand(TestCase):
                 self.assertTupleEqual(dimensions, ('lat_2', 'lon_2'))
                 self.assertSetEqual(set(dataset.dimensions.keys()), {'lat_2', 'lon_2'})
 
+        with self.subTest('Additional target, Harmony defined area.'):
+            cache = {
+                HARMONY_TARGET: {'reprojection': 'information'},
+                DIMENSION_SUFFIX: '_target_1',
+            }
+
+            with Dataset('test.nc', 'w', diskless=True) as dataset:
+                dimensions = write_dimensions(dataset, self.non_geographic_area, cache)
+
+                self.assertTupleEqual(dimensions, ('y_target_1', 'x_target_1'))
+
+        with self.subTest('Additional target, multiple target grids.'):
+            cache = {
+                ('first_lat', 'first_lon'): {
+                    'dimensions': ('lat_target_1', 'lon_target_1')
+                },
+                ('lat', 'lon'): {},
+                DIMENSION_SUFFIX: '_target_1',
+            }
+
+            with Dataset('test.nc', 'w', diskless=True) as dataset:
+                dimensions = write_dimensions(dataset, self.area_definition, cache)
+
+                self.assertTupleEqual(dimensions, ('lat_target_1_1', 'lon_target_1_1'))
+
     def test_write_grid_mapping(self):
         """Check that the grid mapping attributes from the target area are
         saved to the metadata of an appropriately named variable.
@@ -281,6 +307,67 @@ class TestNCSingleBand(TestCase):
             # The science variable metadata attributes are correct.
             self.assertDictEqual(dataset['science_name'].__dict__, expected_attributes)
 
+    def test_write_science_variable_entirely_fill(self):
+        """Ensure that an entirely masked science variable is created with the
+        `_FillValue` from the input attributes, but that no values are
+        written, so the variable reads as entirely fill.
+
+        """
+        attributes = {'_FillValue': -9999}
+        fill_data = np.ma.masked_all(self.reprojected_data.shape, dtype=np.int16)
+
+        with Dataset('test.nc', 'w', diskless=True) as dataset:
+            dataset.createDimension('lat', size=2)
+            dataset.createDimension('lon', size=4)
+
+            write_science_variable(
+                dataset,
+                fill_data,
+                'science_name',
+                ('lat', 'lon'),
+                'mapping_name',
+                attributes,
+            )
+
+            self.assertEqual(dataset['science_name'].datatype, np.int16)
+            self.assertDictEqual(
+                dataset['science_name'].__dict__,
+                {'_FillValue': -9999, 'grid_mapping': 'mapping_name'},
+            )
+            self.assertEqual(np.ma.count(dataset['science_name'][:]), 0)
+            np.testing.assert_array_equal(
+                dataset['science_name'][:].data,
+                np.full(self.reprojected_data.shape, -9999),
+            )
+
+    def test_write_science_variable_masked_values(self):
+        """Ensure that a science variable with a `_FillValue` is chunked, and
+        that masked values read as the fill value, while unmasked values
+        are retained.
+
+        """
+        attributes = {'_FillValue': -9999}
+        masked_data = np.ma.masked_equal(self.reprojected_data, 2)
+
+        with Dataset('test.nc', 'w', diskless=True) as dataset:
+            dataset.createDimension('lat', size=2)
+            dataset.createDimension('lon', size=4)
+
+            write_science_variable(
+                dataset,
+                masked_data,
+                'science_name',
+                ('lat', 'lon'),
+                'mapping_name',
+                attributes,
+            )
+
+            self.assertListEqual(dataset['science_name'].chunking(), [2, 4])
+            np.testing.assert_array_equal(
+                dataset['science_name'][:].filled(),
+                np.array([[1, -9999, 3, 4], [5, 6, 7, 8]]),
+            )
+
     def test_write_dimension_variables(self):
         """Ensure that dimension variables that have suffices are successfully
         saved to a `netCDF4.Dataset`, and still include the expected
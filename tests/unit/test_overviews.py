@@ -0,0 +1,161 @@
+from logging import getLogger
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+import numpy as np
+from netCDF4 import Dataset
+
+from swath_projector.overviews import (
+    create_overviews,
+    get_overview_coordinates,
+    get_overview_shape,
+    get_overview_values,
+)
+
+
+class TestOverviews(TestCase):
+    """A test class for the functions that add decimated overview levels of
+    the reprojected science variables to an output file.
+
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = getLogger('test')
+        cls.fill_value = -9999
+        cls.values = np.ma.masked_equal(
+            [
+                [1, 3, 5, -9999, 9],
+                [5, 7, -9999, -9999, 10],
+                [-9999, -9999, 2, 2, 11],
+            ],
+            cls.fill_value,
+        )
+
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+        self.output_file = join(self.temp_dir, 'output.nc')
+
+        with Dataset(self.output_file, 'w') as dataset:
+            dataset.createDimension('time', size=1)
+            dataset.createDimension('lat', size=3)
+            dataset.createDimension('lon', size=5)
+            dataset.createVariable('latitude_longitude', 'S1')
+            lat = dataset.createVariable('lat', np.float64, ('lat',))
+            lat[:] = [2.5, 1.5, 0.5]
+            lat.setncattr('units', 'degrees_north')
+            lon = dataset.createVariable('lon', np.float64, ('lon',))
+            lon[:] = [0.5, 1.5, 2.5, 3.5, 4.5]
+
+            for group in [dataset, dataset.createGroup('nested')]:
+                variable = group.createVariable(
+                    'packed',
+                    np.int16,
+                    ('time', 'lat', 'lon'),
+                    fill_value=self.fill_value,
+                )
+                variable.setncatts(
+                    {'grid_mapping': 'latitude_longitude', 'scale_factor': 0.5}
+                )
+                variable.set_auto_scale(False)
+                variable[0] = self.values
+
+            flags = dataset.createVariable(
+                'flags', np.int16, ('lat', 'lon'), fill_value=self.fill_value
+            )
+            flags.setncatts(
+                {'grid_mapping': 'latitude_longitude', 'flag_values': [1, 2]}
+            )
+            flags[:] = self.values
+
+    def tearDown(self):
+        rmtree(self.temp_dir)
+
+    def test_create_overviews(self):
+        """Ensure a group is added for each overview factor, containing
+        decimated dimension variables, and a decimated copy of each gridded
+        variable with the same attributes. Packed values are averaged without
+        unpacking, and flag variables use nearest resampling.
+
+        """
+        create_overviews(self.output_file, [2, 4], 'average', self.logger)
+
+        with Dataset(self.output_file) as dataset:
+            self.assertSetEqual(
+                set(dataset.groups), {'nested', 'overview_2', 'overview_4'}
+            )
+            self.assertNotIn('overview_2', dataset['nested'].groups)
+
+            overview = dataset['overview_2']
+            self.assertEqual(overview.dimensions['lat'].size, 2)
+            self.assertEqual(overview.dimensions['lon'].size, 3)
+            np.testing.assert_array_equal(overview['lat'][:], [2.0, 0.0])
+            np.testing.assert_array_equal(overview['lon'][:], [1.0, 3.0, 5.0])
+            self.assertEqual(overview['lat'].units, 'degrees_north')
+
+            for variable_path in ['packed', 'nested/packed']:
+                with self.subTest(variable_path):
+                    variable = overview[variable_path]
+                    variable.set_auto_scale(False)
+
+                    self.assertTupleEqual(variable.dimensions, ('time', 'lat', 'lon'))
+                    self.assertEqual(variable.scale_factor, 0.5)
+                    self.assertEqual(variable.grid_mapping, 'latitude_longitude')
+                    np.testing.assert_array_equal(
+                        variable[0].filled(self.fill_value),
+                        [[4, 5, 10], [-9999, 2, 11]],
+                    )
+
+            with self.subTest('Flag variables use nearest resampling'):
+                np.testing.assert_array_equal(
+                    overview['flags'][:].filled(self.fill_value),
+                    [[7, -9999, 10], [-9999, 2, 11]],
+                )
+
+            self.assertTupleEqual(dataset['overview_4/packed'].shape, (1, 1, 2))
+
+    def test_get_overview_values(self):
+        """Ensure values are reduced over blocks of the overview factor, with
+        partial blocks at the edges retained, and blocks without valid
+        pixels masked.
+
+        """
+        test_args = [
+            ['Average', 'average', [[4, 5, 10], [-9999, 2, 11]]],
+            ['Nearest', 'nearest', [[7, -9999, 10], [-9999, 2, 11]]],
+        ]
+
+        for description, resampling, expected_values in test_args:
+            with self.subTest(description):
+                overview_values = get_overview_values(self.values, 2, resampling)
+                self.assertEqual(overview_values.dtype, self.values.dtype)
+                np.testing.assert_array_equal(
+                    overview_values.filled(self.fill_value), expected_values
+                )
+
+        with self.subTest('Floating point values are not rounded'):
+            np.testing.assert_array_equal(
+                get_overview_values(np.array([[1.0, 2.0]]), 2, 'average'), [[1.5]]
+            )
+
+    def test_get_overview_shape(self):
+        """Ensure partial blocks at the edges of the grid are retained."""
+        self.assertTupleEqual(get_overview_shape((3, 5), 2), (2, 3))
+        self.assertTupleEqual(get_overview_shape((8, 8), 4), (2, 2))
+
+    def test_get_overview_coordinates(self):
+        """Ensure the coordinates are the centres of each block, including
+        partial blocks, for both ascending and descending dimensions.
+
+        """
+        np.testing.assert_array_equal(
+            get_overview_coordinates(np.array([0.5, 1.5, 2.5]), 2), [1.0, 3.0]
+        )
+        np.testing.assert_array_equal(
+            get_overview_coordinates(np.array([10.0, 8.0, 6.0, 4.0]), 4), [7.0]
+        )
+        np.testing.assert_array_equal(
+            get_overview_coordinates(np.array([5.0]), 2), [5.0]
+        )
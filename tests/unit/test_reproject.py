@@ -1,10 +1,33 @@
+import re
 from logging import Logger
+from os import listdir
+from os.path import join
+from shutil import copy, rmtree
+from tempfile import mkdtemp
 from unittest import TestCase
+from unittest.mock import Mock
 
+import numpy as np
 from harmony.message import Message
+from netCDF4 import Dataset
 from pyproj import Proj
 
-from swath_projector.reproject import CRS_DEFAULT, get_parameters_from_message, rgetattr
+from swath_projector.reproject import (
+    CRS_DEFAULT,
+    ZARR_MIME_TYPE,
+    get_additional_target_parameters,
+    get_extra_argument,
+    get_output_format,
+    get_overview_factors,
+    get_overview_resampling,
+    get_parameters_from_message,
+    get_projection,
+    get_tile_scheme,
+    message_defines_target_grid,
+    reproject,
+    rgetattr,
+)
+from swath_projector.tiling import TILE_SCHEMES, get_tile_extents
 
 
 class TestReproject(TestCase):
@@ -40,6 +63,13 @@ class TestReproject(TestCase):
             'y_min': None,
             'y_max': None,
             'yres': None,
+            'trim_margins': None,
+            'estimate_target_area': None,
+            'deduplicate_coordinates': None,
+            'output_format': None,
+            'overview_factors': None,
+            'overview_resampling': None,
+            'tile_scheme': None,
         }
 
     def assert_parameters_equal(self, parameters, expected_parameters):
@@ -214,6 +244,598 @@ class TestReproject(TestCase):
         )
         self.assert_parameters_equal(parameters, expected_parameters)
 
+    def test_get_parameters_from_message_trim_margins(self):
+        """Ensure that the optional flag to trim the margins of the target
+        area is retrieved from the `extraArgs` of the Harmony message.
+
+        """
+        test_args = [
+            ['Boolean true', True, True],
+            ['String true', 'True', True],
+            ['Boolean false', False, False],
+            ['String false', 'false', False],
+            ['Other extraArgs only', None, None],
+        ]
+
+        for description, trim_margins, expected_trim_margins in test_args:
+            with self.subTest(description):
+                extra_args = {'otherArgument': 'value'}
+                if trim_margins is not None:
+                    extra_args['trimMargins'] = trim_margins
+
+                message = Message(
+                    {'granules': self.granules, 'format': {}, 'extraArgs': extra_args}
+                )
+                parameters = get_parameters_from_message(
+                    message, self.granule_url, self.granule
+                )
+                self.assertEqual(parameters['trim_margins'], expected_trim_margins)
+
+    def test_get_parameters_from_message_estimate_target_area(self):
+        """Ensure that the optional flag to estimate the target area from a
+        subsample of the coordinates is retrieved from the `extraArgs` of the
+        Harmony message.
+
+        """
+        test_args = [
+            ['Boolean true', True, True],
+            ['String false', 'false', False],
+            ['Other extraArgs only', None, None],
+        ]
+
+        for description, estimate, expected_estimate in test_args:
+            with self.subTest(description):
+                extra_args = {'otherArgument': 'value'}
+                if estimate is not None:
+                    extra_args['estimateTargetArea'] = estimate
+
+                message = Message(
+                    {'granules': self.granules, 'format': {}, 'extraArgs': extra_args}
+                )
+                parameters = get_parameters_from_message(
+                    message, self.granule_url, self.granule
+                )
+                self.assertEqual(parameters['estimate_target_area'], expected_estimate)
+
+    def test_get_extra_argument(self):
+        """Ensure an optional property is retrieved from the `extraArgs` of
+        the Harmony message, whether or not the `Message` class parses
+        `extraArgs` into an attribute, and that `None` is returned if the
+        message has no `extraArgs`, or the property is absent.
+
+        """
+        message = Message(
+            {'format': {}, 'extraArgs': {'trimMargins': True, 'mosaic': None}}
+        )
+        unparsed_message = Mock(
+            spec=['data'], data={'extraArgs': {'trimMargins': True}}
+        )
+
+        test_args = [
+            ['Present', message, 'trimMargins', True],
+            ['Absent', message, 'deduplicateCoordinates', None],
+            ['Null value', message, 'mosaic', None],
+            ['No extraArgs', Message({'format': {}}), 'trimMargins', None],
+            ['Unparsed extraArgs', unparsed_message, 'trimMargins', True],
+            ['No message content', Mock(spec=[]), 'trimMargins', None],
+        ]
+
+        for description, test_message, argument_name, expected_value in test_args:
+            with self.subTest(description):
+                self.assertEqual(
+                    get_extra_argument(test_message, argument_name), expected_value
+                )
+
+    def test_get_output_format(self):
+        """Ensure a Zarr output format is recognised, regardless of case, and
+        that all other formats use the default merged NetCDF-4 output.
+
+        """
+        test_args = [
+            ['Zarr', {'mime': 'application/x-zarr'}, ZARR_MIME_TYPE],
+            ['Zarr, mixed case', {'mime': 'application/x-Zarr'}, ZARR_MIME_TYPE],
+            ['NetCDF-4', {'mime': 'application/x-netcdf4'}, None],
+            ['No format', {}, None],
+        ]
+
+        for description, message_format, expected_output_format in test_args:
+            with self.subTest(description):
+                message = Message({'granules': self.granules, 'format': message_format})
+                self.assertEqual(get_output_format(message), expected_output_format)
+
+    def test_get_overview_factors(self):
+        """Ensure overview factors are parsed from either a list or a string,
+        sorted and deduplicated, and that invalid factors raise an exception.
+
+        """
+        test_args = [
+            ['List', [8, 2, 4], [2, 4, 8]],
+            ['String', '4, 2,4', [2, 4]],
+            ['Single integer', 2, [2]],
+            ['Absent', None, None],
+        ]
+
+        for description, overviews, expected_factors in test_args:
+            with self.subTest(description):
+                extra_args = {'otherArgument': 'value'}
+                if overviews is not None:
+                    extra_args['overviews'] = overviews
+
+                message = Message(
+                    {'granules': self.granules, 'format': {}, 'extraArgs': extra_args}
+                )
+                self.assertEqual(get_overview_factors(message), expected_factors)
+
+        for description, overviews in [['Not integer', 'two'], ['Too small', [1, 2]]]:
+            with self.subTest(description):
+                message = Message(
+                    {
+                        'granules': self.granules,
+                        'format': {},
+                        'extraArgs': {'overviews': overviews},
+                    }
+                )
+
+                with self.assertRaises(Exception):
+                    get_overview_factors(message)
+
+        with self.subTest('Zarr output raises an exception'):
+            message = Message(
+                {
+                    'granules': self.granules,
+                    'format': {'mime': ZARR_MIME_TYPE},
+                    'extraArgs': {'overviews': [2]},
+                }
+            )
+
+            with self.assertRaises(Exception) as context:
+                get_parameters_from_message(message, self.granule_url, self.granule)
+
+            self.assertIn('only available for NetCDF-4', str(context.exception))
+
+    def test_get_overview_resampling(self):
+        """Ensure the overview resampling defaults to averaging, is case
+        insensitive, and that unknown methods raise an exception.
+
+        """
+        test_args = [
+            ['Default', {}, 'average'],
+            ['Nearest', {'overviewResampling': 'Nearest'}, 'nearest'],
+        ]
+
+        for description, extra_args, expected_resampling in test_args:
+            with self.subTest(description):
+                message = Message(
+                    {'granules': self.granules, 'format': {}, 'extraArgs': extra_args}
+                )
+                self.assertEqual(get_overview_resampling(message), expected_resampling)
+
+        with self.subTest('Unknown method'):
+            message = Message(
+                {
+                    'granules': self.granules,
+                    'format': {},
+                    'extraArgs': {'overviewResampling': 'bicubic'},
+                }
+            )
+
+            with self.assertRaises(Exception):
+                get_overview_resampling(message)
+
+    def test_get_additional_target_parameters(self):
+        """Ensure each additional target grid is parsed with the same schema
+        as the message format, using defaults for unspecified properties,
+        and is named by its position in the list.
+
+        """
+        with self.subTest('Two targets'):
+            message = Message(
+                {
+                    'granules': self.granules,
+                    'format': {'crs': 'EPSG:4326', 'interpolation': 'near'},
+                    'extraArgs': {
+                        'targets': [
+                            {
+                                'crs': 'EPSG:3857',
+                                'scaleSize': {'x': 1000, 'y': -1000},
+                            },
+                            {'interpolation': 'bilinear', 'height': 10, 'width': 20},
+                        ]
+                    },
+                }
+            )
+            targets = get_additional_target_parameters(
+                message, self.granule_url, self.granule
+            )
+
+            self.assertEqual(len(targets), 2)
+            self.assertEqual(targets[0]['target_name'], 'target_1')
+            self.assertEqual(targets[0]['crs'], 'EPSG:3857')
+            self.assertEqual(targets[0]['xres'], 1000)
+            self.assertEqual(targets[0]['interpolation'], self.default_interpolation)
+            self.assertEqual(targets[1]['target_name'], 'target_2')
+            self.assertEqual(targets[1]['crs'], CRS_DEFAULT)
+            self.assertEqual(targets[1]['interpolation'], 'bilinear')
+            self.assertEqual(targets[1]['height'], 10)
+
+        with self.subTest('No targets'):
+            message = Message({'granules': self.granules, 'format': {}})
+            self.assertListEqual(
+                get_additional_target_parameters(
+                    message, self.granule_url, self.granule
+                ),
+                [],
+            )
+
+        with self.subTest('Invalid target specification'):
+            message = Message(
+                {
+                    'granules': self.granules,
+                    'format': {},
+                    'extraArgs': {'targets': 'EPSG:3857'},
+                }
+            )
+
+            with self.assertRaises(Exception):
+                get_additional_target_parameters(
+                    message, self.granule_url, self.granule
+                )
+
+        with self.subTest('Invalid target grid'):
+            message = Message(
+                {
+                    'granules': self.granules,
+                    'format': {},
+                    'extraArgs': {'targets': [{'height': 10}]},
+                }
+            )
+
+            with self.assertRaises(Exception) as context:
+                get_additional_target_parameters(
+                    message, self.granule_url, self.granule
+                )
+
+            self.assertIn('Missing', str(context.exception))
+
+    def test_reproject_multiple_targets(self):
+        """Ensure that each additional target grid is written to its own
+        group, with suffixed dimensions and grid mapping in the root group.
+        The values for each target should match those of a request for that
+        target alone.
+
+        """
+        temp_dir = mkdtemp()
+        input_file = join(temp_dir, 'africa.nc')
+        copy(self.granule, input_file)
+        main_format = {
+            'crs': 'EPSG:4326',
+            'interpolation': 'near',
+            'scaleExtent': {'x': {'min': -20, 'max': 60}, 'y': {'min': 10, 'max': 35}},
+            'height': 25,
+            'width': 80,
+        }
+        target_format = {**main_format, 'height': 10, 'width': 40}
+
+        multiple_output = reproject(
+            Message(
+                {
+                    'granules': self.granules,
+                    'format': main_format,
+                    'extraArgs': {'targets': [target_format]},
+                }
+            ),
+            'harmony_example_l2',
+            self.granule_url,
+            input_file,
+            mkdtemp(dir=temp_dir),
+            self.logger,
+        )
+        single_output = reproject(
+            Message({'granules': self.granules, 'format': target_format}),
+            'harmony_example_l2',
+            self.granule_url,
+            input_file,
+            mkdtemp(dir=temp_dir),
+            self.logger,
+        )
+
+        with (
+            Dataset(multiple_output) as multiple_dataset,
+            Dataset(single_output) as single_dataset,
+        ):
+            self.assertTupleEqual(multiple_dataset['red_var'].shape[-2:], (25, 80))
+            self.assertTupleEqual(
+                multiple_dataset['target_1/red_var'].dimensions[-2:],
+                ('lat_target_1', 'lon_target_1'),
+            )
+            self.assertEqual(
+                multiple_dataset['target_1/red_var'].grid_mapping,
+                'latitude_longitude_lat_target_1_lon_target_1',
+            )
+            self.assertIn(
+                'latitude_longitude_lat_target_1_lon_target_1',
+                multiple_dataset.variables,
+            )
+            np.testing.assert_array_equal(
+                multiple_dataset['lat_target_1'][:], single_dataset['lat'][:]
+            )
+
+            for variable_name in ['red_var', 'green_var', 'blue_var', 'alpha_var']:
+                with self.subTest(variable_name):
+                    np.testing.assert_array_equal(
+                        multiple_dataset[f'target_1/{variable_name}'][:],
+                        single_dataset[variable_name][:],
+                    )
+
+        rmtree(temp_dir)
+
+    def test_reproject_with_aggregator(self):
+        """Ensure that, when an aggregator is supplied, the reprojected
+        variables are added to it instead of being merged into a per-granule
+        output file.
+
+        """
+        temp_dir = mkdtemp()
+        output_dir = mkdtemp(dir=temp_dir)
+        input_file = join(temp_dir, 'africa.nc')
+        copy(self.granule, input_file)
+        aggregator = Mock(output_file=join(temp_dir, 'mosaic.nc'))
+
+        output_file = reproject(
+            Message(
+                {
+                    'granules': self.granules,
+                    'format': {
+                        'crs': 'EPSG:4326',
+                        'interpolation': 'near',
+                        'height': 10,
+                        'width': 40,
+                    },
+                }
+            ),
+            'harmony_example_l2',
+            self.granule_url,
+            input_file,
+            output_dir,
+            self.logger,
+            aggregator=aggregator,
+        )
+
+        self.assertEqual(output_file, aggregator.output_file)
+        aggregator.add_granule.assert_called_once()
+        parameters, single_band_dir, science_variables = (
+            aggregator.add_granule.call_args[0][:3]
+        )
+        self.assertEqual(parameters['input_file'], input_file)
+        self.assertEqual(single_band_dir, output_dir)
+        self.assertSetEqual(
+            set(science_variables),
+            {'/red_var', '/green_var', '/blue_var', '/alpha_var'},
+        )
+        self.assertNotIn('africa_repr.nc', listdir(output_dir))
+
+        rmtree(temp_dir)
+
+    def test_get_tile_scheme(self):
+        """Ensure a tiling scheme is recognised, regardless of case, and that
+        the CRS of the tiling scheme replaces that of the message. Tiling
+        schemes cannot be combined with message extents, Zarr output or
+        additional target grids.
+
+        """
+        test_args = [
+            ['MODIS', {'tileScheme': 'modis'}, 'modis'],
+            ['Geographic, mixed case', {'tileScheme': 'Geographic'}, 'geographic'],
+            ['No tiling scheme', {}, None],
+        ]
+
+        for description, extra_args, expected_tile_scheme in test_args:
+            with self.subTest(description):
+                message = Message(
+                    {
+                        'granules': self.granules,
+                        'format': {},
+                        'extraArgs': extra_args,
+                    }
+                )
+                self.assertEqual(get_tile_scheme(message), expected_tile_scheme)
+
+        with self.subTest('Invalid tiling scheme'):
+            message = Message(
+                {
+                    'granules': self.granules,
+                    'format': {},
+                    'extraArgs': {'tileScheme': 'utm'},
+                }
+            )
+
+            with self.assertRaises(Exception):
+                get_tile_scheme(message)
+
+        with self.subTest('Tiling scheme CRS is used'):
+            message = Message(
+                {
+                    'granules': self.granules,
+                    'format': {'crs': 'EPSG:3857'},
+                    'extraArgs': {'tileScheme': 'modis'},
+                }
+            )
+            parameters = get_parameters_from_message(
+                message, self.granule_url, self.granule
+            )
+            self.assertEqual(parameters['tile_scheme'], 'modis')
+            self.assertEqual(parameters['crs'], TILE_SCHEMES['modis']['crs'])
+
+        invalid_formats = [
+            ['Zarr output', {'mime': 'application/x-zarr'}],
+            [
+                'Message extents',
+                {'scaleExtent': {'x': {'min': 0, 'max': 1}, 'y': {'min': 0, 'max': 1}}},
+            ],
+        ]
+
+        for description, message_format in invalid_formats:
+            with self.subTest(description):
+                message = Message(
+                    {
+                        'granules': self.granules,
+                        'format': message_format,
+                        'extraArgs': {'tileScheme': 'geographic'},
+                    }
+                )
+
+                with self.assertRaises(Exception):
+                    get_parameters_from_message(message, self.granule_url, self.granule)
+
+        with self.subTest('Additional target grids'):
+            message = Message(
+                {
+                    'granules': self.granules,
+                    'format': {},
+                    'extraArgs': {
+                        'tileScheme': 'geographic',
+                        'targets': [{'height': 10, 'width': 10}],
+                    },
+                }
+            )
+
+            with self.assertRaises(Exception):
+                get_additional_target_parameters(
+                    message, self.granule_url, self.granule
+                )
+
+    def test_reproject_tile_scheme(self):
+        """Ensure a tiling scheme request writes a file for each tile
+        containing valid pixels in any variable, named after the tile, with
+        the values that a request for the extents of that tile alone would
+        produce.
+
+        """
+        temp_dir = mkdtemp()
+        input_file = join(temp_dir, 'africa.nc')
+        copy(self.granule, input_file)
+        tile_format = {'interpolation': 'near', 'height': 10, 'width': 10}
+        science_variables = ['red_var', 'green_var', 'blue_var', 'alpha_var']
+
+        tile_directory = reproject(
+            Message(
+                {
+                    'granules': self.granules,
+                    'format': tile_format,
+                    'extraArgs': {'tileScheme': 'geographic'},
+                }
+            ),
+            'harmony_example_l2',
+            self.granule_url,
+            input_file,
+            mkdtemp(dir=temp_dir),
+            self.logger,
+        )
+
+        self.assertTrue(tile_directory.endswith('africa_repr_tiles'))
+        tile_files = sorted(listdir(tile_directory))
+        self.assertGreater(len(tile_files), 0)
+
+        for tile_file in tile_files:
+            with self.subTest(tile_file):
+                tile_match = re.match(r'^africa_repr_h(\d{2})v(\d{2})\.nc$', tile_file)
+                self.assertIsNotNone(tile_match)
+                tile_extents = get_tile_extents(
+                    TILE_SCHEMES['geographic'],
+                    int(tile_match.group(1)),
+                    int(tile_match.group(2)),
+                )
+
+                single_output = reproject(
+                    Message(
+                        {
+                            'granules': self.granules,
+                            'format': {
+                                **tile_format,
+                                'crs': 'EPSG:4326',
+                                'scaleExtent': {
+                                    'x': {
+                                        'min': tile_extents['x_min'],
+                                        'max': tile_extents['x_max'],
+                                    },
+                                    'y': {
+                                        'min': tile_extents['y_min'],
+                                        'max': tile_extents['y_max'],
+                                    },
+                                },
+                            },
+                        }
+                    ),
+                    'harmony_example_l2',
+                    self.granule_url,
+                    input_file,
+                    mkdtemp(dir=temp_dir),
+                    self.logger,
+                )
+
+                with (
+                    Dataset(join(tile_directory, tile_file)) as tile_dataset,
+                    Dataset(single_output) as single_dataset,
+                ):
+                    # Tiles are retained if any variable has valid pixels.
+                    self.assertGreater(
+                        sum(
+                            np.ma.count(tile_dataset[variable_name][:])
+                            for variable_name in science_variables
+                        ),
+                        0,
+                    )
+                    np.testing.assert_array_equal(
+                        tile_dataset['lon'][:], single_dataset['lon'][:]
+                    )
+
+                    for variable_name in science_variables:
+                        np.testing.assert_array_equal(
+                            tile_dataset[variable_name][:],
+                            single_dataset[variable_name][:],
+                        )
+
+        rmtree(temp_dir)
+
+    def test_message_defines_target_grid(self):
+        """Ensure the target grid is only considered fully defined if the
+        message includes all extents, and either dimensions or resolutions.
+
+        """
+        extents = {'x': {'min': -20, 'max': 60}, 'y': {'min': 10, 'max': 35}}
+        test_args = [
+            [
+                'Extents and dimensions',
+                {'scaleExtent': extents, 'height': 25, 'width': 80},
+                True,
+            ],
+            [
+                'Extents and resolutions',
+                {'scaleExtent': extents, 'scaleSize': {'x': 1, 'y': 1}},
+                True,
+            ],
+            ['Extents only', {'scaleExtent': extents}, False],
+            ['Dimensions only', {'height': 25, 'width': 80}, False],
+            ['Nothing defined', {}, False],
+        ]
+
+        for description, message_format, expected_result in test_args:
+            with self.subTest(description):
+                message = Message({'granules': self.granules, 'format': message_format})
+                self.assertEqual(message_defines_target_grid(message), expected_result)
+
+    def test_get_projection(self):
+        """Ensure `Proj` objects are cached, so that requests using the same
+        CRS reuse the same object.
+
+        """
+        get_projection.cache_clear()
+        projection = get_projection(CRS_DEFAULT)
+
+        self.assertEqual(projection.srs, Proj(CRS_DEFAULT).srs)
+        self.assertIs(get_projection(CRS_DEFAULT), projection)
+        self.assertIsNot(get_projection('EPSG:6933'), projection)
+
     def test_rgetattr(self):
         """Ensure the utility function to recursively retrieve a class
         attribute will work as expected.
@@ -0,0 +1,185 @@
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from unittest import TestCase
+
+import numpy as np
+from netCDF4 import Dataset
+from pyresample.geometry import AreaDefinition
+
+from swath_projector.interpolation import get_ewa_information, get_swath_definition
+from swath_projector.shared_arrays import (
+    SharedArrayRegistry,
+    attach_shared_array,
+    attached_information,
+    release_information,
+    share_information,
+)
+
+
+def populate_output_buffer(descriptor, row_index):
+    """Write the row index to a row of a shared output buffer. This is run in
+    a worker process, so must be defined at module level.
+
+    """
+    shared_block, output_buffer = attach_shared_array(descriptor)
+    output_buffer[row_index] = row_index
+    del output_buffer
+    shared_block.close()
+
+
+def sum_shared_columns(shared_information):
+    """Return the sum of the shared EWA columns, and the shape of the target
+    area, as seen by a worker process.
+
+    """
+    with attached_information(shared_information) as information:
+        return float(information['columns'].sum()), information['target_area'].shape
+
+
+class TestSharedArrays(TestCase):
+    """A test class for the registry of arrays in shared memory, which are
+    handed to worker processes without pickling.
+
+    """
+
+    def setUp(self):
+        self.registry = SharedArrayRegistry()
+
+    def tearDown(self):
+        self.registry.close()
+
+    def assert_unlinked(self, descriptor):
+        """Ensure a shared memory block no longer exists."""
+        with self.assertRaises(FileNotFoundError):
+            SharedMemory(name=descriptor['name'])
+
+    def test_share(self):
+        """Ensure arrays, including masked arrays, are copied to shared memory
+        and can be attached to without copying.
+
+        """
+        test_args = [
+            ['Array', np.arange(12, dtype=np.float32).reshape(3, 4)],
+            [
+                'Masked array',
+                np.ma.masked_array(np.arange(6), mask=[0, 1, 0, 0, 1, 0]),
+            ],
+        ]
+
+        for description, array in test_args:
+            with self.subTest(description):
+                descriptor = self.registry.share(description, array)
+                shared_block, shared_array = attach_shared_array(descriptor)
+
+                self.assertEqual(shared_array.dtype, array.dtype)
+                np.testing.assert_array_equal(
+                    np.ma.getmaskarray(shared_array), np.ma.getmaskarray(array)
+                )
+                np.testing.assert_array_equal(shared_array, array)
+                self.assertIs(self.registry.get_descriptor(description), descriptor)
+
+                # The attached array views the registered block, so updates
+                # are visible to the registry without copying.
+                np.ma.getdata(shared_array)[0] = 100
+                self.assertEqual(
+                    np.ma.getdata(self.registry.get_array(description)).flat[0], 100
+                )
+
+                del shared_array
+                shared_block.close()
+
+    def test_reference_counting(self):
+        """Ensure an array shared more than once is only copied once, and is
+        only unlinked when all references are released.
+
+        """
+        descriptor = self.registry.share('coordinates', np.ones((2, 2)))
+        self.assertIs(self.registry.share('coordinates', np.zeros((2, 2))), descriptor)
+        np.testing.assert_array_equal(
+            self.registry.get_array('coordinates'), np.ones((2, 2))
+        )
+
+        self.registry.release('coordinates')
+        self.assertIn('coordinates', self.registry)
+
+        self.registry.release('coordinates')
+        self.assertNotIn('coordinates', self.registry)
+        self.assert_unlinked(descriptor)
+
+    def test_close(self):
+        """Ensure all blocks are unlinked when the registry is closed, even if
+        references remain or an exception is raised, and that no further
+        arrays can be registered.
+
+        """
+        with self.assertRaises(RuntimeError):
+            with SharedArrayRegistry() as registry:
+                descriptor = registry.share('values', np.arange(4))
+                registry.acquire('values')
+                raise RuntimeError('Processing failed')
+
+        self.assert_unlinked(descriptor)
+
+        with self.assertRaises(ValueError):
+            registry.share('values', np.arange(4))
+
+    def test_create_output_buffer(self):
+        """Ensure an output buffer is zero-filled, and that values written by
+        worker processes are visible to the parent process.
+
+        """
+        self.registry.create('output', (4, 3), np.float64)
+        descriptor = self.registry.acquire('output')
+        np.testing.assert_array_equal(
+            self.registry.get_array('output'), np.zeros((4, 3))
+        )
+
+        with get_context('fork').Pool(2) as pool:
+            pool.starmap(
+                populate_output_buffer, [(descriptor, row) for row in range(4)]
+            )
+
+        np.testing.assert_array_equal(
+            self.registry.get_array('output'),
+            np.repeat(np.arange(4.0)[:, np.newaxis], 3, axis=1),
+        )
+
+        with self.assertRaises(ValueError):
+            self.registry.create('output', (4, 3), np.float64)
+
+    def test_share_information(self):
+        """Ensure the arrays of reprojection information are shared, while
+        other values are retained, and that the information is restored in
+        a worker process. Releasing the information should unlink the
+        arrays.
+
+        """
+        target_area = AreaDefinition.from_extent(
+            'target', '+proj=longlat', (25, 80), (-20, 10, 60, 35)
+        )
+
+        with Dataset('tests/data/africa.nc') as dataset:
+            ewa_information = get_ewa_information(
+                {'swath_definition': get_swath_definition(dataset, ('/lat', '/lon'))},
+                target_area,
+            )
+
+        shared_information = share_information(
+            self.registry, 'lat_lon', ewa_information
+        )
+
+        self.assertIs(shared_information['target_area'], target_area)
+        self.assertIn('lat_lon/columns', self.registry)
+        self.assertIn('lat_lon/rows', self.registry)
+
+        with get_context('fork').Pool(1) as pool:
+            columns_sum, target_shape = pool.apply(
+                sum_shared_columns, (shared_information,)
+            )
+
+        self.assertEqual(columns_sum, float(ewa_information['columns'].sum()))
+        self.assertTupleEqual(target_shape, target_area.shape)
+
+        release_information(self.registry, 'lat_lon', shared_information)
+        self.assertNotIn('lat_lon/columns', self.registry)
+        self.assert_unlinked(shared_information['columns']['shared_array'])
@@ -0,0 +1,235 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+from netCDF4 import Dataset
+from pyresample.ewa import _fornav
+from pyresample.geometry import AreaDefinition
+
+from swath_projector.interpolation import (
+    get_ewa_information,
+    get_ewa_results,
+    get_swath_definition,
+)
+from swath_projector.streamed_ewa import (
+    get_aligned_block_rows,
+    get_block_rows_per_scan,
+    get_block_slices,
+    get_block_values,
+    get_streamed_ewa_results,
+)
+from swath_projector.utilities import (
+    get_variable_numeric_fill_value,
+    get_variable_values,
+)
+
+
+class TestStreamedEwa(TestCase):
+    """A test class for the functions that perform EWA interpolation in
+    blocks of swath rows.
+
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.coordinates = ('/lat', '/lon')
+        cls.target_area = AreaDefinition.from_extent(
+            'target', '+proj=longlat', (25, 80), (-20, 10, 60, 35)
+        )
+
+    def setUp(self):
+        self.dataset = Dataset('tests/data/africa.nc')
+        self.variable = self.dataset['/red_var']
+        self.fill_value = get_variable_numeric_fill_value(self.variable)
+        self.total_rows = self.dataset['/lat'].shape[0]
+
+    def tearDown(self):
+        self.dataset.close()
+
+    def test_get_streamed_ewa_results_single_block(self):
+        """Ensure that a single block containing the full swath gives the same
+        results as the standard EWA implementation, for both weighted
+        average and maximum weight modes.
+
+        """
+        swath_resources = {
+            'swath_definition': get_swath_definition(self.dataset, self.coordinates)
+        }
+        ewa_information = get_ewa_information(swath_resources, self.target_area)
+
+        for maximum_weight_mode in [False, True]:
+            with self.subTest(f'Maximum weight mode: {maximum_weight_mode}'):
+                expected_results = get_ewa_results(
+                    {
+                        'values': get_variable_values(
+                            self.dataset, self.variable, self.fill_value
+                        ),
+                        'fill_value': self.fill_value,
+                    },
+                    ewa_information,
+                    maximum_weight_mode,
+                )
+
+                results = get_streamed_ewa_results(
+                    self.dataset,
+                    self.variable,
+                    self.coordinates,
+                    self.target_area,
+                    self.fill_value,
+                    self.total_rows,
+                    maximum_weight_mode,
+                )
+
+                self.assertTupleEqual(results.shape, self.target_area.shape)
+                np.testing.assert_allclose(results, expected_results, rtol=1e-6)
+
+    def test_get_streamed_ewa_results_multiple_blocks(self):
+        """Ensure the weights and sums of each block of rows are accumulated
+        into the same arrays, with each block treated as a single scan, and
+        that the accumulated results are normalised to a populated grid.
+
+        """
+        block_rows = -(-self.total_rows // 3)
+        global_area = AreaDefinition.from_extent(
+            'global', '+proj=longlat', (90, 180), (-180, -90, 180, 90)
+        )
+
+        with patch.object(
+            _fornav,
+            'fornav_weights_and_sums_wrapper',
+            wraps=_fornav.fornav_weights_and_sums_wrapper,
+        ) as mock_fornav:
+            results = get_streamed_ewa_results(
+                self.dataset,
+                self.variable,
+                self.coordinates,
+                global_area,
+                self.fill_value,
+                block_rows,
+                False,
+            )
+
+        block_slices = get_block_slices(self.total_rows, block_rows)
+        self.assertEqual(mock_fornav.call_count, len(block_slices))
+
+        for call, block_slice in zip(mock_fornav.call_args_list, block_slices):
+            self.assertEqual(call.args[7], block_slice.stop - block_slice.start)
+
+        accumulator_ids = {id(call.args[3]) for call in mock_fornav.call_args_list}
+        self.assertEqual(len(accumulator_ids), 1)
+
+        if self.fill_value is None:
+            self.assertTrue(np.any(np.isfinite(results)))
+        else:
+            self.assertTrue(np.any(results != self.fill_value))
+
+    def test_get_streamed_ewa_results_rows_per_scan(self):
+        """Ensure single row blocks, or blocks leaving a single final row, are
+        resampled without error, and that the instrument scan height is
+        passed to `fornav` for blocks containing whole scans.
+
+        """
+        test_args = [
+            ['Single row blocks', 1, 0],
+            ['Single row final block', self.total_rows - 1, 0],
+            ['Two row scans', 3, 2],
+        ]
+
+        for description, block_rows, rows_per_scan in test_args:
+            with self.subTest(description):
+                with patch.object(
+                    _fornav,
+                    'fornav_weights_and_sums_wrapper',
+                    wraps=_fornav.fornav_weights_and_sums_wrapper,
+                ) as mock_fornav:
+                    results = get_streamed_ewa_results(
+                        self.dataset,
+                        self.variable,
+                        self.coordinates,
+                        self.target_area,
+                        self.fill_value,
+                        block_rows,
+                        False,
+                        rows_per_scan,
+                    )
+
+                self.assertTupleEqual(results.shape, self.target_area.shape)
+
+                for call in mock_fornav.call_args_list:
+                    self.assertGreaterEqual(call.args[7], 2)
+
+                if rows_per_scan:
+                    self.assertEqual(
+                        mock_fornav.call_args_list[0].args[7], rows_per_scan
+                    )
+
+    def test_get_block_slices(self):
+        """Ensure blocks cover all rows, with the final block containing any
+        remaining rows, unless that would be fewer than the minimum number of
+        rows, in which case those rows are merged into the preceding block.
+
+        """
+        self.assertListEqual(
+            get_block_slices(10, 4), [slice(0, 4), slice(4, 8), slice(8, 10)]
+        )
+        self.assertListEqual(get_block_slices(8, 4), [slice(0, 4), slice(4, 8)])
+        self.assertListEqual(get_block_slices(3, 4), [slice(0, 3)])
+        self.assertListEqual(get_block_slices(9, 4), [slice(0, 4), slice(4, 9)])
+        self.assertListEqual(
+            get_block_slices(9, 4, minimum_rows=1),
+            [slice(0, 4), slice(4, 8), slice(8, 9)],
+        )
+
+    def test_get_aligned_block_rows(self):
+        """Ensure blocks contain at least two rows, and are rounded up to a
+        whole number of scans when the scan height is known.
+
+        """
+        test_args = [
+            ['Unknown scan height', 5, 0, 5],
+            ['Single row block', 1, 0, 2],
+            ['Single row scans', 5, 1, 5],
+            ['Whole scans', 32, 16, 32],
+            ['Partial scan', 20, 16, 32],
+            ['Smaller than a scan', 1, 16, 16],
+        ]
+
+        for description, block_rows, rows_per_scan, expected_rows in test_args:
+            with self.subTest(description):
+                self.assertEqual(
+                    get_aligned_block_rows(block_rows, rows_per_scan), expected_rows
+                )
+
+    def test_get_block_rows_per_scan(self):
+        """Ensure the instrument scan height is used for blocks containing a
+        whole number of scans, and otherwise the block is a single scan.
+
+        """
+        test_args = [
+            ['Unknown scan height', slice(0, 5), 0, 5],
+            ['Whole scans', slice(16, 48), 16, 16],
+            ['Partial final scan', slice(32, 56), 16, 24],
+        ]
+
+        for description, rows, rows_per_scan, expected_rows_per_scan in test_args:
+            with self.subTest(description):
+                self.assertEqual(
+                    get_block_rows_per_scan(rows, rows_per_scan),
+                    expected_rows_per_scan,
+                )
+
+    def test_get_block_values(self):
+        """Ensure a block of rows is retrieved as a C-contiguous, floating
+        point array, with masked pixels set to the fill value.
+
+        """
+        block_values = get_block_values(
+            self.dataset, self.variable, slice(1, 3), self.fill_value
+        )
+
+        self.assertTrue(block_values.flags['C_CONTIGUOUS'])
+        self.assertTrue(np.issubdtype(block_values.dtype, np.floating))
+        np.testing.assert_array_equal(
+            block_values,
+            get_variable_values(self.dataset, self.variable, self.fill_value)[1:3],
+        )
@@ -12,14 +12,20 @@ from swath_projector.swath_geometry import (
     clockwise_point_sort,
     euclidean_distance,
     get_absolute_resolution,
+    get_decimated_coordinates,
+    get_edge_coordinates,
     get_extents_from_perimeter,
+    get_extents_from_projected_perimeter,
     get_one_dimensional_resolution,
     get_perimeter_coordinates,
     get_polygon_area,
+    get_projected_perimeter,
     get_projected_resolution,
+    get_resolution_from_perimeter,
     get_slice_edges,
     get_valid_coordinates_mask,
     reproject_coordinates,
+    should_decimate_coordinates,
     sort_perimeter_points,
     swath_crosses_international_date_line,
 )
@@ -142,6 +148,125 @@ class TestSwathGeometry(TestCase):
             self.assertAlmostEqual(y_min, 0.0, places=7)
             self.assertAlmostEqual(y_max, 9.0, places=7)
 
+    def test_get_projected_perimeter(self):
+        """Ensure the projected perimeter can be derived once, and used to
+        calculate both the extents and resolution of the swath, with the
+        same results as deriving each from the coordinates separately.
+
+        """
+        test_args = [
+            ['2-D', self.longitudes, self.latitudes, 1],
+            ['2-D, stride ignored', self.longitudes, self.latitudes, 10],
+            ['1-D', self.test_dataset['lon_1d'], self.test_dataset['lat_1d'], 1],
+        ]
+
+        for description, longitudes, latitudes, stride in test_args:
+            with self.subTest(description):
+                projected_perimeter = get_projected_perimeter(
+                    self.ease_projection, longitudes, latitudes, stride
+                )
+
+                self.assertTupleEqual(
+                    get_extents_from_projected_perimeter(projected_perimeter),
+                    get_extents_from_perimeter(
+                        self.ease_projection, longitudes, latitudes, stride
+                    ),
+                )
+                self.assertEqual(
+                    get_resolution_from_perimeter(
+                        projected_perimeter, len(longitudes.shape)
+                    ),
+                    get_projected_resolution(
+                        self.ease_projection, longitudes, latitudes, stride
+                    ),
+                )
+
+    def test_get_decimated_coordinates(self):
+        """Ensure the extents and resolution estimated from a subsample of the
+        coordinates, plus the full swath edges, match those derived from every
+        pixel to within a small tolerance. The swath has a triangle of fill
+        values in one corner, so the perimeter is not only the swath edges.
+
+        """
+        rows, columns = np.mgrid[0:201, 0:161]
+        fill_pixels = rows + columns < 40
+        latitudes = np.ma.masked_where(fill_pixels, -10.0 + 0.1 * rows)
+
+        test_args = [
+            ['Geographic', self.geographic_projection, 10.0],
+            ['Projected metres', self.ease_projection, 10.0],
+            ['International Date Line', self.geographic_projection, 170.0],
+        ]
+
+        for description, projection, first_longitude in test_args:
+            with self.subTest(description):
+                longitudes = first_longitude + 0.1 * columns + 0.01 * rows
+                longitudes = np.ma.masked_where(
+                    fill_pixels,
+                    np.where(longitudes > 180, longitudes - 360, longitudes),
+                )
+
+                x_values, y_values, n_pixels = get_decimated_coordinates(
+                    projection, longitudes, latitudes, 10
+                )
+                self.assertAlmostEqual(
+                    n_pixels / np.count_nonzero(~fill_pixels), 1.0, delta=0.01
+                )
+
+                np.testing.assert_allclose(
+                    get_extents_from_perimeter(projection, longitudes, latitudes, 10),
+                    get_extents_from_perimeter(projection, longitudes, latitudes),
+                )
+                self.assertAlmostEqual(
+                    get_projected_resolution(projection, longitudes, latitudes, 10)
+                    / get_projected_resolution(projection, longitudes, latitudes),
+                    1.0,
+                    delta=0.01,
+                )
+
+    def test_should_decimate_coordinates(self):
+        """Ensure only 2-D coordinates with more rows and columns than a stride
+        greater than one are decimated.
+
+        """
+        test_args = [
+            ['Stride of one', (100, 100), 1, False],
+            ['2-D, larger than stride', (100, 100), 10, True],
+            ['Too few rows', (10, 100), 10, False],
+            ['Too few columns', (100, 5), 10, False],
+            ['1-D', (1000,), 10, False],
+        ]
+
+        for description, shape, stride, expected_result in test_args:
+            with self.subTest(description):
+                self.assertEqual(
+                    should_decimate_coordinates(np.ones(shape), stride),
+                    expected_result,
+                )
+
+    def test_get_edge_coordinates(self):
+        """Ensure the coordinates of all valid pixels in the first and last
+        rows and columns are returned.
+
+        """
+        latitudes = np.ma.masked_array(self.lat_data, mask=np.zeros((3, 4)))
+        latitudes[0, 1] = np.ma.masked
+
+        edge_longitudes, edge_latitudes = get_edge_coordinates(
+            self.longitudes, latitudes
+        )
+
+        np.testing.assert_array_equal(
+            edge_longitudes,
+            [40.0, 50.0, 55.0, 40.0, 45.0, 50.0, 55.0]
+            + [40.0, 40.0, 40.0, 55.0, 55.0, 55.0],
+        )
+        np.testing.assert_array_equal(
+            edge_latitudes,
+            [25.0, 25.0, 25.0, 15.0, 15.0, 15.0, 15.0]
+            + [25.0, 20.0, 15.0, 25.0, 20.0, 15.0],
+        )
+
     def test_get_perimeter_coordinates(self):
         """Ensure a full list of longitude, latitude points are returned for
         a given coordinate mask. These points will be unordered.
@@ -0,0 +1,105 @@
+from logging import getLogger
+from os import environ
+from unittest import TestCase
+from unittest.mock import patch
+
+from swath_projector import swath_resource_cache
+from swath_projector.swath_resource_cache import (
+    DEFAULT_WORKER_CACHE_SIZE,
+    REPROJECTION_INFORMATION,
+    SWATH_RESOURCE_CACHE_SIZE_ENVIRONMENT_VARIABLE,
+    cache_swath_resources,
+    configure_swath_resource_cache,
+    get_cached_swath_resources,
+    set_swath_resource_cache_size,
+    swath_resource_cache_enabled,
+)
+
+
+class TestSwathResourceCache(TestCase):
+    """A test class for the process-level cache of swath resources, retained
+    between the messages of a long-lived worker.
+
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = getLogger('test')
+
+    def setUp(self):
+        swath_resource_cache.swath_resource_cache.clear()
+
+    def tearDown(self):
+        set_swath_resource_cache_size(0)
+
+    def test_cache_disabled_by_default(self):
+        """Ensure no resources are retained unless the cache is enabled."""
+        self.assertFalse(swath_resource_cache_enabled())
+        cache_swath_resources('fingerprint', {'swath_definition': 'swath'})
+        self.assertIsNone(get_cached_swath_resources('fingerprint'))
+
+    def test_cached_swath_resources(self):
+        """Ensure cached resources are returned by reference, so resources
+        added later are retained, and that the least recently used entry is
+        evicted once the cache is full.
+
+        """
+        set_swath_resource_cache_size(2)
+        first_resources = {'swath_definition': 'first'}
+        cache_swath_resources('first', first_resources)
+        cache_swath_resources('second', {'swath_definition': 'second'})
+
+        with self.subTest('Resources are retrieved by reference'):
+            first_resources['kd_tree'] = 'tree'
+            cached_resources = get_cached_swath_resources('first')
+            self.assertIs(cached_resources, first_resources)
+            self.assertDictEqual(
+                cached_resources,
+                {
+                    'swath_definition': 'first',
+                    'kd_tree': 'tree',
+                    REPROJECTION_INFORMATION: {},
+                },
+            )
+
+        with self.subTest('Least recently used entry is evicted'):
+            cache_swath_resources('third', {'swath_definition': 'third'})
+            self.assertIsNone(get_cached_swath_resources('second'))
+            self.assertIsNotNone(get_cached_swath_resources('first'))
+            self.assertIsNotNone(get_cached_swath_resources('third'))
+
+        with self.subTest('Reducing the size evicts entries'):
+            set_swath_resource_cache_size(1)
+            self.assertListEqual(
+                list(swath_resource_cache.swath_resource_cache), ['third']
+            )
+
+    def test_configure_swath_resource_cache(self):
+        """Ensure the worker cache size is read from the environment, with a
+        default when unset, and that a size of zero disables the cache.
+
+        """
+        with self.subTest('Default size'):
+            with patch.dict(environ, clear=True):
+                configure_swath_resource_cache(self.logger)
+
+            self.assertEqual(
+                swath_resource_cache.cache_settings['maximum_size'],
+                DEFAULT_WORKER_CACHE_SIZE,
+            )
+
+        with self.subTest('Configured size'):
+            with patch.dict(
+                environ, {SWATH_RESOURCE_CACHE_SIZE_ENVIRONMENT_VARIABLE: '2'}
+            ):
+                configure_swath_resource_cache(self.logger)
+
+            self.assertEqual(swath_resource_cache.cache_settings['maximum_size'], 2)
+
+        with self.subTest('Disabled'):
+            with patch.dict(
+                environ, {SWATH_RESOURCE_CACHE_SIZE_ENVIRONMENT_VARIABLE: '0'}
+            ):
+                configure_swath_resource_cache(self.logger)
+
+            self.assertFalse(swath_resource_cache_enabled())
@@ -0,0 +1,372 @@
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+import numpy as np
+from netCDF4 import Dataset
+from pyproj import Proj
+
+from swath_projector.tiling import (
+    MODIS_TILE_SIZE,
+    TILE_SCHEMES,
+    clip_polygon_at_meridian,
+    get_swath_tiles,
+    get_tile_dimensions,
+    get_tile_extents,
+    get_tile_indices,
+    get_tile_name,
+    point_in_polygon,
+    polygon_intersects_rectangle,
+    segments_intersect,
+    split_polygon_at_antimeridian,
+    tile_is_empty,
+)
+
+
+class TestTiling(TestCase):
+    """A test class for the functions that determine the tiles of a standard
+    tiling scheme intersected by a swath.
+
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.geographic_scheme = TILE_SCHEMES['geographic']
+        cls.modis_scheme = TILE_SCHEMES['modis']
+        cls.geographic_projection = Proj(cls.geographic_scheme['crs'])
+        # A diamond centred on (5, 5), with vertices 5 units from the centre.
+        cls.polygon_x = np.array([5.0, 10.0, 5.0, 0.0])
+        cls.polygon_y = np.array([10.0, 5.0, 0.0, 5.0])
+
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.temp_dir)
+
+    def test_get_swath_tiles(self):
+        """Ensure tiles are included if they contain the swath perimeter, or
+        are otherwise intersected by the polygon of that perimeter, but not
+        if they are only within the bounding box of the swath.
+
+        """
+        with self.subTest('Diagonal swath excludes bounding box corners'):
+            # A parallelogram from 1 to 9 degrees east at 1 degree north, to
+            # 21 to 29 degrees east at 29 degrees north.
+            rows, columns = np.indices((29, 9))
+            latitudes = np.ma.masked_array(1.0 + rows)
+            longitudes = np.ma.masked_array(1.0 + columns + rows * 20.0 / 28.0)
+
+            self.assertSetEqual(
+                get_swath_tiles(
+                    self.geographic_scheme,
+                    self.geographic_projection,
+                    longitudes,
+                    latitudes,
+                ),
+                {
+                    (18, 7),
+                    (18, 8),
+                    (19, 6),
+                    (19, 7),
+                    (19, 8),
+                    (20, 6),
+                    (20, 7),
+                },
+            )
+
+        with self.subTest('Tiles without perimeter points are included'):
+            rows, columns = np.indices((30, 38))
+            latitudes = np.ma.masked_array(1.0 + rows)
+            longitudes = np.ma.masked_array(1.0 + columns)
+
+            self.assertSetEqual(
+                get_swath_tiles(
+                    self.geographic_scheme,
+                    self.geographic_projection,
+                    longitudes,
+                    latitudes,
+                ),
+                {(column, row) for column in range(18, 22) for row in range(6, 9)},
+            )
+
+        with self.subTest('Swath crossing the antimeridian'):
+            rows, columns = np.indices((5, 10))
+            latitudes = np.ma.masked_array(1.0 + rows)
+            longitudes = np.ma.masked_array(175.0 + columns)
+            longitudes[longitudes > 180.0] -= 360.0
+
+            self.assertSetEqual(
+                get_swath_tiles(
+                    self.geographic_scheme,
+                    self.geographic_projection,
+                    longitudes,
+                    latitudes,
+                ),
+                {(0, 8), (35, 8)},
+            )
+
+        with self.subTest('MODIS swath crossing the antimeridian'):
+            # Meridians are curved in the sinusoidal projection, so the
+            # antimeridian crosses different columns at each latitude.
+            rows, columns = np.indices((10, 10))
+            latitudes = np.ma.masked_array(55.0 + rows)
+            longitudes = np.ma.masked_array(175.0 + columns)
+            longitudes[longitudes > 180.0] -= 360.0
+
+            self.assertSetEqual(
+                get_swath_tiles(
+                    self.modis_scheme,
+                    Proj(self.modis_scheme['crs']),
+                    longitudes,
+                    latitudes,
+                ),
+                {
+                    (7, 3),
+                    (8, 3),
+                    (9, 2),
+                    (9, 3),
+                    (10, 2),
+                    (25, 2),
+                    (26, 2),
+                    (26, 3),
+                    (27, 3),
+                    (28, 3),
+                },
+            )
+
+        with self.subTest('One-dimensional coordinates'):
+            self.assertSetEqual(
+                get_swath_tiles(
+                    self.geographic_scheme,
+                    self.geographic_projection,
+                    np.ma.masked_array([5.0, 15.0, 25.0]),
+                    np.ma.masked_array([5.0, 5.0, 15.0]),
+                ),
+                {(18, 8), (19, 8), (20, 7)},
+            )
+
+        with self.subTest('No valid coordinates'):
+            self.assertSetEqual(
+                get_swath_tiles(
+                    self.geographic_scheme,
+                    self.geographic_projection,
+                    np.ma.masked_all((2, 2)),
+                    np.ma.masked_all((2, 2)),
+                ),
+                set(),
+            )
+
+    def test_split_polygon_at_antimeridian(self):
+        """Ensure a polygon crossing the antimeridian is split into the parts
+        either side of it, with longitudes beyond 180 degrees east or west
+        shifted by 360 degrees. Other polygons are returned unchanged.
+
+        """
+        latitudes = np.array([0.0, 0.0, 1.0, 1.0])
+
+        with self.subTest('Polygon not crossing the antimeridian'):
+            longitudes = np.array([170.0, 180.0, 180.0, 170.0])
+            polygon_parts = split_polygon_at_antimeridian(longitudes, latitudes)
+            self.assertEqual(len(polygon_parts), 1)
+            np.testing.assert_array_equal(polygon_parts[0][0], longitudes)
+            np.testing.assert_array_equal(polygon_parts[0][1], latitudes)
+
+        test_args = [
+            ['Beyond 180 degrees east', [170.0, 190.0, 190.0, 170.0]],
+            ['Beyond 180 degrees west', [-190.0, -170.0, -170.0, -190.0]],
+        ]
+
+        for description, longitudes in test_args:
+            with self.subTest(description):
+                polygon_parts = split_polygon_at_antimeridian(
+                    np.array(longitudes), latitudes
+                )
+                self.assertEqual(len(polygon_parts), 2)
+                self.assertSetEqual(
+                    {
+                        (np.min(part_longitudes), np.max(part_longitudes))
+                        for part_longitudes, _ in polygon_parts
+                    },
+                    {(170.0, 180.0), (-180.0, -170.0)},
+                )
+
+    def test_clip_polygon_at_meridian(self):
+        """Ensure a polygon is clipped to the side of a meridian requested,
+        with vertices added where edges cross the meridian, and additional
+        vertices along the clipped edge on the meridian.
+
+        """
+        longitudes = np.array([170.0, 190.0, 190.0, 170.0])
+        latitudes = np.array([0.0, 0.0, 2.0, 2.0])
+
+        with self.subTest('West of the meridian'):
+            clipped_longitudes, clipped_latitudes = clip_polygon_at_meridian(
+                longitudes, latitudes, 180.0, True
+            )
+            np.testing.assert_array_equal(
+                clipped_longitudes, [170.0, 180.0, 180.0, 180.0, 170.0]
+            )
+            np.testing.assert_array_equal(clipped_latitudes, [0.0, 0.0, 1.0, 2.0, 2.0])
+
+        with self.subTest('East of the meridian'):
+            clipped_longitudes, clipped_latitudes = clip_polygon_at_meridian(
+                longitudes, latitudes, 180.0, False, latitude_spacing=2.0
+            )
+            np.testing.assert_array_equal(
+                clipped_longitudes, [180.0, 190.0, 190.0, 180.0]
+            )
+            np.testing.assert_array_equal(clipped_latitudes, [0.0, 0.0, 2.0, 2.0])
+
+    def test_get_tile_indices(self):
+        """Ensure projected points are mapped to the tiles containing them,
+        counting from the tile at the minimum x and maximum y.
+
+        """
+        with self.subTest('Geographic'):
+            columns, rows = get_tile_indices(
+                self.geographic_scheme,
+                np.array([-180.0, -0.5, 0.0, 185.0]),
+                np.array([90.0, 0.5, -0.5, -89.5]),
+            )
+            np.testing.assert_array_equal(columns, [0, 17, 18, 36])
+            np.testing.assert_array_equal(rows, [0, 8, 9, 17])
+
+        with self.subTest('MODIS sinusoidal'):
+            columns, rows = get_tile_indices(
+                self.modis_scheme,
+                np.array([0.5 * MODIS_TILE_SIZE]),
+                np.array([-1.5 * MODIS_TILE_SIZE]),
+            )
+            np.testing.assert_array_equal(columns, [18])
+            np.testing.assert_array_equal(rows, [10])
+
+    def test_get_tile_extents(self):
+        """Ensure the projected extents of a tile are derived from its
+        horizontal and vertical indices.
+
+        """
+        self.assertDictEqual(
+            get_tile_extents(self.geographic_scheme, 18, 7),
+            {'x_min': 0.0, 'x_max': 10.0, 'y_min': 10.0, 'y_max': 20.0},
+        )
+
+        modis_extents = get_tile_extents(self.modis_scheme, 0, 17)
+        self.assertAlmostEqual(modis_extents['x_min'], -20015109.355798, places=5)
+        self.assertAlmostEqual(modis_extents['y_min'], -10007554.677899, places=5)
+
+    def test_get_tile_dimensions(self):
+        """Ensure tile dimensions are taken from the message, or the number of
+        pixels of the requested or derived resolution that fit in each tile.
+
+        """
+        parameters = {'height': None, 'width': None, 'xres': None, 'yres': None}
+
+        test_args = [
+            ['Message dimensions', {'height': 20, 'width': 30}, None, (20, 30)],
+            ['Message resolutions', {'xres': 0.5, 'yres': -0.25}, None, (40, 20)],
+            ['Derived resolution', {}, 3.0, (3, 3)],
+            ['At least one pixel', {}, 100.0, (1, 1)],
+        ]
+
+        for (
+            description,
+            message_parameters,
+            resolution,
+            expected_dimensions,
+        ) in test_args:
+            with self.subTest(description):
+                self.assertTupleEqual(
+                    get_tile_dimensions(
+                        {**parameters, **message_parameters},
+                        self.geographic_scheme,
+                        resolution,
+                    ),
+                    expected_dimensions,
+                )
+
+    def test_get_tile_name(self):
+        """Ensure tile names use two digits for each index."""
+        self.assertEqual(get_tile_name(8, 5), 'h08v05')
+        self.assertEqual(get_tile_name(35, 17), 'h35v17')
+
+    def test_polygon_intersects_rectangle(self):
+        """Ensure a rectangle intersects the polygon if either contains a
+        vertex of the other, or their edges cross.
+
+        """
+        test_args = [
+            ['Polygon vertex in rectangle', (9.0, 4.0, 11.0, 6.0), True],
+            ['Rectangle within polygon', (4.0, 4.0, 6.0, 6.0), True],
+            ['Polygon within rectangle', (-1.0, -1.0, 11.0, 11.0), True],
+            ['Edges cross', (-1.0, 2.0, 11.0, 3.0), True],
+            ['Within bounding box only', (8.0, 8.0, 10.0, 10.0), False],
+            ['Outside bounding box', (20.0, 20.0, 30.0, 30.0), False],
+        ]
+
+        for description, (x_min, y_min, x_max, y_max), expected_result in test_args:
+            with self.subTest(description):
+                self.assertEqual(
+                    polygon_intersects_rectangle(
+                        self.polygon_x,
+                        self.polygon_y,
+                        {
+                            'x_min': x_min,
+                            'x_max': x_max,
+                            'y_min': y_min,
+                            'y_max': y_max,
+                        },
+                    ),
+                    expected_result,
+                )
+
+    def test_point_in_polygon(self):
+        """Ensure points are correctly identified as inside or outside the
+        polygon.
+
+        """
+        self.assertTrue(point_in_polygon(5.0, 5.0, self.polygon_x, self.polygon_y))
+        self.assertTrue(point_in_polygon(8.0, 4.0, self.polygon_x, self.polygon_y))
+        self.assertFalse(point_in_polygon(9.0, 9.0, self.polygon_x, self.polygon_y))
+        self.assertFalse(point_in_polygon(-1.0, 5.5, self.polygon_x, self.polygon_y))
+
+    def test_segments_intersect(self):
+        """Ensure each segment is checked for intersection with the single
+        other segment.
+
+        """
+        np.testing.assert_array_equal(
+            segments_intersect(
+                np.array([0.0, 0.0, 0.0]),
+                np.array([0.0, 2.0, 3.0]),
+                np.array([2.0, 2.0, 1.0]),
+                np.array([2.0, 0.0, 3.0]),
+                (0.0, 1.0),
+                (2.0, 1.0),
+            ),
+            [True, True, False],
+        )
+
+    def test_tile_is_empty(self):
+        """Ensure a tile is empty if none of its single band outputs contain
+        valid pixels, ignoring variables without a single band output.
+
+        """
+        for variable_name, values in [
+            ('empty', np.ma.masked_all((2, 2))),
+            (
+                'valid',
+                np.ma.masked_array([[1.0, 2.0], [3.0, 4.0]], mask=[[1, 1], [1, 0]]),
+            ),
+        ]:
+            with Dataset(join(self.temp_dir, f'{variable_name}.nc'), 'w') as dataset:
+                dataset.createDimension('y', size=2)
+                dataset.createDimension('x', size=2)
+                variable = dataset.createVariable(
+                    variable_name, np.float64, ('y', 'x'), fill_value=-9999.0
+                )
+                variable[:] = values
+
+        self.assertTrue(tile_is_empty(self.temp_dir, ['/empty', '/missing'], '.nc'))
+        self.assertFalse(tile_is_empty(self.temp_dir, ['/empty', '/valid'], '.nc'))
@@ -1,5 +1,8 @@
+import os
+from shutil import rmtree
+from tempfile import mkdtemp
 from unittest import TestCase
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 import numpy as np
 from netCDF4 import Dataset, Variable
@@ -10,13 +13,15 @@ from swath_projector.utilities import (
     construct_absolute_path,
     create_coordinates_key,
     get_coordinate_variable,
+    get_coordinates_fingerprint,
     get_scale_and_offset,
     get_variable_file_path,
     get_variable_numeric_fill_value,
     get_variable_values,
-    make_array_two_dimensional,
     qualify_reference,
+    values_are_entirely_fill,
     variable_in_dataset,
+    write_populated_chunks,
 )
 
 
@@ -34,10 +39,12 @@ class TestUtilities(TestCase):
         expected_output = ('/lat', '/lon')
 
         test_args = [['comma-space', ['/lon, /lat']], ['reverse order', ['/lat, /lon']]]
+        temp_dir = mkdtemp()
+        test_file = os.path.join(temp_dir, 'test.nc')
 
         for description, coordinates in test_args:
             with self.subTest(description):
-                with Dataset('test.nc', 'w') as dataset:
+                with Dataset(test_file, 'w') as dataset:
                     dataset.createDimension('lat', size=2)
                     dataset.createDimension('lon', size=4)
 
@@ -49,12 +56,14 @@ class TestUtilities(TestCase):
 
                     nc4_variable.setncattr('coordinates', coordinates)
 
-                varinfo = VarInfoFromNetCDF4('test.nc')
+                varinfo = VarInfoFromNetCDF4(test_file)
                 varinfo_variable = varinfo.get_variable('/group/variable')
                 self.assertEqual(
                     create_coordinates_key(varinfo_variable), expected_output
                 )
 
+        rmtree(temp_dir)
+
     def test_get_variable_values(self):
         """Ensure values for a variable are retrieved, respecting the absence
         or presence of a time variable in the dataset.
@@ -105,6 +114,20 @@ class TestUtilities(TestCase):
                 # Check the output matches all the input data
                 np.testing.assert_array_equal(input_data, returned_data)
 
+        with self.subTest('1-D variable retains its shape.'):
+            with Dataset('profile.nc', 'w', diskless=True) as dataset:
+                dataset.createDimension('along_track', size=3)
+                variable = dataset.createVariable(
+                    'data', np.float32, dimensions=('along_track',), fill_value=-1.0
+                )
+                variable[:] = np.ma.masked_array([1.0, 2.0, 3.0], mask=[0, 1, 0])
+
+                returned_data = get_variable_values(dataset, variable, -1.0)
+
+                self.assertIsInstance(returned_data, np.ndarray)
+                self.assertNotIsInstance(returned_data, np.ma.MaskedArray)
+                np.testing.assert_array_equal(returned_data, [1.0, -1.0, 3.0])
+
         with self.subTest('2-D variable, time in dataset, but not variable'):
             with Dataset('test.nc', 'w', diskless=True) as dataset:
                 dataset.createDimension('time', size=1)
@@ -121,6 +144,27 @@ class TestUtilities(TestCase):
                 self.assertIsInstance(returned_data, np.ndarray)
                 np.testing.assert_array_equal(input_data, returned_data)
 
+    def test_values_are_entirely_fill(self):
+        """Ensure arrays are only identified as entirely fill when every
+        element is either masked, equal to the fill value or NaN, and
+        that arrays are never entirely fill without a numeric fill value.
+
+        """
+        test_args = [
+            ['All fill values', np.array([[-9999, -9999]]), -9999, True],
+            ['Fill values and NaN', np.array([[-9999.0, np.nan]]), -9999.0, True],
+            ['Masked and fill', np.ma.masked_equal([[1, 2], [2, 2]], 1), 2, True],
+            ['Some valid data', np.array([[-9999, 4], [-9999, -9999]]), -9999, False],
+            ['Masked with valid data', np.ma.masked_equal([[1, 3]], 1), 2, False],
+            ['No fill value', np.array([[np.nan, np.nan]]), None, False],
+        ]
+
+        for description, values, fill_value, expected_result in test_args:
+            with self.subTest(description):
+                self.assertEqual(
+                    values_are_entirely_fill(values, fill_value), expected_result
+                )
+
     def test_get_coordinate_variables(self):
         """Ensure the longitude or latitude coordinate variable, is retrieved
         when requested.
@@ -146,6 +190,62 @@ class TestUtilities(TestCase):
                     dataset, absent_coordinates_tuple, absent_coordinates_tuple[0]
                 )
 
+    def test_get_coordinates_fingerprint(self):
+        """Ensure coordinate variables with identical contents have the same
+        fingerprint, regardless of their names or groups, and that the
+        fingerprint changes if any coordinate value differs. The fingerprint
+        should be the same, however many rows are read at a time.
+
+        """
+        temp_dir = mkdtemp()
+        dataset_path = os.path.join(temp_dir, 'coordinates.nc')
+        latitudes = np.linspace(-10, 10, 60, dtype=np.float32).reshape(10, 6)
+        longitudes = np.linspace(20, 40, 60, dtype=np.float32).reshape(10, 6)
+
+        with Dataset(dataset_path, 'w') as dataset:
+            dataset.createDimension('along', size=10)
+            dataset.createDimension('across', size=6)
+            for group_name in ['beam_one', 'beam_two', 'beam_three']:
+                group = dataset.createGroup(group_name)
+                group.createVariable('latitude', np.float32, ('along', 'across'))
+                group.createVariable('longitude', np.float32, ('along', 'across'))
+                group['latitude'][:] = latitudes
+                group['longitude'][:] = longitudes
+
+            dataset['/beam_three/longitude'][4, 3] = 50.0
+
+        with Dataset(dataset_path) as dataset:
+            beam_one = get_coordinates_fingerprint(
+                dataset, ('/beam_one/latitude', '/beam_one/longitude')
+            )
+
+            with self.subTest('Identical contents, different names'):
+                self.assertEqual(
+                    get_coordinates_fingerprint(
+                        dataset, ('/beam_two/latitude', '/beam_two/longitude')
+                    ),
+                    beam_one,
+                )
+
+            with self.subTest('Different contents'):
+                self.assertNotEqual(
+                    get_coordinates_fingerprint(
+                        dataset, ('/beam_three/latitude', '/beam_three/longitude')
+                    ),
+                    beam_one,
+                )
+
+            with self.subTest('Read in multiple blocks'):
+                with patch('swath_projector.utilities.FINGERPRINT_BLOCK_SIZE', 12):
+                    self.assertEqual(
+                        get_coordinates_fingerprint(
+                            dataset, ('/beam_one/latitude', '/beam_one/longitude')
+                        ),
+                        beam_one,
+                    )
+
+        rmtree(temp_dir)
+
     def test_get_variable_numeric_fill_value(self):
         """Ensure a fill value is retrieved from a variable that has a vaild
         numeric value, and is cast as either an integer or a float. If no
@@ -347,14 +447,70 @@ class TestUtilities(TestCase):
 
         dataset.close()
 
-    def test_make_array_two_dimensional(self):
-        """Ensure a 1-D array is expaned to be a 2-D array with elements all
-        in the same column,
+    def test_write_populated_chunks(self):
+        """Ensure only chunks containing unmasked values are written to the
+        output variable, and that the remaining chunks read as fill. The
+        unpopulated chunks should not be allocated in the output file.
 
         """
-        input_array = np.array([1, 2, 3])
-        expected_output = np.array([[1], [2], [3]])
-        output_array = make_array_two_dimensional(input_array)
+        temp_dir = mkdtemp()
+        fill_value = -9999.0
+        values = np.ma.masked_all((2000, 2000), dtype=np.float32)
+        values[10:20, 1500:1510] = 2.5
+
+        with self.subTest('Only populated chunks are written'):
+            sparse_path = os.path.join(temp_dir, 'sparse.nc')
+
+            with Dataset(sparse_path, 'w') as dataset:
+                dataset.createDimension('y', size=2000)
+                dataset.createDimension('x', size=2000)
+                variable = dataset.createVariable(
+                    'data',
+                    np.float32,
+                    dimensions=('y', 'x'),
+                    fill_value=fill_value,
+                    chunksizes=(100, 100),
+                )
+                write_populated_chunks(variable, values)
+
+            with Dataset(sparse_path) as dataset:
+                np.testing.assert_array_equal(
+                    dataset['data'][:].filled(), values.filled(fill_value)
+                )
+
+            # A fully allocated array would be 16 MB.
+            self.assertLess(os.path.getsize(sparse_path), 1_000_000)
+
+        with self.subTest('Leading indices are used for extra dimensions'):
+            with Dataset('test.nc', 'w', diskless=True) as dataset:
+                dataset.createDimension('time', size=2)
+                dataset.createDimension('y', size=2000)
+                dataset.createDimension('x', size=2000)
+                variable = dataset.createVariable(
+                    'data',
+                    np.float32,
+                    dimensions=('time', 'y', 'x'),
+                    fill_value=fill_value,
+                    chunksizes=(1, 100, 100),
+                )
+                write_populated_chunks(variable, values, (1,))
+
+                self.assertEqual(np.ma.count(dataset['data'][0]), 0)
+                np.testing.assert_array_equal(
+                    dataset['data'][1].filled(), values.filled(fill_value)
+                )
+
+        with self.subTest('Contiguous variables write all values'):
+            unmasked_values = np.array([[1.0, 2.0], [3.0, 4.0]])
+
+            with Dataset('test.nc', 'w', diskless=True) as dataset:
+                dataset.createDimension('y', size=2)
+                dataset.createDimension('x', size=2)
+                variable = dataset.createVariable(
+                    'data', np.float64, dimensions=('y', 'x'), contiguous=True
+                )
+                write_populated_chunks(variable, unmasked_values)
+
+                np.testing.assert_array_equal(dataset['data'][:], unmasked_values)
 
-        self.assertEqual(len(output_array.shape), 2)
-        np.testing.assert_array_equal(output_array, expected_output)
+        rmtree(temp_dir)
@@ -0,0 +1,141 @@
+from logging import getLogger
+from os.path import join
+from shutil import copy, rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+from unittest.mock import patch
+
+from netCDF4 import Dataset
+
+from swath_projector import var_info_cache
+from swath_projector.reproject import CF_CONFIG_FILE
+from swath_projector.var_info_cache import (
+    CachedConfigVarInfoFromNetCDF4,
+    get_structure_fingerprint,
+    get_var_info,
+)
+
+
+class TestVarInfoCache(TestCase):
+    """A test class for the process-level cache of VarInfo configuration and
+    granule representations.
+
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = getLogger('test')
+        cls.short_name = 'harmony_example_l2'
+
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+        self.granule_one = join(self.temp_dir, 'granule_one.nc')
+        self.granule_two = join(self.temp_dir, 'granule_two.nc')
+        copy('tests/data/africa.nc', self.granule_one)
+        copy('tests/data/africa.nc', self.granule_two)
+
+        with Dataset(self.granule_two, 'a') as dataset:
+            dataset.setncattr('granule_id', 'granule_two')
+
+        var_info_cache.var_info_configurations.clear()
+        var_info_cache.cf_configurations.clear()
+        var_info_cache.var_info_cache.clear()
+
+    def tearDown(self):
+        rmtree(self.temp_dir)
+
+    def test_configuration_parsed_once(self):
+        """Ensure the VarInfo configuration file, and the `CFConfig` for a
+        collection, are only parsed once per process.
+
+        """
+        with patch(
+            'swath_projector.var_info_cache.VarInfoFromNetCDF4._set_var_info_config',
+            autospec=True,
+            side_effect=lambda self: setattr(self, 'var_info_config', {}),
+        ) as mock_set_var_info_config:
+            var_info_one = CachedConfigVarInfoFromNetCDF4(
+                self.granule_one, short_name=self.short_name, config_file=CF_CONFIG_FILE
+            )
+            var_info_two = CachedConfigVarInfoFromNetCDF4(
+                self.granule_two, short_name=self.short_name, config_file=CF_CONFIG_FILE
+            )
+
+        mock_set_var_info_config.assert_called_once()
+        self.assertIs(var_info_one.var_info_config, var_info_two.var_info_config)
+        self.assertIs(var_info_one.cf_config, var_info_two.cf_config)
+
+    def test_get_var_info(self):
+        """Ensure granules from the same collection with the same structure
+        reuse the cached variable graph, but retain their own file path and
+        global attributes. Different collections, or structures, should not
+        share a cache entry.
+
+        """
+        var_info_one = get_var_info(
+            self.granule_one, self.short_name, CF_CONFIG_FILE, self.logger
+        )
+
+        with self.subTest('Same collection and structure reuses graph'):
+            var_info_two = get_var_info(
+                self.granule_two, self.short_name, CF_CONFIG_FILE, self.logger
+            )
+            self.assertIs(var_info_two.variables, var_info_one.variables)
+            self.assertEqual(var_info_two.dataset, self.granule_two)
+            self.assertEqual(
+                var_info_two.global_attributes['granule_id'], 'granule_two'
+            )
+            self.assertNotIn('granule_id', var_info_one.global_attributes)
+            self.assertSetEqual(
+                var_info_two.get_science_variables(),
+                var_info_one.get_science_variables(),
+            )
+
+        with self.subTest('Different collection is not shared'):
+            var_info_three = get_var_info(
+                self.granule_two, 'other_collection', CF_CONFIG_FILE, self.logger
+            )
+            self.assertIsNot(var_info_three.variables, var_info_one.variables)
+
+        with self.subTest('Different structure is not shared'):
+            with Dataset(self.granule_two, 'a') as dataset:
+                dataset['/red_var'].setncattr('units', 'changed')
+
+            var_info_four = get_var_info(
+                self.granule_two, self.short_name, CF_CONFIG_FILE, self.logger
+            )
+            self.assertIsNot(var_info_four.variables, var_info_one.variables)
+
+        with self.subTest('Unknown collection is not cached'):
+            var_info_cache.var_info_cache.clear()
+            get_var_info(self.granule_one, None, CF_CONFIG_FILE, self.logger)
+            self.assertEqual(len(var_info_cache.var_info_cache), 0)
+
+    def test_cache_size_is_bounded(self):
+        """Ensure the least recently used granule representation is removed
+        when the cache is full.
+
+        """
+        with patch('swath_projector.var_info_cache.VAR_INFO_CACHE_SIZE', 1):
+            get_var_info(self.granule_one, self.short_name, CF_CONFIG_FILE, self.logger)
+            get_var_info(self.granule_one, 'other', CF_CONFIG_FILE, self.logger)
+
+        self.assertListEqual(
+            [key[0] for key in var_info_cache.var_info_cache], ['other']
+        )
+
+    def test_get_structure_fingerprint(self):
+        """Ensure the fingerprint ignores global attributes, but changes when
+        variables are added to the file.
+
+        """
+        fingerprint_one = get_structure_fingerprint(self.granule_one)
+        self.assertEqual(get_structure_fingerprint(self.granule_two), fingerprint_one)
+
+        with Dataset(self.granule_two, 'a') as dataset:
+            dataset.createDimension('new_dimension', 3)
+            dataset.createVariable('new_variable', 'f4', ('new_dimension',))
+
+        self.assertNotEqual(
+            get_structure_fingerprint(self.granule_two), fingerprint_one
+        )
@@ -0,0 +1,125 @@
+import json
+from argparse import ArgumentParser
+from io import StringIO
+from logging import getLogger
+from os import listdir
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+from unittest.mock import patch
+
+from harmony import setup_cli
+
+from swath_projector.adapter import SwathProjectorAdapter
+from swath_projector.worker import (
+    SHUTDOWN_FILE_NAME,
+    process_message,
+    run_directory_worker,
+    run_stream_worker,
+)
+
+
+class TestWorker(TestCase):
+    """A test class for the long-lived worker, that processes a stream of
+    Harmony CLI invocations within a single process.
+
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = getLogger('test')
+        cls.parser = ArgumentParser()
+        setup_cli(cls.parser)
+        cls.message = json.dumps(
+            [
+                '--harmony-action',
+                'invoke',
+                '--harmony-input',
+                '{}',
+                '--harmony-sources',
+                'catalog.json',
+            ]
+        )
+
+    def setUp(self):
+        self.queue_dir = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.queue_dir)
+
+    @patch('swath_projector.worker.run_cli')
+    def test_process_message(self, mock_run_cli):
+        """Ensure a valid message invokes the Harmony CLI with the adapter, and
+        that invalid messages, or failed invocations, are reported without
+        raising an exception.
+
+        """
+        with self.subTest('Valid message'):
+            self.assertTrue(process_message(self.parser, self.message, self.logger))
+            mock_run_cli.assert_called_once()
+            self.assertEqual(mock_run_cli.call_args[0][1].harmony_action, 'invoke')
+            self.assertEqual(mock_run_cli.call_args[0][2], SwathProjectorAdapter)
+
+        mock_run_cli.reset_mock()
+
+        with self.subTest('Invalid JSON'):
+            self.assertFalse(process_message(self.parser, 'not JSON', self.logger))
+            mock_run_cli.assert_not_called()
+
+        with self.subTest('Not a Harmony CLI invocation'):
+            self.assertFalse(process_message(self.parser, '[]', self.logger))
+            mock_run_cli.assert_not_called()
+
+        with self.subTest('Invocation fails'):
+            mock_run_cli.side_effect = SystemExit(2)
+            self.assertFalse(process_message(self.parser, self.message, self.logger))
+
+    @patch('swath_projector.worker.configure_swath_resource_cache')
+    @patch('swath_projector.worker.run_cli')
+    def test_run_stream_worker(self, mock_run_cli, mock_configure_cache):
+        """Ensure each non-blank line of a stream is processed, and that a
+        failed message does not stop the worker. The swath resource cache
+        should be enabled, so it is retained between messages.
+
+        """
+        mock_run_cli.side_effect = [Exception('Bad granule'), None]
+        stream = StringIO(f'{self.message}\n\n{self.message}\n')
+
+        self.assertEqual(run_stream_worker(self.parser, stream, self.logger), 1)
+        self.assertEqual(mock_run_cli.call_count, 2)
+        mock_configure_cache.assert_called_once_with(self.logger)
+
+    @patch('swath_projector.worker.configure_swath_resource_cache')
+    @patch('swath_projector.worker.time.sleep')
+    @patch('swath_projector.worker.run_cli')
+    def test_run_directory_worker(self, mock_run_cli, mock_sleep, mock_configure_cache):
+        """Ensure message files are processed in name order, renamed to
+        indicate whether they succeeded, and that the worker polls the queue
+        directory until it has no pending messages and a shutdown file. The
+        swath resource cache should be enabled, so it is retained between
+        messages.
+
+        """
+        mock_run_cli.side_effect = [None, Exception('Bad granule')]
+
+        for file_name in ['b.json', 'a.json', 'ignored.txt']:
+            with open(join(self.queue_dir, file_name), 'w') as file_handler:
+                file_handler.write(self.message)
+
+        def request_shutdown(_):
+            with open(join(self.queue_dir, SHUTDOWN_FILE_NAME), 'w'):
+                pass
+
+        mock_sleep.side_effect = request_shutdown
+
+        self.assertEqual(
+            run_directory_worker(self.parser, self.queue_dir, self.logger), 1
+        )
+        self.assertEqual(mock_run_cli.call_count, 2)
+        mock_sleep.assert_called_once()
+        self.assertSetEqual(
+            set(listdir(self.queue_dir)),
+            {'a.done', 'b.failed', 'ignored.txt', SHUTDOWN_FILE_NAME},
+        )
+        mock_configure_cache.assert_called_once_with(self.logger)
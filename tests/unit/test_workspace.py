@@ -0,0 +1,159 @@
+from collections import namedtuple
+from logging import getLogger
+from os import environ, listdir, makedirs
+from os.path import isdir, join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+from unittest.mock import patch
+
+from swath_projector.exceptions import WorkspaceQuotaExceededError
+from swath_projector.workspace import (
+    INTERMEDIATE_SIZE_FACTOR,
+    QUOTA_ENVIRONMENT_VARIABLE,
+    SCRATCH_DIRECTORY_ENVIRONMENT_VARIABLE,
+    Workspace,
+)
+
+DiskUsage = namedtuple('DiskUsage', ['total', 'used', 'free'])
+
+
+class TestWorkspace(TestCase):
+    """A test class for the `Workspace` class, that manages the scratch
+    directories used to process a single item.
+
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = getLogger('test')
+
+    def setUp(self):
+        self.test_dir = mkdtemp()
+        self.scratch_dir = join(self.test_dir, 'scratch')
+        makedirs(self.scratch_dir)
+        self.input_file = join(self.test_dir, 'input.nc')
+
+        with open(self.input_file, 'wb') as file_handler:
+            file_handler.write(b'0' * 100)
+
+    def tearDown(self):
+        rmtree(self.test_dir)
+
+    def test_workspace_cleanup(self):
+        """Ensure the workspace directory is created on instantiation, and
+        all directories owned by the workspace are removed on exit, even if
+        an exception is raised.
+
+        """
+        environment = {SCRATCH_DIRECTORY_ENVIRONMENT_VARIABLE: self.scratch_dir}
+
+        with patch.dict(environ, environment):
+            with self.assertRaises(ValueError):
+                with Workspace(self.logger) as workspace:
+                    intermediate_directory = workspace.get_intermediate_directory(
+                        self.input_file
+                    )
+                    self.assertTrue(isdir(workspace.directory))
+                    self.assertTrue(isdir(intermediate_directory))
+                    raise ValueError('Processing failed')
+
+        self.assertFalse(isdir(workspace.directory))
+        self.assertFalse(isdir(intermediate_directory))
+        self.assertListEqual(listdir(self.scratch_dir), [])
+
+    def test_get_intermediate_directory(self):
+        """Ensure intermediate files are only written to the scratch directory
+        if it is configured, available, and has space for the expected
+        intermediate files.
+
+        """
+        expected_size = 100 * INTERMEDIATE_SIZE_FACTOR
+
+        with self.subTest('No scratch directory configured'):
+            with patch.dict(environ, {}, clear=True):
+                with Workspace(self.logger) as workspace:
+                    self.assertEqual(
+                        workspace.get_intermediate_directory(self.input_file),
+                        workspace.directory,
+                    )
+
+        with patch.dict(
+            environ, {SCRATCH_DIRECTORY_ENVIRONMENT_VARIABLE: self.scratch_dir}
+        ):
+            with self.subTest('Intermediate files fit in scratch directory'):
+                with patch(
+                    'swath_projector.workspace.shutil.disk_usage',
+                    return_value=DiskUsage(1000, 0, expected_size),
+                ):
+                    with Workspace(self.logger) as workspace:
+                        intermediate_directory = workspace.get_intermediate_directory(
+                            self.input_file
+                        )
+                        self.assertListEqual(
+                            listdir(self.scratch_dir),
+                            [intermediate_directory.split('/')[-1]],
+                        )
+
+            with self.subTest('Intermediate files too large for scratch'):
+                with patch(
+                    'swath_projector.workspace.shutil.disk_usage',
+                    return_value=DiskUsage(1000, 0, expected_size - 1),
+                ):
+                    with Workspace(self.logger) as workspace:
+                        self.assertEqual(
+                            workspace.get_intermediate_directory(self.input_file),
+                            workspace.directory,
+                        )
+
+            with self.subTest('Scratch directory unavailable'):
+                with patch(
+                    'swath_projector.workspace.shutil.disk_usage',
+                    side_effect=FileNotFoundError(),
+                ):
+                    with Workspace(self.logger) as workspace:
+                        self.assertEqual(
+                            workspace.get_intermediate_directory(self.input_file),
+                            workspace.directory,
+                        )
+
+    def test_check_quota(self):
+        """Ensure an exception is raised if files in any directory owned by the
+        workspace exceed the quota, and that no quota is enforced by default.
+
+        """
+        environment = {SCRATCH_DIRECTORY_ENVIRONMENT_VARIABLE: self.scratch_dir}
+
+        with self.subTest('No quota'):
+            with patch.dict(environ, environment):
+                with Workspace(self.logger) as workspace:
+                    with open(join(workspace.directory, 'file'), 'wb') as handler:
+                        handler.write(b'0' * 1000)
+
+                    workspace.check_quota()
+
+        environment[QUOTA_ENVIRONMENT_VARIABLE] = '1500'
+
+        with self.subTest('Within quota'):
+            with patch.dict(environ, environment):
+                with Workspace(self.logger) as workspace:
+                    with open(join(workspace.directory, 'file'), 'wb') as handler:
+                        handler.write(b'0' * 1000)
+
+                    workspace.check_quota()
+                    self.assertEqual(workspace.get_size(), 1000)
+
+        with self.subTest('Quota exceeded across directories'):
+            with patch.dict(environ, environment):
+                with Workspace(self.logger) as workspace:
+                    scratch_directory = workspace.get_intermediate_directory(
+                        self.input_file
+                    )
+                    self.assertNotEqual(scratch_directory, workspace.directory)
+
+                    for directory in [workspace.directory, scratch_directory]:
+                        with open(join(directory, 'file'), 'wb') as handler:
+                            handler.write(b'0' * 1000)
+
+                    with self.assertRaises(WorkspaceQuotaExceededError):
+                        workspace.check_quota()
@@ -0,0 +1,158 @@
+from logging import getLogger
+from os.path import join
+from shutil import copy, rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+import numpy as np
+import zarr
+from harmony.message import Message
+from netCDF4 import Dataset
+
+from swath_projector.reproject import reproject
+from swath_projector.zarr_output import (
+    DIMENSIONS_ATTRIBUTE,
+    get_json_attributes,
+    get_zarr_blocks,
+    get_zarr_chunk_sizes,
+)
+
+
+class TestZarrOutput(TestCase):
+    """A test class for the functions that write reprojected variables to a
+    Zarr directory store.
+
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.logger = getLogger('test')
+        cls.science_variables = ['red_var', 'green_var', 'blue_var', 'alpha_var']
+
+    def setUp(self):
+        self.temp_dir = mkdtemp()
+        self.input_file = join(self.temp_dir, 'africa.nc')
+        copy('tests/data/africa.nc', self.input_file)
+
+    def tearDown(self):
+        rmtree(self.temp_dir)
+
+    def get_message(self, mime_type):
+        """Return a Harmony message requesting the specified output format."""
+        return Message(
+            {
+                'sources': [{'collection': 'C1234-EEDTEST'}],
+                'format': {
+                    'crs': 'EPSG:4326',
+                    'interpolation': 'near',
+                    'mime': mime_type,
+                },
+            }
+        )
+
+    def test_zarr_output_matches_netcdf4(self):
+        """Ensure a Zarr output store contains the same variables, values and
+        dimensions as the merged NetCDF-4 output of the same request, with
+        global attributes and consolidated metadata.
+
+        """
+        netcdf4_output = reproject(
+            self.get_message('application/x-netcdf4'),
+            'harmony_example_l2',
+            'https://example.com/africa.nc',
+            self.input_file,
+            mkdtemp(dir=self.temp_dir),
+            self.logger,
+        )
+        zarr_output = reproject(
+            self.get_message('application/x-zarr'),
+            'harmony_example_l2',
+            'https://example.com/africa.nc',
+            self.input_file,
+            mkdtemp(dir=self.temp_dir),
+            self.logger,
+        )
+
+        self.assertTrue(zarr_output.endswith('africa_repr.zarr'))
+
+        store = zarr.open_consolidated(zarr_output, mode='r')
+
+        with Dataset(netcdf4_output) as netcdf4_dataset:
+            self.assertIn('history_json', store.attrs)
+            self.assertSetEqual(
+                set(store.array_keys()), set(netcdf4_dataset.variables.keys())
+            )
+
+            for variable_name in self.science_variables + ['lat', 'lon']:
+                with self.subTest(variable_name):
+                    netcdf4_variable = netcdf4_dataset[variable_name]
+                    netcdf4_variable.set_auto_maskandscale(False)
+
+                    np.testing.assert_array_equal(
+                        store[variable_name][:], netcdf4_variable[:]
+                    )
+                    self.assertListEqual(
+                        store[variable_name].attrs[DIMENSIONS_ATTRIBUTE],
+                        list(netcdf4_variable.dimensions),
+                    )
+
+            self.assertEqual(
+                store['red_var'].attrs['grid_mapping'],
+                netcdf4_dataset['red_var'].grid_mapping,
+            )
+
+    def test_get_zarr_chunk_sizes(self):
+        """Ensure only the last two dimensions have chunks longer than one,
+        limited to the maximum chunk size.
+
+        """
+        test_args = [
+            ['Scalar', (), ()],
+            ['One dimension', (5000,), (5000,)],
+            ['Small grid', (20, 30), (20, 30)],
+            ['Large grid', (2000, 3000), (1024, 1024)],
+            ['Time and grid', (1, 2000, 30), (1, 1024, 30)],
+        ]
+
+        for description, shape, expected_chunk_sizes in test_args:
+            with self.subTest(description):
+                self.assertTupleEqual(get_zarr_chunk_sizes(shape), expected_chunk_sizes)
+
+    def test_get_zarr_blocks(self):
+        """Ensure each block is a single row of chunks, and arrays with fewer
+        than two dimensions are a single block.
+
+        """
+        with self.subTest('Grid with leading dimension'):
+            self.assertListEqual(
+                get_zarr_blocks((2, 5, 4), (1, 3, 4)),
+                [
+                    (slice(0, 1), slice(0, 3), slice(None)),
+                    (slice(0, 1), slice(3, 6), slice(None)),
+                    (slice(1, 2), slice(0, 3), slice(None)),
+                    (slice(1, 2), slice(3, 6), slice(None)),
+                ],
+            )
+
+        with self.subTest('One dimension'):
+            self.assertListEqual(get_zarr_blocks((5,), (5,)), [(slice(None),)])
+
+        with self.subTest('Scalar'):
+            self.assertListEqual(get_zarr_blocks((), ()), [()])
+
+    def test_get_json_attributes(self):
+        """Ensure NetCDF-4 attribute values are converted to types that can be
+        serialised to JSON.
+
+        """
+        self.assertDictEqual(
+            get_json_attributes(
+                {
+                    'array': np.array([1, 2], dtype=np.int16),
+                    'scalar': np.float32(0.5),
+                    'bytes': b'units',
+                    'string': 'string',
+                }
+            ),
+            {'array': [1, 2], 'scalar': 0.5, 'bytes': 'units', 'string': 'string'},
+        )